@@ -1,5 +1,7 @@
 import os
 import logging
+import json
+from functools import partial
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -7,6 +9,8 @@ from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from k9.utils.db_routing import REPLICA_BIND, RoutingSession, replica_database_url
+from k9.utils.db_runtime import install_engine_events, pool_options
 
 # Configure logging based on environment
 flask_env = os.environ.get("FLASK_ENV", "development")
@@ -18,7 +22,8 @@ else:
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+# RoutingSession sends @read_replica SELECTs to the 'replica' bind when one is configured
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 csrf = CSRFProtect()
@@ -76,13 +81,26 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
     "connect_args": {
         "client_encoding": "utf8"
-    }
+    },
+    # JSON/JSONB parameters as UTF-8 text: Arabic values stay unescaped (half
+    # the size of \uXXXX escapes) and jsonb accepts them on any server encoding
+    "json_serializer": partial(json.dumps, ensure_ascii=False),
+    # Pool sized to this process's share of max_connections (k9/utils/db_runtime.py)
+    **pool_options(),
 }
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Optional read replica for report/dashboard reads (k9/utils/db_routing.py)
+replica_url = replica_database_url()
+if replica_url:
+    app.config["SQLALCHEMY_BINDS"] = {REPLICA_BIND: replica_url}
 app.config["UPLOAD_FOLDER"] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
+# Worker processes for batch PDF bundles (unset: min(4, CPU count))
+app.config["BATCH_PDF_WORKERS"] = int(os.environ["BATCH_PDF_WORKERS"]) if os.environ.get("BATCH_PDF_WORKERS") else None
+# Background-built bundles (unset: <instance>/batch_exports; share it between containers)
+app.config["BATCH_EXPORT_DIR"] = os.environ.get("BATCH_EXPORT_DIR")
 
 # Security settings for session cookies
 # Replit uses HTTPS and iframes, so we need SameSite=None for cookies to work
@@ -103,11 +121,19 @@ else:
     app.config["REMEMBER_COOKIE_HTTPONLY"] = True
     app.config["REMEMBER_COOKIE_SAMESITE"] = "Lax"
 
+# Server-side sessions: the cookie carries only a signed session ID
+app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "sqlalchemy")  # sqlalchemy | filesystem | cookie
+app.config["SESSION_FILE_DIR"] = os.environ.get("SESSION_FILE_DIR")
+
 # Ensure upload directory exists
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
 # initialize the app with the extension, flask-sqlalchemy >= 3.0.x
 db.init_app(app)
+# Route-class timeouts and slow statement telemetry on every bind
+with app.app_context():
+    for engine in db.engines.values():
+        install_engine_events(engine)
 login_manager.init_app(app)
 migrate.init_app(app, db)
 csrf.init_app(app)
@@ -153,6 +179,10 @@ with app.app_context():
     else:
         print("✓ Production mode: Using migrations for database schema (flask db upgrade)")
     
+    # Install the server-side session store (needs the ServerSession model imported above)
+    from k9.utils.server_session import init_server_session
+    init_server_session(app, db)
+    
     # Permissions are seeded via Alembic data migration (7e8f529ec334).
     # Run: flask db upgrade
 
@@ -458,46 +488,12 @@ with app.app_context():
     def get_filtered_navigation():
         """Get navigation items filtered by current user's effective permissions"""
         from flask_login import current_user
-        from k9.services.permission_service import PermissionService
-        from k9.services.ui_navigation import UINavigationRegistry, NavigationFilter
+        from k9.services.ui_navigation import NavigationCache
         
         if not current_user.is_authenticated:
-            return {
-                'main_nav': [],
-                'handler_nav': None,
-                'pm_nav': None,
-                'pm_quick_nav': [],
-                'admin_nav': None
-            }
-        
-        def check_permission(permission_key):
-            return PermissionService.has_permission(current_user.id, permission_key)
-        
-        def check_is_admin():
-            return PermissionService.is_admin(current_user.id)
-        
-        nav_filter = NavigationFilter(check_permission, check_is_admin)
+            return NavigationCache.empty_navigation()
         
-        main_nav = nav_filter.filter_navigation(UINavigationRegistry.get_main_navigation())
-        
-        handler_nav_item = UINavigationRegistry.get_handler_navigation()
-        handler_nav = nav_filter.filter_nav_item(handler_nav_item)
-        
-        pm_nav_item = UINavigationRegistry.get_pm_navigation()
-        pm_nav = nav_filter.filter_nav_item(pm_nav_item)
-        
-        pm_quick_nav = nav_filter.filter_navigation(UINavigationRegistry.get_pm_quick_nav())
-        
-        admin_nav_item = UINavigationRegistry.get_admin_navigation()
-        admin_nav = nav_filter.filter_nav_item(admin_nav_item)
-        
-        return {
-            'main_nav': main_nav,
-            'handler_nav': handler_nav,
-            'pm_nav': pm_nav,
-            'pm_quick_nav': pm_quick_nav,
-            'admin_nav': admin_nav
-        }
+        return NavigationCache.get_navigation(current_user.id, current_user.permissions_version or 0)
     
     # V2 Permission helper wrappers for templates
     def has_any_permission_v2(*permission_keys):
@@ -1031,6 +1027,50 @@ with app.app_context():
                 )
                 print("✓ Notification cleanup job scheduled (weekly on Monday 2:00 AM)")
                 
+                # Keep monthly log partitions ahead of time and apply retention
+                from k9.utils.schedule_utils import maintain_log_partitions
+                backup_scheduler.add_job(
+                    maintain_log_partitions,
+                    trigger=CronTrigger(hour=1, minute=30),
+                    id='maintain_log_partitions',
+                    name='Maintain Log Table Partitions',
+                    replace_existing=True
+                )
+                print("✓ Log partition maintenance job scheduled (daily 1:30 AM)")
+                
+                # Restore date order of drifted tables so BRIN range scans stay selective
+                from k9.utils.schedule_utils import reorder_date_ordered_tables
+                backup_scheduler.add_job(
+                    reorder_date_ordered_tables,
+                    trigger=CronTrigger(day_of_week='sun', hour=3, minute=30),
+                    id='reorder_date_ordered_tables',
+                    name='Reorder Date-Ordered Tables',
+                    replace_existing=True
+                )
+                print("✓ Table reorder job scheduled (weekly on Sunday 3:30 AM)")
+                
+                # Move aged audit rows to the cold archive
+                from k9.utils.schedule_utils import archive_old_audit_logs
+                backup_scheduler.add_job(
+                    archive_old_audit_logs,
+                    trigger=CronTrigger(hour=2, minute=30),
+                    id='archive_audit_logs',
+                    name='Archive Old Audit Logs',
+                    replace_existing=True
+                )
+                print("✓ Audit archive job scheduled (daily 2:30 AM)")
+                
+                # Purge expired server-side sessions
+                from k9.utils.schedule_utils import cleanup_expired_sessions
+                backup_scheduler.add_job(
+                    cleanup_expired_sessions,
+                    trigger=CronTrigger(minute=15),
+                    id='cleanup_expired_sessions',
+                    name='Cleanup Expired Sessions',
+                    replace_existing=True
+                )
+                print("✓ Expired session cleanup job scheduled (hourly)")
+                
             except Exception as e:
                 print(f"⚠ Warning: Could not schedule auto-lock job: {e}")
             
@@ -1,6 +1,11 @@
 import os
+import json
+from functools import partial
 from datetime import timedelta
 
+from k9.utils.db_routing import REPLICA_BIND, replica_database_url
+from k9.utils.db_runtime import pool_options
+
 class Config:
     SECRET_KEY = os.environ.get('SESSION_SECRET')
 
@@ -21,8 +26,14 @@ class Config:
         "pool_pre_ping": True,
         "connect_args": {
             "client_encoding": "utf8"
-        }
+        },
+        "json_serializer": partial(json.dumps, ensure_ascii=False),
+        # Pool sized to this process's share of max_connections (k9/utils/db_runtime.py)
+        **pool_options(),
     }
+    # Optional read replica for report/dashboard reads (k9/utils/db_routing.py)
+    replica_url = replica_database_url()
+    SQLALCHEMY_BINDS = {REPLICA_BIND: replica_url} if replica_url else {}
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
@@ -51,6 +62,10 @@ class Config:
     # Notification Settings
     NOTIFICATION_POLL_INTERVAL = int(os.environ.get('NOTIFICATION_POLL_INTERVAL', 30))  # seconds
     
+    # Audit Archive Settings
+    AUDIT_ARCHIVE_DIR = os.environ.get('AUDIT_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archives', 'audit'))
+    AUDIT_ARCHIVE_AFTER_DAYS = int(os.environ.get('AUDIT_ARCHIVE_AFTER_DAYS', 180))  # move rows older than this to cold segments
+    
 class DevelopmentConfig(Config):
     DEBUG = True
 
@@ -2,6 +2,7 @@
 # Copy this file to /home/k9app/app/gunicorn.conf.py on your server
 
 import multiprocessing
+import os
 
 # Server socket
 bind = "127.0.0.1:8000"
@@ -12,7 +13,8 @@ backlog = 2048
 workers = multiprocessing.cpu_count() * 2 + 1
 worker_class = "sync"
 worker_connections = 1000
-timeout = 120
+# Export statement timeouts are derived from it (k9/utils/db_runtime.py)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
 keepalive = 5
 
 # Restart workers after this many requests (prevents memory leaks)
@@ -33,4 +35,7 @@ daemon = False
 # Environment variables
 raw_env = [
     "FLASK_ENV=production",
+    # The app sizes its connection pools from the worker count (k9/utils/db_runtime.py)
+    f"GUNICORN_WORKERS={workers}",
+    f"GUNICORN_TIMEOUT={timeout}",
 ]
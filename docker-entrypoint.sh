@@ -18,6 +18,11 @@ flask db upgrade
 
 # Determine number of workers based on CPU cores
 WORKERS=${GUNICORN_WORKERS:-$((2 * $(nproc) + 1))}
+# The app sizes its connection pools from the worker count (k9/utils/db_runtime.py)
+export GUNICORN_WORKERS=$WORKERS
+# Export statement timeouts are derived from the worker timeout
+TIMEOUT=${GUNICORN_TIMEOUT:-120}
+export GUNICORN_TIMEOUT=$TIMEOUT
 echo "Starting Gunicorn with $WORKERS workers..."
 
 # Start Gunicorn
@@ -28,7 +33,7 @@ exec gunicorn app:app \
     --worker-connections 1000 \
     --max-requests 1000 \
     --max-requests-jitter 100 \
-    --timeout 30 \
+    --timeout $TIMEOUT \
     --keep-alive 2 \
     --access-logfile - \
     --error-logfile - \
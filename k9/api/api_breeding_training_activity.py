@@ -13,9 +13,22 @@ from k9.models.models import (
 )
 from k9.utils.permissions_new import require_permission
 from k9.utils.utils import get_user_assigned_projects
+from k9.utils.db_routing import read_replica
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
 
 bp = Blueprint('api_breeding_training_activity', __name__)
 
+TRAINING_ACTIVITY_KPIS = KPIDefinition('training_activity', BreedingTrainingActivity, [
+    KPIMetric.count('total_activities'),
+    KPIMetric.distinct('unique_dogs', 'dog_id'),
+    KPIMetric.distinct('unique_trainers', 'trainer_id'),
+    KPIMetric.sum('total_duration_minutes', 'duration'),
+    KPIMetric.avg('avg_success_rating', 'success_rating', precision=1),
+    KPIMetric.breakdown('category_breakdown', 'category', enum=TrainingCategory),
+    KPIMetric.breakdown('subtype_socialization_breakdown', 'subtype_socialization', enum=SocializationType),
+    KPIMetric.breakdown('subtype_ball_breakdown', 'subtype_ball', enum=BallWorkType),
+])
+
 @bp.route('/api/breeding/training-activity', methods=['POST'])
 @login_required
 @require_permission('training.create')
@@ -165,6 +178,7 @@ def create_training_activity():
 @bp.route('/api/breeding/training-activity/list')
 @login_required
 @require_permission('training.view')
+@read_replica
 def list_training_activities():
     """List training activities with filters and KPIs"""
     try:
@@ -284,64 +298,8 @@ def list_training_activities():
             }
             activities_data.append(activity_data)
         
-        # Calculate KPIs
-        # Total activities
-        total_activities = query.count()
-        
-        # Average success rating
-        avg_rating_result = query.with_entities(func.avg(BreedingTrainingActivity.success_rating)).scalar()
-        avg_rating = round(float(avg_rating_result), 1) if avg_rating_result else 0
-        
-        # Total duration
-        total_duration_result = query.with_entities(func.sum(BreedingTrainingActivity.duration)).scalar()
-        total_duration = int(total_duration_result) if total_duration_result else 0
-        
-        # Unique dogs trained
-        unique_dogs = query.with_entities(func.count(func.distinct(BreedingTrainingActivity.dog_id))).scalar() or 0
-        
-        # Unique trainers
-        unique_trainers = query.with_entities(func.count(func.distinct(BreedingTrainingActivity.trainer_id))).scalar() or 0
-        
-        # Category breakdown
-        category_breakdown = {}
-        category_results = db.session.query(
-            BreedingTrainingActivity.category,
-            func.count(BreedingTrainingActivity.id).label('count')
-        ).filter(
-            BreedingTrainingActivity.id.in_([activity.id for activity in activities])
-        ).group_by(BreedingTrainingActivity.category).all()
-        
-        for category_result in category_results:
-            category_breakdown[category_result.category.value] = category_result.count
-        
-        # Subtype breakdown
-        subtype_socialization_breakdown = {}
-        socialization_results = db.session.query(
-            BreedingTrainingActivity.subtype_socialization,
-            func.count(BreedingTrainingActivity.id).label('count')
-        ).filter(
-            and_(
-                BreedingTrainingActivity.id.in_([activity.id for activity in activities]),
-                BreedingTrainingActivity.subtype_socialization.is_not(None)
-            )
-        ).group_by(BreedingTrainingActivity.subtype_socialization).all()
-        
-        for subtype_result in socialization_results:
-            subtype_socialization_breakdown[subtype_result.subtype_socialization.value] = subtype_result.count
-        
-        subtype_ball_breakdown = {}
-        ball_results = db.session.query(
-            BreedingTrainingActivity.subtype_ball,
-            func.count(BreedingTrainingActivity.id).label('count')
-        ).filter(
-            and_(
-                BreedingTrainingActivity.id.in_([activity.id for activity in activities]),
-                BreedingTrainingActivity.subtype_ball.is_not(None)
-            )
-        ).group_by(BreedingTrainingActivity.subtype_ball).all()
-        
-        for subtype_result in ball_results:
-            subtype_ball_breakdown[subtype_result.subtype_ball.value] = subtype_result.count
+        # KPIs (and breakdowns) over the whole filtered range, not only the current page
+        kpis = KPIEngine.evaluate(TRAINING_ACTIVITY_KPIS, query)
         
         return jsonify({
             'items': activities_data,
@@ -353,16 +311,7 @@ def list_training_activities():
                 'has_next': paginated_result.has_next,
                 'has_prev': paginated_result.has_prev
             },
-            'kpis': {
-                'total_activities': total_activities,
-                'unique_dogs': unique_dogs,
-                'unique_trainers': unique_trainers,
-                'total_duration_minutes': total_duration,
-                'avg_success_rating': avg_rating,
-                'category_breakdown': category_breakdown,
-                'subtype_socialization_breakdown': subtype_socialization_breakdown,
-                'subtype_ball_breakdown': subtype_ball_breakdown
-            }
+            'kpis': kpis
         })
         
     except Exception as e:
@@ -375,6 +324,7 @@ def list_training_activities():
 @bp.route('/api/breeding/training-activity/<activity_id>')
 @login_required
 @require_permission('training.view')
+@read_replica
 def get_training_activity(activity_id):
     """Get single training activity by ID"""
     try:
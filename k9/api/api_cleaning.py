@@ -10,8 +10,10 @@ from app import db
 from k9.models.models import (CleaningLog, Project, Dog, Employee, User, UserRole, ProjectStatus)
 from k9.utils.utils import get_user_assigned_projects, get_user_accessible_dogs, log_audit, validate_required_project_id, get_project_id_for_user
 from datetime import datetime, date, time, timedelta
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select
 from k9.utils.permissions_new import require_permission
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
+from k9.utils.jsonb_filters import uses_material
 import json
 import re
 
@@ -56,6 +58,7 @@ def list_cleaning_logs():
         dog_id = request.args.get('dog_id')
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
+        material = (request.args.get('material') or '').strip()
         
         # Base query with joins (LEFT JOIN for project to handle NULL project_id)
         query = CleaningLog.query.outerjoin(Project).join(Dog, CleaningLog.dog_id == Dog.id)
@@ -90,6 +93,9 @@ def list_cleaning_logs():
         if dog_id:
             query = query.filter(CleaningLog.dog_id == dog_id)
         
+        if material:
+            query = query.filter(uses_material(material))
+        
         if date_from:
             try:
                 date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
@@ -369,97 +375,69 @@ def delete_cleaning_log(log_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+CLEANING_YES = 'نعم'
+
+CLEANING_KPIS = KPIDefinition('cleaning', CleaningLog, [
+    KPIMetric.count('total'),
+    KPIMetric.count('cleaned_yes', where=lambda m: m.cleaned_house == CLEANING_YES),
+    KPIMetric.count('washed_yes', where=lambda m: m.washed_house == CLEANING_YES),
+    KPIMetric.count('disinfected_yes', where=lambda m: m.disinfected_house == CLEANING_YES),
+    KPIMetric.count('group_disinfections', where=lambda m: m.group_disinfection == CLEANING_YES),
+])
+
+# Days after the last wash / disinfection from which a dog is due (overdue after that)
+WASH_CADENCE_DAYS = 3
+DISINFECT_CADENCE_DAYS = 7
+
+
+def calculate_cleaning_cadence(query, reference_date):
+    """
+    Due/overdue wash and disinfection counts for the dogs in the query's scope,
+    from each dog's last wash and disinfection across its whole history
+    (one grouped query instead of two lookups per dog)
+    """
+    dog_ids = query.order_by(None).with_entities(CleaningLog.dog_id).distinct().subquery()
+    rows = db.session.query(
+        CleaningLog.dog_id,
+        func.max(CleaningLog.date).filter(CleaningLog.washed_house == CLEANING_YES),
+        func.max(CleaningLog.date).filter(CleaningLog.disinfected_house == CLEANING_YES),
+    ).filter(CleaningLog.dog_id.in_(select(dog_ids.c.dog_id))).group_by(CleaningLog.dog_id).all()
+
+    cadence = {'due_wash_count': 0, 'overdue_wash_count': 0, 'due_disinfect_count': 0, 'overdue_disinfect_count': 0}
+    for _, last_wash, last_disinfect in rows:
+        for kind, last, days in (('wash', last_wash, WASH_CADENCE_DAYS),
+                                 ('disinfect', last_disinfect, DISINFECT_CADENCE_DAYS)):
+            if last is None:
+                # Never washed / disinfected - count as overdue
+                cadence[f'overdue_{kind}_count'] += 1
+                continue
+            days_since = (reference_date - last).days
+            if days_since >= days:
+                cadence[f'due_{kind}_count'] += 1
+            if days_since > days:
+                cadence[f'overdue_{kind}_count'] += 1
+    return cadence
+
+
 def calculate_cleaning_kpis(query, date_to_str=None):
     """Calculate KPIs for cleaning logs"""
     try:
-        # Basic counts
-        total = query.count()
-        
-        # Use Unicode strings explicitly for Arabic text
-        yes_value = 'نعم'
-        
-        cleaned_yes = query.filter(CleaningLog.cleaned_house == yes_value).count()
-        washed_yes = query.filter(CleaningLog.washed_house == yes_value).count()
-        disinfected_yes = query.filter(CleaningLog.disinfected_house == yes_value).count()
-        group_disinfections = query.filter(CleaningLog.group_disinfection == yes_value).count()
-        
-        # Cadence calculations
         reference_date = date.today()
         if date_to_str:
             try:
                 reference_date = datetime.strptime(date_to_str, '%Y-%m-%d').date()
-            except:
+            except ValueError:
                 pass
-        
-        # Get unique dogs from the query scope
-        dog_ids = [row[0] for row in query.with_entities(CleaningLog.dog_id).distinct().all()]
-        
-        due_wash_count = 0
-        overdue_wash_count = 0
-        due_disinfect_count = 0
-        overdue_disinfect_count = 0
-        
-        for dog_id in dog_ids:
-            # Find last wash for this dog
-            last_wash = CleaningLog.query.filter(
-                and_(
-                    CleaningLog.dog_id == dog_id,
-                    CleaningLog.washed_house == yes_value
-                )
-            ).order_by(CleaningLog.date.desc(), CleaningLog.time.desc()).first()
-            
-            if last_wash:
-                days_since_wash = (reference_date - last_wash.date).days
-                if days_since_wash >= 3:
-                    due_wash_count += 1
-                if days_since_wash > 3:
-                    overdue_wash_count += 1
-            else:
-                # Never washed - count as overdue
-                overdue_wash_count += 1
-            
-            # Find last disinfection for this dog
-            last_disinfect = CleaningLog.query.filter(
-                and_(
-                    CleaningLog.dog_id == dog_id,
-                    CleaningLog.disinfected_house == yes_value
-                )
-            ).order_by(CleaningLog.date.desc(), CleaningLog.time.desc()).first()
-            
-            if last_disinfect:
-                days_since_disinfect = (reference_date - last_disinfect.date).days
-                if days_since_disinfect >= 7:
-                    due_disinfect_count += 1
-                if days_since_disinfect > 7:
-                    overdue_disinfect_count += 1
-            else:
-                # Never disinfected - count as overdue
-                overdue_disinfect_count += 1
-        
-        return {
-            'total': total,
-            'cleaned_yes': cleaned_yes,
-            'washed_yes': washed_yes,
-            'disinfected_yes': disinfected_yes,
-            'group_disinfections': group_disinfections,
-            'due_wash_count': due_wash_count,
-            'overdue_wash_count': overdue_wash_count,
-            'due_disinfect_count': due_disinfect_count,
-            'overdue_disinfect_count': overdue_disinfect_count
-        }
-        
+
+        kpis = KPIEngine.evaluate(CLEANING_KPIS, query)
+        kpis.update(calculate_cleaning_cadence(query, reference_date))
+        return kpis
+
     except Exception as e:
         import traceback
         current_app.logger.error(f"Error calculating KPIs: {str(e)}")
         current_app.logger.error(f"Traceback: {traceback.format_exc()}")
-        return {
-            'total': 0,
-            'cleaned_yes': 0,
-            'washed_yes': 0,
-            'disinfected_yes': 0,
-            'group_disinfections': 0,
-            'due_wash_count': 0,
-            'overdue_wash_count': 0,
-            'due_disinfect_count': 0,
-            'overdue_disinfect_count': 0
-        }
\ No newline at end of file
+        kpis = CLEANING_KPIS.empty()
+        kpis.update({'due_wash_count': 0, 'overdue_wash_count': 0, 'due_disinfect_count': 0,
+                     'overdue_disinfect_count': 0})
+        return kpis
\ No newline at end of file
@@ -9,9 +9,17 @@ from datetime import datetime
 from k9.models.models import db, DewormingLog, Project, Dog, Employee, UserRole
 from k9.utils.permissions_new import require_permission
 from k9.utils.utils import get_user_assigned_projects
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
 
 bp = Blueprint('api_deworming', __name__)
 
+DEWORMING_KPIS = KPIDefinition('deworming', DewormingLog, [
+    KPIMetric.count('total'),
+    KPIMetric.avg('avg_mg_per_kg', 'standard_dose_mg_per_kg', precision=2),
+    KPIMetric.count('with_next_due', where=lambda m: m.next_due_date.isnot(None)),
+    KPIMetric.breakdown('by_route', 'administration_route'),
+])
+
 @bp.route('/api/breeding/deworming', methods=['POST'])
 @login_required
 @require_permission('breeding.deworming')
@@ -223,8 +231,6 @@ def delete_deworming_log(log_id):
 def api_deworming_list():
     """Get paginated list of deworming logs with KPIs"""
     try:
-        from sqlalchemy import func
-        
         # Query parameters
         project_id = request.args.get('project_id')
         date_from = request.args.get('date_from')
@@ -308,47 +314,8 @@ def api_deworming_list():
             }
             items_data.append(item_data)
         
-        # Calculate KPIs
-        total_query = DewormingLog.query
-        if current_user.role == UserRole.PROJECT_MANAGER:
-            assigned_projects = get_user_assigned_projects(current_user)
-            assigned_project_ids = [p.id for p in assigned_projects]
-            # Include both assigned projects AND records without project assignment
-            from sqlalchemy import or_
-            total_query = total_query.filter(or_(
-                DewormingLog.project_id.in_(assigned_project_ids),
-                DewormingLog.project_id.is_(None)
-            ))
-        
-        # Apply same filters to KPI calculations
-        if project_id:
-            total_query = total_query.filter(DewormingLog.project_id == project_id)
-        if date_from:
-            total_query = total_query.filter(DewormingLog.date >= datetime.strptime(date_from, '%Y-%m-%d').date())
-        if date_to:
-            total_query = total_query.filter(DewormingLog.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
-        if dog_id:
-            total_query = total_query.filter(DewormingLog.dog_id == dog_id)
-        
-        total_count = total_query.count()
-        avg_mg_per_kg = total_query.filter(DewormingLog.standard_dose_mg_per_kg.isnot(None)).with_entities(func.avg(DewormingLog.standard_dose_mg_per_kg)).scalar()
-        with_next_due = total_query.filter(DewormingLog.next_due_date.isnot(None)).count()
-        
-        # Route distribution
-        route_distribution = {}
-        route_counts = total_query.filter(DewormingLog.administration_route.isnot(None)).with_entities(
-            DewormingLog.administration_route, func.count(DewormingLog.administration_route)
-        ).group_by(DewormingLog.administration_route).all()
-        
-        for route, count in route_counts:
-            route_distribution[route] = count
-        
-        kpis = {
-            'total': total_count,
-            'avg_mg_per_kg': round(float(avg_mg_per_kg), 2) if avg_mg_per_kg else 0,
-            'with_next_due': with_next_due,
-            'by_route': route_distribution
-        }
+        # KPIs over the whole filtered range (not only the current page)
+        kpis = KPIEngine.evaluate(DEWORMING_KPIS, query)
         
         return jsonify({
             'items': items_data,
@@ -8,6 +8,7 @@ from sqlalchemy import and_, or_
 from datetime import datetime, date
 from k9.models.models import db, ExcretionLog, Project, Dog, Employee, UserRole
 from k9.utils.permissions_new import require_permission
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
 from k9.utils.utils import get_user_assigned_projects, validate_required_project_id, get_project_id_for_user
 
 bp = Blueprint('api_excretion', __name__)
@@ -337,72 +338,27 @@ def delete_excretion_log(log_id):
         return jsonify({'error': str(e)}), 500
 
 
+EXCRETION_KPIS = KPIDefinition('excretion', ExcretionLog, [
+    KPIMetric.count('total'),
+    KPIMetric.count('stool.constipation', where=lambda m: m.constipation == True),
+    KPIMetric.count('stool.abnormal_consistency', where=lambda m: and_(
+        m.stool_consistency.isnot(None),
+        or_(m.stool_consistency.like('%سائل%'), m.stool_consistency.like('%صلب%'), m.stool_consistency.like('%دموي%'))
+    )),
+    KPIMetric.count('urine.abnormal_color', where=lambda m: and_(
+        m.urine_color.isnot(None),
+        or_(m.urine_color.like('%بني%'), m.urine_color.like('%دموي%'), m.urine_color.like('%وردي%'))
+    )),
+    KPIMetric.count('vomit.total_events', where=lambda m: or_(
+        m.vomit_color.isnot(None), m.vomit_count > 0, m.vomit_notes.isnot(None)
+    )),
+])
+
+
 def calculate_excretion_kpis(query):
     """Calculate KPIs for excretion logs"""
     try:
-        # Basic counts
-        total = query.count()
-        
-        # Stool KPIs
-        constipation_count = query.filter(ExcretionLog.constipation == True).count()
-        abnormal_consistency_count = query.filter(
-            and_(
-                ExcretionLog.stool_consistency.isnot(None),
-                or_(
-                    ExcretionLog.stool_consistency.like('%سائل%'),
-                    ExcretionLog.stool_consistency.like('%صلب%'),
-                    ExcretionLog.stool_consistency.like('%دموي%')
-                )
-            )
-        ).count()
-        
-        # Urine KPIs
-        abnormal_urine_count = query.filter(
-            and_(
-                ExcretionLog.urine_color.isnot(None),
-                or_(
-                    ExcretionLog.urine_color.like('%بني%'),
-                    ExcretionLog.urine_color.like('%دموي%'),
-                    ExcretionLog.urine_color.like('%وردي%')
-                )
-            )
-        ).count()
-        
-        # Vomit KPIs
-        vomit_events = query.filter(
-            or_(
-                ExcretionLog.vomit_color.isnot(None),
-                ExcretionLog.vomit_count > 0,
-                ExcretionLog.vomit_notes.isnot(None)
-            )
-        ).count()
-        
-        return {
-            'total': total,
-            'stool': {
-                'constipation': constipation_count,
-                'abnormal_consistency': abnormal_consistency_count
-            },
-            'urine': {
-                'abnormal_color': abnormal_urine_count
-            },
-            'vomit': {
-                'total_events': vomit_events
-            }
-        }
-        
+        return KPIEngine.evaluate(EXCRETION_KPIS, query)
     except Exception as e:
         current_app.logger.error(f"Error calculating KPIs: {e}")
-        return {
-            'total': 0,
-            'stool': {
-                'constipation': 0,
-                'abnormal_consistency': 0
-            },
-            'urine': {
-                'abnormal_color': 0
-            },
-            'vomit': {
-                'total_events': 0
-            }
-        }
\ No newline at end of file
+        return EXCRETION_KPIS.empty()
\ No newline at end of file
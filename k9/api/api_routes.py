@@ -4,22 +4,44 @@ from datetime import datetime, date
 from sqlalchemy import func
 from k9.models.models import (
     db, Project, Employee, Dog, UserRole,
-    FeedingLog, PrepMethod, BodyConditionScale, DailyCheckupLog, DogStatus,
+    FeedingLog, PrepMethod, BodyConditionScale, DailyCheckupLog, DogStatus, Severity,
     ExcretionLog, StoolColor, StoolConsistency, StoolContent, UrineColor, VomitColor, ExcretionPlace,
     GroomingLog, GroomingYesNo, GroomingCleanlinessScore
 )
 from k9.utils.utils import get_user_permissions, get_user_assigned_projects, get_user_accessible_dogs, get_user_accessible_employees
-from k9.utils.permissions_new import require_permission
+from k9.utils.permissions_new import require_permission, admin_required
+from k9.utils.db_runtime import pool_status
+from k9.utils.checkup_findings import CHECKUP_BODY_PARTS, BODY_PART_BITS
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
 import uuid
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+CHECKUP_LIST_KPIS = KPIDefinition('checkup_list', DailyCheckupLog, [
+    KPIMetric.count('total'),
+    *[
+        KPIMetric.count(f'flags.{part}', where=lambda m, bit=bit: m.abnormal_mask.op('&')(bit) != 0)
+        for part, bit in BODY_PART_BITS.items()
+    ],
+    KPIMetric.breakdown('severity', 'severity', enum=Severity, skip_zero=False),
+])
+
 # Health check endpoint
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint"""
     return jsonify({'status': 'ok', 'message': 'API is running'})
 
+
+@api_bp.route('/health/db', methods=['GET'])
+@login_required
+@admin_required
+def database_health():
+    """Connection pool occupancy, checkout waits and slow statements per bind"""
+    return jsonify({
+        bind or 'primary': pool_status(engine) for bind, engine in db.engines.items()
+    })
+
 # =============================================
 # BREEDING FEEDING LOG API ENDPOINTS
 # =============================================
@@ -27,7 +49,8 @@ def health_check():
 from k9.utils.permissions_new import has_permission
 from k9.utils.utils import get_user_assigned_projects, get_user_accessible_dogs, validate_required_project_id, get_project_id_for_user
 from sqlalchemy.orm import joinedload
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func
+from k9.utils.jsonb_filters import uses_supplement
 import json
 
 @api_bp.route('/breeding/feeding/log/list', methods=['GET'])
@@ -44,6 +67,7 @@ def feeding_log_list():
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
         dog_id = request.args.get('dog_id')
+        supplement = (request.args.get('supplement') or '').strip()
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 50)), 100)
         
@@ -81,6 +105,8 @@ def feeding_log_list():
             query = query.filter(FeedingLog.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
         if dog_id:
             query = query.filter(FeedingLog.dog_id == dog_id)
+        if supplement:
+            query = query.filter(uses_supplement(supplement))
         
         # Get total count for pagination
         total = query.count()
@@ -95,15 +121,13 @@ def feeding_log_list():
         kpi_query = query.with_entities(
             func.count(FeedingLog.id).label('total'),
             func.sum(FeedingLog.grams).label('grams_sum'),
-            func.sum(FeedingLog.water_ml).label('water_sum')
+            func.sum(FeedingLog.water_ml).label('water_sum'),
+            func.sum(case(
+                (func.jsonb_typeof(FeedingLog.supplements) == 'array', func.jsonb_array_length(FeedingLog.supplements)),
+                else_=0
+            )).label('supplements_count')
         ).first()
         
-        # Count supplements
-        supplements_count = 0
-        for item in query.all():
-            if item.supplements:
-                supplements_count += len(item.supplements)
-        
         # Serialize items
         items_data = []
         for item in items:
@@ -141,7 +165,7 @@ def feeding_log_list():
                 'total': kpi_query.total or 0,
                 'grams_sum': int(kpi_query.grams_sum or 0),
                 'water_sum': int(kpi_query.water_sum or 0),
-                'supplements_count': supplements_count
+                'supplements_count': int(kpi_query.supplements_count or 0)
             }
         })
         
@@ -406,21 +430,8 @@ def api_checkup_list():
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
         checkups = paginated.items
 
-        # Calculate KPIs
-        total_query = query
-        all_checkups = total_query.all()
-        
-        # Count body part flags (not 'سليم')
-        body_parts = ['eyes', 'ears', 'nose', 'front_legs', 'hind_legs', 'coat', 'tail']
-        flags = {}
-        for part in body_parts:
-            flags[part] = len([c for c in all_checkups if getattr(c, part) and getattr(c, part) != 'سليم'])
-        
-        # Count severity levels
-        severity_counts = {"خفيف": 0, "متوسط": 0, "شديد": 0}
-        for checkup in all_checkups:
-            if checkup.severity:
-                severity_counts[checkup.severity] = severity_counts.get(checkup.severity, 0) + 1
+        # Calculate KPIs (one aggregate query on the stored findings bitmask)
+        kpis = KPIEngine.evaluate(CHECKUP_LIST_KPIS, query)
 
         # Format response
         items = []
@@ -456,17 +467,9 @@ def api_checkup_list():
                 'has_next': paginated.has_next
             },
             'kpis': {
-                'total': len(all_checkups),
-                'flags': {
-                    'العين': flags['eyes'],
-                    'الأذن': flags['ears'],
-                    'الأنف': flags['nose'],
-                    'الأطراف_الأمامية': flags['front_legs'],
-                    'الأطراف_الخلفية': flags['hind_legs'],
-                    'الشعر': flags['coat'],
-                    'الذيل': flags['tail']
-                },
-                'severity': severity_counts
+                'total': kpis['total'],
+                'flags': {name.replace(' ', '_'): kpis['flags'][part] for part, name in CHECKUP_BODY_PARTS.items()},
+                'severity': kpis['severity']
             }
         })
 
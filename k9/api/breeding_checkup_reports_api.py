@@ -21,6 +21,7 @@ from k9.models.models import (
     DailyCheckupLog, Dog, Project, Employee
 )
 from k9.utils.utils import get_user_projects, check_project_access
+from k9.utils.db_routing import read_replica
 from k9.utils.utils_pdf_rtl import register_arabic_fonts, rtl, get_arabic_font_name
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -28,31 +29,41 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 from app import db
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
+from k9.utils.checkup_findings import (
+    CHECKUP_BODY_PARTS, BODY_PART_BITS, SEVERITY_LEVELS, mask_parts
+)
 
 # Create blueprint
 bp = Blueprint('breeding_checkup_reports_api', __name__)
 
 # Arabic body part names for display
-BODY_PARTS_AR = {
-    'eyes': 'العين',
-    'ears': 'الأذن', 
-    'nose': 'الأنف',
-    'front_legs': 'الأطراف الأمامية',
-    'hind_legs': 'الأطراف الخلفية',
-    'coat': 'الشعر',
-    'tail': 'الذيل'
-}
+BODY_PARTS_AR = CHECKUP_BODY_PARTS
+
+# Summary cards over a filtered checkup query; findings are counted on the stored bitmask
+CHECKUP_KPIS = KPIDefinition('checkup', DailyCheckupLog, [
+    KPIMetric.count('total_checks'),
+    KPIMetric.distinct('unique_dogs', 'dog_id'),
+    KPIMetric.breakdown('by_severity', 'severity', where=lambda m: m.severity != ''),
+    KPIMetric.count('abnormal_checks', where=lambda m: m.abnormal_mask != 0),
+    KPIMetric.distinct('flagged_dogs', 'dog_id', where=lambda m: m.abnormal_mask != 0),
+    *[
+        KPIMetric.count(f'flags.{part}', where=lambda m, bit=bit: m.abnormal_mask.op('&')(bit) != 0)
+        for part, bit in BODY_PART_BITS.items()
+    ],
+])
+
+
+def checkup_kpis(query):
+    """Checkup KPIs in one aggregate query; flags keyed by Arabic body part, parts without findings omitted"""
+    kpis = KPIEngine.evaluate(CHECKUP_KPIS, query)
+    kpis['flags'] = {BODY_PARTS_AR[part]: count for part, count in kpis['flags'].items() if count}
+    return kpis
 
-# Severity levels in order (for max severity calculation)
-SEVERITY_LEVELS = ['خفيف', 'متوسط', 'شديد']
 
-def is_abnormal_finding(value):
-    """Check if a body part finding is abnormal (not normal)"""
-    if not value:
-        return False
-    # Consider anything that's not "طبيعي" or "سليم" as abnormal
-    normal_values = ['طبيعي', 'سليم', 'Normal', 'normal']
-    return value.strip() not in normal_values
+def abnormal_part_names(log):
+    """Arabic names of the body parts flagged on a checkup"""
+    return [BODY_PARTS_AR[part] for part in mask_parts(log.abnormal_mask)]
 
 def get_max_severity(severities):
     """Get the maximum severity from a list of severity values"""
@@ -83,6 +94,7 @@ def get_max_severity(severities):
 @bp.route('/daily')
 @login_required
 @require_permission("reports.breeding.checkup.view")
+@read_replica
 def checkup_daily_data():
     """Get daily checkup report data with KPIs and rows"""
     project_id = request.args.get('project_id')
@@ -146,37 +158,8 @@ def checkup_daily_data():
         (page - 1) * per_page
     ).limit(per_page).all()
     
-    # Fix: Calculate KPIs from full dataset using DB queries (not just paginated results)
-    kpi_query = db.session.query(
-        func.count(DailyCheckupLog.id).label('total_checks'),
-        func.count(func.distinct(DailyCheckupLog.dog_id)).label('unique_dogs')
-    ).filter(
-        DailyCheckupLog.date == target_date,
-        DailyCheckupLog.project_id.in_(authorized_project_ids)
-    )
-    
-    if dog_id:
-        kpi_query = kpi_query.filter(DailyCheckupLog.dog_id == dog_id)
-    
-    kpi_result = kpi_query.first()
-    
-    # Fix: Calculate severity and flag distributions from full dataset using DB queries
-    severity_counts = defaultdict(int)
-    flag_counts = defaultdict(int)
-    
-    # Get all logs for accurate KPI calculation (not just paginated results)
-    all_logs_for_kpis = base_query.all()
-    
-    for log in all_logs_for_kpis:
-        # Count severity levels from full dataset
-        if log.severity:
-            severity_counts[log.severity] += 1
-        
-        # Count abnormal findings by body part from full dataset
-        for field, ar_name in BODY_PARTS_AR.items():
-            value = getattr(log, field)
-            if is_abnormal_finding(value):
-                flag_counts[ar_name] += 1
+    # KPIs over the full day (not just the current page) in one aggregate query
+    kpis = checkup_kpis(base_query)
     
     # Prepare data for frontend
     rows = []
@@ -221,10 +204,10 @@ def checkup_daily_data():
             "dog_id": dog_id
         },
         "kpis": {
-            "total_checks": kpi_result.total_checks if kpi_result else 0,
-            "unique_dogs": kpi_result.unique_dogs if kpi_result else 0,
-            "by_severity": dict(severity_counts),
-            "flags": dict(flag_counts)
+            "total_checks": kpis['total_checks'],
+            "unique_dogs": kpis['unique_dogs'],
+            "by_severity": kpis['by_severity'],
+            "flags": kpis['flags']
         },
         "rows": rows,
         "date": date_str,
@@ -237,6 +220,7 @@ def checkup_daily_data():
 @bp.route('/weekly')
 @login_required
 @require_permission("reports.breeding.checkup.view")
+@read_replica
 def checkup_weekly_data():
     """Get weekly checkup report data aggregated by dog"""
     project_id = request.args.get('project_id')
@@ -331,13 +315,11 @@ def checkup_weekly_data():
         
         # Count flags for this dog
         day_flags = 0
-        for field, ar_name in BODY_PARTS_AR.items():
-            value = getattr(log, field)
-            if is_abnormal_finding(value):
-                dog_data['flags_by_part'][ar_name] += 1
-                dog_data['flags_total'] += 1
-                day_flags += 1
-                flagged_dogs.add(dog_key)
+        for ar_name in abnormal_part_names(log):
+            dog_data['flags_by_part'][ar_name] += 1
+            dog_data['flags_total'] += 1
+            day_flags += 1
+            flagged_dogs.add(dog_key)
         
         # Store daily data
         day_key = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'][log.date.weekday()]
@@ -417,6 +399,7 @@ def checkup_weekly_data():
 @bp.route('/daily/export.pdf')
 @login_required
 @require_permission("reports.breeding.checkup.export")
+@read_replica
 def export_checkup_daily_pdf():
     """Export daily checkup report as PDF"""
     project_id = request.args.get('project_id')
@@ -660,6 +643,7 @@ def export_checkup_daily_pdf():
 @bp.route('/weekly/export.pdf')
 @login_required
 @require_permission("reports.breeding.checkup.export")
+@read_replica
 def export_checkup_weekly_pdf():
     """Export weekly checkup report as PDF"""
     project_id = request.args.get('project_id')
@@ -776,6 +760,7 @@ def export_checkup_weekly_pdf():
 @bp.route('/unified')
 @login_required
 @require_permission("reports.breeding.checkup.view")
+@read_replica
 def checkup_unified_data():
     """Unified checkup report data with range selector and smart aggregation"""
     
@@ -870,14 +855,7 @@ def checkup_unified_data():
                 'examiner': log.examiner_employee.name if log.examiner_employee else 'غير محدد',
                 'project': log.project.name if log.project else 'غير محدد',
                 'severity': severity,
-                'abnormal_findings': [
-                    BODY_PARTS_AR[part] for part, finding in [
-                        ('eyes', log.eyes), ('ears', log.ears),
-                        ('nose', log.nose), ('front_legs', log.front_legs),
-                        ('hind_legs', log.hind_legs), ('coat', log.coat),
-                        ('tail', log.tail)
-                    ] if is_abnormal_finding(finding)
-                ],
+                'abnormal_findings': abnormal_part_names(log),
                 'symptoms': log.symptoms or '',
                 'initial_diagnosis': log.initial_diagnosis or '',
                 'suggested_treatment': log.suggested_treatment or '',
@@ -917,14 +895,7 @@ def checkup_unified_data():
             # Add this check to the week
             severity = log.severity or 'غير محدد'
             
-            abnormal_findings = [
-                part for part, finding in [
-                    ('eyes', log.eyes), ('ears', log.ears),
-                    ('nose', log.nose), ('front_legs', log.front_legs),
-                    ('hind_legs', log.hind_legs), ('coat', log.coat),
-                    ('tail', log.tail)
-                ] if is_abnormal_finding(finding)
-            ]
+            abnormal_findings = mask_parts(log.abnormal_mask)
             
             dogs_data[dog_key]['weeks'][week_key]['checks'].append({
                 'date': log.date.strftime('%Y-%m-%d'),
@@ -984,14 +955,7 @@ def checkup_unified_data():
             # Add this check to the month
             severity = log.severity or 'غير محدد'
             
-            abnormal_findings = [
-                part for part, finding in [
-                    ('eyes', log.eyes), ('ears', log.ears),
-                    ('nose', log.nose), ('front_legs', log.front_legs),
-                    ('hind_legs', log.hind_legs), ('coat', log.coat),
-                    ('tail', log.tail)
-                ] if is_abnormal_finding(finding)
-            ]
+            abnormal_findings = mask_parts(log.abnormal_mask)
             
             dogs_data[dog_key]['months'][month_key]['checks'].append({
                 'date': log.date.strftime('%Y-%m-%d'),
@@ -1022,19 +986,7 @@ def checkup_unified_data():
         return jsonify({'error': 'إستراتيجية التجميع غير مدعومة'}), 400
     
     # Calculate KPIs from full dataset
-    kpi_query = db.session.query(
-        func.count(DailyCheckupLog.id).label('total_checks'),
-        func.count(func.distinct(DailyCheckupLog.dog_id)).label('unique_dogs')
-    ).filter(
-        DailyCheckupLog.date >= date_from,
-        DailyCheckupLog.date <= date_to,
-        DailyCheckupLog.project_id.in_(authorized_project_ids)
-    )
-    
-    if dog_id:
-        kpi_query = kpi_query.filter(DailyCheckupLog.dog_id == dog_id)
-    
-    kpi_result = kpi_query.first()
+    kpis = checkup_kpis(base_query)
     
     # Get project name for display
     project_name = "جميع المشاريع"
@@ -1062,8 +1014,11 @@ def checkup_unified_data():
             'dog_id': dog_id
         },
         'kpis': {
-            'total_checks': kpi_result.total_checks if kpi_result else 0,
-            'unique_dogs': kpi_result.unique_dogs if kpi_result else 0,
+            'total_checks': kpis['total_checks'],
+            'unique_dogs': kpis['unique_dogs'],
+            'abnormal_checks': kpis['abnormal_checks'],
+            'flagged_dogs': kpis['flagged_dogs'],
+            'flags': kpis['flags'],
             'date_range_display': format_date_range_for_display(date_from, date_to, range_type, "ar")
         },
         'rows': rows,
@@ -1080,6 +1035,7 @@ def checkup_unified_data():
 @bp.route('/unified/export.pdf')
 @login_required
 @require_permission("reports.breeding.checkup.export")
+@read_replica
 def checkup_unified_export_pdf():
     """Export unified checkup report as PDF with proper naming"""
     
@@ -1174,10 +1130,8 @@ def checkup_unified_export_pdf():
                 severity_counts[log.severity] += 1
             
             # Count abnormal findings
-            for field, ar_name in BODY_PARTS_AR.items():
-                value = getattr(log, field)
-                if is_abnormal_finding(value):
-                    flag_counts[ar_name] += 1
+            for ar_name in abnormal_part_names(log):
+                flag_counts[ar_name] += 1
         
         # Generate PDF using existing logic
         register_arabic_fonts()
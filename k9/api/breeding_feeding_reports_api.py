@@ -21,6 +21,8 @@ from k9.models.models import (
     FeedingLog, Dog, Project, BodyConditionScale, PrepMethod
 )
 from k9.utils.utils import get_user_projects, check_project_access
+from k9.utils.db_routing import read_replica
+from k9.utils.jsonb_filters import uses_supplement
 from k9.utils.utils_pdf_rtl import register_arabic_fonts, rtl, get_arabic_font_name
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -68,6 +70,7 @@ def get_bcs_numeric(bcs_enum):
 @bp.route('/daily')
 @login_required
 @require_permission("reports.breeding.feeding.view")
+@read_replica
 def feeding_daily_data():
     """Get daily feeding report data with KPIs and rows"""
     project_id = request.args.get('project_id')
@@ -265,6 +268,7 @@ def feeding_daily_data():
 @bp.route('/weekly')
 @login_required
 @require_permission("reports.breeding.feeding.view")
+@read_replica
 def feeding_weekly_data():
     """Get weekly feeding report data aggregated by dog"""
     project_id = request.args.get('project_id')
@@ -437,6 +441,7 @@ def feeding_weekly_data():
 @bp.route('/daily/export.pdf')
 @login_required
 @require_permission("reports.breeding.feeding.export")
+@read_replica
 def export_daily_pdf():
     """Export daily feeding report as PDF"""
     # Get the same data as daily endpoint
@@ -548,6 +553,7 @@ def export_daily_pdf():
 @bp.route('/weekly/export.pdf')
 @login_required
 @require_permission("reports.breeding.feeding.export")
+@read_replica
 def export_weekly_pdf():
     """Export weekly feeding report as PDF"""
     # Get the same data as weekly endpoint
@@ -791,6 +797,7 @@ def _generate_feeding_pdf(title: str, data: dict, output_path: str):
 @bp.route('/unified')
 @login_required
 @require_permission("reports.breeding.feeding.view")
+@read_replica
 def feeding_unified_data():
     """Unified feeding report data with range selector and smart aggregation"""
     
@@ -798,6 +805,7 @@ def feeding_unified_data():
     range_type = request.args.get('range_type', 'daily')
     project_id = request.args.get('project_id', '').strip() or None
     dog_id = request.args.get('dog_id', '').strip() or None
+    supplement = request.args.get('supplement', '').strip() or None
     
     # Handle "no_project" special case
     no_project_filter = False
@@ -889,6 +897,9 @@ def feeding_unified_data():
     if dog_id:
         base_query = base_query.filter(FeedingLog.dog_id == dog_id)
     
+    if supplement:
+        base_query = base_query.filter(uses_supplement(supplement))
+    
     # Apply aggregation strategy
     if aggregation == "daily":
         # Daily: Show individual feeding records with pagination
@@ -1076,6 +1087,9 @@ def feeding_unified_data():
     if dog_id:
         kpi_query = kpi_query.filter(FeedingLog.dog_id == dog_id)
     
+    if supplement:
+        kpi_query = kpi_query.filter(uses_supplement(supplement))
+    
     kpi_result = kpi_query.first()
     
     # Get project name for display
@@ -1101,7 +1115,8 @@ def feeding_unified_data():
             'date_from': date_from.strftime('%Y-%m-%d'),
             'date_to': date_to.strftime('%Y-%m-%d'),
             'aggregation': aggregation,
-            'dog_id': dog_id
+            'dog_id': dog_id,
+            'supplement': supplement
         },
         'kpis': {
             'total_feedings': kpi_result.total_feedings if kpi_result else 0,
@@ -1124,6 +1139,7 @@ def feeding_unified_data():
 @bp.route('/unified/export.pdf')
 @login_required
 @require_permission("reports.breeding.feeding.export")
+@read_replica
 def feeding_unified_export_pdf():
     """Export unified feeding report as PDF with proper naming"""
     
@@ -1131,6 +1147,7 @@ def feeding_unified_export_pdf():
     range_type = request.args.get('range_type', 'daily')
     project_id = request.args.get('project_id', '').strip() or None
     dog_id = request.args.get('dog_id', '').strip() or None
+    supplement = request.args.get('supplement', '').strip() or None
     
     range_params = {
         'date': request.args.get('date'),
@@ -1205,6 +1222,9 @@ def feeding_unified_export_pdf():
         if dog_id:
             base_query = base_query.filter(FeedingLog.dog_id == dog_id)
         
+        if supplement:
+            base_query = base_query.filter(uses_supplement(supplement))
+        
         feeding_logs = base_query.order_by(FeedingLog.date.desc(), FeedingLog.time.desc()).all()
         
         # Calculate KPIs
@@ -21,6 +21,7 @@ from k9.models.models import (
     CaretakerDailyLog, Dog, Project, Employee
 )
 from k9.utils.utils import get_user_projects, check_project_access
+from k9.utils.db_routing import read_replica
 from k9.utils.utils_pdf_rtl import register_arabic_fonts, rtl, get_arabic_font_name
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -28,6 +29,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 from app import db
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
 
 # Create blueprint
 bp = Blueprint('caretaker_daily_reports_api', __name__)
@@ -38,6 +40,33 @@ def get_cleaning_status_display(status):
     return "نعم" if status else "لا"
 
 
+HOUSE_TASKS = ('house_clean', 'house_vacuum', 'house_tap_clean', 'house_drain_clean')
+DOG_TASKS = ('dog_clean', 'dog_washed', 'dog_brushed', 'bowls_bucket_clean')
+# Tasks that together count as a full grooming (bowls are not part of it)
+GROOMING_TASKS = ('dog_clean', 'dog_washed', 'dog_brushed')
+
+
+def _all_done(tasks):
+    return lambda m: and_(*[getattr(m, task).is_(True) for task in tasks])
+
+
+CARETAKER_KPIS = KPIDefinition('caretaker_daily', CaretakerDailyLog, [
+    KPIMetric.count('total_entries'),
+    KPIMetric.distinct('unique_dogs', 'dog_id'),
+    KPIMetric.distinct('unique_dates', 'date'),
+    *[KPIMetric.count(f'house_tasks.{task}', where=_all_done([task])) for task in HOUSE_TASKS],
+    KPIMetric.count('house_tasks.full_house_clean', where=_all_done(HOUSE_TASKS)),
+    KPIMetric.ratio('house_tasks.house_clean_pct', 'house_tasks.house_clean', 'total_entries', scale=100, precision=1),
+    KPIMetric.ratio('house_tasks.full_house_clean_pct', 'house_tasks.full_house_clean', 'total_entries',
+                    scale=100, precision=1),
+    *[KPIMetric.count(f'dog_tasks.{task}', where=_all_done([task])) for task in DOG_TASKS],
+    KPIMetric.count('dog_tasks.full_dog_grooming', where=_all_done(GROOMING_TASKS)),
+    KPIMetric.ratio('dog_tasks.dog_clean_pct', 'dog_tasks.dog_clean', 'total_entries', scale=100, precision=1),
+    KPIMetric.ratio('dog_tasks.full_dog_grooming_pct', 'dog_tasks.full_dog_grooming', 'total_entries',
+                    scale=100, precision=1),
+])
+
+
 # ==============================================================================
 # UNIFIED ENDPOINTS (Range-Based API)
 # ==============================================================================
@@ -45,6 +74,7 @@ def get_cleaning_status_display(status):
 @bp.route('/unified')
 @login_required
 @require_permission("reports.breeding.caretaker_daily.view")
+@read_replica
 def caretaker_daily_unified_data():
     """Unified caretaker daily report data with range selector and smart aggregation"""
     
@@ -125,41 +155,8 @@ def caretaker_daily_unified_data():
         CaretakerDailyLog.created_at.desc()
     ).offset((page - 1) * per_page).limit(per_page).all()
     
-    # Calculate KPIs
-    kpi_query = base_query
-    all_logs = kpi_query.all()
-    
-    # Basic KPIs
-    total_entries = len(all_logs)
-    unique_dogs = len(set(log.dog_id for log in all_logs))
-    unique_dates = len(set(log.date for log in all_logs))
-    
-    # Cleaning status KPIs
-    house_clean_count = sum(1 for log in all_logs if log.house_clean)
-    house_vacuum_count = sum(1 for log in all_logs if log.house_vacuum)
-    house_tap_clean_count = sum(1 for log in all_logs if log.house_tap_clean)
-    house_drain_clean_count = sum(1 for log in all_logs if log.house_drain_clean)
-    
-    dog_clean_count = sum(1 for log in all_logs if log.dog_clean)
-    dog_washed_count = sum(1 for log in all_logs if log.dog_washed)
-    dog_brushed_count = sum(1 for log in all_logs if log.dog_brushed)
-    bowls_bucket_clean_count = sum(1 for log in all_logs if log.bowls_bucket_clean)
-    
-    # Calculate percentages (avoid division by zero)
-    house_clean_pct = round((house_clean_count / total_entries * 100), 1) if total_entries > 0 else 0
-    dog_clean_pct = round((dog_clean_count / total_entries * 100), 1) if total_entries > 0 else 0
-    
-    # Full house cleaning (all house tasks completed)
-    full_house_clean = sum(1 for log in all_logs if all([
-        log.house_clean, log.house_vacuum, log.house_tap_clean, log.house_drain_clean
-    ]))
-    full_house_clean_pct = round((full_house_clean / total_entries * 100), 1) if total_entries > 0 else 0
-    
-    # Full dog grooming (all dog tasks completed)
-    full_dog_grooming = sum(1 for log in all_logs if all([
-        log.dog_clean, log.dog_washed, log.dog_brushed
-    ]))
-    full_dog_grooming_pct = round((full_dog_grooming / total_entries * 100), 1) if total_entries > 0 else 0
+    # Calculate KPIs (one aggregate query over the filtered range)
+    kpis = KPIEngine.evaluate(CARETAKER_KPIS, base_query)
     
     # Build rows for display
     rows = []
@@ -208,29 +205,7 @@ def caretaker_daily_unified_data():
             "date_to": date_to.strftime('%Y-%m-%d'),
             "dog_id": dog_id
         },
-        "kpis": {
-            "total_entries": total_entries,
-            "unique_dogs": unique_dogs,
-            "unique_dates": unique_dates,
-            "house_tasks": {
-                "house_clean": house_clean_count,
-                "house_vacuum": house_vacuum_count,
-                "house_tap_clean": house_tap_clean_count,
-                "house_drain_clean": house_drain_clean_count,
-                "full_house_clean": full_house_clean,
-                "house_clean_pct": house_clean_pct,
-                "full_house_clean_pct": full_house_clean_pct
-            },
-            "dog_tasks": {
-                "dog_clean": dog_clean_count,
-                "dog_washed": dog_washed_count,
-                "dog_brushed": dog_brushed_count,
-                "bowls_bucket_clean": bowls_bucket_clean_count,
-                "full_dog_grooming": full_dog_grooming,
-                "dog_clean_pct": dog_clean_pct,
-                "full_dog_grooming_pct": full_dog_grooming_pct
-            }
-        },
+        "kpis": kpis,
         "rows": rows,
         "range_display": format_date_range_for_display(date_from, date_to, range_type),
         "project_name": project_name
@@ -240,6 +215,7 @@ def caretaker_daily_unified_data():
 @bp.route('/unified/export.pdf')
 @login_required
 @require_permission("reports.breeding.caretaker_daily.export")
+@read_replica
 def caretaker_daily_unified_export_pdf():
     """Export unified caretaker daily report as PDF with proper naming"""
     
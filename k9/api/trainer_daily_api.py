@@ -7,7 +7,8 @@ from datetime import datetime, date
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from k9.utils.permissions_new import require_permission
-from k9.services.trainer_daily_services import get_trainer_daily
+from k9.services.trainer_daily_services import get_trainer_daily, get_trainer_progress
+from k9.services.trainer_analytics import GROUPINGS, PERIODS
 from k9.utils.trainer_daily_exporters import export_trainer_daily_pdf
 
 bp = Blueprint('reports_training_trainer_daily_api', __name__)
@@ -63,6 +64,54 @@ def run_trainer_daily():
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
 
+@bp.route('/run/trainer-progress', methods=['POST'])
+@login_required
+@require_permission("reports.training.trainer_daily.view")
+def run_trainer_progress():
+    """
+    Training progress curves, category mix and plateau detection over a date range
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body required"}), 400
+        
+        if not data.get('date_from') or not data.get('date_to'):
+            return jsonify({"error": "date_from and date_to are required"}), 400
+        try:
+            date_from = datetime.strptime(data['date_from'], '%Y-%m-%d').date()
+            date_to = datetime.strptime(data['date_to'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        if date_to < date_from:
+            return jsonify({"error": "date_to must not be before date_from"}), 400
+        
+        group_by = data.get('group_by', 'dog')
+        if group_by not in GROUPINGS:
+            return jsonify({"error": f"group_by must be one of: {', '.join(GROUPINGS)}"}), 400
+        period = data.get('period', 'week')
+        if period not in PERIODS:
+            return jsonify({"error": f"period must be one of: {', '.join(PERIODS)}"}), 400
+        
+        result = get_trainer_progress(
+            project_id=data.get('project_id'),
+            date_from=date_from,
+            date_to=date_to,
+            group_by=group_by,
+            period=period,
+            trainer_id=data.get('trainer_id'),
+            dog_id=data.get('dog_id'),
+            user=current_user
+        )
+        
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
 @bp.route('/export/pdf/trainer-daily', methods=['POST'])
 @login_required
 @require_permission("reports.training.trainer_daily.export")
@@ -2,11 +2,16 @@
 Data API endpoints for trainer daily report dropdowns
 """
 
+import logging
+
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
-from k9.models.models import Project, Employee, Dog, EmployeeRole
+from k9.models.models import Project
 from app import db
 from k9.utils.permissions_new import has_permission, require_permission
+from k9.services.picker_service import PickerService, DEFAULT_PICKER_LIMIT
+
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('trainer_daily_data_api', __name__)
 
@@ -47,24 +52,15 @@ def get_projects():
 def get_employees():
     """Get list of employees (trainers) for dropdown"""
     try:
-        # Filter by role if provided
-        role_filter = None
-        if 'role' in request.args:
-            role_value = request.args.get('role')
-            if role_value == 'TRAINER':
-                role_filter = EmployeeRole.TRAINER
-        
-        query = db.session.query(Employee)
-        if role_filter:
-            query = query.filter(Employee.role == role_filter)
-            
-        employees = query.all()
+        # Filter by role if provided (only TRAINER is supported)
+        role = 'TRAINER' if request.args.get('role') == 'TRAINER' else None
+        employees = PickerService.employee_options(role=role, active_only=False)
         
         return jsonify([{
-            'id': str(employee.id),
-            'name': employee.name,
-            'full_name': employee.name,
-            'role': employee.role.value
+            'id': employee['id'],
+            'name': employee['name'],
+            'full_name': employee['name'],
+            'role': employee['role']
         } for employee in employees])
         
     except Exception as e:
@@ -79,111 +75,22 @@ def get_dogs():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        from k9.models.models import project_dog_assignment, ProjectAssignment, DogStatus, User, UserRole
-        
         # Get optional project_id parameter
         project_id = request.args.get('project_id')
         
         if project_id:
-            # Filter dogs by specific project using multiple methods
-            all_dogs_set = {}
-            
-            # Method 1: Dogs assigned via ProjectAssignment model (recommended)
-            project_assignments = ProjectAssignment.query.filter_by(
-                project_id=project_id,
-                is_active=True
-            ).filter(
-                ProjectAssignment.dog_id.isnot(None)
-            ).all()
-            assignment_dog_ids = [pa.dog_id for pa in project_assignments]
-            if assignment_dog_ids:
-                for dog in Dog.query.filter(Dog.id.in_(assignment_dog_ids)).all():
-                    if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                        all_dogs_set[str(dog.id)] = dog
-            
-            # Method 2: Dogs assigned via legacy many-to-many relationship
-            legacy_dogs = db.session.query(Dog).join(
-                project_dog_assignment
-            ).filter(
-                project_dog_assignment.c.project_id == project_id
-            ).all()
-            for dog in legacy_dogs:
-                if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                    all_dogs_set[str(dog.id)] = dog
-            
-            # Method 3: Dogs assigned to handlers who are in this project
-            handlers_in_project = User.query.filter_by(
-                role=UserRole.HANDLER,
-                project_id=project_id
-            ).all()
-            handler_ids = [h.id for h in handlers_in_project]
-            if handler_ids:
-                handler_dogs = Dog.query.filter(
-                    Dog.assigned_to_user_id.in_(handler_ids)
-                ).all()
-                for dog in handler_dogs:
-                    if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                        all_dogs_set[str(dog.id)] = dog
-            
-            # Method 4: Include unassigned dogs as available options
-            unassigned_dogs = Dog.query.filter(
-                Dog.assigned_to_user_id.is_(None)
-            ).all()
-            for dog in unassigned_dogs:
-                if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                    all_dogs_set[str(dog.id)] = dog
-            
-            dogs = list(all_dogs_set.values())
+            # Project dogs via assignments, legacy links and project handlers, plus unassigned dogs
+            dogs = PickerService.dog_options([project_id], include_unassigned=True)
         else:
-            # No project filter - apply role-based filtering
-            if current_user.role.value == "GENERAL_ADMIN":
-                dogs = db.session.query(Dog).filter(
-                    Dog.current_status.in_([DogStatus.ACTIVE, DogStatus.TRAINING])
-                ).all()
-            else:
-                # PROJECT_MANAGER - get dogs assigned to their projects via multiple methods
-                all_dogs_set = {}
-                
-                # Get PM's project IDs
-                pm_projects = Project.query.filter_by(manager_id=current_user.id).all()
-                pm_project_ids = [p.id for p in pm_projects]
-                
-                if pm_project_ids:
-                    # Method 1: Via ProjectAssignment
-                    for proj_id in pm_project_ids:
-                        project_assignments = ProjectAssignment.query.filter_by(
-                            project_id=proj_id,
-                            is_active=True
-                        ).filter(
-                            ProjectAssignment.dog_id.isnot(None)
-                        ).all()
-                        for pa in project_assignments:
-                            dog = Dog.query.get(pa.dog_id)
-                            if dog and dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                                all_dogs_set[str(dog.id)] = dog
-                    
-                    # Method 2: Via legacy many-to-many
-                    legacy_dogs = db.session.query(Dog).join(
-                        project_dog_assignment
-                    ).filter(
-                        project_dog_assignment.c.project_id.in_(pm_project_ids)
-                    ).all()
-                    for dog in legacy_dogs:
-                        if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                            all_dogs_set[str(dog.id)] = dog
-                
-                dogs = list(all_dogs_set.values())
+            # No project filter - GENERAL_ADMIN sees all, PROJECT_MANAGER sees their projects' dogs
+            project_ids = PickerService.managed_project_ids(current_user)
+            dogs = PickerService.dog_options(project_ids, sources=('assignment', 'legacy'))
         
         # Return array directly for backwards compatibility with JS files
-        return jsonify([{
-            'id': str(dog.id),
-            'name': dog.name,
-            'code': dog.code
-        } for dog in dogs])
+        return jsonify(dogs)
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error loading dog options")
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/api/dogs/accessible')
@@ -192,93 +99,40 @@ def get_dogs():
 def get_accessible_dogs():
     """Get list of accessible dogs and projects for breeding forms"""
     try:
-        from k9.models.models import project_dog_assignment, ProjectAssignment, DogStatus, User, UserRole
+        from k9.models.models import project_dog_assignment, ProjectAssignment
         
         # GENERAL_ADMIN sees all dogs, PROJECT_MANAGER sees assigned dogs
-        if current_user.role.value == "GENERAL_ADMIN":
-            dogs = db.session.query(Dog).filter(
-                Dog.current_status.in_([DogStatus.ACTIVE, DogStatus.TRAINING])
-            ).all()
+        project_ids = PickerService.managed_project_ids(current_user)
+        dogs = PickerService.dog_options(project_ids)
+        if project_ids is None:
             projects = db.session.query(Project).filter(
                 Project.status.in_(['PLANNED', 'ACTIVE'])
             ).all()
         else:
-            # PROJECT_MANAGER - get dogs assigned to their projects via multiple methods
-            all_dogs_set = {}
-            
-            # Get PM's project IDs
-            pm_projects = Project.query.filter_by(manager_id=current_user.id).all()
-            pm_project_ids = [p.id for p in pm_projects]
-            
-            if pm_project_ids:
-                # Method 1: Via ProjectAssignment
-                for proj_id in pm_project_ids:
-                    project_assignments = ProjectAssignment.query.filter_by(
-                        project_id=proj_id,
-                        is_active=True
-                    ).filter(
-                        ProjectAssignment.dog_id.isnot(None)
-                    ).all()
-                    for pa in project_assignments:
-                        dog = Dog.query.get(pa.dog_id)
-                        if dog and dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                            all_dogs_set[str(dog.id)] = dog
-                
-                # Method 2: Via legacy many-to-many
-                legacy_dogs = db.session.query(Dog).join(
-                    project_dog_assignment
-                ).filter(
-                    project_dog_assignment.c.project_id.in_(pm_project_ids)
-                ).all()
-                for dog in legacy_dogs:
-                    if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                        all_dogs_set[str(dog.id)] = dog
-                
-                # Method 3: Dogs assigned to handlers who are in these projects
-                for proj_id in pm_project_ids:
-                    handlers_in_project = User.query.filter_by(
-                        role=UserRole.HANDLER,
-                        project_id=proj_id
-                    ).all()
-                    handler_ids = [h.id for h in handlers_in_project]
-                    if handler_ids:
-                        handler_dogs = Dog.query.filter(
-                            Dog.assigned_to_user_id.in_(handler_ids)
-                        ).all()
-                        for dog in handler_dogs:
-                            if dog.current_status in [DogStatus.ACTIVE, DogStatus.TRAINING]:
-                                all_dogs_set[str(dog.id)] = dog
-            
-            dogs = list(all_dogs_set.values())
-            projects = pm_projects
+            projects = Project.query.filter(Project.id.in_(project_ids)).all() if project_ids else []
         
-        # Get project assignments for dogs using both methods
+        # First project of each dog: ProjectAssignment takes precedence over legacy links
         dog_projects = {}
-        if dogs:
-            # From ProjectAssignment
-            for dog in dogs:
-                assignments = ProjectAssignment.query.filter_by(
-                    dog_id=dog.id,
-                    is_active=True
-                ).all()
-                if assignments:
-                    dog_projects[dog.id] = [a.project_id for a in assignments]
-            
-            # From legacy many-to-many
-            legacy_assignments = db.session.query(project_dog_assignment).all()
-            for assignment in legacy_assignments:
-                if assignment.dog_id not in dog_projects:
-                    dog_projects[assignment.dog_id] = []
-                if assignment.project_id not in dog_projects.get(assignment.dog_id, []):
-                    dog_projects[assignment.dog_id].append(assignment.project_id)
-
+        dog_ids = [dog['id'] for dog in dogs]
+        if dog_ids:
+            assignment_rows = db.session.query(ProjectAssignment.dog_id, ProjectAssignment.project_id).filter(
+                ProjectAssignment.dog_id.in_(dog_ids),
+                ProjectAssignment.is_active == True
+            ).all()
+            legacy_rows = db.session.query(project_dog_assignment.c.dog_id, project_dog_assignment.c.project_id).filter(
+                project_dog_assignment.c.dog_id.in_(dog_ids)
+            ).all()
+            for dog_id, project_id in list(assignment_rows) + list(legacy_rows):
+                dog_projects.setdefault(str(dog_id), str(project_id))
+        
+        project_names = {str(project.id): project.name for project in projects}
         return jsonify({
             'dogs': [{
-                'id': str(dog.id),
-                'name': dog.name,
-                'code': dog.code,
-                'project_id': str(dog_projects.get(dog.id, [None])[0]) if dog_projects.get(dog.id) else None,
-                'project_name': next((p.name for p in projects if str(p.id) == str(dog_projects.get(dog.id, [None])[0])), None) if dog_projects.get(dog.id) else None
+                'id': dog['id'],
+                'name': dog['name'],
+                'code': dog['code'],
+                'project_id': dog_projects.get(dog['id']),
+                'project_name': project_names.get(dog_projects.get(dog['id']))
             } for dog in dogs],
             'projects': [{
                 'id': str(project.id),
@@ -288,4 +142,50 @@ def get_accessible_dogs():
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+def _picker_scope():
+    """(project_ids, error response) for typeahead requests; None means unscoped"""
+    project_ids = PickerService.managed_project_ids(current_user)
+    requested = request.args.get('project_id')
+    if not requested:
+        return project_ids, None
+    if project_ids is not None and requested not in project_ids:
+        return None, (jsonify({'error': 'Unauthorized'}), 403)
+    return [requested], None
+
+
+@bp.route('/api/pickers/dogs')
+@login_required
+def dog_picker():
+    """Typeahead: top matches for a name/code prefix (?q=&project_id=&limit=)"""
+    if not has_permission("dogs.view"):
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    project_ids, error = _picker_scope()
+    if error:
+        return error
+    results = PickerService.dog_options(
+        project_ids,
+        search=request.args.get('q'),
+        limit=request.args.get('limit', DEFAULT_PICKER_LIMIT, type=int)
+    )
+    return jsonify({'results': results})
+
+
+@bp.route('/api/pickers/employees')
+@login_required
+@require_permission('employees.view')
+def employee_picker():
+    """Typeahead: top matches for an employee name/number prefix (?q=&role=&project_id=&limit=)"""
+    project_ids, error = _picker_scope()
+    if error:
+        return error
+    results = PickerService.employee_options(
+        role=request.args.get('role'),
+        project_ids=project_ids,
+        search=request.args.get('q'),
+        limit=request.args.get('limit', DEFAULT_PICKER_LIMIT, type=int)
+    )
+    return jsonify({'results': results})
@@ -8,7 +8,10 @@ import os
 
 from k9.utils.permissions_new import admin_required
 from k9.utils.permissions_new import has_permission
-from k9.services.veterinary_daily_services import get_vet_daily, get_available_vets, get_available_dogs
+from k9.utils.db_routing import read_replica
+from k9.services.veterinary_daily_services import (
+    get_vet_daily, get_vet_period, get_available_vets, get_available_dogs, PERIOD_GROUPINGS
+)
 from k9.utils.veterinary_daily_exporters import export_vet_daily_pdf
 
 bp = Blueprint('veterinary_daily_api', __name__)
@@ -17,6 +20,7 @@ bp = Blueprint('veterinary_daily_api', __name__)
 @bp.route('/run/daily', methods=['POST'])
 @login_required
 @admin_required
+@read_replica
 def run_daily_report():
     """
     Generate veterinary daily report data
@@ -61,8 +65,61 @@ def run_daily_report():
         return jsonify({"error": f"Failed to generate report: {str(e)}"}), 500
 
 
+@bp.route('/run/period', methods=['POST'])
+@login_required
+@admin_required
+@read_replica
+def run_period_report():
+    """
+    Generate a veterinary summary over several projects and days
+    """
+    
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        if not data or not data.get('project_ids') or 'date_from' not in data or 'date_to' not in data:
+            return jsonify({"error": "project_ids, date_from and date_to are required"}), 400
+        
+        project_ids = data['project_ids']
+        if isinstance(project_ids, str):
+            project_ids = [project_ids]
+        
+        # Parse dates
+        try:
+            date_from = datetime.strptime(data['date_from'], '%Y-%m-%d').date()
+            date_to = datetime.strptime(data['date_to'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        if date_to < date_from:
+            return jsonify({"error": "date_to must not be before date_from"}), 400
+        
+        group_by = data.get('group_by', 'project')
+        if group_by not in PERIOD_GROUPINGS:
+            return jsonify({"error": f"group_by must be one of: {', '.join(PERIOD_GROUPINGS)}"}), 400
+        
+        report_data = get_vet_period(
+            project_ids=project_ids,
+            date_from=date_from,
+            date_to=date_to,
+            group_by=group_by,
+            vet_id=data.get('vet_id'),
+            dog_id=data.get('dog_id'),
+            visit_type=data.get('visit_type'),
+            user=current_user
+        )
+        
+        return jsonify(report_data)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 403
+    except Exception as e:
+        return jsonify({"error": f"Failed to generate report: {str(e)}"}), 500
+
+
 @bp.route('/export/pdf/daily', methods=['POST'])
 @login_required
+@read_replica
 def export_daily_pdf():
     """
     Export veterinary daily report as PDF
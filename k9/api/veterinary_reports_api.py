@@ -5,7 +5,6 @@ Handles data endpoints and PDF exports for Arabic/RTL veterinary reports
 
 import os
 from datetime import datetime, date, timedelta
-from collections import defaultdict
 from flask import Blueprint, jsonify, request, current_app, send_file, make_response
 from flask_login import login_required, current_user
 from sqlalchemy import and_, func, case, or_
@@ -21,6 +20,9 @@ from k9.models.models import (
     VeterinaryVisit, Dog, Project, Employee, VisitType
 )
 from k9.utils.utils import get_user_projects, check_project_access
+from k9.utils.db_routing import read_replica
+from k9.services.veterinary_daily_services import visit_kpis, visit_kpis_by_dog
+from k9.services.medication_ledger_service import MedicationLedgerService, USAGE_GROUPINGS
 from k9.utils.utils_pdf_rtl import register_arabic_fonts, rtl, get_arabic_font_name
 from k9.utils.pdf_minimal_elegant import (
     create_minimal_header,
@@ -100,9 +102,63 @@ def get_project_scope_filter(user, project_id):
             return VeterinaryVisit.project_id.is_(None)
 
 
+def get_range_filters(date_from, date_to, project_filter=None, dog_id=None):
+    """WHERE clauses shared by the rows query and the SQL aggregates"""
+    clauses = [
+        VeterinaryVisit.visit_date >= datetime.combine(date_from, datetime.min.time()),
+        VeterinaryVisit.visit_date <= datetime.combine(date_to, datetime.max.time())
+    ]
+    if project_filter is not None:
+        clauses.append(project_filter)
+    if dog_id:
+        clauses.append(VeterinaryVisit.dog_id == dog_id)
+    return clauses
+
+
+def _by_visit_type_display(counts):
+    """Arabic labels for the visit types that occurred"""
+    return {get_visit_type_display(VisitType(value)): count for value, count in counts.items() if count}
+
+
+def get_range_kpis(clauses):
+    """Report KPIs from one aggregate query"""
+    kpis = visit_kpis(clauses)
+    return {
+        'total_visits': kpis['total_visits'],
+        'total_dogs': kpis['unique_dogs'],
+        'total_vets': kpis['unique_vets'],
+        'by_visit_type': _by_visit_type_display(kpis['by_visit_type']),
+        'total_medications': kpis['total_medications'],
+        'total_cost': kpis['total_cost']
+    }
+
+
+def get_dog_aggregates(clauses):
+    """Per-dog aggregate table from one grouped query"""
+    return [{
+        'dog_id': agg['dog_id'],
+        'dog_code': agg['dog_code'],
+        'dog_name': agg['dog_name'],
+        'visits': agg['total_visits'],
+        'by_visit_type': _by_visit_type_display(agg['by_visit_type']),
+        'medications_count': agg['total_medications'],
+        'cost_sum': agg['total_cost']
+    } for agg in visit_kpis_by_dog(clauses)]
+
+
+def get_visit_rows(clauses):
+    """Visits in the range with dog, vet and project loaded in bulk"""
+    return VeterinaryVisit.query.options(
+        selectinload(VeterinaryVisit.dog),
+        selectinload(VeterinaryVisit.vet),
+        selectinload(VeterinaryVisit.project)
+    ).filter(*clauses).order_by(VeterinaryVisit.visit_date.desc()).all()
+
+
 @bp.route('/')
 @login_required
 @require_permission("reports.veterinary.view")
+@read_replica
 def veterinary_data():
     """Get unified veterinary report data with range selector"""
     
@@ -121,61 +177,16 @@ def veterinary_data():
         # Resolve date range
         date_from, date_to, granularity = resolve_range(range_type, request.args.to_dict())
         
-        # Build base query with optimized joins
-        query = VeterinaryVisit.query.options(
-            selectinload(VeterinaryVisit.dog),
-            selectinload(VeterinaryVisit.vet),
-            selectinload(VeterinaryVisit.project)
-        ).filter(
-            and_(
-                VeterinaryVisit.visit_date >= datetime.combine(date_from, datetime.min.time()),
-                VeterinaryVisit.visit_date <= datetime.combine(date_to, datetime.max.time())
-            )
-        )
-        
         # Apply project scope filter
         try:
             project_filter = get_project_scope_filter(current_user, project_id)
-            if project_filter is not None:
-                query = query.filter(project_filter)
         except ValueError as e:
             return jsonify({'error': str(e)}), 403
         
-        # Apply dog filter if specified
-        if dog_id:
-            query = query.filter(VeterinaryVisit.dog_id == dog_id)
+        clauses = get_range_filters(date_from, date_to, project_filter, dog_id)
         
-        # Execute query
-        visits = query.order_by(VeterinaryVisit.visit_date.desc()).all()
-        
-        # Calculate KPIs if requested
-        kpis = None
-        if show_kpis:
-            total_visits = len(visits)
-            by_visit_type = defaultdict(int)
-            total_medications = 0
-            total_cost = 0
-            total_dogs = len(set(visit.dog_id for visit in visits))
-            total_vets = len(set(visit.vet_id for visit in visits))
-            
-            for visit in visits:
-                visit_type_label = get_visit_type_display(visit.visit_type)
-                by_visit_type[visit_type_label] += 1
-                
-                if visit.medications:
-                    total_medications += len(visit.medications)
-                
-                if visit.cost:
-                    total_cost += visit.cost
-            
-            kpis = {
-                'total_visits': total_visits,
-                'total_dogs': total_dogs,
-                'total_vets': total_vets,
-                'by_visit_type': dict(by_visit_type),
-                'total_medications': total_medications,
-                'total_cost': round(total_cost, 2)
-            }
+        # KPIs as SQL aggregates
+        kpis = get_range_kpis(clauses) if show_kpis else None
         
         # Build response based on granularity
         response_data = {
@@ -196,7 +207,7 @@ def veterinary_data():
         if granularity == "day":
             # Daily view: return detailed rows
             rows = []
-            for visit in visits:
+            for visit in get_visit_rows(clauses):
                 project_name = "(خارج مشروع)" if not visit.project else visit.project.name
                 
                 rows.append({
@@ -219,52 +230,8 @@ def veterinary_data():
             
             response_data['rows'] = rows
         else:
-            # Aggregate view: return per-dog aggregates
-            dog_aggregates = {}
-            
-            for visit in visits:
-                dog_key = visit.dog_id
-                if dog_key not in dog_aggregates:
-                    dog_aggregates[dog_key] = {
-                        'dog_id': visit.dog_id,
-                        'dog_code': visit.dog.code if visit.dog else '',
-                        'dog_name': visit.dog.name if visit.dog else '',
-                        'visits': 0,
-                        'by_visit_type': {},
-                        'medications_count': 0,
-                        'cost_sum': 0
-                    }
-                
-                agg = dog_aggregates[dog_key]
-                agg['visits'] += 1
-                
-                visit_type_label = get_visit_type_display(visit.visit_type)
-                if visit_type_label not in agg['by_visit_type']:
-                    agg['by_visit_type'][visit_type_label] = 0
-                agg['by_visit_type'][visit_type_label] += 1
-                
-                if visit.medications:
-                    agg['medications_count'] += len(visit.medications)
-                
-                if visit.cost:
-                    agg['cost_sum'] += visit.cost
-                
-                # VeterinaryVisit doesn't track duration
-            
-            # Convert to table format
-            table = []
-            for dog_id, agg in dog_aggregates.items():
-                table.append({
-                    'dog_id': agg['dog_id'],
-                    'dog_code': agg['dog_code'],
-                    'dog_name': agg['dog_name'],
-                    'visits': agg['visits'],
-                    'by_visit_type': dict(agg['by_visit_type']),
-                    'medications_count': agg['medications_count'],
-                    'cost_sum': round(agg['cost_sum'], 2)
-                })
-            
-            response_data['table'] = table
+            # Aggregate view: per-dog aggregates grouped in SQL
+            response_data['table'] = get_dog_aggregates(clauses)
         
         return jsonify(response_data)
     
@@ -278,6 +245,7 @@ def veterinary_data():
 @bp.route('/export.pdf')
 @login_required
 @require_permission("reports.veterinary.export")
+@read_replica
 def export_pdf():
     """Export veterinary report as Arabic RTL PDF"""
     
@@ -296,27 +264,9 @@ def export_pdf():
         
         date_from, date_to, granularity = resolve_range(range_type, request.args.to_dict())
         
-        # Build query (simplified version)
-        query = VeterinaryVisit.query.options(
-            selectinload(VeterinaryVisit.dog),
-            selectinload(VeterinaryVisit.vet),
-            selectinload(VeterinaryVisit.project)
-        ).filter(
-            and_(
-                VeterinaryVisit.visit_date >= datetime.combine(date_from, datetime.min.time()),
-                VeterinaryVisit.visit_date <= datetime.combine(date_to, datetime.max.time())
-            )
-        )
-        
         # Apply filters as needed
         project_filter = get_project_scope_filter(current_user, project_id)
-        if project_filter is not None:
-            query = query.filter(project_filter)
-        
-        if dog_id:
-            query = query.filter(VeterinaryVisit.dog_id == dog_id)
-        
-        visits = query.order_by(VeterinaryVisit.visit_date.desc()).all()
+        clauses = get_range_filters(date_from, date_to, project_filter, dog_id)
         
         # Build simplified data structure for PDF
         data = {
@@ -333,37 +283,12 @@ def export_pdf():
         
         # Add KPIs if requested
         if show_kpis:
-            total_visits = len(visits)
-            by_visit_type = {}
-            total_medications = 0
-            total_cost = 0
-            # VeterinaryVisit doesn't track duration like TrainingSession
-            total_dogs = len(set(visit.dog_id for visit in visits))
-            total_vets = len(set(visit.vet_id for visit in visits))
-            
-            for visit in visits:
-                visit_type_label = get_visit_type_display(visit.visit_type)
-                by_visit_type[visit_type_label] = by_visit_type.get(visit_type_label, 0) + 1
-                
-                if visit.medications:
-                    total_medications += len(visit.medications)
-                
-                if visit.cost:
-                    total_cost += visit.cost
-            
-            data['kpis'] = {
-                'total_visits': total_visits,
-                'total_dogs': total_dogs,
-                'total_vets': total_vets,
-                'by_visit_type': by_visit_type,
-                'total_medications': total_medications,
-                'total_cost': round(total_cost, 2)
-            }
+            data['kpis'] = get_range_kpis(clauses)
         
         # Add rows/table data
         if granularity == "day":
             rows = []
-            for visit in visits:
+            for visit in get_visit_rows(clauses):
                 project_name = "(خارج مشروع)" if not visit.project else visit.project.name
                 
                 rows.append({
@@ -382,50 +307,8 @@ def export_pdf():
             
             data['rows'] = rows
         else:
-            # Create aggregate table
-            dog_aggregates = {}
-            for visit in visits:
-                dog_key = visit.dog_id
-                if dog_key not in dog_aggregates:
-                    dog_aggregates[dog_key] = {
-                        'dog_code': visit.dog.code if visit.dog else '',
-                        'dog_name': visit.dog.name if visit.dog else '',
-                        'visits': 0,
-                        'by_visit_type': {},
-                        'medications_count': 0,
-                        'cost_sum': 0
-                    }
-                
-                agg = dog_aggregates[dog_key]
-                agg['visits'] += 1
-                
-                visit_type_label = get_visit_type_display(visit.visit_type)
-                agg['by_visit_type'][visit_type_label] = agg['by_visit_type'].get(visit_type_label, 0) + 1
-                
-                if visit.medications:
-                    agg['medications_count'] += len(visit.medications)
-                
-                if visit.cost:
-                    agg['cost_sum'] += visit.cost
-                
-                # VeterinaryVisit doesn't track duration
-            
-            table = []
-            for agg in dog_aggregates.values():
-                avg_duration = None
-                # VeterinaryVisit doesn't track duration
-                
-                table.append({
-                    'dog_code': agg['dog_code'],
-                    'dog_name': agg['dog_name'],
-                    'visits': agg['visits'],
-                    'by_visit_type': agg['by_visit_type'],
-                    'medications_count': agg['medications_count'],
-                    'cost_sum': round(agg['cost_sum'], 2),
-                    # No duration tracking for veterinary visits
-                })
-            
-            data['table'] = table
+            # Aggregate table grouped in SQL
+            data['table'] = get_dog_aggregates(clauses)
         
         # Generate PDF
         register_arabic_fonts()
@@ -624,4 +507,89 @@ def export_pdf():
         
     except Exception as e:
         current_app.logger.error(f"Error in veterinary PDF export: {e}")
-        return jsonify({'error': 'حدث خطأ في تصدير التقرير'}), 500
\ No newline at end of file
+        return jsonify({'error': 'حدث خطأ في تصدير التقرير'}), 500
+
+
+def get_scoped_project_ids(user, project_id):
+    """Project IDs a medication query may read: None means every project"""
+    if project_id:
+        if not check_project_access(user, project_id):
+            raise PermissionError("ليس لديك صلاحية للوصول لهذا المشروع")
+        return [project_id]
+    if user.role.value == "GENERAL_ADMIN":
+        return None
+    return [p.id for p in get_user_projects(user)]
+
+
+@bp.route('/medications')
+@login_required
+@require_permission("reports.veterinary.view")
+@read_replica
+def medication_usage():
+    """Medication usage and cost from the visit_medication ledger, grouped by drug, project, dog or month"""
+    
+    range_type = request.args.get('range_type', 'daily')
+    project_id = request.args.get('project_id', '').strip() or None
+    dog_id = request.args.get('dog_id', '').strip() or None
+    medication_id = request.args.get('medication_id', '').strip() or None
+    group_by = request.args.get('group_by', 'medication')
+    
+    errors = validate_range_params(range_type, request.args.to_dict())
+    if errors:
+        return jsonify({'errors': errors}), 400
+    if group_by not in USAGE_GROUPINGS:
+        return jsonify({'error': f"group_by must be one of: {', '.join(USAGE_GROUPINGS)}"}), 400
+    
+    try:
+        date_from, date_to, granularity = resolve_range(range_type, request.args.to_dict())
+        
+        try:
+            project_ids = get_scoped_project_ids(current_user, project_id)
+        except PermissionError as e:
+            return jsonify({'error': str(e)}), 403
+        
+        rows = MedicationLedgerService.usage(
+            date_from, date_to, group_by=group_by, project_ids=project_ids,
+            dog_id=dog_id, medication_id=medication_id
+        )
+        
+        return jsonify({
+            'filters': {
+                'project_id': project_id,
+                'dog_id': dog_id,
+                'medication_id': medication_id,
+                'range_type': range_type,
+                'date_from': date_from.strftime('%Y-%m-%d'),
+                'date_to': date_to.strftime('%Y-%m-%d'),
+                'group_by': group_by
+            },
+            'rows': rows,
+            'totals': {
+                'administrations': sum(row['administrations'] for row in rows),
+                'cost': round(sum(row['cost'] for row in rows), 2)
+            }
+        })
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error in medication_usage: {e}")
+        return jsonify({'error': 'حدث خطأ في الخادم'}), 500
+
+
+@bp.route('/medications/catalogue')
+@login_required
+@require_permission("reports.veterinary.view")
+@read_replica
+def medication_catalogue():
+    """Medication catalogue with lifetime administration counts"""
+    try:
+        return jsonify({
+            'medications': MedicationLedgerService.catalogue(
+                search=request.args.get('q', '').strip() or None,
+                include_merged=request.args.get('include_merged') == '1'
+            )
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error in medication_catalogue: {e}")
+        return jsonify({'error': 'حدث خطأ في الخادم'}), 500
@@ -3,8 +3,12 @@ Shared utility functions for database models
 Prevents circular import issues between model files
 """
 import uuid
+from sqlalchemy import Index
 from sqlalchemy.dialects.postgresql import UUID
 
+# Block ranges per BRIN summary entry (see k9/utils/index_maintenance.py)
+BRIN_PAGES_PER_RANGE = 32
+
 
 def get_uuid_column():
     """Get PostgreSQL native UUID column type."""
@@ -16,6 +20,12 @@ def default_uuid():
     return str(uuid.uuid4())
 
 
+def brin_index(name, column):
+    """BRIN index for a column that grows with insertion order (dates, timestamps)"""
+    return Index(name, column, postgresql_using='brin',
+                 postgresql_with={'pages_per_range': BRIN_PAGES_PER_RANGE, 'autosummarize': 'on'})
+
+
 def ensure_uuid_string():
     """Helper function to ensure UUID values are strings for SQLite"""
     return lambda: str(uuid.uuid4())
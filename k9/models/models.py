@@ -2,10 +2,10 @@ from app import db
 from flask_login import UserMixin
 from datetime import datetime, date
 from enum import Enum
-from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy import String, Text
+from sqlalchemy.dialects.postgresql import JSON, JSONB, insert as pg_insert
+from sqlalchemy import String, Text, event, inspect, select
 from sqlalchemy.orm import validates
-from k9.models.model_utils import get_uuid_column, default_uuid, ensure_uuid_string
+from k9.models.model_utils import get_uuid_column, default_uuid, ensure_uuid_string, brin_index
 
 class UserRole(Enum):
     GENERAL_ADMIN = "GENERAL_ADMIN"
@@ -256,6 +256,8 @@ class User(UserMixin, db.Model):
     
     # Permission cache invalidation - updated when permissions change
     permissions_updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Incremented on every permission change; sessions compare it to detect stale permission sets
+    permissions_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # For project managers - which sections they can access
     allowed_sections = db.Column(JSON, default=list)
@@ -282,6 +284,11 @@ class User(UserMixin, db.Model):
             raise ValueError("All users must be linked to an employee record. employee_id cannot be None.")
         return employee_id
     
+    def touch_permissions(self):
+        """Mark this user's permissions as changed so cached permission sets are reloaded"""
+        self.permissions_updated_at = datetime.utcnow()
+        self.permissions_version = User.permissions_version + 1
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -439,6 +446,10 @@ class EmployeeDocument(db.Model):
         return f'<EmployeeDocument {self.document_type} for Employee {self.employee_id}>'
 
 class TrainingSession(db.Model):
+    __table_args__ = (
+        brin_index('ix_training_session_date_brin', 'session_date'),
+    )
+    
     id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
     dog_id = db.Column(get_uuid_column(), db.ForeignKey('dog.id'), nullable=False)
     trainer_id = db.Column(get_uuid_column(), db.ForeignKey('employee.id'), nullable=False)
@@ -470,6 +481,11 @@ class VeterinaryVisit(db.Model):
         db.Index('idx_veterinary_vet_date', 'vet_id', 'visit_date'),
         db.Index('idx_veterinary_project_date', 'project_id', 'visit_date'),
         db.Index('idx_veterinary_type_date', 'visit_type', 'visit_date'),
+        brin_index('ix_veterinary_visit_date_brin', 'visit_date'),
+        db.Index('idx_veterinary_medications_gin', 'medications', postgresql_using='gin',
+                 postgresql_ops={'medications': 'jsonb_path_ops'}),
+        db.Index('idx_veterinary_vital_signs_gin', 'vital_signs', postgresql_using='gin',
+                 postgresql_ops={'vital_signs': 'jsonb_path_ops'}),
     )
     
     id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
@@ -489,7 +505,7 @@ class VeterinaryVisit(db.Model):
     symptoms = db.Column(Text)
     diagnosis = db.Column(Text)
     treatment = db.Column(Text)
-    medications = db.Column(JSON, default=list)  # [{name, dose, duration, frequency}]
+    medications = db.Column(JSONB, default=list)  # [{name, dose, duration, frequency}]
     
     # Stool and urine analysis
     stool_color = db.Column(db.String(50))
@@ -506,7 +522,12 @@ class VeterinaryVisit(db.Model):
     # Additional fields for daily reports
     location = db.Column(db.String(120))  # Location of examination
     weather = db.Column(db.String(80))    # Weather conditions
-    vital_signs = db.Column(JSON, default=dict)  # Consolidated vital signs
+    vital_signs = db.Column(JSONB, default=dict)  # Consolidated vital signs
+    
+    # Display summaries written on save (see refresh_summary) for set-based reports
+    medications_summary = db.Column(Text)
+    vital_signs_summary = db.Column(Text)
+    medication_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Workflow fields for PM review
     status = db.Column(db.String(50), nullable=False, default='DRAFT')
@@ -525,9 +546,148 @@ class VeterinaryVisit(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def refresh_summary(self):
+        """Recompute the stored medication and vital-sign summaries"""
+        from k9.utils.veterinary_summary import (
+            format_medications_summary, format_vital_signs_summary, count_medications
+        )
+        self.medications_summary = format_medications_summary(self.medications)
+        self.medication_count = count_medications(self.medications)
+        self.vital_signs_summary = format_vital_signs_summary(
+            self.vital_signs, self.temperature, self.heart_rate, self.blood_pressure
+        )
+    
     def __repr__(self):
         return f'<VeterinaryVisit {self.visit_type.value} - {self.dog.name}>'
 
+
+@event.listens_for(VeterinaryVisit, 'before_insert')
+@event.listens_for(VeterinaryVisit, 'before_update')
+def _refresh_veterinary_visit_summary(mapper, connection, target):
+    target.refresh_summary()
+
+
+class Medication(db.Model):
+    """كتالوج الأدوية - one canonical entry per medication name"""
+    __tablename__ = 'medication'
+    
+    id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
+    name = db.Column(db.String(200), nullable=False)
+    normalized_name = db.Column(db.String(200), nullable=False, unique=True, index=True)
+    unit = db.Column(db.String(30))
+    unit_cost = db.Column(db.Float)
+    # Spelling variants merged into another entry point at it
+    canonical_id = db.Column(get_uuid_column(), db.ForeignKey('medication.id', ondelete='SET NULL'), nullable=True)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    canonical = db.relationship('Medication', remote_side=[id])
+    
+    def __repr__(self):
+        return f'<Medication {self.name}>'
+
+
+class VisitMedication(db.Model):
+    """سجل صرف الأدوية - one row per medication given in a veterinary visit"""
+    __tablename__ = 'visit_medication'
+    __table_args__ = (
+        db.Index('idx_visit_medication_med_date', 'medication_id', 'visit_date'),
+        db.Index('idx_visit_medication_project_date', 'project_id', 'visit_date'),
+        db.Index('idx_visit_medication_dog_date', 'dog_id', 'visit_date'),
+        db.Index('idx_visit_medication_visit', 'visit_id'),
+    )
+    
+    id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
+    visit_id = db.Column(get_uuid_column(), db.ForeignKey('veterinary_visit.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    medication_id = db.Column(get_uuid_column(), db.ForeignKey('medication.id'), nullable=False)
+    
+    # Copied from the visit so usage queries by dog, project and period stay on this table
+    dog_id = db.Column(get_uuid_column(), db.ForeignKey('dog.id'), nullable=False)
+    project_id = db.Column(get_uuid_column(), db.ForeignKey('project.id'), nullable=False)
+    visit_date = db.Column(db.DateTime, nullable=False)
+    
+    name_as_entered = db.Column(db.String(200), nullable=False)
+    dose = db.Column(db.String(100))
+    frequency = db.Column(db.String(100))
+    duration = db.Column(db.String(100))
+    quantity = db.Column(db.Float)
+    unit_cost = db.Column(db.Float)  # Catalogue price when the visit was saved
+    
+    visit = db.relationship('VeterinaryVisit', viewonly=True)
+    medication = db.relationship('Medication')
+    
+    def __repr__(self):
+        return f'<VisitMedication {self.name_as_entered}>'
+
+
+# Visit attributes copied into the ledger; a change to any of them rewrites the visit's rows
+_LEDGER_SOURCE_ATTRS = ('medications', 'dog_id', 'project_id', 'visit_date')
+
+
+def sync_visit_medications(connection, visit):
+    """Rewrite a visit's visit_medication rows from its medications JSON"""
+    from k9.utils.veterinary_summary import medication_ledger_entries
+    
+    ledger = VisitMedication.__table__
+    catalogue = Medication.__table__
+    connection.execute(ledger.delete().where(ledger.c.visit_id == visit.id))
+    
+    entries = medication_ledger_entries(visit.medications)
+    if not entries:
+        return
+    
+    names = {}
+    for entry in entries:
+        names.setdefault(entry['normalized_name'], entry['name_as_entered'])
+    connection.execute(pg_insert(catalogue).values([
+        {'id': default_uuid(), 'name': name, 'normalized_name': key, 'is_active': True,
+         'created_at': datetime.utcnow()}
+        for key, name in names.items()
+    ]).on_conflict_do_nothing(index_elements=['normalized_name']))
+    
+    canonical = catalogue.alias('canonical')
+    resolved = {
+        row.normalized_name: (row.medication_id, row.unit_cost)
+        for row in connection.execute(
+            select(
+                catalogue.c.normalized_name,
+                db.func.coalesce(canonical.c.id, catalogue.c.id).label('medication_id'),
+                db.func.coalesce(canonical.c.unit_cost, catalogue.c.unit_cost).label('unit_cost')
+            ).select_from(
+                catalogue.outerjoin(canonical, canonical.c.id == catalogue.c.canonical_id)
+            ).where(catalogue.c.normalized_name.in_(list(names)))
+        )
+    }
+    
+    connection.execute(ledger.insert(), [{
+        'id': default_uuid(),
+        'visit_id': visit.id,
+        'position': entry['position'],
+        'medication_id': resolved[entry['normalized_name']][0],
+        'dog_id': visit.dog_id,
+        'project_id': visit.project_id,
+        'visit_date': visit.visit_date,
+        'name_as_entered': entry['name_as_entered'],
+        'dose': entry['dose'],
+        'frequency': entry['frequency'],
+        'duration': entry['duration'],
+        'quantity': entry['quantity'],
+        'unit_cost': resolved[entry['normalized_name']][1],
+    } for entry in entries])
+
+
+@event.listens_for(VeterinaryVisit, 'after_insert')
+def _ledger_after_visit_insert(mapper, connection, target):
+    sync_visit_medications(connection, target)
+
+
+@event.listens_for(VeterinaryVisit, 'after_update')
+def _ledger_after_visit_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[attr].history.has_changes() for attr in _LEDGER_SOURCE_ATTRS):
+        sync_visit_medications(connection, target)
+
 class ProductionCycle(db.Model):
     __tablename__ = 'production_cycle'
     id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
@@ -896,14 +1056,14 @@ class PregnancyRecord(db.Model):
     status = db.Column(db.Enum(PregnancyStatus), default=PregnancyStatus.NOT_PREGNANT)
     
     # Health monitoring
-    week_1_checkup = db.Column(JSON, default=dict)  # {weight, appetite, behavior}
-    week_2_checkup = db.Column(JSON, default=dict)
-    week_3_checkup = db.Column(JSON, default=dict)
-    week_4_checkup = db.Column(JSON, default=dict)
-    week_5_checkup = db.Column(JSON, default=dict)
-    week_6_checkup = db.Column(JSON, default=dict)
-    week_7_checkup = db.Column(JSON, default=dict)
-    week_8_checkup = db.Column(JSON, default=dict)
+    week_1_checkup = db.Column(JSONB, default=dict)  # {weight, appetite, behavior}
+    week_2_checkup = db.Column(JSONB, default=dict)
+    week_3_checkup = db.Column(JSONB, default=dict)
+    week_4_checkup = db.Column(JSONB, default=dict)
+    week_5_checkup = db.Column(JSONB, default=dict)
+    week_6_checkup = db.Column(JSONB, default=dict)
+    week_7_checkup = db.Column(JSONB, default=dict)
+    week_8_checkup = db.Column(JSONB, default=dict)
     
     # Ultrasound results
     ultrasound_results = db.Column(JSON, default=list)  # [{date, puppies_count, notes}]
@@ -1099,8 +1259,8 @@ class AuditLog(db.Model):
     
     # Action details
     description = db.Column(Text)
-    old_values = db.Column(JSON)  # Previous state
-    new_values = db.Column(JSON)  # New state
+    old_values = db.Column(JSONB)  # Previous state
+    new_values = db.Column(JSONB)  # New state
     
     # Session information
     ip_address = db.Column(db.String(45))  # Support IPv6
@@ -1115,6 +1275,14 @@ class AuditLog(db.Model):
     # Relationships
     user = db.relationship('User', backref='audit_logs')
     
+    __table_args__ = (
+        brin_index('ix_audit_log_created_at_brin', 'created_at'),
+        db.Index('ix_audit_log_old_values_gin', 'old_values', postgresql_using='gin',
+                 postgresql_ops={'old_values': 'jsonb_path_ops'}),
+        db.Index('ix_audit_log_new_values_gin', 'new_values', postgresql_using='gin',
+                 postgresql_ops={'new_values': 'jsonb_path_ops'}),
+    )
+    
     def __repr__(self):
         return f'<AuditLog {self.user.username} - {self.action.value} - {self.target_type}>'
 
@@ -1156,11 +1324,25 @@ class AccessAuditLog(db.Model):
     __table_args__ = (
         db.Index('idx_access_audit_action_time', 'action_type', 'created_at'),
         db.Index('idx_access_audit_user_time', 'user_id', 'created_at'),
+        brin_index('ix_access_audit_created_at_brin', 'created_at'),
     )
     
     def __repr__(self):
         return f'<AccessAuditLog {self.action_type.value} by User {self.user_id} on {self.target_type}>'
 
+class ServerSession(db.Model):
+    """Server-side session data; the cookie only carries the signed session ID"""
+    __tablename__ = 'server_session'
+    
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(Text, nullable=False)
+    user_id = db.Column(get_uuid_column(), nullable=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ServerSession {self.id[:8]}>'
+
 class Shift(db.Model):
     """Shift model for schedule management"""
     id = db.Column(get_uuid_column(), primary_key=True, default=default_uuid)
@@ -1219,7 +1401,7 @@ class FeedingLog(db.Model):
     grams    = db.Column(db.Integer, nullable=True)                        # كمية الوجبة (غم)
     water_ml = db.Column(db.Integer, nullable=True)                        # ماء الشرب (مل)
 
-    supplements   = db.Column(JSON, nullable=True)                         # [{"name":"اسم المكمل","qty":"5 مل"}]
+    supplements   = db.Column(JSONB, nullable=True)                        # [{"name":"اسم المكمل","qty":"5 مل"}]
     body_condition = db.Column(db.Enum(BodyConditionScale), nullable=True) # كتلة الجسم (Arabic values)
     notes = db.Column(db.Text, nullable=True)
 
@@ -1236,6 +1418,9 @@ class FeedingLog(db.Model):
     __table_args__ = (
         db.Index("ix_feeding_log_project_date", "project_id", "date"),
         db.Index("ix_feeding_log_dog_datetime", "dog_id", "date", "time"),
+        brin_index("ix_feeding_log_date_brin", "date"),
+        db.Index("ix_feeding_log_supplements_gin", "supplements", postgresql_using="gin",
+                 postgresql_ops={"supplements": "jsonb_path_ops"}),
     )
     
     def __repr__(self):
@@ -1270,6 +1455,10 @@ class DailyCheckupLog(db.Model):
     suggested_treatment = db.Column(db.Text, nullable=True) # علاج أو إجراء مقترح
     notes = db.Column(db.Text, nullable=True)              # ملاحظات
 
+    # Derived on save (see k9.utils.checkup_findings): one bit per abnormal body part, severity as 1..3
+    abnormal_mask = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    severity_rank = db.Column(db.SmallInteger, nullable=True)
+
     created_by_user_id = db.Column(get_uuid_column(), db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1280,10 +1469,31 @@ class DailyCheckupLog(db.Model):
     examiner_employee = db.relationship('Employee', backref='daily_checkups')
     created_by_user = db.relationship('User', backref='daily_checkups')
 
+    __table_args__ = (
+        # Only checkups with findings are indexed: "abnormal this month" never scans normal rows
+        db.Index("ix_daily_checkup_abnormal_project_date", "project_id", "date",
+                 postgresql_where=db.text("abnormal_mask <> 0")),
+        db.Index("ix_daily_checkup_abnormal_dog_date", "dog_id", "date",
+                 postgresql_where=db.text("abnormal_mask <> 0")),
+        brin_index("ix_daily_checkup_date_brin", "date"),
+    )
+
+    def refresh_findings(self):
+        """Recompute the stored abnormal-findings bitmask and severity rank"""
+        from k9.utils.checkup_findings import CHECKUP_BODY_PARTS, abnormal_mask, severity_rank
+        self.abnormal_mask = abnormal_mask({part: getattr(self, part) for part in CHECKUP_BODY_PARTS})
+        self.severity_rank = severity_rank(self.severity)
+
     def __repr__(self):
         return f'<DailyCheckupLog {self.id}: {self.dog_id} on {self.date} at {self.time}>'
 
 
+@event.listens_for(DailyCheckupLog, 'before_insert')
+@event.listens_for(DailyCheckupLog, 'before_update')
+def _refresh_daily_checkup_findings(mapper, connection, target):
+    target.refresh_findings()
+
+
 # ---------- Arabic enums for Excretion (store Arabic strings) ----------
 class StoolColor(Enum):
     شفاف_او_فاتح = "شفاف/فاتح"
@@ -1379,6 +1589,7 @@ class ExcretionLog(db.Model):
     __table_args__ = (
         db.Index("ix_excretion_project_date", "project_id", "date"),
         db.Index("ix_excretion_dog_datetime", "dog_id", "date", "time"),
+        brin_index("ix_excretion_date_brin", "date"),
     )
 
     def __repr__(self):
@@ -1423,6 +1634,7 @@ class GroomingLog(db.Model):
     __table_args__ = (
         db.Index("ix_grooming_project_date", "project_id", "date"),
         db.Index("ix_grooming_dog_datetime", "dog_id", "date", "time"),
+        brin_index("ix_grooming_date_brin", "date"),
         db.UniqueConstraint("project_id","dog_id","date","time", name="uq_grooming_project_dog_dt"),
     )
 
@@ -1507,7 +1719,7 @@ class CleaningLog(db.Model):
     group_disinfection = db.Column(db.String(10), nullable=True)          # تطهير بيوت مجموعة كلاب - group disinfection
     group_description = db.Column(db.String(120), nullable=True)          # وصف المجموعة - e.g., "الصف A" or "مجموعة 1"
 
-    materials_used = db.Column(JSON, nullable=True)                       # المواد المستخدمة - list like [{"name":"هيبوكلوريت","qty":"100 مل"}]
+    materials_used = db.Column(JSONB, nullable=True)                      # المواد المستخدمة - list like [{"name":"هيبوكلوريت","qty":"100 مل"}]
     notes = db.Column(Text, nullable=True)                                # ملاحظات
 
     # For cadence computation (not persisted as enums, computed in API)
@@ -1524,6 +1736,9 @@ class CleaningLog(db.Model):
     __table_args__ = (
         db.Index("ix_cleaning_project_date", "project_id", "date"),
         db.Index("ix_cleaning_dog_datetime", "dog_id", "date", "time"),
+        brin_index("ix_cleaning_date_brin", "date"),
+        db.Index("ix_cleaning_materials_gin", "materials_used", postgresql_using="gin",
+                 postgresql_ops={"materials_used": "jsonb_path_ops"}),
         db.UniqueConstraint("project_id","dog_id","date","time", name="uq_cleaning_project_dog_dt"),
     )
 
@@ -1655,6 +1870,7 @@ class CaretakerDailyLog(db.Model):
         db.Index("ix_caretaker_daily_date", "date"),
         db.Index("ix_caretaker_daily_project_date", "project_id", "date"),
         db.Index("ix_caretaker_daily_dog_date", "dog_id", "date"),
+        brin_index("ix_caretaker_daily_date_brin", "date"),
         db.UniqueConstraint("dog_id", "date", name="uq_caretaker_daily_dog_date"),
     )
 
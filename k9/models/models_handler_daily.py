@@ -5,7 +5,7 @@ Daily Schedule and Handler Daily Report Models
 from app import db
 from datetime import datetime, date, time
 from enum import Enum
-from k9.models.model_utils import get_uuid_column, default_uuid
+from k9.models.model_utils import get_uuid_column, default_uuid, brin_index
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy import Text
 
@@ -554,14 +554,15 @@ class Notification(db.Model):
     read = db.Column(db.Boolean, default=False, index=True)
     read_at = db.Column(db.DateTime, nullable=True)
     
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     user = db.relationship('User', backref='notifications')
     
     __table_args__ = (
         db.Index('idx_notification_user_read', 'user_id', 'read'),
-        db.Index('idx_notification_created', 'created_at'),
+        db.Index('idx_notification_created', 'created_at'),  # CLUSTER key (k9/utils/index_maintenance.py)
+        brin_index('ix_notification_created_at_brin', 'created_at'),
     )
     
     def __repr__(self):
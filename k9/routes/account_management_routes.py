@@ -527,7 +527,7 @@ def save_permissions(user_id):
             )
             db.session.add(override)
         
-        user.permissions_updated_at = datetime.utcnow()
+        user.touch_permissions()
         
         db.session.commit()
         
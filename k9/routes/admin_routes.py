@@ -491,7 +491,12 @@ def permissions_audit_log():
     if end_date:
         query = query.filter(PermissionAuditLog.created_at <= end_date)
     
-    audit_logs = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Hot rows from PostgreSQL followed by archived segments
+    from k9.services.audit_archive_service import AuditArchiveService
+    audit_logs = AuditArchiveService.paginate(
+        'permission', query, page, per_page,
+        user_id=target_user_id or None, start=start_date, end=end_date
+    )
     
     project_managers = get_project_managers()
     permission_structure = get_all_permissions_grouped()
@@ -618,26 +623,8 @@ def export_user_permissions_pdf(user_id):
 @require_admin_permission('admin.permissions.view')
 def export_all_permissions_excel():
     """Export all permissions to Excel for compliance tracking"""
-    from openpyxl import Workbook
-    
-    # Get all user permissions
-    users = User.query.filter_by(active=True).all()
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Permissions"
-    
-    # Headers
-    ws.append(['User', 'Username', 'Role', 'Permissions'])
-    
-    for user in users:
-        perms = list(get_user_permission_keys(str(user.id)))
-        ws.append([user.full_name, user.username, user.role.value, ', '.join(perms)])
-    
-    # Save to bytes
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
+    from k9.services.access_matrix_service import AccessMatrixService
+    from k9.utils.excel_exporter import excel_stream_response
     
     log_audit(
         user_id=current_user.id,
@@ -647,11 +634,10 @@ def export_all_permissions_excel():
         description="Exported all permissions to Excel"
     )
     
-    return send_file(
-        output,
-        as_attachment=True,
-        download_name=f"all_permissions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return excel_stream_response(
+        AccessMatrixService.excel_writer(),
+        f"all_permissions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        rows=AccessMatrixService.export_rows(AccessMatrixService.iter_rows(active_only=True))
     )
 
 @admin_bp.route('/permissions/preview/<user_id>')
@@ -818,8 +804,10 @@ def admin_profile():
                 user_to_relogin = current_user
                 logout_user()
                 
-                # Clear session data
+                # Clear session data and move it to a new session ID
                 session.clear()
+                from k9.routes.auth import regenerate_session
+                regenerate_session()
                 
                 # Log the user back in with fresh session
                 login_user(user_to_relogin, remember=False, force=True, fresh=True)
@@ -2117,6 +2105,7 @@ def get_user_permission_audit(user_id):
     """Get permission change audit log for a user with pagination (V2)"""
     from k9.models.permissions_v2 import PermissionAuditLog
     from k9.models.models import User
+    from k9.services.audit_archive_service import AuditArchiveService
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
@@ -2126,15 +2115,17 @@ def get_user_permission_audit(user_id):
         target_user_id=user_id
     ).order_by(PermissionAuditLog.created_at.desc())
     
-    total = query.count()
-    logs = query.offset((page - 1) * per_page).limit(per_page).all()
+    # Hot rows from PostgreSQL followed by archived segments
+    pagination = AuditArchiveService.paginate('permission', query, page, per_page, user_id=user_id)
+    total = pagination.total
+    logs = pagination.items
     
     actor_ids = {log.changed_by_id for log in logs if log.changed_by_id}
-    actors = {u.id: u for u in User.query.filter(User.id.in_(actor_ids)).all()} if actor_ids else {}
+    actors = {str(u.id): u for u in User.query.filter(User.id.in_(actor_ids)).all()} if actor_ids else {}
     
     result = []
     for log in logs:
-        actor = actors.get(log.changed_by_id) if log.changed_by_id else None
+        actor = actors.get(str(log.changed_by_id)) if log.changed_by_id else None
         result.append({
             'timestamp': log.created_at.isoformat() if log.created_at else None,
             'permission_key': log.details,
@@ -2410,34 +2401,42 @@ def access_control_hub():
 @admin_required
 def access_control_users():
     """API: Get all users with their current V2 roles"""
-    from k9.models.permissions_v2 import Role, UserRoleAssignment, RoleType
+    from k9.services.access_matrix_service import AccessMatrixService
     
-    users = User.query.order_by(User.full_name).all()
+    rows = AccessMatrixService.build_rows(User.query.order_by(User.full_name).all())
     
-    users_data = []
-    for user in users:
-        assignment = UserRoleAssignment.query.filter_by(
-            user_id=user.id,
-            is_active=True,
-            project_id=None
-        ).first()
-        
-        v2_role = None
-        if assignment and assignment.role:
-            v2_role = assignment.role.name
-        
-        users_data.append({
-            'id': str(user.id),
-            'username': user.username,
-            'full_name': user.full_name,
-            'email': user.email,
-            'v2_role': v2_role,
-            'legacy_role': user.role.value if user.role else None
-        })
+    users_data = [{
+        'id': row['id'],
+        'username': row['username'],
+        'full_name': row['full_name'],
+        'email': row['email'],
+        'v2_role': row['v2_role'],
+        'v2_roles': row['v2_roles'],
+        'legacy_role': row['legacy_role']
+    } for row in rows]
     
     return jsonify({'users': users_data})
 
 
+@admin_bp.route('/access-control/api/matrix')
+@login_required
+@admin_required
+def access_control_matrix():
+    """API: Paginated matrix of users with roles, overrides and effective permissions"""
+    from k9.services.access_matrix_service import AccessMatrixService
+    
+    result, error = AccessMatrixService.get_page(
+        page=request.args.get('page', 1),
+        per_page=request.args.get('per_page'),
+        search=request.args.get('search', '').strip() or None,
+        active_only=request.args.get('active_only') == '1'
+    )
+    if error:
+        return jsonify({'error': error}), 400
+    
+    return jsonify(result)
+
+
 @admin_bp.route('/access-control/api/user/<user_id>/permissions')
 @login_required
 @admin_required
@@ -2613,8 +2612,8 @@ def access_control_save():
         
         db.session.commit()
         
-        # Update user.permissions_updated_at to trigger session-based permission reload
-        user.permissions_updated_at = datetime.utcnow()
+        # Bump the user's permission version to trigger session-based permission reload
+        user.touch_permissions()
         db.session.commit()
         
         # Clear the permission cache for this user so changes take effect immediately
@@ -19,6 +19,11 @@ def is_safe_url(target):
     return test_url.scheme in ('http', 'https') and \
            ref_url.netloc == test_url.netloc
 
+def regenerate_session():
+    """Move the session to a new ID (server-side sessions) to prevent session fixation"""
+    regenerate = getattr(session, 'regenerate', None)
+    if regenerate is not None:
+        regenerate()
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 @csrf.exempt
@@ -110,6 +115,7 @@ def login():
         
         # Successful login
         AccountLockoutManager.reset_failed_attempts(user)
+        regenerate_session()
         login_user(user, remember=remember)
         user.last_login = datetime.utcnow()
         db.session.commit()
@@ -159,6 +165,7 @@ def logout():
     session.pop('admin_mode', None)
     session.pop('pending_user_id', None)
     logout_user()
+    regenerate_session()
     flash('تم تسجيل الخروج بنجاح', 'success')
     return redirect(url_for('main.index'))
 
@@ -619,31 +619,19 @@ def new_report():
             prepopulated_data['incidents'] = incidents
     
     # Get available dogs (project dogs or all if no project)
-    available_dogs = []
+    from k9.models.models import DogStatus
+    from k9.services.picker_service import PickerService
     if current_user.project_id:
-        # Dogs are assigned to handlers, not directly to projects
-        # Get all handlers in this project
-        handlers_in_project = User.query.filter_by(
-            role=UserRole.HANDLER,
-            project_id=current_user.project_id
-        ).all()
-        
-        # Get dogs assigned to these handlers
-        handler_ids = [h.id for h in handlers_in_project]
-        if handler_ids:
-            available_dogs = Dog.query.filter(
-                Dog.assigned_to_user_id.in_(handler_ids),
-                Dog.current_status == 'ACTIVE'
-            ).all()
-        
-        # Also include unassigned dogs
-        unassigned_dogs = Dog.query.filter(
-            Dog.assigned_to_user_id.is_(None),
-            Dog.current_status == 'ACTIVE'
-        ).all()
-        available_dogs = available_dogs + unassigned_dogs
+        # Dogs are assigned to handlers, not directly to projects:
+        # dogs of the project's handlers plus unassigned dogs, in one query
+        available_dogs = PickerService.dog_options(
+            [current_user.project_id],
+            statuses=(DogStatus.ACTIVE,),
+            sources=('handler',),
+            include_unassigned=True
+        )
     else:
-        available_dogs = Dog.query.filter_by(current_status='ACTIVE').all()
+        available_dogs = PickerService.dog_options(statuses=(DogStatus.ACTIVE,))
     
     # Get shifts
     shifts = Shift.query.all()
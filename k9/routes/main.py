@@ -33,6 +33,7 @@ from k9.utils.permissions_new import (
 )
 from k9.utils.validators import validate_yemen_phone
 from k9.utils.template_utils import get_base_template, is_pm_view
+from k9.utils.db_runtime import export_route
 from k9.utils.pm_scoping import get_scoped_dogs, get_scoped_employees, get_scoped_projects, is_pm, is_admin
 from sqlalchemy.exc import IntegrityError
 import os
@@ -3084,6 +3085,7 @@ def reports_simple():
 
 @main_bp.route('/reports/generate', methods=['POST'])
 @login_required
+@export_route
 def reports_generate():
     """
     Generate a report based on type, optional date range and optional filters.
@@ -3118,8 +3120,14 @@ def reports_generate():
     
     try:
         if export_format == 'excel':
-            from k9.utils.utils import generate_excel_report
-            filename = generate_excel_report(report_type, start_date, end_date, current_user, filters)
+            from k9.utils.utils import stream_excel_report
+            return stream_excel_report(report_type, start_date, end_date, current_user, filters)
+        elif export_format in ('csv', 'ndjson'):
+            response, error = _stream_registry_report(report_type, export_format, filters, start_date, end_date)
+            if error:
+                flash(error, 'error')
+                return redirect(url_for('main.reports_hub'))
+            return response
         else:
             # Use unified data service - single source of truth
             data_service = get_report_data_service()
@@ -3154,6 +3162,126 @@ def reports_generate():
         flash(f'تعذّر إنشاء التقرير: {str(e)}', 'error')
         return redirect(url_for('main.reports_hub'))
 
+def _stream_registry_report(report_type, export_format, filters, start_date, end_date, sort=None, limit=None):
+    """Stream a registry report as CSV or NDJSON; returns (response, error)"""
+    from k9.services.report_stream_export import stream_report_export
+    
+    response, error = stream_report_export(report_type, export_format, filters, start_date, end_date, current_user,
+                                           sort=sort, limit=limit)
+    if error:
+        return None, error
+    
+    log_audit(current_user.id, 'EXPORT', 'Report', str(uuid.uuid4()), {
+        'report_type': report_type,
+        'format': export_format,
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        'filters': filters
+    })
+    return response, None
+
+@main_bp.route('/reports/export/<report_type>.<export_format>')
+@login_required
+def reports_stream_export(report_type, export_format):
+    """
+    Stream a registry report as CSV or NDJSON for integrations and analysts.
+    Filters are passed as query parameters (repeat a key for multi-select);
+    sort (e.g. -visit_date) and limit are applied in the database.
+    """
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+    except ValueError:
+        return jsonify({'error': 'صيغة التاريخ غير صحيحة'}), 400
+    
+    filters = {}
+    for field in ['status', 'gender', 'role', 'category', 'visit_type', 'cycle_type']:
+        values = request.args.getlist(field)
+        if values:
+            filters[field] = values
+    for field in ['breed', 'keyword']:
+        value = request.args.get(field)
+        if value:
+            filters[field] = value
+    
+    response, error = _stream_registry_report(report_type, export_format, filters, start_date, end_date,
+                                              sort=request.args.get('sort'),
+                                              limit=request.args.get('limit', type=int))
+    if error:
+        return jsonify({'error': error}), 400
+    return response
+
+@main_bp.route('/reports/batch/<report_type>', methods=['POST'])
+@login_required
+def reports_batch_export(report_type):
+    """
+    Start building per-dog PDF reports for a whole project as one ZIP archive.
+    Parameters: project_id (required), start_date, end_date.
+    The bundle is rendered in the background: poll status_url, then fetch download_url.
+    """
+    from k9.utils.pm_scoping import can_access_project
+    from k9.services.batch_pdf_export import BatchPDFExportService
+    
+    project_id = request.values.get('project_id')
+    if not project_id:
+        return jsonify({'error': 'المشروع مطلوب'}), 400
+    if not can_access_project(project_id):
+        abort(403)
+    try:
+        start_date = datetime.strptime(request.values['start_date'], '%Y-%m-%d').date() if request.values.get('start_date') else None
+        end_date = datetime.strptime(request.values['end_date'], '%Y-%m-%d').date() if request.values.get('end_date') else None
+    except ValueError:
+        return jsonify({'error': 'صيغة التاريخ غير صحيحة'}), 400
+    
+    bundle_id, error = BatchPDFExportService.start_bundle(
+        report_type, project_id, start_date=start_date, end_date=end_date,
+        user=current_user, max_workers=current_app.config.get('BATCH_PDF_WORKERS')
+    )
+    if error:
+        return jsonify({'error': error}), 429 if error == BatchPDFExportService.BUSY_ERROR else 400
+    
+    return jsonify({
+        'bundle_id': bundle_id,
+        'status_url': url_for('main.reports_batch_status', bundle_id=bundle_id),
+        'download_url': url_for('main.reports_batch_download', bundle_id=bundle_id)
+    }), 202
+
+@main_bp.route('/reports/batch/bundles/<bundle_id>')
+@login_required
+def reports_batch_status(bundle_id):
+    """Progress of a batch bundle started by the current user"""
+    from k9.services.batch_pdf_export import BatchPDFExportService
+    
+    status, error = BatchPDFExportService.bundle_status(bundle_id, current_user)
+    if error:
+        return jsonify({'error': error}), 404
+    return jsonify({key: status[key] for key in ('state', 'done', 'total', 'error')})
+
+@main_bp.route('/reports/batch/bundles/<bundle_id>.zip')
+@login_required
+def reports_batch_download(bundle_id):
+    """Download a finished batch bundle"""
+    from flask import send_file
+    from k9.services.batch_pdf_export import BatchPDFExportService
+    
+    status, error = BatchPDFExportService.bundle_status(bundle_id, current_user)
+    if error:
+        return jsonify({'error': error}), 404
+    path, error = BatchPDFExportService.bundle_path(bundle_id, current_user)
+    if error:
+        return jsonify({'error': error}), 409
+    
+    log_audit(current_user.id, 'EXPORT', 'Report', str(uuid.uuid4()), {
+        'report_type': status['report_type'],
+        'format': 'zip',
+        'project_id': status['project_id'],
+        'documents': status['done'],
+        'start_date': status['start_date'],
+        'end_date': status['end_date']
+    })
+    filename = f"{status['report_type']}_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return send_file(path, mimetype='application/zip', as_attachment=True, download_name=filename)
+
 @main_bp.route('/reports/preview', methods=['POST'])
 @login_required
 def reports_preview():
@@ -3192,7 +3320,9 @@ def reports_preview():
         filters=filters,
         start_date=start_date,
         end_date=end_date,
-        user=current_user
+        user=current_user,
+        sort=request.form.get('sort'),
+        limit=request.form.get('limit', type=int)
     )
     
     # Handle legacy report types not in registry (training_trainer_daily)
@@ -150,15 +150,15 @@ def edit(schedule_id):
         return redirect(url_for('schedule.edit', schedule_id=schedule_id))
     
     # GET request
-    from k9.models.models import UserRole, ProjectLocation
-    # Get handler users for the project
-    handlers = User.query.filter_by(
-        role=UserRole.HANDLER,
-        project_id=schedule.project_id,
-        is_active=True
-    ).all()
-    
-    dogs = Dog.query.filter_by(current_status='ACTIVE').all()
+    from k9.models.models import DogStatus, ProjectLocation
+    from k9.services.picker_service import PickerService
+    # Active handler users and dogs for the project (plus unassigned dogs)
+    handlers = PickerService.handler_options([schedule.project_id])
+    dogs = PickerService.dog_options(
+        [schedule.project_id],
+        statuses=(DogStatus.ACTIVE,),
+        include_unassigned=True
+    )
     shifts = Shift.query.filter_by(is_active=True).all()
     locations = ProjectLocation.query.filter_by(project_id=schedule.project_id).all()
     
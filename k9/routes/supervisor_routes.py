@@ -2,6 +2,8 @@
 مسارات واجهة المشرف
 Supervisor Interface Routes - Daily Schedule Management
 """
+import uuid
+
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from datetime import date, datetime, timedelta
@@ -100,36 +102,28 @@ def schedule_create():
             flash(f'جدول يومي موجود بالفعل لهذا التاريخ ({schedule_date})', 'warning')
             return redirect(url_for('supervisor.schedule_view', schedule_id=str(existing.id)))
         
-        # Create schedule
-        schedule = DailySchedule(
-            date=schedule_date,
-            project_id=project_id,
-            notes=notes,
-            created_by_user_id=current_user.id
-        )
-        # status defaults to ScheduleStatus.OPEN automatically
-        db.session.add(schedule)
-        db.session.flush()
-        
-        # Add schedule items
+        # Collect schedule items and write the whole day in one transaction
         handler_ids = request.form.getlist('handler_ids[]')
         dog_ids = request.form.getlist('dog_ids[]')
         shift_ids = request.form.getlist('shift_ids[]')
         location_ids = request.form.getlist('location_ids[]')
         
+        items = []
         for i in range(len(handler_ids)):
             if handler_ids[i] and dog_ids[i] and shift_ids[i]:
-                location_id = location_ids[i] if i < len(location_ids) and location_ids[i] else None
-                item = DailyScheduleItem(
-                    daily_schedule_id=schedule.id,
-                    handler_user_id=handler_ids[i],
-                    dog_id=dog_ids[i],
-                    shift_id=shift_ids[i],
-                    location_id=location_id
-                )
-                db.session.add(item)
+                items.append({
+                    'handler_user_id': handler_ids[i],
+                    'dog_id': dog_ids[i],
+                    'shift_id': shift_ids[i],
+                    'location_id': location_ids[i] if i < len(location_ids) and location_ids[i] else None
+                })
         
-        db.session.commit()
+        schedule, error = DailyScheduleService.save_schedule(
+            schedule_date, project_id, current_user.id, items, notes=notes
+        )
+        if error:
+            flash(error, 'danger')
+            return redirect(url_for('supervisor.schedule_create'))
         
         # NOTE: Notifications for schedules are DISABLED - schedules appear only in handler dashboard
         # Daily schedules should appear in the handler's dashboard section, NOT in notifications
@@ -232,6 +226,123 @@ def schedule_unlock(schedule_id):
     return jsonify({'success': success, 'message': message})
 
 
+@supervisor_bp.route('/schedules/bulk', methods=['POST'])
+@login_required
+@require_permission('supervisor.schedules.create')
+def schedules_bulk_save():
+    """API: إنشاء أو استبدال جداول يوم أو أسبوع كامل في طلب واحد
+    
+    JSON body:
+        project_id: المشروع (يُحدد تلقائياً لمدير المشروع)
+        days: {"YYYY-MM-DD": [{handler_user_id, dog_id, shift_id, location_id}, ...]}
+        notes: ملاحظات اختيارية
+        replace: استبدال عناصر الجداول الموجودة
+    """
+    data = request.get_json(silent=True) or {}
+    
+    success, result = get_project_id_for_user(current_user, data.get('project_id'))
+    if not success:
+        return jsonify({'success': False, 'error': result}), 400
+    project_id = result
+    
+    try:
+        days = {
+            datetime.strptime(day, '%Y-%m-%d').date(): items or []
+            for day, items in (data.get('days') or {}).items()
+        }
+    except (ValueError, TypeError, AttributeError):
+        return jsonify({'success': False, 'error': 'صيغة التاريخ غير صحيحة'}), 400
+    
+    schedules, error = DailyScheduleService.save_schedules_bulk(
+        project_id, current_user.id, days,
+        notes=data.get('notes'), replace=bool(data.get('replace'))
+    )
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    return jsonify({
+        'success': True,
+        'message': f'تم حفظ {len(schedules)} جدول بنجاح',
+        'schedules': [{'id': str(s.id), 'date': s.date.isoformat()} for s in schedules]
+    })
+
+
+@supervisor_bp.route('/schedules/copy', methods=['POST'])
+@login_required
+@require_permission('supervisor.schedules.create')
+def schedules_copy_forward():
+    """API: نسخ جدول الأمس أو الأسبوع الماضي
+    
+    JSON body:
+        project_id: المشروع (يُحدد تلقائياً لمدير المشروع)
+        target_date: أول يوم هدف (YYYY-MM-DD)
+        source: yesterday | last_week
+        days: عدد الأيام الهدف (1 - 7)
+        replace: استبدال عناصر الجداول الموجودة
+    """
+    data = request.get_json(silent=True) or {}
+    
+    success, result = get_project_id_for_user(current_user, data.get('project_id'))
+    if not success:
+        return jsonify({'success': False, 'error': result}), 400
+    project_id = result
+    
+    try:
+        target_date = datetime.strptime(data.get('target_date') or '', '%Y-%m-%d').date()
+        days = min(max(int(data.get('days', 1)), 1), 7)
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'بيانات النسخ غير صحيحة'}), 400
+    
+    schedules, error = DailyScheduleService.copy_forward(
+        project_id, target_date, current_user.id,
+        source=data.get('source', 'yesterday'), days=days, replace=bool(data.get('replace'))
+    )
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    return jsonify({
+        'success': True,
+        'message': f'تم نسخ {len(schedules)} جدول بنجاح',
+        'schedules': [{'id': str(s.id), 'date': s.date.isoformat()} for s in schedules]
+    })
+
+
+@supervisor_bp.route('/schedules/bulk-lock', methods=['POST'])
+@login_required
+@require_permission('supervisor.schedules.lock')
+def schedules_bulk_lock():
+    """API: قفل أو إلغاء قفل مجموعة جداول دفعة واحدة"""
+    data = request.get_json(silent=True) or {}
+    schedule_ids = data.get('schedule_ids') or []
+    action = data.get('action', 'lock')
+    
+    if action not in ('lock', 'unlock'):
+        return jsonify({'success': False, 'error': 'إجراء غير معروف'}), 400
+    
+    if not isinstance(schedule_ids, list) or not schedule_ids:
+        return jsonify({'success': False, 'error': 'لم يتم تحديد أي جدول'}), 400
+    try:
+        schedule_ids = sorted({str(uuid.UUID(str(schedule_id))) for schedule_id in schedule_ids})
+    except ValueError:
+        return jsonify({'success': False, 'error': 'معرف جدول غير صالح'}), 400
+    
+    schedule_projects = dict(db.session.query(DailySchedule.id, DailySchedule.project_id).filter(
+        DailySchedule.id.in_(schedule_ids)
+    ).all())
+    if len(schedule_projects) != len(schedule_ids):
+        return jsonify({'success': False, 'error': 'بعض الجداول المحددة غير موجودة'}), 400
+    
+    # PMs may only touch schedules of their own project
+    project_id = None
+    if current_user.role == UserRole.PROJECT_MANAGER and current_user.project_id:
+        project_id = str(current_user.project_id)
+        if any(str(pid) != project_id for pid in schedule_projects.values()):
+            return jsonify({'success': False, 'error': 'غير مصرح لك'}), 403
+    
+    count = DailyScheduleService.set_schedules_locked(schedule_ids, action == 'lock', project_id=project_id)
+    return jsonify({'success': True, 'count': count, 'message': f'تم تحديث {count} جدول'})
+
+
 @supervisor_bp.route('/schedules/<schedule_id>/delete', methods=['POST'])
 @login_required
 @require_permission('supervisor.schedules.delete')
@@ -105,7 +105,8 @@ def admin_create():
         return redirect(url_for('tasks.admin_index'))
     
     # GET - show form
-    handlers = User.query.filter_by(role=UserRole.HANDLER, active=True).all()
+    from k9.services.picker_service import PickerService
+    handlers = PickerService.handler_options()
     
     # Get projects for the dropdown
     from k9.models.models import Project
@@ -280,7 +280,8 @@ def log_mode_switch(from_mode, to_mode, outcome=AccessOutcome.SUCCESS):
     )
 
 
-def get_audit_logs(user_id=None, action_type=None, start_date=None, end_date=None, limit=100):
+def get_audit_logs(user_id=None, action_type=None, start_date=None, end_date=None, limit=100,
+                   include_archived=True):
     """
     Query access audit logs with filters
     
@@ -290,9 +291,10 @@ def get_audit_logs(user_id=None, action_type=None, start_date=None, end_date=Non
         start_date: Filter logs after this date
         end_date: Filter logs before this date
         limit: Maximum number of logs to return
+        include_archived: Continue into the cold archive when hot rows run out
         
     Returns:
-        List of AccessAuditLog objects
+        List of AccessAuditLog objects (archived entries as ArchivedLogRecord)
     """
     query = AccessAuditLog.query
     
@@ -313,7 +315,17 @@ def get_audit_logs(user_id=None, action_type=None, start_date=None, end_date=Non
     if limit:
         query = query.limit(limit)
     
-    return query.all()
+    logs = query.all()
+    
+    # Archived rows are all older than the hot ones, so they follow in order
+    if include_archived and (not limit or len(logs) < limit):
+        from k9.services.audit_archive_service import AuditArchiveService
+        logs.extend(AuditArchiveService.query(
+            'access', user_id=user_id, action=action_type, start=start_date, end=end_date,
+            limit=(limit - len(logs)) if limit else None
+        ))
+    
+    return logs
 
 
 def get_user_recent_activity(user_id, limit=50):
@@ -0,0 +1,193 @@
+"""
+Access Control Matrix Service
+Builds the users × roles × overrides matrix with set-based queries
+
+The matrix for any set of users is loaded in three queries (users, global
+role assignments, global overrides). Each distinct role is expanded to its
+concrete permission keys once per process, so building the matrix costs
+set unions instead of per-user pattern matching.
+"""
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+
+from app import db
+from k9.models.models import User
+from k9.models.permissions_v2 import Role, UserRoleAssignment, PermissionOverride, PermissionKey, ROLE_PERMISSIONS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+EXPORT_HEADERS = ['User', 'Username', 'Role', 'Access Role', 'Permissions']
+
+
+@lru_cache(maxsize=1)
+def all_permission_keys():
+    """Every concrete permission key declared on PermissionKey"""
+    keys = set()
+    for attr_name in dir(PermissionKey):
+        if not attr_name.startswith('_'):
+            value = getattr(PermissionKey, attr_name)
+            if isinstance(value, str) and '.' in value:
+                keys.add(value)
+    return frozenset(keys)
+
+
+@lru_cache(maxsize=None)
+def expand_role(role_name):
+    """Concrete permission keys granted by a role, with wildcards expanded"""
+    universe = all_permission_keys()
+    expanded = set()
+    for pattern in ROLE_PERMISSIONS.get(role_name, []):
+        if pattern == '*':
+            return universe
+        if pattern.endswith('.*'):
+            prefix = pattern[:-1]
+            expanded.update(key for key in universe if key.startswith(prefix))
+        else:
+            expanded.add(pattern)
+    return frozenset(expanded)
+
+
+class AccessMatrixService:
+    """Set-based loading of users with their roles, overrides and effective permissions"""
+
+    @staticmethod
+    def _user_query(search=None, active_only=False):
+        query = User.query
+        if active_only:
+            query = query.filter(User.active == True)
+        if search:
+            pattern = f'%{search}%'
+            query = query.filter(db.or_(
+                User.full_name.ilike(pattern),
+                User.username.ilike(pattern),
+                User.email.ilike(pattern)
+            ))
+        return query.order_by(User.full_name, User.id)
+
+    @staticmethod
+    def build_rows(users):
+        """Matrix rows for the given users: two queries regardless of how many users"""
+        if not users:
+            return []
+
+        user_ids = [user.id for user in users]
+        now = datetime.utcnow()
+
+        assignments = db.session.query(UserRoleAssignment.user_id, Role.name).join(
+            Role, Role.id == UserRoleAssignment.role_id
+        ).filter(
+            UserRoleAssignment.user_id.in_(user_ids),
+            UserRoleAssignment.is_active == True,
+            UserRoleAssignment.project_id.is_(None),
+            db.or_(UserRoleAssignment.expires_at.is_(None), UserRoleAssignment.expires_at > now)
+        ).order_by(UserRoleAssignment.granted_at.desc()).all()
+
+        # Every active role counts (most recently granted first), as in PermissionService
+        roles_by_user = {}
+        for user_id, role_name in assignments:
+            user_roles = roles_by_user.setdefault(str(user_id), [])
+            if role_name not in user_roles:
+                user_roles.append(role_name)
+
+        overrides = db.session.query(
+            PermissionOverride.user_id, PermissionOverride.permission_key, PermissionOverride.is_granted
+        ).filter(
+            PermissionOverride.user_id.in_(user_ids),
+            PermissionOverride.project_id.is_(None),
+            db.or_(PermissionOverride.expires_at.is_(None), PermissionOverride.expires_at >= now)
+        ).all()
+
+        overrides_by_user = {}
+        for user_id, permission_key, is_granted in overrides:
+            overrides_by_user.setdefault(str(user_id), {})[permission_key] = is_granted
+
+        rows = []
+        for user in users:
+            key = str(user.id)
+            role_names = roles_by_user.get(key, [])
+            user_overrides = overrides_by_user.get(key, {})
+
+            effective = set().union(*(expand_role(role_name) for role_name in role_names))
+            effective.update(k for k, granted in user_overrides.items() if granted)
+            effective.difference_update(k for k, granted in user_overrides.items() if not granted)
+
+            rows.append({
+                'id': key,
+                'username': user.username,
+                'full_name': user.full_name,
+                'email': user.email,
+                'v2_role': role_names[0] if role_names else None,
+                'v2_roles': role_names,
+                'legacy_role': user.role.value if user.role else None,
+                'overrides': user_overrides,
+                'permissions': sorted(effective)
+            })
+        return rows
+
+    @staticmethod
+    def get_page(page=1, per_page=DEFAULT_PER_PAGE, search=None, active_only=False):
+        """
+        One page of the matrix
+
+        Returns:
+            tuple: (dict with users/total/page/per_page/pages, error message or None)
+        """
+        try:
+            page = max(int(page or 1), 1)
+            per_page = min(max(int(per_page or DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+        except (TypeError, ValueError):
+            return None, "قيم الترقيم غير صالحة"
+
+        try:
+            query = AccessMatrixService._user_query(search, active_only)
+            total = query.order_by(None).count()
+            users = query.offset((page - 1) * per_page).limit(per_page).all()
+            return {
+                'users': AccessMatrixService.build_rows(users),
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'pages': (total + per_page - 1) // per_page
+            }, None
+        except Exception as e:
+            logger.error(f"Error building access matrix page: {e}")
+            return None, "تعذر تحميل مصفوفة الصلاحيات"
+
+    @staticmethod
+    def iter_rows(active_only=True, chunk_size=500, search=None):
+        """All matrix rows, loaded chunk by chunk"""
+        query = AccessMatrixService._user_query(search, active_only)
+        offset = 0
+        while True:
+            users = query.offset(offset).limit(chunk_size).all()
+            if not users:
+                return
+            yield from AccessMatrixService.build_rows(users)
+            offset += chunk_size
+
+    @staticmethod
+    def export_rows(rows):
+        """Matrix rows flattened to EXPORT_HEADERS order"""
+        for row in rows:
+            yield [
+                row['full_name'], row['username'], row['legacy_role'] or '',
+                ', '.join(row['v2_roles']), ', '.join(row['permissions'])
+            ]
+
+    @staticmethod
+    def excel_writer():
+        from k9.utils.excel_exporter import StreamingExcelWriter
+        return StreamingExcelWriter(EXPORT_HEADERS, sheet_name="Permissions", rtl=False,
+                                    column_widths=[30, 20, 20, 20, 80])
+
+    @staticmethod
+    def write_xlsx(output, rows):
+        """Write matrix rows to a write-only workbook (rows are not kept in memory)"""
+        writer = AccessMatrixService.excel_writer()
+        writer.write_rows(AccessMatrixService.export_rows(rows))
+        writer.save(output)
+        return output
@@ -0,0 +1,433 @@
+"""
+Audit Archive Service
+Moves aged audit rows out of PostgreSQL into compressed, date-bucketed JSONL
+segments and serves them back alongside the hot rows.
+
+Layout under AUDIT_ARCHIVE_DIR:
+    <source>/<YYYY>/<YYYY-MM-DD>-<token>.jsonl.gz   rows of one day, newest first
+    <source>/<YYYY>/<YYYY-MM-DD>-<token>.idx.json   per-segment index (count,
+                                                    time range, per-user and
+                                                    per-action counts)
+"""
+
+import os
+import gzip
+import json
+import uuid
+import logging
+from datetime import datetime, date, timedelta
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete
+
+from app import db
+from config import Config
+from k9.models.models import AccessAuditLog, AccessActionType, AccessOutcome, User
+from k9.models.permissions_v2 import PermissionAuditLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_BATCH_SIZE = 5000
+
+# Archivable tables and how their rows are indexed and rehydrated
+ARCHIVE_SOURCES = {
+    'access': {
+        'model': AccessAuditLog,
+        'user_field': 'user_id',
+        'action_field': 'action_type',
+        'enums': {'action_type': AccessActionType, 'outcome': AccessOutcome},
+        'relations': {'user': 'user_id'},
+    },
+    'permission': {
+        'model': PermissionAuditLog,
+        'user_field': 'target_user_id',
+        'action_field': 'action',
+        'enums': {},
+        'relations': {'target_user': 'target_user_id', 'changed_by': 'changed_by_id'},
+    },
+}
+
+
+class ArchivedLogRecord:
+    """Read-only archived audit row with the same attribute access as the ORM model"""
+
+    is_archived = True
+
+    def __init__(self, data: Dict[str, Any]):
+        self.__dict__.update(data)
+
+    def __getattr__(self, name):
+        # Columns or relationships that were not archived read as empty
+        return None
+
+
+class AuditPagination:
+    """Pagination over hot and archived rows exposing the Flask-SQLAlchemy pagination API"""
+
+    def __init__(self, items: List[Any], page: int, per_page: int, total: int):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def pages(self) -> int:
+        return (self.total + self.per_page - 1) // self.per_page if self.per_page else 0
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    @property
+    def prev_num(self) -> Optional[int]:
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self) -> Optional[int]:
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        last = 0
+        for num in range(1, self.pages + 1):
+            if (num <= left_edge
+                    or self.page - left_current - 1 < num < self.page + right_current
+                    or num > self.pages - right_edge):
+                if last + 1 != num:
+                    yield None
+                yield num
+                last = num
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    """Accept datetime, date or ISO string filters as used by the audit views"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value))
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+class AuditArchiveService:
+    """خدمة أرشفة سجلات التدقيق القديمة"""
+
+    @staticmethod
+    def archive_dir() -> str:
+        """Root directory of the cold archive (app config overrides config.Config)"""
+        return current_app.config.get('AUDIT_ARCHIVE_DIR') or Config.AUDIT_ARCHIVE_DIR
+
+    @staticmethod
+    def archive_after_days() -> int:
+        """Archive age in days; a configured 0 archives everything up to now"""
+        days = current_app.config.get('AUDIT_ARCHIVE_AFTER_DAYS')
+        if days is None:
+            days = Config.AUDIT_ARCHIVE_AFTER_DAYS
+        return DEFAULT_ARCHIVE_AFTER_DAYS if days is None else int(days)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def archive_source(source: str, older_than_days: Optional[int] = None,
+                       batch_size: int = ARCHIVE_BATCH_SIZE) -> Tuple[int, Optional[str]]:
+        """
+        Move rows older than the cutoff from one audit table into segments
+
+        Each batch is written and fsynced before its rows are deleted; if the
+        delete fails the batch's segments are removed again.
+
+        Returns:
+            (number of rows archived, error message or None)
+        """
+        spec = ARCHIVE_SOURCES.get(source)
+        if spec is None:
+            return 0, f'مصدر أرشفة غير معروف: {source}'
+
+        model = spec['model']
+        days = AuditArchiveService.archive_after_days() if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        archived = 0
+
+        while True:
+            rows = model.query.filter(model.created_at < cutoff).order_by(
+                model.created_at
+            ).limit(batch_size).all()
+            if not rows:
+                break
+
+            by_day: Dict[date, List[Dict[str, Any]]] = {}
+            for row in rows:
+                data = {c.key: _serialize(getattr(row, c.key)) for c in model.__table__.columns}
+                by_day.setdefault(row.created_at.date(), []).append(data)
+            ids = [row.id for row in rows]
+            for row in rows:
+                db.session.expunge(row)
+
+            written = []
+            try:
+                for day, day_rows in by_day.items():
+                    written.extend(AuditArchiveService._write_segment(source, spec, day, day_rows))
+                db.session.execute(
+                    delete(model).where(model.id.in_(ids)),
+                    execution_options={'synchronize_session': False}
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                for path in written:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                logger.error(f"Audit archive of {source} failed: {e}")
+                return archived, f'فشل أرشفة السجلات: {str(e)}'
+
+            archived += len(ids)
+            if len(rows) < batch_size:
+                break
+
+        if archived:
+            logger.info(f"Archived {archived} {source} audit rows older than {cutoff:%Y-%m-%d}")
+        return archived, None
+
+    @staticmethod
+    def archive_all(older_than_days: Optional[int] = None) -> Dict[str, int]:
+        """Archive every registered audit table; returns rows archived per source"""
+        return {
+            source: AuditArchiveService.archive_source(source, older_than_days)[0]
+            for source in ARCHIVE_SOURCES
+        }
+
+    @staticmethod
+    def _write_segment(source: str, spec: Dict, day: date, rows: List[Dict[str, Any]]) -> List[str]:
+        """Write one compressed segment plus its index; returns the paths written"""
+        directory = os.path.join(AuditArchiveService.archive_dir(), source, f'{day:%Y}')
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f'{day.isoformat()}-{uuid.uuid4().hex[:12]}')
+        segment_path = f'{base}.jsonl.gz'
+        index_path = f'{base}.idx.json'
+
+        rows = sorted(rows, key=lambda r: r['created_at'], reverse=True)
+        users: Dict[str, int] = {}
+        actions: Dict[str, int] = {}
+        for row in rows:
+            user = row.get(spec['user_field'])
+            action = row.get(spec['action_field'])
+            users[str(user)] = users.get(str(user), 0) + 1
+            actions[str(action)] = actions.get(str(action), 0) + 1
+
+        index = {
+            'source': source,
+            'day': day.isoformat(),
+            'segment': os.path.basename(segment_path),
+            'count': len(rows),
+            'min_created_at': rows[-1]['created_at'],
+            'max_created_at': rows[0]['created_at'],
+            'users': users,
+            'actions': actions,
+        }
+
+        written = []
+        for path, writer in (
+            (segment_path, lambda tmp: AuditArchiveService._write_rows(tmp, rows)),
+            (index_path, lambda tmp: AuditArchiveService._write_json(tmp, index)),
+        ):
+            tmp_path = f'{path}.tmp'
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+            written.append(path)
+        return written
+
+    @staticmethod
+    def _write_rows(path: str, rows: List[Dict[str, Any]]):
+        with open(path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as gz:
+                for row in rows:
+                    gz.write(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+                    gz.write(b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    @staticmethod
+    def _write_json(path: str, data: Dict[str, Any]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _indexes(source: str, start: Optional[datetime], end: Optional[datetime]) -> Dict[str, List[Dict]]:
+        """Segment indexes overlapping the time range, grouped by day (newest day first)"""
+        root = os.path.join(AuditArchiveService.archive_dir(), source)
+        if not os.path.isdir(root):
+            return {}
+
+        by_day: Dict[str, List[Dict]] = {}
+        for year in sorted(os.listdir(root), reverse=True):
+            if start and year.isdigit() and int(year) < start.year:
+                continue
+            if end and year.isdigit() and int(year) > end.year:
+                continue
+            directory = os.path.join(root, year)
+            for name in os.listdir(directory):
+                if not name.endswith('.idx.json'):
+                    continue
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    index = json.load(f)
+                if start and datetime.fromisoformat(index['max_created_at']) < start:
+                    continue
+                if end and datetime.fromisoformat(index['min_created_at']) > end:
+                    continue
+                index['path'] = os.path.join(directory, index['segment'])
+                by_day.setdefault(index['day'], []).append(index)
+        return dict(sorted(by_day.items(), reverse=True))
+
+    @staticmethod
+    def _index_match_count(index: Dict, user_id, action, start, end) -> Optional[int]:
+        """Exact match count from the index alone, or None when the rows must be scanned"""
+        if start and datetime.fromisoformat(index['min_created_at']) < start:
+            return None
+        if end and datetime.fromisoformat(index['max_created_at']) > end:
+            return None
+        if user_id is not None and action is not None:
+            return None
+        if user_id is not None:
+            return index['users'].get(str(user_id), 0)
+        if action is not None:
+            return index['actions'].get(str(action), 0)
+        return index['count']
+
+    @staticmethod
+    def _matching_rows(source: str, index: Dict, user_id, action, start, end) -> Iterator[Dict[str, Any]]:
+        spec = ARCHIVE_SOURCES[source]
+        with gzip.open(index['path'], 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                if user_id is not None and str(row.get(spec['user_field'])) != str(user_id):
+                    continue
+                if action is not None and str(row.get(spec['action_field'])) != str(action):
+                    continue
+                created_at = datetime.fromisoformat(row['created_at'])
+                if start and created_at < start:
+                    continue
+                if end and created_at > end:
+                    continue
+                yield row
+
+    @staticmethod
+    def count(source: str, user_id=None, action=None, start=None, end=None) -> int:
+        """Number of archived rows matching the filters"""
+        action = action.value if isinstance(action, Enum) else action
+        start, end = _to_datetime(start), _to_datetime(end)
+        total = 0
+        for indexes in AuditArchiveService._indexes(source, start, end).values():
+            for index in indexes:
+                known = AuditArchiveService._index_match_count(index, user_id, action, start, end)
+                if known is None:
+                    known = sum(1 for _ in AuditArchiveService._matching_rows(
+                        source, index, user_id, action, start, end))
+                total += known
+        return total
+
+    @staticmethod
+    def query(source: str, user_id=None, action=None, start=None, end=None,
+              offset: int = 0, limit: Optional[int] = None) -> List[ArchivedLogRecord]:
+        """
+        Archived rows matching the filters, newest first
+
+        Days whose match count is known from the index are skipped without
+        decompressing them while consuming the offset.
+        """
+        spec = ARCHIVE_SOURCES[source]
+        action = action.value if isinstance(action, Enum) else action
+        start, end = _to_datetime(start), _to_datetime(end)
+        results: List[Dict[str, Any]] = []
+
+        for indexes in AuditArchiveService._indexes(source, start, end).values():
+            if limit is not None and len(results) >= limit:
+                break
+
+            known = [AuditArchiveService._index_match_count(i, user_id, action, start, end) for i in indexes]
+            if offset and None not in known and sum(known) <= offset:
+                offset -= sum(known)
+                continue
+
+            day_rows = []
+            for index in indexes:
+                day_rows.extend(AuditArchiveService._matching_rows(source, index, user_id, action, start, end))
+            day_rows.sort(key=lambda r: r['created_at'], reverse=True)
+
+            if offset:
+                skipped = min(offset, len(day_rows))
+                day_rows = day_rows[skipped:]
+                offset -= skipped
+            results.extend(day_rows)
+
+        if limit is not None:
+            results = results[:limit]
+        return AuditArchiveService._to_records(spec, results)
+
+    @staticmethod
+    def _to_records(spec: Dict, rows: List[Dict[str, Any]]) -> List[ArchivedLogRecord]:
+        """Rehydrate timestamps, enums and user relationships"""
+        user_ids = {row.get(field) for row in rows for field in spec['relations'].values() if row.get(field)}
+        users = {str(u.id): u for u in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+
+        records = []
+        for row in rows:
+            for field in ('created_at', 'updated_at'):
+                if row.get(field):
+                    row[field] = datetime.fromisoformat(row[field])
+            for field, enum_type in spec['enums'].items():
+                if row.get(field) is not None:
+                    row[field] = enum_type(row[field])
+            for relation, field in spec['relations'].items():
+                row[relation] = users.get(str(row.get(field)))
+            records.append(ArchivedLogRecord(row))
+        return records
+
+    @staticmethod
+    def paginate(source: str, hot_query, page: int, per_page: int, user_id=None, action=None,
+                 start=None, end=None) -> AuditPagination:
+        """
+        Page through hot rows (hot_query, already filtered and ordered newest
+        first) followed by the matching archived rows
+        """
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        hot_total = hot_query.order_by(None).count()
+        cold_total = AuditArchiveService.count(source, user_id=user_id, action=action, start=start, end=end)
+
+        items: List[Any] = []
+        if offset < hot_total:
+            items = hot_query.offset(offset).limit(per_page).all()
+        if len(items) < per_page and cold_total:
+            items.extend(AuditArchiveService.query(
+                source, user_id=user_id, action=action, start=start, end=end,
+                offset=max(0, offset - hot_total), limit=per_page - len(items)
+            ))
+
+        return AuditPagination(items, page, per_page, hot_total + cold_total)
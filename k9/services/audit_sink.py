@@ -0,0 +1,232 @@
+"""
+Audit Sink
+Unified append-only writer for AuditLog rows.
+
+Rows recorded while the current session holds uncommitted business changes
+are added to that session (transactional outbox): they commit atomically with
+the change and disappear with it on rollback, without an extra commit.
+All other rows are appended to an in-process buffer that a background thread
+flushes in batches over its own connection.
+"""
+
+import os
+import json
+import uuid
+import queue
+import atexit
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from flask import current_app, request, has_request_context
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app import db
+from k9.models.models import AuditLog, AuditAction
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 200))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 2.0))  # seconds
+AUDIT_BUFFER_MAX = int(os.environ.get('AUDIT_BUFFER_MAX', 10000))
+
+# Session.info key set once the transaction has flushed business writes
+_PENDING_WRITES_KEY = 'audit_pending_writes'
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_pending_writes(session, flush_context):
+    session.info[_PENDING_WRITES_KEY] = True
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _clear_pending_writes(session, transaction):
+    # Commit, rollback and close all end the root transaction
+    if transaction.parent is None:
+        session.info.pop(_PENDING_WRITES_KEY, None)
+
+
+def _has_uncommitted_changes(session) -> bool:
+    """True when the session's transaction carries business changes not yet committed"""
+    return bool(session.new or session.dirty or session.deleted
+                or session.info.get(_PENDING_WRITES_KEY))
+
+
+def _coerce_action(action):
+    if isinstance(action, str) and action in AuditAction.__members__:
+        return AuditAction[action]
+    return action
+
+
+def _coerce_target_id(target_type, target_id) -> Optional[str]:
+    # Integer user IDs from older callers cannot be stored in the UUID column
+    if target_type == 'User' and isinstance(target_id, (int, str)) and str(target_id).isdigit():
+        return None
+    if target_id is None:
+        return None
+    try:
+        return str(uuid.UUID(str(target_id)))
+    except ValueError:
+        return None
+
+
+def build_audit_row(user_id, action, target_type=None, target_id=None, description=None,
+                    old_values=None, new_values=None, extra_data=None,
+                    target_name=None) -> Optional[Dict[str, Any]]:
+    """
+    Build an AuditLog row as a plain dict
+
+    old_values/new_values/extra_data are kept as native Python structures and
+    encoded once by the JSON column. Returns None when user_id is not a user UUID.
+    """
+    try:
+        user_id = str(uuid.UUID(str(user_id)))
+    except (TypeError, ValueError):
+        return None
+
+    if isinstance(description, dict):
+        description = json.dumps(description, ensure_ascii=False)
+
+    row = {
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'action': _coerce_action(action),
+        'target_type': target_type,
+        'target_id': _coerce_target_id(target_type, target_id),
+        'target_name': target_name,
+        'description': description,
+        'old_values': old_values,
+        'new_values': new_values,
+        'extra_data': extra_data or {},
+        'ip_address': None,
+        'user_agent': None,
+        'session_id': None,
+        'created_at': datetime.utcnow(),
+    }
+
+    if has_request_context():
+        row['ip_address'] = request.remote_addr
+        row['user_agent'] = request.headers.get('User-Agent')
+        row['session_id'] = request.headers.get('X-Session-ID')
+
+    return row
+
+
+class AuditSink:
+    """Buffered audit writer with a background flush thread"""
+
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 max_buffer: int = AUDIT_BUFFER_MAX):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._engine = None
+        self._atexit_registered = False
+
+    def record(self, **kwargs) -> bool:
+        """
+        Record an audit entry (see build_audit_row for arguments)
+
+        Returns:
+            True if the row was accepted, False if it was rejected
+        """
+        row = build_audit_row(**kwargs)
+        if row is None:
+            logger.warning(f"Audit entry skipped - invalid user id: {kwargs.get('user_id')!r}")
+            return False
+
+        session = db.session
+        if _has_uncommitted_changes(session):
+            # Outbox: ride the in-flight business transaction
+            session.add(AuditLog(**row))
+            return True
+
+        if current_app.testing:
+            self._write_batch([row], db.engine)
+            return True
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Back-pressure: write inline rather than drop the entry
+            self._write_batch([row], self._engine)
+        return True
+
+    def flush(self):
+        """Write everything currently buffered"""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        rows = self._drain()
+        while rows:
+            self._write_batch(rows, self._engine)
+            rows = self._drain()
+
+    def _ensure_started(self):
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            # (Re)start after first use or after the worker process was forked
+            self._engine = db.engine
+            self._queue = queue.Queue(maxsize=self.max_buffer)
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name='audit-sink', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        rows = []
+        try:
+            while len(rows) < self.batch_size:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _run(self):
+        while True:
+            rows = [self._queue.get()]
+            # Collect a batch until it is full or the flush interval has passed
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(rows, self._engine)
+
+    def _write_batch(self, rows: List[Dict[str, Any]], engine):
+        """Insert rows with one executemany; fall back to row-by-row so one bad row cannot sink the batch"""
+        with self._flush_lock:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), rows)
+                return
+            except Exception as e:
+                logger.error(f"Audit batch write failed ({len(rows)} rows), retrying individually: {e}")
+
+            for row in rows:
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(AuditLog.__table__), [row])
+                except Exception as e:
+                    logger.error(f"Audit entry dropped ({row.get('action')} {row.get('target_type')}): {e}")
+
+
+audit_sink = AuditSink()
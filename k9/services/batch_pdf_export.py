@@ -0,0 +1,332 @@
+"""
+Batch PDF Export
+Per-dog PDF reports for a whole project, rendered in a process pool and
+bundled into one ZIP archive
+
+The parent process runs a single query for the project's report data and
+groups it per dog; rendering (CPU-bound ReportLab work) is fanned out to a
+ProcessPoolExecutor whose workers register fonts and build paragraph styles
+once at start-up. Finished PDFs are written into the archive as they
+complete, so only in-flight documents are held in memory.
+
+Workers are started with the 'spawn' method and run the functions of
+k9.services.batch_pdf_worker, which imports neither Flask nor the database;
+jobs are handed to them as plain data.
+
+Bundles are built in the background: start_bundle() collects the jobs in
+the request, then a thread renders them into BATCH_EXPORT_DIR/<bundle id>/
+while the client polls bundle_status() and finally downloads the ZIP. A
+file lock per slot caps the bundles rendering at once across all worker
+processes (BATCH_PDF_MAX_CONCURRENT), and bundles larger than
+BATCH_PDF_MAX_RECORDS records are refused.
+"""
+
+import fcntl
+import json
+import os
+import re
+import logging
+import multiprocessing
+import secrets
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from k9.models.models import Dog, Project, ProjectAssignment
+from k9.services.batch_pdf_worker import init_worker, render_job
+from k9.services.report_registry import get_report_registry
+from k9.services.report_data_service import get_report_data_service
+
+logger = logging.getLogger(__name__)
+
+# Report types whose records carry a dog_id and can be split per dog
+BATCH_REPORT_TYPES = ('training', 'veterinary')
+DEFAULT_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+MAX_BATCH_DOGS = 500
+MAX_BATCH_RECORDS = int(os.environ.get('BATCH_PDF_MAX_RECORDS', 20000))
+MAX_CONCURRENT_BUNDLES = int(os.environ.get('BATCH_PDF_MAX_CONCURRENT', 2))
+# Finished (or abandoned) bundles are removed after this many seconds
+BUNDLE_TTL_SECONDS = int(os.environ.get('BATCH_PDF_TTL_SECONDS', 6 * 3600))
+# Progress is written to the status file at most this often (documents)
+STATUS_EVERY = 10
+
+BUNDLE_FILE = 'bundle.zip'
+STATUS_FILE = 'status.json'
+_BUNDLE_ID = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def _safe_filename(text: str) -> str:
+    return re.sub(r'[^\w\-]+', '_', text, flags=re.UNICODE).strip('_') or 'dog'
+
+
+def export_dir() -> str:
+    """Directory holding bundle folders (BATCH_EXPORT_DIR or <instance>/batch_exports)"""
+    return current_app.config.get('BATCH_EXPORT_DIR') or os.path.join(current_app.instance_path, 'batch_exports')
+
+
+def _write_status(folder: str, status: Dict[str, Any]):
+    tmp_path = os.path.join(folder, f'{STATUS_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(folder, STATUS_FILE))
+
+
+def _acquire_slot(base_dir: str):
+    """
+    Lock one of MAX_CONCURRENT_BUNDLES slot files without waiting
+
+    Returns the open slot file (closing it releases the slot, as does the
+    process exiting), or None when every slot is taken.
+    """
+    for slot in range(MAX_CONCURRENT_BUNDLES):
+        handle = open(os.path.join(base_dir, f'.slot-{slot}.lock'), 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except OSError:
+            handle.close()
+    return None
+
+
+def _render_bundle(folder: str, jobs: List[dict], status: Dict[str, Any], slot, max_workers: Optional[int]):
+    """Background thread body: render the bundle into folder, then release the slot"""
+    def progress(done, total):
+        status['done'] = done
+        if done == total or done % STATUS_EVERY == 0:
+            _write_status(folder, status)
+
+    part_path = os.path.join(folder, f'{BUNDLE_FILE}.part')
+    try:
+        with open(part_path, 'wb') as output:
+            BatchPDFExportService.write_zip(jobs, output, max_workers, progress)
+        os.replace(part_path, os.path.join(folder, BUNDLE_FILE))
+        status['state'] = 'done'
+        logger.info(f"Batch PDF bundle {os.path.basename(folder)}: {status['done']} {status['report_type']} reports")
+    except Exception as e:
+        logger.error(f"Batch PDF bundle {os.path.basename(folder)} failed: {e}")
+        status.update(state='failed', error="تعذر إنشاء حزمة التقارير")
+    finally:
+        status['finished_at'] = time.time()
+        _write_status(folder, status)
+        slot.close()
+
+
+class BatchPDFExportService:
+    """Project-wide per-dog PDF bundles"""
+
+    BUSY_ERROR = "يوجد عدد كبير من الحزم قيد الإنشاء، يرجى المحاولة لاحقاً"
+
+    @staticmethod
+    def project_dogs(project_id) -> List[Dog]:
+        """Dogs actively assigned to the project, ordered by code"""
+        return Dog.query.join(
+            ProjectAssignment, ProjectAssignment.dog_id == Dog.id
+        ).filter(
+            ProjectAssignment.project_id == project_id,
+            ProjectAssignment.is_active == True
+        ).order_by(Dog.code, Dog.name).all()
+
+    @staticmethod
+    def build_jobs(report_type, project_id, start_date=None, end_date=None, user=None):
+        """
+        Collect the render jobs for every dog in the project
+
+        Returns:
+            tuple: (list of job dicts, error message or None)
+        """
+        if report_type not in BATCH_REPORT_TYPES:
+            return None, "نوع التقرير غير مدعوم للتصدير المجمع"
+
+        report_def = get_report_registry().get_report(report_type)
+        project = db.session.get(Project, project_id)
+        if not report_def or not project:
+            return None, "المشروع أو نوع التقرير غير موجود"
+
+        dogs = BatchPDFExportService.project_dogs(project.id)
+        if not dogs:
+            return None, "لا توجد كلاب مخصصة لهذا المشروع"
+        if len(dogs) > MAX_BATCH_DOGS:
+            return None, f"عدد الكلاب يتجاوز الحد الأقصى ({MAX_BATCH_DOGS})"
+
+        grouped = get_report_data_service().group_report_records(
+            report_type, 'dog_id',
+            filters={'project_id': project.id, 'dog_ids': [dog.id for dog in dogs]},
+            start_date=start_date, end_date=end_date, user=user
+        )
+
+        username = getattr(user, 'username', '') if user else ''
+        jobs = []
+        for dog in dogs:
+            records = grouped.get(str(dog.id))
+            if not records:
+                continue
+            jobs.append({
+                'filename': f"{_safe_filename(dog.code or dog.name)}_{report_type}.pdf",
+                'report_type': report_type,
+                'records': records,
+                'start_date': start_date,
+                'end_date': end_date,
+                'username': username,
+                'subtitle': f"{project.name} - {dog.name}"
+            })
+        return jobs, None
+
+    @staticmethod
+    def write_zip(jobs: List[dict], output, max_workers: Optional[int] = None,
+                  progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Render jobs in a process pool and write each PDF into a ZIP archive
+        as soon as it is ready. Returns the number of PDFs written.
+        """
+        total = len(jobs)
+        done = 0
+        workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, total or 1))
+
+        # PDFs are already compressed; storing them keeps the archive step cheap
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+            if not jobs:
+                return 0
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=init_worker) as executor:
+                futures = [executor.submit(render_job, job) for job in jobs]
+                for future in as_completed(futures):
+                    filename, content = future.result()
+                    archive.writestr(filename, content)
+                    done += 1
+                    if progress:
+                        progress(done, total)
+        return done
+
+    @staticmethod
+    def export_project_bundle(report_type, project_id, output, start_date=None, end_date=None,
+                              user=None, max_workers=None, progress=None):
+        """
+        Build the per-dog PDF bundle for a project into output
+
+        Returns:
+            tuple: (number of PDFs written, error message or None)
+        """
+        jobs, error = BatchPDFExportService.build_jobs(report_type, project_id, start_date, end_date, user)
+        if error:
+            return 0, error
+        if not jobs:
+            return 0, "لا توجد بيانات في الفترة المحددة"
+
+        try:
+            count = BatchPDFExportService.write_zip(jobs, output, max_workers, progress)
+        except Exception as e:
+            logger.error(f"Batch PDF export of {report_type} for project {project_id} failed: {e}")
+            return 0, "تعذر إنشاء حزمة التقارير"
+
+        logger.info(f"Batch PDF export: {count} {report_type} reports for project {project_id}")
+        return count, None
+
+    @staticmethod
+    def start_bundle(report_type, project_id, start_date=None, end_date=None, user=None, max_workers=None):
+        """
+        Collect the render jobs in the caller and build the bundle in a background thread
+
+        Returns:
+            tuple: (bundle id, error message or None); the error is BUSY_ERROR
+            when MAX_CONCURRENT_BUNDLES bundles are already rendering
+        """
+        jobs, error = BatchPDFExportService.build_jobs(report_type, project_id, start_date, end_date, user)
+        if error:
+            return None, error
+        if not jobs:
+            return None, "لا توجد بيانات في الفترة المحددة"
+        if sum(len(job['records']) for job in jobs) > MAX_BATCH_RECORDS:
+            return None, f"عدد السجلات يتجاوز الحد الأقصى للحزمة ({MAX_BATCH_RECORDS})، يرجى تضييق الفترة"
+
+        base_dir = export_dir()
+        os.makedirs(base_dir, exist_ok=True)
+        BatchPDFExportService.purge_expired(base_dir)
+
+        slot = _acquire_slot(base_dir)
+        if slot is None:
+            return None, BatchPDFExportService.BUSY_ERROR
+
+        bundle_id = secrets.token_urlsafe(24)
+        folder = os.path.join(base_dir, bundle_id)
+        status = {
+            'state': 'running',
+            'done': 0,
+            'total': len(jobs),
+            'error': None,
+            'user_id': str(user.id) if user else None,
+            'report_type': report_type,
+            'project_id': str(project_id),
+            'start_date': start_date.isoformat() if start_date else None,
+            'end_date': end_date.isoformat() if end_date else None,
+            'created_at': time.time(),
+        }
+        try:
+            os.makedirs(folder)
+            _write_status(folder, status)
+            threading.Thread(
+                target=_render_bundle, args=(folder, jobs, status, slot, max_workers),
+                name=f'batch-pdf-{bundle_id[:8]}', daemon=True
+            ).start()
+        except Exception as e:
+            slot.close()
+            logger.error(f"Could not start batch PDF bundle for project {project_id}: {e}")
+            return None, "تعذر إنشاء حزمة التقارير"
+        return bundle_id, None
+
+    @staticmethod
+    def bundle_status(bundle_id: str, user) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Status of a bundle started by user
+
+        Returns:
+            tuple: (dict with state/done/total/error and the request's parameters, error message or None)
+        """
+        if not _BUNDLE_ID.match(bundle_id or ''):
+            return None, "الحزمة غير موجودة"
+        try:
+            with open(os.path.join(export_dir(), bundle_id, STATUS_FILE), encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None, "الحزمة غير موجودة"
+        if status.get('user_id') != str(user.id):
+            return None, "الحزمة غير موجودة"
+        return status, None
+
+    @staticmethod
+    def bundle_path(bundle_id: str, user) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Path of a finished bundle's ZIP archive
+
+        Returns:
+            tuple: (path, error message or None)
+        """
+        status, error = BatchPDFExportService.bundle_status(bundle_id, user)
+        if error:
+            return None, error
+        if status['state'] != 'done':
+            return None, "الحزمة لم تكتمل بعد"
+        return os.path.join(export_dir(), bundle_id, BUNDLE_FILE), None
+
+    @staticmethod
+    def purge_expired(base_dir: Optional[str] = None) -> int:
+        """Remove bundle folders not updated for BUNDLE_TTL_SECONDS; returns how many"""
+        base_dir = base_dir or export_dir()
+        cutoff = time.time() - BUNDLE_TTL_SECONDS
+        removed = 0
+        for name in os.listdir(base_dir):
+            folder = os.path.join(base_dir, name)
+            if not _BUNDLE_ID.match(name) or not os.path.isdir(folder):
+                continue
+            status_path = os.path.join(folder, STATUS_FILE)
+            updated = os.path.getmtime(status_path if os.path.exists(status_path) else folder)
+            if updated < cutoff:
+                shutil.rmtree(folder, ignore_errors=True)
+                removed += 1
+        return removed
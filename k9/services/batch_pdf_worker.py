@@ -0,0 +1,34 @@
+"""
+Batch PDF Worker
+Entry points of the ProcessPoolExecutor children used by
+BatchPDFExportService
+
+Workers are started with the 'spawn' method and unpickle these functions by
+module path, so this module must stay free of Flask, the app and the
+database: importing app.py in a child would build a second Flask app and
+start another scheduler per worker. Each job arrives as plain data (strings,
+dates and pre-formatted record dicts) prepared by the parent process.
+"""
+
+from typing import Tuple
+
+
+def init_worker():
+    """Register fonts and build styles once per worker process"""
+    from k9.services.pdf_report_generator import get_pdf_generator
+    get_pdf_generator()
+
+
+def render_job(job: dict) -> Tuple[str, bytes]:
+    """Render one PDF; returns (archive name, PDF bytes)"""
+    from k9.services.pdf_report_generator import generate_report_from_registry
+
+    buffer = generate_report_from_registry(
+        report_type=job['report_type'],
+        records=job['records'],
+        start_date=job['start_date'],
+        end_date=job['end_date'],
+        user=job['username'],
+        subtitle=job['subtitle']
+    )
+    return job['filename'], buffer.getvalue()
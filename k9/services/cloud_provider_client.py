@@ -0,0 +1,132 @@
+"""
+Cloud Provider Client Layer
+Shared HTTP sessions, token expiry checks and metadata caching for cloud backup providers
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from k9.models.models import CloudProvider, UserCloudIntegration
+
+
+# Refresh tokens slightly before the provider-reported expiry
+TOKEN_EXPIRY_SKEW = timedelta(seconds=60)
+
+# Retry transient failures with exponential backoff (0.5s, 1s, 2s). Provider
+# APIs are POST-only, so POSTs (uploads) are re-sent only when the request
+# never reached the server or it answered 429 with Retry-After; a 5xx after
+# an upload was accepted must not create a second (autorenamed) backup.
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (10, 60)
+UPLOAD_TIMEOUT = (10, 600)
+
+# Base URLs - override with environment variables to point at a local stub server
+PROVIDER_URLS = {
+    CloudProvider.DROPBOX: {
+        'api': ('DROPBOX_API_URL', 'https://api.dropboxapi.com'),
+        'content': ('DROPBOX_CONTENT_URL', 'https://content.dropboxapi.com'),
+    },
+    CloudProvider.GOOGLE_DRIVE: {
+        'token': ('GOOGLE_TOKEN_URI', 'https://oauth2.googleapis.com/token'),
+    },
+}
+
+_sessions: Dict[CloudProvider, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+class ProviderRetry(Retry):
+    """urllib3 Retry that also re-sends non-idempotent requests on 429 with Retry-After"""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method.upper() in self.allowed_methods:
+            return super().is_retry(method, status_code, has_retry_after)
+        return bool(self.total and self.respect_retry_after_header and has_retry_after and status_code == 429)
+
+
+def provider_url(provider: CloudProvider, kind: str) -> str:
+    """Get the base URL of a provider endpoint, honouring environment overrides"""
+    env_var, default = PROVIDER_URLS[provider][kind]
+    return os.environ.get(env_var, default).rstrip('/')
+
+
+def get_session(provider: CloudProvider) -> requests.Session:
+    """
+    Get the shared keep-alive session for a provider
+
+    One session per provider per process, so TLS connections are reused
+    across requests and across service instances.
+    """
+    session = _sessions.get(provider)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            # Default allowed_methods: only idempotent methods retry on read errors and 5xx
+            retry = ProviderRetry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[provider] = session
+    return session
+
+
+def reset_sessions():
+    """Close and drop all shared sessions (used after fork and in tests)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def token_is_fresh(integration: Optional[UserCloudIntegration]) -> bool:
+    """Check whether the stored access token can be used without refreshing"""
+    if not integration or not integration.access_token or not integration.expires_at:
+        return False
+    return datetime.utcnow() + TOKEN_EXPIRY_SKEW < integration.expires_at
+
+
+def expiry_from_seconds(expires_in) -> Optional[datetime]:
+    """Convert an OAuth expires_in value into an absolute UTC expiry"""
+    try:
+        return datetime.utcnow() + timedelta(seconds=int(expires_in))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_cached_folder_id(integration: UserCloudIntegration, folder_name: str) -> Optional[str]:
+    """Get a folder ID previously cached in provider_metadata"""
+    metadata = integration.provider_metadata or {}
+    return (metadata.get('folder_ids') or {}).get(folder_name)
+
+
+def set_cached_folder_id(integration: UserCloudIntegration, folder_name: str, folder_id: Optional[str]):
+    """Cache (or clear) a folder ID in provider_metadata"""
+    metadata = dict(integration.provider_metadata or {})
+    folder_ids = dict(metadata.get('folder_ids') or {})
+    if folder_id:
+        folder_ids[folder_name] = folder_id
+    else:
+        folder_ids.pop(folder_name, None)
+    metadata['folder_ids'] = folder_ids
+    # Reassign so the plain JSON column is flagged as modified
+    integration.provider_metadata = metadata
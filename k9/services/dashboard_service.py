@@ -16,11 +16,14 @@ from k9.models.models_handler_daily import (
 from typing import Dict, List, Optional
 import calendar
 
+from k9.utils.db_routing import read_replica
+
 
 class DashboardService:
     """Service for generating dashboard statistics and chart data"""
     
     @staticmethod
+    @read_replica
     def get_active_dogs_by_project() -> Dict:
         """Get count of active dogs grouped by project"""
         from k9.models.models import ProjectAssignment
@@ -54,6 +57,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_dogs_by_status() -> Dict:
         """Get count of dogs grouped by status"""
         results = db.session.query(
@@ -80,6 +84,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_handler_report_status_distribution(project_id: Optional[str] = None) -> Dict:
         """Get distribution of handler reports by status"""
         query = db.session.query(
@@ -114,6 +119,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_attendance_trends(project_id: Optional[str] = None, days: int = 30) -> Dict:
         """Get attendance trends over time (present/absent/replaced)"""
         end_date = date.today()
@@ -208,6 +214,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_dogs_worked_per_handler(project_id: Optional[str] = None, limit: int = 10) -> Dict:
         """Get number of dogs worked by each handler"""
         query = db.session.query(
@@ -242,6 +249,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_monthly_report_trends(project_id: Optional[str] = None, months: int = 6) -> Dict:
         """Get monthly report submission trends"""
         end_date = date.today()
@@ -284,6 +292,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_employee_distribution_by_role() -> Dict:
         """Get count of employees grouped by role"""
         results = db.session.query(
@@ -313,6 +322,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_project_status_overview() -> Dict:
         """Get count of projects grouped by status"""
         results = db.session.query(
@@ -339,6 +349,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_training_activity_stats(project_id: Optional[str] = None, days: int = 30) -> Dict:
         """Get training session statistics"""
         end_date = date.today()
@@ -362,6 +373,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_veterinary_visit_stats(project_id: Optional[str] = None, days: int = 30) -> Dict:
         """Get veterinary visit statistics"""
         end_date = date.today()
@@ -385,6 +397,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_pm_dashboard_data(project_id: str) -> Dict:
         """Get comprehensive dashboard data for Project Manager"""
         return {
@@ -397,6 +410,7 @@ class DashboardService:
         }
     
     @staticmethod
+    @read_replica
     def get_admin_dashboard_data() -> Dict:
         """Get comprehensive dashboard data for General Admin"""
         return {
@@ -13,6 +13,10 @@ import requests
 
 from app import db
 from k9.models.models import UserCloudIntegration, CloudProvider
+from k9.services.cloud_provider_client import (
+    get_session, provider_url, token_is_fresh, expiry_from_seconds,
+    REQUEST_TIMEOUT, UPLOAD_TIMEOUT
+)
 
 
 class DropboxService:
@@ -22,6 +26,9 @@ class DropboxService:
         """Initialize Dropbox service for a specific user"""
         self.user_id = user_id
         self.integration = self._get_integration()
+        self.session = get_session(CloudProvider.DROPBOX)
+        self.api_url = provider_url(CloudProvider.DROPBOX, 'api')
+        self.content_url = provider_url(CloudProvider.DROPBOX, 'content')
     
     def _get_integration(self) -> Optional[UserCloudIntegration]:
         """Get user's Dropbox integration from database"""
@@ -83,15 +90,16 @@ class DropboxService:
             app_secret = self._get_app_secret()
             
             # Exchange code for tokens
-            response = requests.post(
-                'https://api.dropboxapi.com/oauth2/token',
+            response = self.session.post(
+                f'{self.api_url}/oauth2/token',
                 data={
                     'code': code,
                     'grant_type': 'authorization_code',
                     'client_id': app_key,
                     'client_secret': app_secret,
                     'redirect_uri': redirect_uri
-                }
+                },
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code != 200:
@@ -101,6 +109,7 @@ class DropboxService:
             data = response.json()
             access_token = data.get('access_token')
             refresh_token = data.get('refresh_token')
+            expires_at = expiry_from_seconds(data.get('expires_in'))
             
             # Get user info
             user_info = self._get_user_info(access_token)
@@ -112,6 +121,7 @@ class DropboxService:
                 old_refresh_token = self.integration.refresh_token
                 self.integration.access_token = access_token
                 self.integration.refresh_token = refresh_token or old_refresh_token
+                self.integration.expires_at = expires_at
                 self.integration.user_email = user_email
                 self.integration.updated_at = datetime.utcnow()
             else:
@@ -120,6 +130,7 @@ class DropboxService:
                     provider=CloudProvider.DROPBOX,
                     access_token=access_token,
                     refresh_token=refresh_token,
+                    expires_at=expires_at,
                     user_email=user_email
                 )
                 db.session.add(self.integration)
@@ -165,48 +176,77 @@ class DropboxService:
         return app_secret
     
     def _get_access_token(self) -> Optional[str]:
-        """Get valid access token, refreshing if necessary"""
+        """Get valid access token, refreshing only when it is about to expire"""
         if not self.integration or not self.integration.access_token:
             return None
         
-        # Try to refresh if we have refresh token
-        if self.integration.refresh_token:
-            try:
-                app_key = self._get_app_key()
-                app_secret = self._get_app_secret()
+        # Reuse the stored token until shortly before its recorded expiry
+        if not self.integration.refresh_token or token_is_fresh(self.integration):
+            return self.integration.access_token
+        
+        return self._refresh_access_token() or self.integration.access_token
+    
+    def _refresh_access_token(self) -> Optional[str]:
+        """Exchange the refresh token for a new access token and store its expiry"""
+        try:
+            app_key = self._get_app_key()
+            app_secret = self._get_app_secret()
+            
+            response = self.session.post(
+                f'{self.api_url}/oauth2/token',
+                data={
+                    'grant_type': 'refresh_token',
+                    'refresh_token': self.integration.refresh_token,
+                    'client_id': app_key,
+                    'client_secret': app_secret
+                },
+                timeout=REQUEST_TIMEOUT
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                new_token = data.get('access_token')
                 
-                response = requests.post(
-                    'https://api.dropboxapi.com/oauth2/token',
-                    data={
-                        'grant_type': 'refresh_token',
-                        'refresh_token': self.integration.refresh_token,
-                        'client_id': app_key,
-                        'client_secret': app_secret
-                    }
-                )
+                # Update database
+                self.integration.access_token = new_token
+                self.integration.expires_at = expiry_from_seconds(data.get('expires_in'))
+                self.integration.updated_at = datetime.utcnow()
+                db.session.commit()
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    new_token = data.get('access_token')
-                    
-                    # Update database
-                    self.integration.access_token = new_token
-                    self.integration.updated_at = datetime.utcnow()
-                    db.session.commit()
-                    
-                    return new_token
-                    
-            except Exception as e:
-                current_app.logger.error(f"Error refreshing Dropbox token: {e}")
+                return new_token
+            
+            current_app.logger.error(f"Dropbox token refresh error: {response.text}")
+            
+        except Exception as e:
+            current_app.logger.error(f"Error refreshing Dropbox token: {e}")
         
-        return self.integration.access_token
+        return None
+    
+    def _authorized_post(self, url: str, timeout=REQUEST_TIMEOUT, **kwargs) -> Optional[requests.Response]:
+        """POST with the bearer token, refreshing once if the provider rejects it"""
+        access_token = self._get_access_token()
+        if not access_token:
+            return None
+        
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers['Authorization'] = f'Bearer {access_token}'
+        response = self.session.post(url, headers=headers, timeout=timeout, **kwargs)
+        
+        if response.status_code == 401 and self.integration.refresh_token:
+            access_token = self._refresh_access_token()
+            if access_token:
+                headers['Authorization'] = f'Bearer {access_token}'
+                response = self.session.post(url, headers=headers, timeout=timeout, **kwargs)
+        
+        return response
     
     def _get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
         """Get user information from Dropbox"""
         try:
-            response = requests.post(
-                'https://api.dropboxapi.com/2/users/get_current_account',
-                headers={'Authorization': f'Bearer {access_token}'}
+            response = self.session.post(
+                f'{self.api_url}/2/users/get_current_account',
+                headers={'Authorization': f'Bearer {access_token}'},
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
@@ -222,9 +262,10 @@ class DropboxService:
         """Revoke access token"""
         try:
             if self.integration and self.integration.access_token:
-                requests.post(
-                    'https://api.dropboxapi.com/2/auth/token/revoke',
-                    headers={'Authorization': f'Bearer {self.integration.access_token}'}
+                self.session.post(
+                    f'{self.api_url}/2/auth/token/revoke',
+                    headers={'Authorization': f'Bearer {self.integration.access_token}'},
+                    timeout=REQUEST_TIMEOUT
                 )
         except Exception as e:
             current_app.logger.error(f"Error revoking Dropbox token: {e}")
@@ -242,8 +283,7 @@ class DropboxService:
             File path if successful, None otherwise
         """
         try:
-            access_token = self._get_access_token()
-            if not access_token:
+            if not self._get_access_token():
                 current_app.logger.error("No valid access token for Dropbox upload")
                 return None
             
@@ -258,23 +298,23 @@ class DropboxService:
             with open(file_path, 'rb') as f:
                 file_data = f.read()
             
-            # Upload file
-            response = requests.post(
-                'https://content.dropboxapi.com/2/files/upload',
+            # Upload file (bytes rather than a stream so retries can resend the body)
+            response = self._authorized_post(
+                f'{self.content_url}/2/files/upload',
                 headers={
-                    'Authorization': f'Bearer {access_token}',
                     'Dropbox-API-Arg': f'{{"path": "{dropbox_path}", "mode": "add", "autorename": true}}',
                     'Content-Type': 'application/octet-stream'
                 },
-                data=file_data
+                data=file_data,
+                timeout=UPLOAD_TIMEOUT
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 result = response.json()
                 current_app.logger.info(f"File uploaded to Dropbox: {result.get('name')} ({result.get('path_display')})")
                 return result.get('path_display')
             else:
-                current_app.logger.error(f"Dropbox upload error: {response.text}")
+                current_app.logger.error(f"Dropbox upload error: {response.text if response is not None else 'no token'}")
                 return None
             
         except Exception as e:
@@ -289,16 +329,9 @@ class DropboxService:
             Dict with 'used', 'total', 'allocated' in bytes
         """
         try:
-            access_token = self._get_access_token()
-            if not access_token:
-                return None
+            response = self._authorized_post(f'{self.api_url}/2/users/get_space_usage')
             
-            response = requests.post(
-                'https://api.dropboxapi.com/2/users/get_space_usage',
-                headers={'Authorization': f'Bearer {access_token}'}
-            )
-            
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 data = response.json()
                 used = data.get('used', 0)
                 allocation = data.get('allocation', {})
@@ -332,27 +365,19 @@ class DropboxService:
             List of file dictionaries with name, path, size, modified
         """
         try:
-            access_token = self._get_access_token()
-            if not access_token:
-                return []
-            
             # Ensure folder path starts with /
             if not folder_path.startswith('/'):
                 folder_path = '/' + folder_path
             
-            response = requests.post(
-                'https://api.dropboxapi.com/2/files/list_folder',
-                headers={
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                },
+            response = self._authorized_post(
+                f'{self.api_url}/2/files/list_folder',
                 json={
                     'path': folder_path,
                     'recursive': False
                 }
             )
             
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 data = response.json()
                 entries = data.get('entries', [])
                 
@@ -377,19 +402,14 @@ class DropboxService:
     def delete_file(self, file_path: str) -> bool:
         """Delete a file from Dropbox"""
         try:
-            access_token = self._get_access_token()
-            if not access_token:
-                return False
-            
-            response = requests.post(
-                'https://api.dropboxapi.com/2/files/delete_v2',
-                headers={
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                },
+            response = self._authorized_post(
+                f'{self.api_url}/2/files/delete_v2',
                 json={'path': file_path}
             )
             
+            if response is None:
+                return False
+            
             if response.status_code == 200:
                 current_app.logger.info(f"File deleted from Dropbox: {file_path}")
                 return True
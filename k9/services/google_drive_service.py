@@ -5,6 +5,8 @@ Handles OAuth authentication and file operations with Google Drive
 
 import os
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from flask import url_for, current_app
@@ -16,6 +18,25 @@ from googleapiclient.errors import HttpError
 
 from app import db
 from k9.models.models import UserCloudIntegration, CloudProvider
+from k9.services.cloud_provider_client import (
+    provider_url, get_cached_folder_id, set_cached_folder_id
+)
+
+
+# Retries for transient Drive API errors (googleapiclient backs off exponentially)
+DRIVE_NUM_RETRIES = 3
+# Base delay in seconds between attempts to create a folder (doubled each time)
+DRIVE_RETRY_BACKOFF = 1.0
+
+def _is_transient(error: Exception) -> bool:
+    """Connection errors, 5xx and 429 responses (the errors googleapiclient retries)"""
+    if isinstance(error, HttpError):
+        return error.resp.status >= 500 or error.resp.status == 429
+    return True
+
+
+# Drive clients are not thread-safe, so each thread keeps its own per user/token
+_drive_clients = threading.local()
 
 
 class GoogleDriveService:
@@ -153,7 +174,8 @@ class GoogleDriveService:
         credentials = Credentials(
             token=self.integration.access_token,
             refresh_token=self.integration.refresh_token,
-            token_uri='https://oauth2.googleapis.com/token',
+            expiry=self.integration.expires_at,
+            token_uri=provider_url(CloudProvider.GOOGLE_DRIVE, 'token'),
             client_id=os.environ.get('GOOGLE_CLIENT_ID'),
             client_secret=os.environ.get('GOOGLE_CLIENT_SECRET'),
             scopes=self.SCOPES
@@ -177,6 +199,26 @@ class GoogleDriveService:
         
         return credentials
     
+    def _get_drive(self):
+        """Get a Drive client, reusing the one built for the current token"""
+        credentials = self._get_credentials()
+        if not credentials:
+            return None
+        
+        cache = getattr(_drive_clients, 'clients', None)
+        if cache is None:
+            cache = _drive_clients.clients = {}
+        
+        key = (str(self.user_id), credentials.token)
+        service = cache.get(key)
+        if service is None:
+            # Drop clients built for this user's previous tokens
+            for old_key in [k for k in cache if k[0] == key[0]]:
+                del cache[old_key]
+            service = build('drive', 'v3', credentials=credentials, cache_discovery=False)
+            cache[key] = service
+        return service
+    
     def _get_client_config(self) -> Dict[str, Any]:
         """Get OAuth client configuration from environment"""
         client_id = os.environ.get('GOOGLE_CLIENT_ID')
@@ -190,7 +232,7 @@ class GoogleDriveService:
                 "client_id": client_id,
                 "client_secret": client_secret,
                 "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token"
+                "token_uri": provider_url(CloudProvider.GOOGLE_DRIVE, 'token')
             }
         }
     
@@ -207,29 +249,23 @@ class GoogleDriveService:
             File ID if successful, None otherwise
         """
         try:
-            credentials = self._get_credentials()
-            if not credentials:
+            service = self._get_drive()
+            if not service:
                 current_app.logger.error("No valid credentials for Google Drive upload")
                 return None
             
-            service = build('drive', 'v3', credentials=credentials)
-            
             # Find or create folder
             folder_id = self._find_or_create_folder(service, folder_name)
             
-            # Upload file
-            file_metadata = {
-                'name': file_name,
-                'parents': [folder_id] if folder_id else []
-            }
-            
-            media = MediaFileUpload(file_path, resumable=True)
-            
-            file = service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, size, createdTime'
-            ).execute()
+            try:
+                file = self._create_file(service, file_path, file_name, folder_id)
+            except HttpError as e:
+                if not folder_id or e.resp.status != 404:
+                    raise
+                # Cached folder was deleted on Drive - look it up again once
+                set_cached_folder_id(self.integration, folder_name, None)
+                folder_id = self._find_or_create_folder(service, folder_name)
+                file = self._create_file(service, file_path, file_name, folder_id)
             
             current_app.logger.info(f"File uploaded to Google Drive: {file.get('name')} ({file.get('id')})")
             return file.get('id')
@@ -241,37 +277,72 @@ class GoogleDriveService:
             current_app.logger.error(f"Error uploading to Google Drive: {e}")
             return None
     
+    def _create_file(self, service, file_path: str, file_name: str, folder_id: Optional[str]) -> Dict[str, Any]:
+        """Upload a single file into a folder"""
+        file_metadata = {
+            'name': file_name,
+            'parents': [folder_id] if folder_id else []
+        }
+        
+        media = MediaFileUpload(file_path, resumable=True)
+        
+        return service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, name, size, createdTime'
+        ).execute(num_retries=DRIVE_NUM_RETRIES)
+    
+    def _find_folder(self, service, folder_name: str) -> Optional[str]:
+        """ID of an existing (not trashed) folder with this name, or None"""
+        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+        results = service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id, name)'
+        ).execute(num_retries=DRIVE_NUM_RETRIES)
+        
+        folders = results.get('files', [])
+        return folders[0]['id'] if folders else None
+    
     def _find_or_create_folder(self, service, folder_name: str) -> Optional[str]:
-        """Find existing folder or create new one"""
+        """Find existing folder or create new one, caching its ID on the integration"""
+        folder_id = get_cached_folder_id(self.integration, folder_name)
+        if folder_id:
+            return folder_id
+        
         try:
-            # Search for existing folder
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = service.files().list(
-                q=query,
-                spaces='drive',
-                fields='files(id, name)'
-            ).execute()
-            
-            folders = results.get('files', [])
-            
-            if folders:
-                return folders[0]['id']
-            
-            # Create folder if not found
-            folder_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            
-            folder = service.files().create(
-                body=folder_metadata,
-                fields='id'
-            ).execute()
+            folder_id = self._find_folder(service, folder_name)
+            attempt = 0
+            while not folder_id:
+                # Creating is not idempotent: a retried POST whose response was lost
+                # leaves duplicate folders, so look the folder up again before retrying
+                folder_metadata = {
+                    'name': folder_name,
+                    'mimeType': 'application/vnd.google-apps.folder'
+                }
+                try:
+                    folder = service.files().create(
+                        body=folder_metadata,
+                        fields='id'
+                    ).execute()
+                    folder_id = folder.get('id')
+                    break
+                except (HttpError, OSError) as e:
+                    if attempt >= DRIVE_NUM_RETRIES or not _is_transient(e):
+                        raise
+                    time.sleep(DRIVE_RETRY_BACKOFF * 2 ** attempt)
+                    attempt += 1
+                    folder_id = self._find_folder(service, folder_name)
+            
+            if folder_id:
+                set_cached_folder_id(self.integration, folder_name, folder_id)
+                db.session.commit()
             
-            return folder.get('id')
+            return folder_id
             
         except Exception as e:
             current_app.logger.error(f"Error finding/creating folder: {e}")
+            db.session.rollback()
             return None
     
     def get_storage_quota(self) -> Optional[Dict[str, Any]]:
@@ -282,13 +353,11 @@ class GoogleDriveService:
             Dict with 'used', 'total', 'limit' in bytes
         """
         try:
-            credentials = self._get_credentials()
-            if not credentials:
+            service = self._get_drive()
+            if not service:
                 return None
             
-            service = build('drive', 'v3', credentials=credentials)
-            
-            about = service.about().get(fields='storageQuota').execute()
+            about = service.about().get(fields='storageQuota').execute(num_retries=DRIVE_NUM_RETRIES)
             quota = about.get('storageQuota', {})
             
             return {
@@ -309,12 +378,10 @@ class GoogleDriveService:
             List of file dictionaries with name, id, size, created_time
         """
         try:
-            credentials = self._get_credentials()
-            if not credentials:
+            service = self._get_drive()
+            if not service:
                 return []
             
-            service = build('drive', 'v3', credentials=credentials)
-            
             # Find folder
             folder_id = self._find_or_create_folder(service, folder_name)
             if not folder_id:
@@ -326,7 +393,7 @@ class GoogleDriveService:
                 q=query,
                 fields='files(id, name, size, createdTime)',
                 orderBy='createdTime desc'
-            ).execute()
+            ).execute(num_retries=DRIVE_NUM_RETRIES)
             
             files = results.get('files', [])
             
@@ -344,12 +411,11 @@ class GoogleDriveService:
     def delete_file(self, file_id: str) -> bool:
         """Delete a file from Google Drive"""
         try:
-            credentials = self._get_credentials()
-            if not credentials:
+            service = self._get_drive()
+            if not service:
                 return False
             
-            service = build('drive', 'v3', credentials=credentials)
-            service.files().delete(fileId=file_id).execute()
+            service.files().delete(fileId=file_id).execute(num_retries=DRIVE_NUM_RETRIES)
             
             current_app.logger.info(f"File deleted from Google Drive: {file_id}")
             return True
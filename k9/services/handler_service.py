@@ -14,7 +14,8 @@ from k9.models.models_handler_daily import (
     NotificationType, ReportType
 )
 from k9.models.models import User, Employee, Dog, Project, Shift
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, insert, update, delete
+from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List, Dict, Tuple
 import os
 
@@ -206,7 +207,284 @@ class DailyScheduleService:
         schedule.locked_at = None
         db.session.commit()
         return True, "تم إلغاء قفل الجدول بنجاح"
-    
+
+    # ------------------------------------------------------------------
+    # Bulk schedule operations - one transaction per request
+    # ------------------------------------------------------------------
+
+    SCHEDULE_ITEM_FIELDS = ('handler_user_id', 'dog_id', 'shift_id', 'location_id')
+
+    @staticmethod
+    def _normalize_item_rows(items: List[Dict]) -> List[Dict]:
+        """تنظيف عناصر الجدول المرسلة وتجاهل الصفوف بدون سائس"""
+        rows = []
+        for item in items or []:
+            row = {field: (str(item.get(field)) if item.get(field) else None)
+                   for field in DailyScheduleService.SCHEDULE_ITEM_FIELDS}
+            if row['handler_user_id']:
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def _merge_existing_items(existing: Dict[date, DailySchedule],
+                              submitted: Dict[date, List[Dict]]) -> Dict[date, List[Dict]]:
+        """
+        مطابقة العناصر المرسلة مع عناصر الجداول الموجودة
+
+        Each submitted row takes an existing item with the same handler and shift
+        (preferring one with the same dog and location) whose dog/location are
+        updated in place. Existing items left unmatched are deleted unless a
+        handler or shift report references them.
+
+        Returns:
+            dict: {التاريخ: الصفوف التي لم تطابق أي عنصر وتحتاج إلى إدراج}
+        """
+        schedule_dates = {str(s.id): d for d, s in existing.items()}
+        items = DailyScheduleItem.query.filter(
+            DailyScheduleItem.daily_schedule_id.in_(list(schedule_dates))
+        ).order_by(DailyScheduleItem.created_at).all()
+        item_ids = [item.id for item in items]
+        referenced = {
+            str(item_id) for (item_id,) in db.session.query(HandlerReport.schedule_item_id).filter(
+                HandlerReport.schedule_item_id.in_(item_ids)
+            ).union(
+                db.session.query(ShiftReport.schedule_item_id).filter(ShiftReport.schedule_item_id.in_(item_ids))
+            )
+        } if item_ids else set()
+
+        pools: Dict[Tuple, List[DailyScheduleItem]] = {}
+        for item in items:
+            key = (schedule_dates[str(item.daily_schedule_id)], str(item.handler_user_id),
+                   str(item.shift_id) if item.shift_id else None)
+            pools.setdefault(key, []).append(item)
+
+        inserts: Dict[date, List[Dict]] = {}
+        updates = []
+        for schedule_date, rows in submitted.items():
+            inserts[schedule_date] = []
+            for row in rows:
+                pool = pools.get((schedule_date, row['handler_user_id'], row['shift_id']))
+                if not pool:
+                    inserts[schedule_date].append(row)
+                    continue
+                item = next((i for i in pool if (str(i.dog_id) if i.dog_id else None) == row['dog_id']
+                             and (str(i.location_id) if i.location_id else None) == row['location_id']), pool[0])
+                pool.remove(item)
+                if ((str(item.dog_id) if item.dog_id else None) != row['dog_id']
+                        or (str(item.location_id) if item.location_id else None) != row['location_id']):
+                    updates.append({'id': item.id, 'dog_id': row['dog_id'], 'location_id': row['location_id'],
+                                    'updated_at': datetime.utcnow()})
+
+        if updates:
+            db.session.execute(update(DailyScheduleItem), updates)
+
+        stale = [item.id for pool in pools.values() for item in pool if str(item.id) not in referenced]
+        if stale:
+            db.session.execute(
+                delete(DailyScheduleItem).where(DailyScheduleItem.id.in_(stale)),
+                execution_options={'synchronize_session': False}
+            )
+        return inserts
+
+    @staticmethod
+    def save_schedules_bulk(project_id: str, created_by_user_id: str, days: Dict[date, List[Dict]],
+                            notes: Optional[str] = None, replace: bool = False) -> Tuple[List, Optional[str]]:
+        """
+        إنشاء أو استبدال جداول عدة أيام دفعة واحدة
+
+        Every schedule and item is written in a single transaction: new schedules
+        in one batched INSERT and new items in one executemany INSERT. When
+        replacing, existing items are matched to the submitted rows by handler
+        and shift and updated in place (keeping their attendance status and the
+        handler/shift reports that reference them); unmatched existing items are
+        deleted unless a report references them.
+
+        Args:
+            project_id: المشروع
+            created_by_user_id: منشئ الجدول
+            days: {التاريخ: [{handler_user_id, dog_id, shift_id, location_id}, ...]}
+            notes: ملاحظات الجداول الجديدة
+            replace: استبدال عناصر الجداول الموجودة بدلاً من رفض الطلب
+
+        Returns:
+            Tuple[List[DailySchedule], Optional[str]]: (الجداول مرتبة حسب التاريخ, رسالة الخطأ)
+        """
+        if not days:
+            return [], "لم يتم تحديد أي يوم"
+
+        dates = sorted(days)
+        existing = {
+            s.date: s for s in DailySchedule.query.filter(
+                DailySchedule.project_id == project_id,
+                DailySchedule.date.in_(dates)
+            ).all()
+        }
+
+        locked_dates = [d for d, s in existing.items() if s.status == ScheduleStatus.LOCKED]
+        if locked_dates:
+            return [], "لا يمكن تعديل جدول مقفل: " + "، ".join(str(d) for d in sorted(locked_dates))
+
+        if existing and not replace:
+            return [], "يوجد جدول لهذا اليوم بالفعل: " + "، ".join(str(d) for d in sorted(existing))
+
+        try:
+            schedules = {}
+            for schedule_date in dates:
+                schedule = existing.get(schedule_date)
+                if schedule is None:
+                    schedule = DailySchedule(  # type: ignore
+                        date=schedule_date,
+                        project_id=project_id,
+                        created_by_user_id=created_by_user_id,
+                        notes=notes,
+                        status=ScheduleStatus.OPEN
+                    )
+                    db.session.add(schedule)
+                elif notes is not None:
+                    schedule.notes = notes
+                schedules[schedule_date] = schedule
+            db.session.flush()
+
+            submitted = {d: DailyScheduleService._normalize_item_rows(days[d]) for d in dates}
+            if existing:
+                submitted = DailyScheduleService._merge_existing_items(existing, submitted)
+
+            rows = []
+            for schedule_date in dates:
+                schedule_id = str(schedules[schedule_date].id)
+                for row in submitted[schedule_date]:
+                    row['daily_schedule_id'] = schedule_id
+                    row['status'] = ScheduleItemStatus.PLANNED
+                    rows.append(row)
+
+            if rows:
+                db.session.execute(insert(DailyScheduleItem), rows)
+
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Bulk schedule save failed: {e}")
+            return [], "تعذر حفظ الجدول، يرجى التحقق من البيانات"
+
+        return [schedules[d] for d in dates], None
+
+    @staticmethod
+    def save_schedule(schedule_date: date, project_id: str, created_by_user_id: str, items: List[Dict],
+                      notes: Optional[str] = None, replace: bool = False) -> tuple:
+        """إنشاء أو استبدال جدول يوم كامل مع عناصره في معاملة واحدة"""
+        schedules, error = DailyScheduleService.save_schedules_bulk(
+            project_id, created_by_user_id, {schedule_date: items}, notes=notes, replace=replace
+        )
+        if error:
+            return None, error
+        return schedules[0], None
+
+    @staticmethod
+    def copy_schedules(project_id: str, date_map: Dict[date, date], created_by_user_id: str,
+                       replace: bool = False) -> Tuple[List, Optional[str]]:
+        """
+        نسخ جداول سابقة إلى تواريخ جديدة
+
+        Args:
+            date_map: {التاريخ الهدف: التاريخ المصدر}
+
+        Source items for all dates are read with one query and written back through
+        save_schedules_bulk. Target dates without a source schedule are skipped.
+        """
+        source_dates = set(date_map.values())
+        source_rows = db.session.query(
+            DailySchedule.date,
+            DailyScheduleItem.handler_user_id,
+            DailyScheduleItem.dog_id,
+            DailyScheduleItem.shift_id,
+            DailyScheduleItem.location_id
+        ).join(
+            DailyScheduleItem, DailyScheduleItem.daily_schedule_id == DailySchedule.id
+        ).filter(
+            DailySchedule.project_id == project_id,
+            DailySchedule.date.in_(source_dates)
+        ).order_by(DailyScheduleItem.created_at).all()
+
+        templates: Dict[date, List[Dict]] = {}
+        for row in source_rows:
+            templates.setdefault(row.date, []).append({
+                'handler_user_id': row.handler_user_id,
+                'dog_id': row.dog_id,
+                'shift_id': row.shift_id,
+                'location_id': row.location_id
+            })
+
+        days = {target: templates[source] for target, source in date_map.items() if source in templates}
+        if not days:
+            return [], "لا يوجد جدول مصدر للنسخ منه"
+
+        return DailyScheduleService.save_schedules_bulk(
+            project_id, created_by_user_id, days, replace=replace
+        )
+
+    @staticmethod
+    def copy_forward(project_id: str, target_date: date, created_by_user_id: str, source: str = 'yesterday',
+                     days: int = 1, replace: bool = False) -> Tuple[List, Optional[str]]:
+        """
+        نسخ جدول الأمس أو الأسبوع الماضي إلى أيام تبدأ من target_date
+
+        source='yesterday' يكرر جدول اليوم السابق لـ target_date على كل الأيام،
+        source='last_week' ينسخ كل يوم من نفس اليوم في الأسبوع السابق.
+        """
+        targets = [target_date + timedelta(days=offset) for offset in range(max(1, days))]
+        if source == 'last_week':
+            date_map = {d: d - timedelta(days=7) for d in targets}
+        elif source == 'yesterday':
+            date_map = {d: target_date - timedelta(days=1) for d in targets}
+        else:
+            return [], "مصدر النسخ غير معروف"
+
+        return DailyScheduleService.copy_schedules(project_id, date_map, created_by_user_id, replace=replace)
+
+    @staticmethod
+    def lock_schedules_until(cutoff_date: date, project_id: Optional[str] = None) -> int:
+        """إقفال جميع الجداول المفتوحة حتى تاريخ معين بعبارة UPDATE واحدة"""
+        now = datetime.utcnow()
+        stmt = update(DailySchedule).where(
+            DailySchedule.date <= cutoff_date,
+            DailySchedule.status == ScheduleStatus.OPEN
+        )
+        if project_id:
+            stmt = stmt.where(DailySchedule.project_id == project_id)
+
+        result = db.session.execute(
+            stmt.values(status=ScheduleStatus.LOCKED, locked_at=now, updated_at=now),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def set_schedules_locked(schedule_ids: List[str], locked: bool, project_id: Optional[str] = None) -> int:
+        """إقفال أو إلغاء قفل مجموعة جداول بعبارة UPDATE واحدة"""
+        if not schedule_ids:
+            return 0
+
+        now = datetime.utcnow()
+        current_status = ScheduleStatus.OPEN if locked else ScheduleStatus.LOCKED
+        stmt = update(DailySchedule).where(
+            DailySchedule.id.in_(schedule_ids),
+            DailySchedule.status == current_status
+        )
+        if project_id:
+            stmt = stmt.where(DailySchedule.project_id == project_id)
+
+        result = db.session.execute(
+            stmt.values(
+                status=ScheduleStatus.LOCKED if locked else ScheduleStatus.OPEN,
+                locked_at=now if locked else None,
+                updated_at=now
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        return result.rowcount
+
     @staticmethod
     def get_handler_schedule_for_date(handler_user_id: str, target_date: date):
         """الحصول على جدول السائس ليوم معين"""
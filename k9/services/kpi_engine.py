@@ -0,0 +1,227 @@
+"""
+KPI Engine
+Declarative summary-card metrics compiled into a single SQL statement.
+
+A KPIDefinition lists the metrics of one report (count where X, sum or
+average of a field, distinct values, ratios between metrics, breakdowns by
+value). KPIEngine.evaluate takes the report's already-filtered query, wraps
+it in a CTE and computes every metric in one SELECT using
+aggregate FILTER (WHERE ...) clauses, so the filters (and the
+(project_id, date) indexes they use) are applied once and the cards cost
+one round trip whatever the size of the range.
+
+Example:
+    CLEANING_KPIS = KPIDefinition('cleaning', CleaningLog, [
+        KPIMetric.count('total'),
+        KPIMetric.count('washed_yes', where=lambda m: m.washed_house == 'نعم'),
+        KPIMetric.distinct('dogs', 'dog_id'),
+    ])
+    kpis = KPIEngine.evaluate(CLEANING_KPIS, filtered_query)
+
+Metric keys may contain dots ('stool.constipation') to produce nested dicts.
+Conditions are callables receiving the model aliased onto the CTE.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from sqlalchemy import Enum as SAEnum, func, literal_column, select
+from sqlalchemy.orm import aliased
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = ('count', 'sum', 'avg', 'distinct', 'ratio', 'breakdown')
+
+
+@dataclass(frozen=True)
+class KPIMetric:
+    """One summary metric"""
+    key: str
+    aggregate: str
+    field: Optional[str] = None
+    where: Optional[Callable[[Any], Any]] = None
+    numerator: Optional[str] = None       # ratio: metric keys
+    denominator: Optional[str] = None
+    scale: float = 1                      # ratio: e.g. 100 for percentages
+    precision: Optional[int] = None       # round() digits; None keeps ints/floats as computed
+    enum: Optional[Type[Enum]] = None     # breakdown over a fixed set of values
+    skip_zero: bool = True                # breakdown: drop values with no rows
+
+    @classmethod
+    def count(cls, key, where=None):
+        return cls(key, 'count', where=where)
+
+    @classmethod
+    def sum(cls, key, field, where=None, precision=None):
+        return cls(key, 'sum', field=field, where=where, precision=precision)
+
+    @classmethod
+    def avg(cls, key, field, where=None, precision=None):
+        return cls(key, 'avg', field=field, where=where, precision=precision)
+
+    @classmethod
+    def distinct(cls, key, field, where=None):
+        return cls(key, 'distinct', field=field, where=where)
+
+    @classmethod
+    def ratio(cls, key, numerator, denominator, scale=1, precision=None):
+        return cls(key, 'ratio', numerator=numerator, denominator=denominator, scale=scale, precision=precision)
+
+    @classmethod
+    def breakdown(cls, key, field, enum=None, where=None, skip_zero=True):
+        return cls(key, 'breakdown', field=field, where=where, enum=enum, skip_zero=skip_zero)
+
+
+@dataclass
+class KPIDefinition:
+    """The summary cards of one report"""
+    name: str
+    model: Any
+    metrics: List[KPIMetric] = field(default_factory=list)
+
+    def __post_init__(self):
+        keys = set()
+        for metric in self.metrics:
+            if metric.aggregate not in AGGREGATES:
+                raise ValueError(f"{self.name}: unknown aggregate {metric.aggregate!r} for {metric.key}")
+            if metric.key in keys:
+                raise ValueError(f"{self.name}: duplicate metric key {metric.key}")
+            keys.add(metric.key)
+        for metric in self.metrics:
+            if metric.aggregate == 'ratio' and not {metric.numerator, metric.denominator} <= keys:
+                raise ValueError(f"{self.name}: ratio {metric.key} refers to unknown metrics")
+
+    def empty(self) -> Dict[str, Any]:
+        """Result with every metric at its zero value"""
+        flat = {}
+        for metric in self.metrics:
+            flat[metric.key] = {} if metric.aggregate == 'breakdown' else 0
+        return _nest(flat)
+
+
+def _nest(flat: Dict[str, Any]) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for key, value in flat.items():
+        target = result
+        parts = key.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+def _label(index: int, suffix: str = '') -> str:
+    return f'kpi_{index}{suffix}'
+
+
+class KPIEngine:
+    """Compile and evaluate KPI definitions"""
+
+    @staticmethod
+    def compile(definition: KPIDefinition, query):
+        """
+        The single SELECT computing every SQL-backed metric over the query
+
+        Returns:
+            tuple: (select statement, list of (metric, column labels))
+        """
+        base = query.order_by(None).with_entities(definition.model).cte('kpi_base')
+        m = aliased(definition.model, base)
+
+        columns = []
+        layout = []
+        for index, metric in enumerate(definition.metrics):
+            condition = metric.where(m) if metric.where else None
+            if metric.aggregate == 'ratio':
+                layout.append((metric, []))
+                continue
+
+            if metric.aggregate == 'breakdown':
+                column = getattr(m, metric.field)
+                if metric.enum is not None:
+                    # Enum columns bind members, plain string columns store the member values
+                    by_value = not isinstance(column.type, SAEnum)
+                    labels = []
+                    for position, member in enumerate(metric.enum):
+                        member_condition = column == (member.value if by_value else member)
+                        if condition is not None:
+                            member_condition = member_condition & condition
+                        label = _label(index, f'_{position}')
+                        columns.append(func.count(literal_column('1')).filter(member_condition).label(label))
+                        labels.append(label)
+                    layout.append((metric, labels))
+                else:
+                    # Open-ended values: grouped subquery over a second reference to the CTE
+                    # (not correlated with the outer one), folded into one JSON object
+                    values = aliased(definition.model, base.alias(_label(index, '_values')))
+                    column = getattr(values, metric.field)
+                    grouped_where = [column.isnot(None)]
+                    if metric.where:
+                        grouped_where.append(metric.where(values))
+                    grouped = select(column.label('value'), func.count().label('n')).where(
+                        *grouped_where
+                    ).group_by(column).subquery()
+                    label = _label(index)
+                    columns.append(
+                        select(func.json_object_agg(grouped.c.value, grouped.c.n)).scalar_subquery().label(label)
+                    )
+                    layout.append((metric, [label]))
+                continue
+
+            if metric.aggregate == 'count':
+                expression = func.count(literal_column('1'))
+            elif metric.aggregate == 'sum':
+                expression = func.sum(getattr(m, metric.field))
+            elif metric.aggregate == 'avg':
+                expression = func.avg(getattr(m, metric.field))
+            else:
+                expression = func.count(func.distinct(getattr(m, metric.field)))
+            if condition is not None:
+                expression = expression.filter(condition)
+            label = _label(index)
+            columns.append(expression.label(label))
+            layout.append((metric, [label]))
+
+        statement = select(*columns).select_from(base)
+        return statement, layout
+
+    @staticmethod
+    def evaluate(definition: KPIDefinition, query) -> Dict[str, Any]:
+        """Compute every metric of the definition over the filtered query in one round trip"""
+        statement, layout = KPIEngine.compile(definition, query)
+        row = db.session.execute(statement).mappings().one()
+
+        flat: Dict[str, Any] = {}
+        for metric, labels in layout:
+            if metric.aggregate == 'ratio':
+                continue
+            if metric.aggregate == 'breakdown':
+                if metric.enum is not None:
+                    value = {member.value: row[label] for member, label in zip(metric.enum, labels)}
+                else:
+                    value = dict(row[labels[0]] or {})
+                if metric.skip_zero:
+                    value = {k: v for k, v in value.items() if v}
+            else:
+                value = row[labels[0]]
+                if value is None:
+                    value = 0
+                else:
+                    if isinstance(value, Decimal):
+                        value = float(value)
+                    if metric.precision is not None:
+                        value = round(float(value), metric.precision)
+            flat[metric.key] = value
+
+        for metric, _ in layout:
+            if metric.aggregate == 'ratio':
+                denominator = flat.get(metric.denominator) or 0
+                value = flat.get(metric.numerator, 0) / denominator * metric.scale if denominator else 0
+                flat[metric.key] = round(value, metric.precision) if metric.precision is not None else value
+
+        return _nest(flat)
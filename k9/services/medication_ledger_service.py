@@ -0,0 +1,238 @@
+"""
+Medication Ledger Service
+Medication catalogue and usage analytics over the visit_medication ledger.
+
+Every medication given in a veterinary visit is a visit_medication row,
+written whenever the visit is saved (see sync_visit_medications in
+k9.models.models) and linked to a catalogue entry keyed by its normalized
+name. The ledger carries the visit's dog, project and date, so usage and
+cost by drug, dog, project or period are indexed aggregates on one table.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, update
+
+from app import db
+from k9.models.models import Dog, Medication, Project, VeterinaryVisit, VisitMedication, sync_visit_medications
+from k9.utils.veterinary_summary import normalize_medication_name
+
+logger = logging.getLogger(__name__)
+
+USAGE_GROUPINGS = ('medication', 'project', 'dog', 'month')
+REBUILD_BATCH_SIZE = 500
+
+
+class MedicationLedgerService:
+    """Medication catalogue maintenance and usage reports"""
+
+    @staticmethod
+    def find(name: str) -> Optional[Medication]:
+        """Catalogue entry for a name, following merges to the canonical entry"""
+        medication = Medication.query.filter_by(normalized_name=normalize_medication_name(name)).first()
+        if medication and medication.canonical_id:
+            return medication.canonical
+        return medication
+
+    @staticmethod
+    def update_medication(medication_id, name=None, unit=None, unit_cost=None):
+        """
+        Update a catalogue entry's display name, unit or price
+
+        Returns:
+            tuple: (Medication or None, error message or None)
+        """
+        medication = db.session.get(Medication, medication_id)
+        if not medication:
+            return None, "الدواء غير موجود"
+        if name is not None:
+            name = " ".join(name.split())
+            if not name:
+                return None, "اسم الدواء مطلوب"
+            medication.name = name
+        if unit is not None:
+            medication.unit = unit or None
+        if unit_cost is not None:
+            if unit_cost < 0:
+                return None, "سعر الوحدة يجب أن يكون موجباً"
+            medication.unit_cost = unit_cost
+        db.session.commit()
+        return medication, None
+
+    @staticmethod
+    def merge(source_id, target_id):
+        """
+        Merge a spelling variant into a canonical entry: the variant and any
+        entries already merged into it point at the target, and their ledger
+        rows move to the target.
+
+        Returns:
+            tuple: (number of ledger rows moved, error message or None)
+        """
+        source = db.session.get(Medication, source_id)
+        target = db.session.get(Medication, target_id)
+        if not source or not target:
+            return 0, "الدواء غير موجود"
+        if target.canonical_id:
+            target = target.canonical
+        # Checked on the canonical target: merging A into its own variant would point A at itself
+        if source.id == target.id:
+            return 0, "لا يمكن دمج الدواء مع نفسه"
+
+        try:
+            merged_ids = [source.id] + [m.id for m in Medication.query.filter_by(canonical_id=source.id).all()]
+            db.session.execute(
+                update(Medication).where(Medication.id.in_(merged_ids)).values(canonical_id=target.id)
+            )
+            moved = db.session.execute(
+                update(VisitMedication).where(VisitMedication.medication_id.in_(merged_ids)).values(
+                    medication_id=target.id
+                )
+            ).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Merging medication {source_id} into {target_id} failed: {e}")
+            return 0, "تعذر دمج الأدوية"
+
+        logger.info(f"Merged medication {source_id} into {target.id} ({moved} ledger rows)")
+        return moved, None
+
+    @staticmethod
+    def catalogue(search: Optional[str] = None, include_merged: bool = False) -> List[Dict[str, Any]]:
+        """Catalogue entries with their lifetime administration counts"""
+        usage = db.session.query(
+            VisitMedication.medication_id, func.count(VisitMedication.id).label('administrations')
+        ).group_by(VisitMedication.medication_id).subquery()
+
+        query = db.session.query(Medication, func.coalesce(usage.c.administrations, 0)).outerjoin(
+            usage, usage.c.medication_id == Medication.id
+        )
+        if not include_merged:
+            query = query.filter(Medication.canonical_id.is_(None))
+        if search:
+            text = normalize_medication_name(search).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{text}%"
+            query = query.filter(or_(Medication.normalized_name.like(pattern, escape='\\'),
+                                     Medication.name.ilike(pattern, escape='\\')))
+
+        return [{
+            'id': str(medication.id),
+            'name': medication.name,
+            'unit': medication.unit,
+            'unit_cost': medication.unit_cost,
+            'canonical_id': str(medication.canonical_id) if medication.canonical_id else None,
+            'administrations': administrations
+        } for medication, administrations in query.order_by(Medication.name).all()]
+
+    @staticmethod
+    def usage(
+        date_from: date,
+        date_to: date,
+        group_by: str = 'medication',
+        project_ids: Optional[Iterable] = None,
+        dog_id=None,
+        medication_id=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Medication usage in [date_from, date_to] as one grouped query
+
+        Args:
+            group_by: 'medication', 'project', 'dog' or 'month' (per medication)
+            project_ids: None for every project, otherwise the projects to include
+            dog_id: Optional dog filter
+            medication_id: Optional catalogue entry filter
+
+        Each row has administrations, visits, dogs, quantity (sum of recorded
+        quantities) and cost (quantity, or one unit when none was recorded,
+        times the catalogue price at the time of the visit).
+        """
+        if group_by not in USAGE_GROUPINGS:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+
+        clauses = [
+            VisitMedication.visit_date >= datetime.combine(date_from, datetime.min.time()),
+            VisitMedication.visit_date < datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+        ]
+        if project_ids is not None:
+            clauses.append(VisitMedication.project_id.in_(list(project_ids)))
+        if dog_id:
+            clauses.append(VisitMedication.dog_id == dog_id)
+        if medication_id:
+            clauses.append(VisitMedication.medication_id == medication_id)
+
+        measures = [
+            func.count(VisitMedication.id).label('administrations'),
+            func.count(func.distinct(VisitMedication.visit_id)).label('visits'),
+            func.count(func.distinct(VisitMedication.dog_id)).label('dogs'),
+            func.coalesce(func.sum(VisitMedication.quantity), 0).label('quantity'),
+            func.coalesce(func.sum(
+                func.coalesce(VisitMedication.quantity, 1) * VisitMedication.unit_cost
+            ), 0).label('cost'),
+        ]
+
+        if group_by == 'project':
+            keys = [Project.id.label('key_id'), Project.name.label('key_name')]
+            query = db.session.query(*keys, *measures).join(Project, Project.id == VisitMedication.project_id)
+        elif group_by == 'dog':
+            keys = [Dog.id.label('key_id'), Dog.name.label('key_name'), Dog.code.label('dog_code')]
+            query = db.session.query(*keys, *measures).join(Dog, Dog.id == VisitMedication.dog_id)
+        else:
+            keys = [Medication.id.label('key_id'), Medication.name.label('key_name'), Medication.unit.label('unit')]
+            if group_by == 'month':
+                keys.append(func.date_trunc('month', VisitMedication.visit_date).label('period'))
+            query = db.session.query(*keys, *measures).join(Medication, Medication.id == VisitMedication.medication_id)
+
+        query = query.filter(*clauses).group_by(*keys)
+        if group_by == 'month':
+            query = query.order_by(keys[-1], func.count(VisitMedication.id).desc())
+        else:
+            query = query.order_by(func.count(VisitMedication.id).desc(), keys[1])
+
+        rows = []
+        for row in query.all():
+            item = {
+                'id': str(row.key_id),
+                'name': row.key_name,
+                'administrations': row.administrations,
+                'visits': row.visits,
+                'dogs': row.dogs,
+                'quantity': round(float(row.quantity), 2),
+                'cost': round(float(row.cost), 2),
+            }
+            if group_by == 'dog':
+                item['dog_code'] = row.dog_code or ''
+            if group_by in ('medication', 'month'):
+                item['unit'] = row.unit
+            if group_by == 'month':
+                item['period'] = row.period.strftime('%Y-%m')
+            rows.append(item)
+        return rows
+
+    @staticmethod
+    def rebuild(visit_ids: Optional[Iterable] = None) -> Tuple[int, Optional[str]]:
+        """
+        Rewrite ledger rows from the visits' medications JSON, e.g. after
+        medications were edited in place without being reassigned
+
+        Returns:
+            tuple: (number of visits processed, error message or None)
+        """
+        query = VeterinaryVisit.query.order_by(VeterinaryVisit.id)
+        if visit_ids is not None:
+            query = query.filter(VeterinaryVisit.id.in_(list(visit_ids)))
+
+        processed = 0
+        try:
+            connection = db.session.connection()
+            for visit in query.yield_per(REBUILD_BATCH_SIZE):
+                sync_visit_medications(connection, visit)
+                processed += 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Medication ledger rebuild failed: {e}")
+            return 0, "تعذر إعادة بناء سجل الأدوية"
+        return processed, None
@@ -5,6 +5,7 @@ with bilingual header (English/Arabic), company branding, and proper RTL support
 """
 
 import os
+import sys
 import logging
 from io import BytesIO
 from datetime import datetime
@@ -14,9 +15,9 @@ from reportlab.lib.units import inch, mm
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.pdfgen import canvas
-from flask import current_app
 
-from k9.utils.utils_pdf_rtl import register_arabic_fonts, get_arabic_font_name, format_pdf_text
+from k9.utils.utils_pdf_rtl import register_arabic_fonts, get_arabic_font_name, format_pdf_text, preshape, rtl_column
+from k9.utils.pdf_page_templates import StaticPageLayer, draw_watermark
 from k9.services.report_registry import get_report_registry, ColumnDefinition
 
 logger = logging.getLogger(__name__)
@@ -49,6 +50,35 @@ ARABIC_DAYS = {
 # Default header color for tables
 DEFAULT_HEADER_COLOR = colors.HexColor('#603913')
 
+# Large-report mode: above LARGE_REPORT_ROWS rows the table is split into
+# page-sized tables that each repeat the header. A single ReportLab Table is
+# re-split on every page break, which grows superlinearly with row count.
+LARGE_REPORT_ROWS = 300
+CHUNK_ROWS = 30
+AVAILABLE_WIDTH_MM = 180  # accounting for margins
+
+PAGE_TEMPLATE_NAME = 'k9_report_page'
+FOOTER_BASELINE = 40
+
+_LABELS_PRESHAPED = False
+
+
+def _preshape_report_labels():
+    """Pin shaped forms of registry titles, headers and option labels (once per process)"""
+    global _LABELS_PRESHAPED
+    if _LABELS_PRESHAPED:
+        return
+    
+    labels = [COMPANY_NAME_AR, *COMPANY_INFO_AR, *ARABIC_DAYS.values(), "لا توجد بيانات"]
+    for report_def in get_report_registry().get_all_reports().values():
+        labels.append(report_def.title_ar)
+        labels.extend(col.header for col in report_def.columns)
+        for filter_def in report_def.filters:
+            labels.append(filter_def.label)
+            labels.extend(option.get('label', '') for option in filter_def.options)
+    preshape(labels)
+    _LABELS_PRESHAPED = True
+
 
 class UnifiedPDFReportGenerator:
     """
@@ -64,6 +94,7 @@ class UnifiedPDFReportGenerator:
     def _init_fonts_and_styles(self):
         """Initialize fonts and paragraph styles"""
         register_arabic_fonts()
+        _preshape_report_labels()
         self.arabic_font = get_arabic_font_name()
         self.styles = getSampleStyleSheet()
         
@@ -130,12 +161,11 @@ class UnifiedPDFReportGenerator:
             os.path.join(os.path.dirname(__file__), '..', 'static/img/company_logo.png'),  # Relative to this file
         ]
         
-        try:
-            # Also try Flask app root path
-            logo_path = os.path.join(current_app.root_path, 'static/img/company_logo.png')
+        # Also try Flask app root path; batch PDF worker processes never load Flask
+        flask = sys.modules.get('flask')
+        if flask is not None and flask.has_app_context():
+            logo_path = os.path.join(flask.current_app.root_path, 'static/img/company_logo.png')
             possible_paths.insert(0, logo_path)
-        except Exception:
-            pass
         
         for path in possible_paths:
             abs_path = os.path.abspath(path)
@@ -168,6 +198,12 @@ class UnifiedPDFReportGenerator:
         Draw the professional bilingual header on each page.
         Matches the HTML template in k9/templates/reports/_header.html
         """
+        if include_date:
+            self._draw_header_date(canvas_obj, doc)
+        self._draw_letterhead(canvas_obj, doc)
+    
+    def _draw_header_date(self, canvas_obj, doc):
+        """Draw the day and date at the very top right (Arabic)"""
         width, height = A4
         top_margin = height - 30
         
@@ -176,22 +212,24 @@ class UnifiedPDFReportGenerator:
         current_day_name = ARABIC_DAYS.get(now.strftime('%A'), now.strftime('%A'))
         current_date = now.strftime('%d-%m-%Y')
         
-        # Day and Date at very top right (Arabic)
-        if include_date:
-            canvas_obj.setFont(self.arabic_font, 10)
-            canvas_obj.drawRightString(
-                width - doc.rightMargin, 
-                top_margin,
-                self._format_arabic(f"اليوم: {current_day_name}")
-            )
-            canvas_obj.drawRightString(
-                width - doc.rightMargin, 
-                top_margin - 15,
-                self._format_arabic(f"التاريخ: {current_date}")
-            )
+        canvas_obj.setFont(self.arabic_font, 10)
+        canvas_obj.drawRightString(
+            width - doc.rightMargin, 
+            top_margin,
+            self._format_arabic(f"اليوم: {current_day_name}")
+        )
+        canvas_obj.drawRightString(
+            width - doc.rightMargin, 
+            top_margin - 15,
+            self._format_arabic(f"التاريخ: {current_date}")
+        )
+    
+    def _draw_letterhead(self, canvas_obj, doc):
+        """Draw the static part of the header: company info, logo and separator"""
+        width, height = A4
         
         # Header section starts below date
-        header_top = top_margin - 45
+        header_top = height - 30 - 45
         
         # English company info (Left side)
         canvas_obj.setFont('Helvetica-Bold', 9)
@@ -247,24 +285,30 @@ class UnifiedPDFReportGenerator:
     
     def _draw_footer(self, canvas_obj, doc, user=None, page_num=None, total_pages=None):
         """Draw the footer on each page"""
-        width, height = A4
-        bottom_margin = 40
-        
-        # Timestamp
-        now = datetime.now()
-        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
-        
+        self._draw_footer_timestamp(canvas_obj, doc)
+        self._draw_footer_static(canvas_obj, doc, user)
+        self._draw_page_number(canvas_obj, doc, page_num, total_pages)
+    
+    def _footer_font(self, canvas_obj):
         canvas_obj.setFont(self.arabic_font, 8)
         canvas_obj.setFillColor(colors.HexColor('#666666'))
-        
-        # Left side: Generation timestamp
+    
+    def _draw_footer_timestamp(self, canvas_obj, doc):
+        """Left side of the footer: generation timestamp"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._footer_font(canvas_obj)
         canvas_obj.drawString(
             doc.leftMargin, 
-            bottom_margin,
+            FOOTER_BASELINE,
             f"Generated: {timestamp}"
         )
+    
+    def _draw_footer_static(self, canvas_obj, doc, user=None):
+        """Centre of the footer: user info if provided"""
+        width, height = A4
+        bottom_margin = FOOTER_BASELINE
+        self._footer_font(canvas_obj)
         
-        # Center: User info if provided
         if user:
             user_name = getattr(user, 'username', str(user)) if user else ''
             canvas_obj.drawCentredString(
@@ -272,8 +316,13 @@ class UnifiedPDFReportGenerator:
                 bottom_margin,
                 f"By: {user_name}"
             )
+    
+    def _draw_page_number(self, canvas_obj, doc, page_num=None, total_pages=None):
+        """Right side of the footer: page number if provided"""
+        width, height = A4
+        bottom_margin = FOOTER_BASELINE
+        self._footer_font(canvas_obj)
         
-        # Right side: Page number if provided
         if page_num and total_pages:
             canvas_obj.drawRightString(
                 width - doc.rightMargin, 
@@ -281,7 +330,20 @@ class UnifiedPDFReportGenerator:
                 f"Page {page_num} of {total_pages}"
             )
     
-    def _build_data_table(self, data, columns, header_color=None):
+    def _record_value(self, record, col, columns):
+        """Get a column value from a dict, list/tuple or object record"""
+        key = col['key']
+        if isinstance(record, dict):
+            return record.get(key, '')
+        if isinstance(record, (list, tuple)):
+            try:
+                idx = int(key) if isinstance(key, int) else list(range(len(record)))[columns.index(col)]
+                return record[idx] if idx < len(record) else ''
+            except (ValueError, IndexError):
+                return ''
+        return getattr(record, key, '') if hasattr(record, key) else ''
+    
+    def _build_data_table(self, data, columns, header_color=None, chunk_rows=None):
         """
         Build a data table with the specified columns and data.
         
@@ -290,15 +352,16 @@ class UnifiedPDFReportGenerator:
             columns: List of tuples (key, header_text, width_mm, is_arabic)
                     or list of dictionaries with 'key', 'header', 'width', 'arabic' keys
             header_color: Color for header row (default: brown #603913)
+            chunk_rows: Split into tables of this many rows (large-report mode)
         
         Returns:
-            ReportLab Table object
+            List of flowables (one Table, or several in large-report mode)
         """
         if not data:
-            return Paragraph(
+            return [Paragraph(
                 self._format_arabic("لا توجد بيانات"),
                 self.style_ar_right
-            )
+            )]
         
         header_color = header_color or DEFAULT_HEADER_COLOR
         
@@ -323,42 +386,37 @@ class UnifiedPDFReportGenerator:
         # Build header row
         header_row = [self._para_header(col['header']) for col in normalized_columns]
         
+        # Extract raw values first so each Arabic column is shaped in one batch
+        raw_rows = [
+            [self._record_value(record, col, columns) for col in normalized_columns]
+            for record in data
+        ]
+        shaped_columns = {
+            idx: rtl_column(raw[idx] for raw in raw_rows)
+            for idx, col in enumerate(normalized_columns) if col['arabic']
+        }
+        
         # Build data rows
         rows = [header_row]
-        for i, record in enumerate(data):
+        for r, raw in enumerate(raw_rows):
             row = []
-            for col in normalized_columns:
-                key = col['key']
-                is_arabic = col['arabic']
-                
-                # Get value from record
-                if isinstance(record, dict):
-                    value = record.get(key, '')
-                elif isinstance(record, (list, tuple)):
-                    try:
-                        idx = int(key) if isinstance(key, int) else list(range(len(record)))[columns.index(col)]
-                        value = record[idx] if idx < len(record) else ''
-                    except (ValueError, IndexError):
-                        value = ''
-                else:
-                    value = getattr(record, key, '') if hasattr(record, key) else ''
-                
+            for idx, col in enumerate(normalized_columns):
                 # Create paragraph based on text type
-                if is_arabic:
-                    row.append(self._para_arabic(value))
+                if col['arabic']:
+                    row.append(Paragraph(shaped_columns[idx][r], self.style_ar_right))
                 else:
-                    row.append(self._para_latin(value))
+                    row.append(self._para_latin(raw[idx]))
             
             rows.append(row)
         
         # Calculate column widths
         col_widths = [col['width'] * mm for col in normalized_columns]
         
-        # Create table
-        table = Table(rows, repeatRows=1, colWidths=col_widths)
-        
-        # Apply table style
-        table.setStyle(TableStyle([
+        return self._layout_tables(rows, col_widths, header_color, chunk_rows)
+    
+    def _table_style(self, header_color):
+        """Shared table style: coloured header, grid, zebra rows"""
+        return TableStyle([
             # Header styling
             ('BACKGROUND', (0, 0), (-1, 0), header_color),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -378,11 +436,34 @@ class UnifiedPDFReportGenerator:
             ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
             ('LEFTPADDING', (0, 0), (-1, -1), 4),
             ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        ])
+    
+    def _layout_tables(self, rows, col_widths, header_color, chunk_rows=None):
+        """
+        Lay rows (header first) out as one table, or as page-sized tables
+        that each repeat the header row when chunk_rows is given.
         
-        return table
+        Returns:
+            List of Table flowables
+        """
+        style = self._table_style(header_color)
+        header, body = rows[0], rows[1:]
+        
+        if not chunk_rows or len(body) <= chunk_rows:
+            table = Table(rows, repeatRows=1, colWidths=col_widths)
+            table.setStyle(style)
+            return [table]
+        
+        # Keep chunks even-sized so the zebra striping continues across tables
+        chunk_rows += chunk_rows % 2
+        tables = []
+        for start in range(0, len(body), chunk_rows):
+            table = Table([header] + body[start:start + chunk_rows], repeatRows=1, colWidths=col_widths)
+            table.setStyle(style)
+            tables.append(table)
+        return tables
     
-    def _build_simple_table(self, data_rows, header_color=None):
+    def _build_simple_table(self, data_rows, header_color=None, chunk_rows=None):
         """
         Build a simple table from raw data rows.
         First row is treated as headers.
@@ -390,15 +471,16 @@ class UnifiedPDFReportGenerator:
         Args:
             data_rows: List of lists, first row is headers
             header_color: Color for header row
+            chunk_rows: Split into tables of this many rows (large-report mode)
         
         Returns:
-            ReportLab Table object
+            List of flowables (one Table, or several in large-report mode)
         """
         if not data_rows or len(data_rows) == 0:
-            return Paragraph(
+            return [Paragraph(
                 self._format_arabic("لا توجد بيانات"),
                 self.style_ar_right
-            )
+            )]
         
         header_color = header_color or DEFAULT_HEADER_COLOR
         
@@ -419,28 +501,10 @@ class UnifiedPDFReportGenerator:
         
         # Calculate column widths (distribute evenly)
         num_cols = len(data_rows[0]) if data_rows else 1
-        available_width = 180  # mm, accounting for margins
-        col_width = available_width / num_cols
+        col_width = AVAILABLE_WIDTH_MM / num_cols
         col_widths = [col_width * mm] * num_cols
         
-        # Create table
-        table = Table(rows, repeatRows=1, colWidths=col_widths)
-        
-        # Apply table style
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), header_color),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('GRID', (0, 0), (-1, -1), 0.5, header_color),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.HexColor('#f5f5f5')]),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-        ]))
-        
-        return table
+        return self._layout_tables(rows, col_widths, header_color, chunk_rows)
     
     def _build_signature_section(self, signature_labels=None):
         """
@@ -547,7 +611,9 @@ class UnifiedPDFReportGenerator:
         include_notes: bool = True,
         include_signatures: bool = True,
         notes_text: str = None,
-        signature_labels: list = None
+        signature_labels: list = None,
+        large_report: bool = None,
+        watermark: str = None
     ) -> BytesIO:
         """
         Generate a PDF report for any report type.
@@ -567,6 +633,9 @@ class UnifiedPDFReportGenerator:
             include_signatures: Whether to include signature lines
             notes_text: Optional pre-filled notes text
             signature_labels: Optional custom signature labels
+            large_report: Render the table in page-sized chunks; by default
+                          enabled automatically above LARGE_REPORT_ROWS rows
+            watermark: Optional diagonal watermark text (e.g. "سري")
         
         Returns:
             BytesIO buffer containing the PDF
@@ -631,20 +700,22 @@ class UnifiedPDFReportGenerator:
         
         story.append(Spacer(1, 10))
         
+        if large_report is None:
+            large_report = bool(data) and len(data) > LARGE_REPORT_ROWS
+        chunk_rows = CHUNK_ROWS if large_report else None
+        
         # Build data table
         if columns:
             # Using column definitions
-            table = self._build_data_table(data, columns, header_color)
+            story.extend(self._build_data_table(data, columns, header_color, chunk_rows))
         elif data and isinstance(data[0], (list, tuple)):
             # Raw data rows (first row is headers)
-            table = self._build_simple_table(data, header_color)
+            story.extend(self._build_simple_table(data, header_color, chunk_rows))
         else:
-            table = Paragraph(
+            story.append(Paragraph(
                 self._format_arabic("لا توجد بيانات متاحة"),
                 self.style_ar_right
-            )
-        
-        story.append(table)
+            ))
         
         # Add notes section if requested
         if include_notes:
@@ -654,12 +725,19 @@ class UnifiedPDFReportGenerator:
         if include_signatures:
             story.extend(self._build_signature_section(signature_labels))
         
-        # Create header/footer callback
-        def add_header_footer(canvas_obj, doc_obj):
-            canvas_obj.saveState()
-            self._draw_header(canvas_obj, doc_obj)
-            self._draw_footer(canvas_obj, doc_obj, user)
-            canvas_obj.restoreState()
+        # Letterhead, logo, watermark and footer user are recorded once as a
+        # Form XObject; only the date and timestamp are drawn on each page
+        def draw_static(canvas_obj, doc_obj):
+            if watermark:
+                draw_watermark(canvas_obj, self._format_arabic(watermark), self.arabic_font, A4)
+            self._draw_letterhead(canvas_obj, doc_obj)
+            self._draw_footer_static(canvas_obj, doc_obj, user)
+        
+        def draw_live(canvas_obj, doc_obj):
+            self._draw_header_date(canvas_obj, doc_obj)
+            self._draw_footer_timestamp(canvas_obj, doc_obj)
+        
+        add_header_footer = StaticPageLayer(PAGE_TEMPLATE_NAME, draw_static, draw_live)
         
         # Build PDF
         doc.build(story, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
@@ -4,6 +4,7 @@ Unified Permission Service V2
 Single source of truth for all permission checks
 """
 import fnmatch
+import hashlib
 from functools import wraps
 from flask import g, abort, request, flash, redirect, url_for
 from flask_login import current_user
@@ -32,6 +33,38 @@ class PermissionService:
                 del cls._cache[key]
         else:
             cls._cache.clear()
+        
+        from k9.services.ui_navigation import NavigationCache
+        NavigationCache.invalidate(user_id)
+    
+    @classmethod
+    def permission_fingerprint(cls, user_id):
+        """
+        Stable hash of everything that decides a user's global permission checks:
+        live role assignments (role name, role active flag, global or project scope)
+        and live global overrides.
+        Users with equal fingerprints get identical has_permission/is_admin answers.
+        """
+        now = datetime.utcnow()
+        roles = db.session.query(
+            Role.name, Role.is_active, UserRoleAssignment.project_id.is_(None)
+        ).join(
+            UserRoleAssignment, UserRoleAssignment.role_id == Role.id
+        ).filter(
+            UserRoleAssignment.user_id == user_id,
+            UserRoleAssignment.is_active == True,
+            db.or_(UserRoleAssignment.expires_at.is_(None), UserRoleAssignment.expires_at > now)
+        ).all()
+        
+        overrides = db.session.query(PermissionOverride.permission_key, PermissionOverride.is_granted).filter(
+            PermissionOverride.user_id == user_id,
+            PermissionOverride.project_id.is_(None),
+            db.or_(PermissionOverride.expires_at.is_(None), PermissionOverride.expires_at >= now)
+        ).all()
+        
+        parts = sorted({f"r:{name}:{int(bool(active))}:{int(bool(is_global))}" for name, active, is_global in roles})
+        parts += sorted({f"o:{key}:{int(bool(granted))}" for key, granted in overrides})
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
     
     @classmethod
     def get_user_roles(cls, user_id, project_id=None):
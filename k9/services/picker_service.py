@@ -0,0 +1,223 @@
+"""
+Picker Service
+Scoped, searchable option lists for dog, employee and handler dropdowns
+
+Dogs reach a project through several paths: ProjectAssignment, the legacy
+project_dog_assignment table and handlers assigned to the project (plus,
+for some forms, dogs not assigned to anyone). All of them are combined into
+one UNION subquery with the status filter in SQL, so a dropdown costs a
+single query however many projects the user manages.
+
+Search is a prefix match on name and code, returning the top N options for
+typeahead widgets. Results are cached per scope for PICKER_CACHE_TTL seconds;
+the cache is dropped whenever a transaction that touched dogs, employees,
+users or project assignments commits.
+"""
+
+import threading
+import logging
+from typing import Iterable, List, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import event, or_, select, union
+from sqlalchemy.orm import Session
+
+from app import db
+from k9.models.models import (
+    Dog, DogStatus, Employee, EmployeeRole, Project, ProjectAssignment,
+    User, UserRole, project_dog_assignment
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PICKER_LIMIT = 20
+MAX_PICKER_LIMIT = 100
+PICKER_CACHE_TTL = 60
+ACTIVE_DOG_STATUSES = (DogStatus.ACTIVE, DogStatus.TRAINING)
+
+DOG_SOURCES = ('assignment', 'legacy', 'handler')
+
+# Models whose changes can alter an option list
+_PICKER_MODELS = (Dog, Employee, User, ProjectAssignment)
+# Session.info key set once the transaction has flushed picker-relevant writes
+_PICKER_DIRTY_KEY = 'picker_options_dirty'
+
+
+def _prefix_pattern(search: Optional[str]) -> Optional[str]:
+    text = (search or '').strip()
+    if not text:
+        return None
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _resolve_limit(limit, search):
+    """Searches default to the typeahead page size; unsearched lists are unbounded unless limited"""
+    if not limit:
+        return DEFAULT_PICKER_LIMIT if _prefix_pattern(search) else None
+    try:
+        return min(max(int(limit), 1), MAX_PICKER_LIMIT)
+    except (TypeError, ValueError):
+        return DEFAULT_PICKER_LIMIT
+
+
+class PickerService:
+    """Option lists for form dropdowns and typeahead endpoints"""
+
+    _cache = TTLCache(maxsize=1024, ttl=PICKER_CACHE_TTL)
+    _lock = threading.Lock()
+
+    @classmethod
+    def _cached(cls, key, loader):
+        with cls._lock:
+            if key in cls._cache:
+                return cls._cache[key]
+        value = loader()
+        with cls._lock:
+            cls._cache[key] = value
+        return value
+
+    @classmethod
+    def invalidate(cls):
+        """Drop every cached option list (e.g. after assignments change)"""
+        with cls._lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def managed_project_ids(user) -> Optional[List[str]]:
+        """Project scope for a user: None for GENERAL_ADMIN, else the projects they manage"""
+        if user.role == UserRole.GENERAL_ADMIN:
+            return None
+        return [str(pid) for (pid,) in db.session.query(Project.id).filter(Project.manager_id == user.id).all()]
+
+    @staticmethod
+    def dog_scope(project_ids: Iterable, sources=DOG_SOURCES, include_unassigned=False):
+        """UNION of dog IDs reachable from the projects through the given sources"""
+        project_ids = list(project_ids)
+        selects = []
+        if project_ids and 'assignment' in sources:
+            selects.append(select(ProjectAssignment.dog_id.label('dog_id')).where(
+                ProjectAssignment.project_id.in_(project_ids),
+                ProjectAssignment.is_active == True,
+                ProjectAssignment.dog_id.isnot(None)
+            ))
+        if project_ids and 'legacy' in sources:
+            selects.append(select(project_dog_assignment.c.dog_id.label('dog_id')).where(
+                project_dog_assignment.c.project_id.in_(project_ids)
+            ))
+        if project_ids and 'handler' in sources:
+            selects.append(select(Dog.id.label('dog_id')).join(
+                User, User.id == Dog.assigned_to_user_id
+            ).where(
+                User.role == UserRole.HANDLER,
+                User.project_id.in_(project_ids)
+            ))
+        if include_unassigned:
+            selects.append(select(Dog.id.label('dog_id')).where(Dog.assigned_to_user_id.is_(None)))
+        if not selects:
+            return None
+        return union(*selects).subquery() if len(selects) > 1 else selects[0].subquery()
+
+    @staticmethod
+    def dog_options(project_ids=None, search=None, limit=None, statuses=ACTIVE_DOG_STATUSES,
+                    sources=DOG_SOURCES, include_unassigned=False) -> List[dict]:
+        """
+        Dog options ({id, name, code}) ordered by name
+
+        Args:
+            project_ids: None for every dog, otherwise the projects to scope to
+            search: Optional prefix matched against name and code
+            limit: Maximum options (defaults to DEFAULT_PICKER_LIMIT when searching)
+            statuses: DogStatus values to include
+            sources: Which project links count (assignment, legacy, handler)
+            include_unassigned: Also offer dogs not assigned to any handler
+        """
+        scope_key = None if project_ids is None else tuple(sorted(str(pid) for pid in project_ids))
+        limit = _resolve_limit(limit, search)
+        key = ('dogs', scope_key, (search or '').strip().lower(), limit,
+               tuple(s.name for s in statuses), tuple(sources), include_unassigned)
+
+        def load():
+            query = db.session.query(Dog.id, Dog.name, Dog.code).filter(Dog.current_status.in_(statuses))
+            if scope_key is not None:
+                scope = PickerService.dog_scope(scope_key, sources, include_unassigned)
+                if scope is None:
+                    return []
+                query = query.filter(Dog.id.in_(select(scope.c.dog_id)))
+            pattern = _prefix_pattern(search)
+            if pattern:
+                query = query.filter(or_(Dog.name.ilike(pattern, escape='\\'), Dog.code.ilike(pattern, escape='\\')))
+            rows = query.order_by(Dog.name, Dog.code).limit(limit).all()
+            return [{'id': str(row.id), 'name': row.name, 'code': row.code} for row in rows]
+
+        return PickerService._cached(key, load)
+
+    @staticmethod
+    def employee_options(role=None, project_ids=None, search=None, limit=None, active_only=True) -> List[dict]:
+        """Employee options ({id, name, employee_id, role}) ordered by name"""
+        if isinstance(role, str):
+            role = EmployeeRole[role] if role in EmployeeRole.__members__ else None
+        scope_key = None if project_ids is None else tuple(sorted(str(pid) for pid in project_ids))
+        limit = _resolve_limit(limit, search)
+        key = ('employees', role.name if role else None, scope_key, (search or '').strip().lower(), limit, active_only)
+
+        def load():
+            query = db.session.query(Employee.id, Employee.name, Employee.employee_id, Employee.role)
+            if role:
+                query = query.filter(Employee.role == role)
+            if active_only:
+                query = query.filter(Employee.is_active == True)
+            if scope_key is not None:
+                query = query.filter(Employee.id.in_(select(ProjectAssignment.employee_id).where(
+                    ProjectAssignment.project_id.in_(scope_key),
+                    ProjectAssignment.is_active == True
+                )))
+            pattern = _prefix_pattern(search)
+            if pattern:
+                query = query.filter(or_(Employee.name.ilike(pattern, escape='\\'),
+                                         Employee.employee_id.ilike(pattern, escape='\\')))
+            rows = query.order_by(Employee.name).limit(limit).all()
+            return [{'id': str(row.id), 'name': row.name, 'employee_id': row.employee_id,
+                     'role': row.role.value if row.role else None} for row in rows]
+
+        return PickerService._cached(key, load)
+
+    @staticmethod
+    def handler_options(project_ids=None, search=None, limit=None) -> List[dict]:
+        """Active handler user options ({id, full_name, username}) ordered by name"""
+        scope_key = None if project_ids is None else tuple(sorted(str(pid) for pid in project_ids))
+        limit = _resolve_limit(limit, search)
+        key = ('handlers', scope_key, (search or '').strip().lower(), limit)
+
+        def load():
+            query = db.session.query(User.id, User.full_name, User.username).filter(
+                User.role == UserRole.HANDLER,
+                User.active == True
+            )
+            if scope_key is not None:
+                query = query.filter(User.project_id.in_(scope_key))
+            pattern = _prefix_pattern(search)
+            if pattern:
+                query = query.filter(or_(User.full_name.ilike(pattern, escape='\\'),
+                                         User.username.ilike(pattern, escape='\\')))
+            rows = query.order_by(User.full_name).limit(limit).all()
+            return [{'id': str(row.id), 'full_name': row.full_name, 'username': row.username} for row in rows]
+
+        return PickerService._cached(key, load)
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_picker_changes(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, _PICKER_MODELS) for obj in changed):
+        session.info[_PICKER_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop(_PICKER_DIRTY_KEY, None):
+        PickerService.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_picker_changes(session):
+    session.info.pop(_PICKER_DIRTY_KEY, None)
@@ -6,15 +6,20 @@ This ensures 100% parity between HTML preview and PDF export.
 
 import logging
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Iterable
 from flask import current_app
 from flask_login import current_user
 
 from app import db
 from k9.services.report_registry import get_report_registry, ColumnDefinition
+from k9.services.report_filter_compiler import ReportFilterCompiler
+from k9.utils.db_routing import read_replica
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip; fetchers read through a server-side cursor
+REPORT_BATCH_SIZE = 1000
+
 
 class ReportDataService:
     """
@@ -25,13 +30,16 @@ class ReportDataService:
     def __init__(self):
         self.registry = get_report_registry()
     
+    @read_replica
     def fetch_report_data(
         self,
         report_type: str,
         filters: Dict[str, Any] = None,
         start_date: date = None,
         end_date: date = None,
-        user = None
+        user = None,
+        sort: str = None,
+        limit: int = None
     ) -> List[Dict[str, Any]]:
         """
         Fetch formatted report data for any report type.
@@ -42,6 +50,8 @@ class ReportDataService:
             start_date: Optional start date for date range
             end_date: Optional end date for date range
             user: User requesting the report (for permission scoping)
+            sort: Optional model field to sort by ('-' prefix for descending)
+            limit: Optional maximum number of records
         
         Returns:
             List of formatted records ready for display/export
@@ -62,7 +72,7 @@ class ReportDataService:
             return []
         
         try:
-            raw_data = fetcher_method(filters, start_date, end_date, user)
+            raw_data = fetcher_method(filters, start_date, end_date, user, sort=sort, limit=limit)
             
             # Format data according to column definitions
             formatted_data = self._format_records(raw_data, report_def.columns)
@@ -72,9 +82,70 @@ class ReportDataService:
             logger.error(f"Error fetching report data for {report_type}: {e}")
             return []
     
+    @read_replica
+    def iter_report_rows(
+        self,
+        report_type: str,
+        filters: Dict[str, Any] = None,
+        start_date: date = None,
+        end_date: date = None,
+        user = None,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[List[str]]:
+        """
+        Lazily yield formatted rows (values in column order) for streaming exports.
+        Unlike fetch_report_data, errors are raised to the caller.
+        """
+        filters = filters or {}
+        user = user or current_user
+        
+        report_def = self.registry.get_report(report_type)
+        fetcher_method = getattr(self, f'_fetch_{report_type}', None)
+        if not report_def or not fetcher_method:
+            raise ValueError(f"Unknown report type: {report_type}")
+        
+        records = fetcher_method(filters, start_date, end_date, user, sort=sort, limit=limit)
+        for idx, record in enumerate(records, 1):
+            yield [
+                str(idx) if col.key == 'row_num' else col.format_value(record.get(col.key, ''))
+                for col in report_def.columns
+            ]
+    
+    @read_replica
+    def group_report_records(
+        self,
+        report_type: str,
+        group_key: str,
+        filters: Dict[str, Any] = None,
+        start_date: date = None,
+        end_date: date = None,
+        user = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch a report once and split it into formatted records per value of
+        group_key (e.g. dog_id), numbering rows within each group.
+        Errors are raised to the caller.
+        """
+        filters = filters or {}
+        user = user or current_user
+        
+        report_def = self.registry.get_report(report_type)
+        fetcher_method = getattr(self, f'_fetch_{report_type}', None)
+        if not report_def or not fetcher_method:
+            raise ValueError(f"Unknown report type: {report_type}")
+        
+        grouped = {}
+        for record in fetcher_method(filters, start_date, end_date, user):
+            grouped.setdefault(str(record.get(group_key, '')), []).append(record)
+        return {
+            group: self._format_records(records, report_def.columns)
+            for group, records in grouped.items()
+        }
+    
     def _format_records(
         self,
-        raw_records: List[Dict[str, Any]],
+        raw_records: Iterable[Dict[str, Any]],
         columns: List[ColumnDefinition]
     ) -> List[Dict[str, Any]]:
         """Format raw records according to column definitions"""
@@ -92,15 +163,22 @@ class ReportDataService:
         
         return formatted
     
+    def _apply_filters(self, report_type, query, filters, start_date, end_date, sort=None, limit=None):
+        """Push the registry filters, scope, sort and limit down into SQL"""
+        report_def = self.registry.get_report(report_type)
+        return ReportFilterCompiler.apply(query, report_def, filters, start_date, end_date, sort, limit)
+        
     def _fetch_dogs(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch dogs data with filters"""
-        from k9.models.models import Dog, DogStatus, DogGender
+        from k9.models.models import Dog
         
         # Base query - scope based on user role
         if hasattr(user, 'role') and user.role.value == 'GENERAL_ADMIN':
@@ -108,42 +186,20 @@ class ReportDataService:
         else:
             query = Dog.query.filter_by(assigned_to_user_id=user.id)
         
-        # Apply filters
-        if filters.get('gender'):
-            gender_values = filters['gender'] if isinstance(filters['gender'], list) else [filters['gender']]
-            query = query.filter(Dog.gender.in_([DogGender[g] for g in gender_values if g in DogGender.__members__]))
-        
-        if filters.get('status'):
-            status_values = filters['status'] if isinstance(filters['status'], list) else [filters['status']]
-            query = query.filter(Dog.current_status.in_([DogStatus[s] for s in status_values if s in DogStatus.__members__]))
-        
-        dogs = query.all()
-        
-        # Apply text filters in Python (more flexible)
-        if filters.get('breed'):
-            breed_filter = filters['breed'].lower()
-            dogs = [d for d in dogs if breed_filter in (d.breed or '').lower()]
-        
-        if filters.get('keyword'):
-            keyword = filters['keyword'].lower()
-            dogs = [d for d in dogs if keyword in ' '.join([
-                d.name or '', d.code or '', d.breed or '',
-                d.location or '', d.microchip_id or '', d.notes or ''
-            ]).lower()]
+        query = self._apply_filters('dogs', query, filters, start_date, end_date, sort, limit)
         
         # Gender translation
         gender_map = {'MALE': 'ذكر', 'FEMALE': 'أنثى'}
         # Status translation
         status_map = {'ACTIVE': 'نشط', 'RETIRED': 'متقاعد', 'DECEASED': 'متوفى', 'TRAINING': 'تدريب'}
         
-        records = []
-        for dog in dogs:
+        for dog in query.yield_per(REPORT_BATCH_SIZE):
             age = ''
             if dog.birth_date:
                 age_years = (datetime.now().date() - dog.birth_date).days // 365
                 age = f'{age_years} سنة'
             
-            records.append({
+            yield {
                 'name': dog.name or '',
                 'code': dog.code or '',
                 'breed': dog.breed or '',
@@ -151,42 +207,21 @@ class ReportDataService:
                 'status': status_map.get(dog.current_status.value, '') if dog.current_status else '',
                 'location': dog.location or '',
                 'age': age
-            })
-        
-        return records
+            }
     
     def _fetch_employees(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch employees data with filters"""
-        from k9.models.models import Employee, EmployeeRole
-        
-        query = Employee.query
+        from k9.models.models import Employee
         
-        # Apply filters
-        if filters.get('role'):
-            role_values = filters['role'] if isinstance(filters['role'], list) else [filters['role']]
-            query = query.filter(Employee.role.in_([EmployeeRole[r] for r in role_values if r in EmployeeRole.__members__]))
-        
-        if filters.get('status'):
-            status_values = filters['status'] if isinstance(filters['status'], list) else [filters['status']]
-            is_active_list = ['ACTIVE' in status_values]
-            if 'ACTIVE' in status_values and 'INACTIVE' not in status_values:
-                query = query.filter(Employee.is_active == True)
-            elif 'INACTIVE' in status_values and 'ACTIVE' not in status_values:
-                query = query.filter(Employee.is_active == False)
-        
-        employees = query.all()
-        
-        # Apply date range filter
-        if start_date:
-            employees = [e for e in employees if e.hire_date and e.hire_date >= start_date]
-        if end_date:
-            employees = [e for e in employees if e.hire_date and e.hire_date <= end_date]
+        query = self._apply_filters('employees', Employee.query, filters, start_date, end_date, sort, limit)
         
         # Role translation
         role_map = {
@@ -199,43 +234,30 @@ class ReportDataService:
             'SECURITY': 'أمن'
         }
         
-        records = []
-        for emp in employees:
-            records.append({
+        for emp in query.yield_per(REPORT_BATCH_SIZE):
+            yield {
                 'name': emp.name or '',
                 'employee_id': emp.employee_id or '',
                 'role': role_map.get(emp.role.value, emp.role.value) if emp.role else '',
                 'phone': emp.phone or '',
                 'status': 'نشط' if emp.is_active else 'غير نشط',
                 'hire_date': emp.hire_date.strftime('%Y-%m-%d') if emp.hire_date else ''
-            })
-        
-        return records
+            }
     
     def _fetch_training(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch training sessions data with filters"""
-        from k9.models.models import TrainingSession, TrainingCategory
-        
-        query = TrainingSession.query
-        
-        # Apply date range
-        if start_date:
-            query = query.filter(TrainingSession.session_date >= start_date)
-        if end_date:
-            query = query.filter(TrainingSession.session_date <= end_date)
-        
-        # Apply category filter
-        if filters.get('category'):
-            cat_values = filters['category'] if isinstance(filters['category'], list) else [filters['category']]
-            query = query.filter(TrainingSession.category.in_([TrainingCategory[c] for c in cat_values if c in TrainingCategory.__members__]))
+        from k9.models.models import TrainingSession
         
-        sessions = query.order_by(TrainingSession.session_date.desc()).all()
+        query = self._apply_filters('training', TrainingSession.query, filters, start_date, end_date, sort, limit)
+        sessions = query.yield_per(REPORT_BATCH_SIZE)
         
         # Category translation
         category_map = {
@@ -248,44 +270,32 @@ class ReportDataService:
             'SOCIALIZATION': 'التأهيل'
         }
         
-        records = []
         for session in sessions:
-            records.append({
+            yield {
+                'dog_id': str(session.dog_id),
                 'dog_name': session.dog.name if session.dog else '',
                 'trainer_name': session.trainer.name if session.trainer else '',
                 'category': category_map.get(session.category.value, session.category.value) if session.category else '',
                 'session_date': session.session_date.strftime('%Y-%m-%d') if session.session_date else '',
-                'duration': str(session.duration_minutes) if session.duration_minutes else '',
-                'rating': str(session.rating) if session.rating else '',
+                'duration': str(session.duration) if session.duration else '',
+                'rating': str(session.success_rating) if session.success_rating is not None else '',
                 'notes': session.notes or ''
-            })
-        
-        return records
+            }
     
     def _fetch_veterinary(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch veterinary visits data with filters"""
-        from k9.models.models import VeterinaryVisit, VisitType
-        
-        query = VeterinaryVisit.query
-        
-        # Apply date range
-        if start_date:
-            query = query.filter(VeterinaryVisit.visit_date >= start_date)
-        if end_date:
-            query = query.filter(VeterinaryVisit.visit_date <= end_date)
+        from k9.models.models import VeterinaryVisit
         
-        # Apply visit type filter
-        if filters.get('visit_type'):
-            type_values = filters['visit_type'] if isinstance(filters['visit_type'], list) else [filters['visit_type']]
-            query = query.filter(VeterinaryVisit.visit_type.in_([VisitType[t] for t in type_values if t in VisitType.__members__]))
-        
-        visits = query.order_by(VeterinaryVisit.visit_date.desc()).all()
+        query = self._apply_filters('veterinary', VeterinaryVisit.query, filters, start_date, end_date, sort, limit)
+        visits = query.yield_per(REPORT_BATCH_SIZE)
         
         # Visit type translation
         type_map = {
@@ -297,43 +307,31 @@ class ReportDataService:
             'FOLLOW_UP': 'متابعة'
         }
         
-        records = []
         for visit in visits:
-            records.append({
+            yield {
+                'dog_id': str(visit.dog_id),
                 'dog_name': visit.dog.name if visit.dog else '',
                 'visit_type': type_map.get(visit.visit_type.value, visit.visit_type.value) if visit.visit_type else '',
                 'visit_date': visit.visit_date.strftime('%Y-%m-%d') if visit.visit_date else '',
                 'diagnosis': visit.diagnosis or '',
                 'treatment': visit.treatment or '',
                 'vet_name': visit.vet.name if visit.vet else ''
-            })
-        
-        return records
+            }
     
     def _fetch_breeding(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch breeding/production data with filters"""
-        from k9.models.models import ProductionCycle, ProductionCycleType, ProductionResult
-        
-        query = ProductionCycle.query
+        from k9.models.models import ProductionCycle
         
-        # Apply date range
-        if start_date:
-            query = query.filter(ProductionCycle.start_date >= start_date)
-        if end_date:
-            query = query.filter(ProductionCycle.start_date <= end_date)
-        
-        # Apply cycle type filter
-        if filters.get('cycle_type'):
-            type_values = filters['cycle_type'] if isinstance(filters['cycle_type'], list) else [filters['cycle_type']]
-            query = query.filter(ProductionCycle.cycle_type.in_([ProductionCycleType[t] for t in type_values if t in ProductionCycleType.__members__]))
-        
-        cycles = query.order_by(ProductionCycle.start_date.desc()).all()
+        query = self._apply_filters('breeding', ProductionCycle.query, filters, start_date, end_date, sort, limit)
+        cycles = query.yield_per(REPORT_BATCH_SIZE)
         
         # Cycle type translation
         type_map = {
@@ -352,9 +350,8 @@ class ReportDataService:
             'CANCELLED': 'ملغى'
         }
         
-        records = []
         for cycle in cycles:
-            records.append({
+            yield {
                 'dog_name': cycle.dog.name if cycle.dog else '',
                 'cycle_type': type_map.get(cycle.cycle_type.value, cycle.cycle_type.value) if cycle.cycle_type else '',
                 'start_date': cycle.start_date.strftime('%Y-%m-%d') if cycle.start_date else '',
@@ -362,34 +359,22 @@ class ReportDataService:
                 'result': result_map.get(cycle.result.value, cycle.result.value) if cycle.result else '',
                 'puppies_count': str(cycle.puppies_count) if cycle.puppies_count else '0',
                 'notes': cycle.notes or ''
-            })
-        
-        return records
+            }
     
     def _fetch_projects(
         self,
         filters: Dict[str, Any],
         start_date: date,
         end_date: date,
-        user
-    ) -> List[Dict[str, Any]]:
+        user,
+        sort: str = None,
+        limit: int = None
+    ) -> Iterator[Dict[str, Any]]:
         """Fetch projects data with filters"""
-        from k9.models.models import Project, ProjectStatus
+        from k9.models.models import Project
         
-        query = Project.query
-        
-        # Apply status filter
-        if filters.get('status'):
-            status_values = filters['status'] if isinstance(filters['status'], list) else [filters['status']]
-            query = query.filter(Project.status.in_([ProjectStatus[s] for s in status_values if s in ProjectStatus.__members__]))
-        
-        # Apply date range
-        if start_date:
-            query = query.filter(Project.start_date >= start_date)
-        if end_date:
-            query = query.filter(Project.start_date <= end_date)
-        
-        projects = query.order_by(Project.start_date.desc()).all()
+        query = self._apply_filters('projects', Project.query, filters, start_date, end_date, sort, limit)
+        projects = query.yield_per(REPORT_BATCH_SIZE)
         
         # Status translation
         status_map = {
@@ -400,13 +385,12 @@ class ReportDataService:
             'PLANNING': 'تخطيط'
         }
         
-        records = []
         for project in projects:
             # Count dogs and employees
             dogs_count = len(project.dogs) if hasattr(project, 'dogs') else 0
             employees_count = len(project.employees) if hasattr(project, 'employees') else 0
             
-            records.append({
+            yield {
                 'name': project.name or '',
                 'code': project.code or '',
                 'status': status_map.get(project.status.value, project.status.value) if project.status else '',
@@ -414,9 +398,7 @@ class ReportDataService:
                 'manager': project.manager.name if project.manager else '',
                 'dogs_count': str(dogs_count),
                 'employees_count': str(employees_count)
-            })
-        
-        return records
+            }
     
     def get_report_metadata(self, report_type: str) -> Dict[str, Any]:
         """Get metadata for a report type"""
@@ -22,7 +22,6 @@ from reportlab.pdfgen import canvas
 
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 from k9.models.models_handler_daily import HandlerReport, ShiftReport, ReportStatus
 from k9.models.models import VeterinaryVisit, BreedingTrainingActivity, CaretakerDailyLog
@@ -37,6 +36,18 @@ from k9.utils.pdf_minimal_elegant import (
     MinimalColors
 )
 from k9.utils.utils_pdf_rtl import rtl, register_arabic_fonts, get_arabic_font_name, format_pdf_text
+from k9.utils.excel_exporter import create_write_only_sheet, styled_cell
+
+# Excel styles of the handler/shift report workbooks
+_THIN = Side(style='thin')
+EXCEL_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+EXCEL_HEADER_FONT = Font(bold=True, size=12, color='FFFFFF')
+EXCEL_HEADER_FILL = PatternFill(start_color='1a237e', end_color='1a237e', fill_type='solid')
+EXCEL_INCIDENT_FILL = PatternFill(start_color='d32f2f', end_color='d32f2f', fill_type='solid')
+EXCEL_LABEL_FONT = Font(bold=True)
+EXCEL_LABEL_FILL = PatternFill(start_color='e8eaf6', end_color='e8eaf6', fill_type='solid')
+EXCEL_GOOD_FILL = PatternFill(start_color='c8e6c9', end_color='c8e6c9', fill_type='solid')
+EXCEL_BAD_FILL = PatternFill(start_color='ffcdd2', end_color='ffcdd2', fill_type='solid')
 
 
 class ReportExportService:
@@ -350,32 +361,6 @@ class ReportExportService:
         if not report:
             return None
         
-        buffer = BytesIO()
-        wb = Workbook()
-        
-        # Styles
-        header_font = Font(bold=True, size=12, color='FFFFFF')
-        header_fill = PatternFill(start_color='1a237e', end_color='1a237e', fill_type='solid')
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Main sheet
-        ws = wb.active
-        ws.title = 'معلومات التقرير'
-        ws.right_to_left = True
-        
-        # Report metadata
-        row = 1
-        ws.merge_cells(f'A{row}:B{row}')
-        ws[f'A{row}'] = 'تقرير السائس اليومي'
-        ws[f'A{row}'].font = Font(bold=True, size=14)
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-        row += 2
-        
         metadata = [
             ('التاريخ', report.date.strftime('%Y-%m-%d')),
             ('نوع التقرير', 'يومي شامل' if report.report_type.value == 'DAILY' else 'وردية'),
@@ -385,122 +370,31 @@ class ReportExportService:
             ('الموقع', report.location or 'غير محدد'),
             ('الحالة', ReportExportService._get_status_arabic(report.status.value)),
         ]
+        metadata.extend(ReportExportService._review_metadata(report))
         
-        if report.submitted_at:
-            metadata.append(('تاريخ الإرسال', report.submitted_at.strftime('%Y-%m-%d %H:%M')))
-        
-        if report.reviewer:
-            metadata.append(('المراجع', report.reviewer.username))
-            if report.reviewed_at:
-                metadata.append(('تاريخ المراجعة', report.reviewed_at.strftime('%Y-%m-%d %H:%M')))
-        
-        if report.review_notes:
-            metadata.append(('ملاحظات المراجعة', report.review_notes))
-        
-        for label, value in metadata:
-            ws[f'A{row}'] = label
-            ws[f'B{row}'] = value
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color='e8eaf6', end_color='e8eaf6', fill_type='solid')
-            ws[f'A{row}'].border = border
-            ws[f'B{row}'].border = border
-            row += 1
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 40
+        # Write-only workbook: rows are serialised as they are appended
+        wb = Workbook(write_only=True)
+        ReportExportService._excel_metadata_sheet(wb, 'تقرير السائس اليومي', metadata)
         
         # Health sheet
         if report.health:
-            ws_health = wb.create_sheet('الفحص الصحي')
-            ws_health.right_to_left = True
-            
-            ws_health['A1'] = 'الجزء'
-            ws_health['B1'] = 'الحالة'
-            ws_health['C1'] = 'الملاحظات'
-            
-            for cell in ['A1', 'B1', 'C1']:
-                ws_health[cell].font = header_font
-                ws_health[cell].fill = header_fill
-                ws_health[cell].border = border
-            
-            health_fields = [
-                ('eyes', 'العيون'),
-                ('nose', 'الأنف'),
-                ('ears', 'الأذنين'),
-                ('mouth', 'الفم'),
-                ('teeth', 'الأسنان'),
-                ('gums', 'اللثة'),
-                ('front_limbs', 'الأطراف الأمامية'),
-                ('back_limbs', 'الأطراف الخلفية'),
-                ('hair', 'الشعر'),
-                ('tail', 'الذيل'),
-                ('rear', 'الخلفية'),
-            ]
-            
-            row = 2
-            for field, label in health_fields:
-                status = getattr(report.health, f'{field}_status', None)
-                notes = getattr(report.health, f'{field}_notes', None)
-                if status:
-                    ws_health[f'A{row}'] = label
-                    ws_health[f'B{row}'] = ReportExportService._get_health_status_arabic(status.value)
-                    ws_health[f'C{row}'] = notes or ''
-                    for cell in [f'A{row}', f'B{row}', f'C{row}']:
-                        ws_health[cell].border = border
-                    row += 1
-            
-            ws_health.column_dimensions['A'].width = 20
-            ws_health.column_dimensions['B'].width = 15
-            ws_health.column_dimensions['C'].width = 50
+            ReportExportService._excel_health_sheet(wb, report.health)
         
         # Training sheet
         if report.training_sessions:
-            ws_training = wb.create_sheet('التدريب')
-            ws_training.right_to_left = True
-            
-            ws_training['A1'] = 'النوع'
-            ws_training['B1'] = 'الوصف'
-            ws_training['C1'] = 'من'
-            ws_training['D1'] = 'إلى'
-            ws_training['E1'] = 'ملاحظات'
-            
-            for cell in ['A1', 'B1', 'C1', 'D1', 'E1']:
-                ws_training[cell].font = header_font
-                ws_training[cell].fill = header_fill
-                ws_training[cell].border = border
-            
-            row = 2
+            ws_training = create_write_only_sheet(wb, 'التدريب', [20, 30, 10, 10, 30])
+            ws_training.append(ReportExportService._excel_header(ws_training, ['النوع', 'الوصف', 'من', 'إلى', 'ملاحظات']))
             for session in report.training_sessions:
-                ws_training[f'A{row}'] = session.training_type.value if session.training_type else ''
-                ws_training[f'B{row}'] = session.description or ''
-                ws_training[f'C{row}'] = session.time_from.strftime('%H:%M') if session.time_from else ''
-                ws_training[f'D{row}'] = session.time_to.strftime('%H:%M') if session.time_to else ''
-                ws_training[f'E{row}'] = session.notes or ''
-                for cell in [f'A{row}', f'B{row}', f'C{row}', f'D{row}', f'E{row}']:
-                    ws_training[cell].border = border
-                row += 1
-            
-            ws_training.column_dimensions['A'].width = 20
-            ws_training.column_dimensions['B'].width = 30
-            ws_training.column_dimensions['C'].width = 10
-            ws_training.column_dimensions['D'].width = 10
-            ws_training.column_dimensions['E'].width = 30
+                ws_training.append(ReportExportService._excel_cells(ws_training, [
+                    session.training_type.value if session.training_type else '',
+                    session.description or '',
+                    session.time_from.strftime('%H:%M') if session.time_from else '',
+                    session.time_to.strftime('%H:%M') if session.time_to else '',
+                    session.notes or '',
+                ]))
         
         # Care sheet
         if report.care:
-            ws_care = wb.create_sheet('العناية')
-            ws_care.right_to_left = True
-            
-            ws_care['A1'] = 'البند'
-            ws_care['B1'] = 'القيمة'
-            
-            for cell in ['A1', 'B1']:
-                ws_care[cell].font = header_font
-                ws_care[cell].fill = header_fill
-                ws_care[cell].border = border
-            
-            row = 2
             care_items = []
             
             if report.care.food_amount:
@@ -522,83 +416,112 @@ class ReportExportService:
             if report.care.stool_shape:
                 care_items.append(('شكل البراز', report.care.stool_shape.value))
             
+            ws_care = create_write_only_sheet(wb, 'العناية', [20, 40])
+            ws_care.append(ReportExportService._excel_header(ws_care, ['البند', 'القيمة']))
             for label, value in care_items:
-                ws_care[f'A{row}'] = label
-                ws_care[f'B{row}'] = value
-                ws_care[f'A{row}'].font = Font(bold=True)
-                ws_care[f'A{row}'].fill = PatternFill(start_color='e8eaf6', end_color='e8eaf6', fill_type='solid')
-                for cell in [f'A{row}', f'B{row}']:
-                    ws_care[cell].border = border
-                row += 1
-            
-            ws_care.column_dimensions['A'].width = 20
-            ws_care.column_dimensions['B'].width = 40
+                ws_care.append(ReportExportService._excel_label_row(ws_care, label, value))
         
         # Behavior sheet
         if report.behavior:
-            ws_behavior = wb.create_sheet('السلوك')
-            ws_behavior.right_to_left = True
-            
-            ws_behavior['A1'] = 'النوع'
-            ws_behavior['B1'] = 'الملاحظات'
-            
-            for cell in ['A1', 'B1']:
-                ws_behavior[cell].font = header_font
-                ws_behavior[cell].fill = header_fill
-                ws_behavior[cell].border = border
-            
-            row = 2
-            if report.behavior.good_behavior_notes:
-                ws_behavior[f'A{row}'] = 'السلوك الجيد'
-                ws_behavior[f'B{row}'] = report.behavior.good_behavior_notes
-                ws_behavior[f'A{row}'].font = Font(bold=True)
-                ws_behavior[f'A{row}'].fill = PatternFill(start_color='c8e6c9', end_color='c8e6c9', fill_type='solid')
-                for cell in [f'A{row}', f'B{row}']:
-                    ws_behavior[cell].border = border
-                row += 1
-            
-            if report.behavior.bad_behavior_notes:
-                ws_behavior[f'A{row}'] = 'السلوك السيئ'
-                ws_behavior[f'B{row}'] = report.behavior.bad_behavior_notes
-                ws_behavior[f'A{row}'].font = Font(bold=True)
-                ws_behavior[f'A{row}'].fill = PatternFill(start_color='ffcdd2', end_color='ffcdd2', fill_type='solid')
-                for cell in [f'A{row}', f'B{row}']:
-                    ws_behavior[cell].border = border
-                row += 1
-            
-            ws_behavior.column_dimensions['A'].width = 20
-            ws_behavior.column_dimensions['B'].width = 60
+            ReportExportService._excel_behavior_sheet(wb, report.behavior)
         
         # Incidents sheet
         if report.incidents:
-            ws_incidents = wb.create_sheet('الحوادث')
-            ws_incidents.right_to_left = True
-            
-            ws_incidents['A1'] = 'النوع'
-            ws_incidents['B1'] = 'الوصف'
-            ws_incidents['C1'] = 'التاريخ والوقت'
-            ws_incidents['D1'] = 'الموقع'
-            
-            for cell in ['A1', 'B1', 'C1', 'D1']:
-                ws_incidents[cell].font = header_font
-                ws_incidents[cell].fill = PatternFill(start_color='d32f2f', end_color='d32f2f', fill_type='solid')
-                ws_incidents[cell].border = border
-            
-            row = 2
-            for incident in report.incidents:
-                ws_incidents[f'A{row}'] = incident.incident_type.value if incident.incident_type else ''
-                ws_incidents[f'B{row}'] = incident.description or ''
-                ws_incidents[f'C{row}'] = incident.incident_datetime.strftime('%Y-%m-%d %H:%M') if incident.incident_datetime else ''
-                ws_incidents[f'D{row}'] = incident.location or ''
-                for cell in [f'A{row}', f'B{row}', f'C{row}', f'D{row}']:
-                    ws_incidents[cell].border = border
-                row += 1
-            
-            ws_incidents.column_dimensions['A'].width = 20
-            ws_incidents.column_dimensions['B'].width = 40
-            ws_incidents.column_dimensions['C'].width = 20
-            ws_incidents.column_dimensions['D'].width = 20
+            ReportExportService._excel_incidents_sheet(wb, report.incidents)
+        
+        return ReportExportService._save_workbook(wb)
+    
+    @staticmethod
+    def _review_metadata(report) -> list:
+        """Submission and review rows shared by the handler and shift report exports"""
+        metadata = []
+        if report.submitted_at:
+            metadata.append(('تاريخ الإرسال', report.submitted_at.strftime('%Y-%m-%d %H:%M')))
+        
+        if report.reviewer:
+            metadata.append(('المراجع', report.reviewer.username))
+            if report.reviewed_at:
+                metadata.append(('تاريخ المراجعة', report.reviewed_at.strftime('%Y-%m-%d %H:%M')))
         
+        if report.review_notes:
+            metadata.append(('ملاحظات المراجعة', report.review_notes))
+        return metadata
+    
+    @staticmethod
+    def _excel_cells(ws, values, font=None, fill=None) -> list:
+        return [styled_cell(ws, value, font=font, fill=fill, border=EXCEL_BORDER) for value in values]
+    
+    @staticmethod
+    def _excel_header(ws, headers, fill=EXCEL_HEADER_FILL) -> list:
+        return ReportExportService._excel_cells(ws, headers, font=EXCEL_HEADER_FONT, fill=fill)
+    
+    @staticmethod
+    def _excel_label_row(ws, label, value, fill=EXCEL_LABEL_FILL) -> list:
+        return [
+            styled_cell(ws, label, font=EXCEL_LABEL_FONT, fill=fill, border=EXCEL_BORDER),
+            styled_cell(ws, value, border=EXCEL_BORDER),
+        ]
+    
+    @staticmethod
+    def _excel_metadata_sheet(wb: Workbook, title: str, metadata: list):
+        ws = create_write_only_sheet(wb, 'معلومات التقرير', [20, 40])
+        ws.append([styled_cell(ws, title, font=Font(bold=True, size=14), alignment=Alignment(horizontal='center'))])
+        ws.merged_cells.add('A1:B1')
+        ws.append([])
+        for label, value in metadata:
+            ws.append(ReportExportService._excel_label_row(ws, label, value))
+    
+    @staticmethod
+    def _excel_health_sheet(wb: Workbook, health):
+        health_fields = [
+            ('eyes', 'العيون'),
+            ('nose', 'الأنف'),
+            ('ears', 'الأذنين'),
+            ('mouth', 'الفم'),
+            ('teeth', 'الأسنان'),
+            ('gums', 'اللثة'),
+            ('front_limbs', 'الأطراف الأمامية'),
+            ('back_limbs', 'الأطراف الخلفية'),
+            ('hair', 'الشعر'),
+            ('tail', 'الذيل'),
+            ('rear', 'الخلفية'),
+        ]
+        
+        ws = create_write_only_sheet(wb, 'الفحص الصحي', [20, 15, 50])
+        ws.append(ReportExportService._excel_header(ws, ['الجزء', 'الحالة', 'الملاحظات']))
+        for field, label in health_fields:
+            status = getattr(health, f'{field}_status', None)
+            if status:
+                ws.append(ReportExportService._excel_cells(ws, [
+                    label,
+                    ReportExportService._get_health_status_arabic(status.value),
+                    getattr(health, f'{field}_notes', None) or '',
+                ]))
+    
+    @staticmethod
+    def _excel_behavior_sheet(wb: Workbook, behavior):
+        ws = create_write_only_sheet(wb, 'السلوك', [20, 60])
+        ws.append(ReportExportService._excel_header(ws, ['النوع', 'الملاحظات']))
+        if behavior.good_behavior_notes:
+            ws.append(ReportExportService._excel_label_row(ws, 'السلوك الجيد', behavior.good_behavior_notes, EXCEL_GOOD_FILL))
+        if behavior.bad_behavior_notes:
+            ws.append(ReportExportService._excel_label_row(ws, 'السلوك السيئ', behavior.bad_behavior_notes, EXCEL_BAD_FILL))
+    
+    @staticmethod
+    def _excel_incidents_sheet(wb: Workbook, incidents):
+        ws = create_write_only_sheet(wb, 'الحوادث', [20, 40, 20, 20])
+        ws.append(ReportExportService._excel_header(ws, ['النوع', 'الوصف', 'التاريخ والوقت', 'الموقع'], EXCEL_INCIDENT_FILL))
+        for incident in incidents:
+            ws.append(ReportExportService._excel_cells(ws, [
+                incident.incident_type.value if incident.incident_type else '',
+                incident.description or '',
+                incident.incident_datetime.strftime('%Y-%m-%d %H:%M') if incident.incident_datetime else '',
+                incident.location or '',
+            ]))
+    
+    @staticmethod
+    def _save_workbook(wb: Workbook) -> BytesIO:
+        buffer = BytesIO()
         wb.save(buffer)
         buffer.seek(0)
         return buffer
@@ -811,32 +734,6 @@ class ReportExportService:
         if not report:
             return None
         
-        buffer = BytesIO()
-        wb = Workbook()
-        
-        # Styles
-        header_font = Font(bold=True, size=12, color='FFFFFF')
-        header_fill = PatternFill(start_color='1a237e', end_color='1a237e', fill_type='solid')
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Main sheet
-        ws = wb.active
-        ws.title = 'معلومات التقرير'
-        ws.right_to_left = True
-        
-        # Report metadata
-        row = 1
-        ws.merge_cells(f'A{row}:B{row}')
-        ws[f'A{row}'] = 'تقرير الوردية'
-        ws[f'A{row}'].font = Font(bold=True, size=14)
-        ws[f'A{row}'].alignment = Alignment(horizontal='center')
-        row += 2
-        
         metadata = [
             ('التاريخ', report.date.strftime('%Y-%m-%d')),
             ('السائس', report.handler.username if report.handler else 'غير محدد'),
@@ -845,140 +742,16 @@ class ReportExportService:
             ('الموقع', report.location or 'غير محدد'),
             ('الحالة', ReportExportService._get_status_arabic(report.status.value)),
         ]
+        metadata.extend(ReportExportService._review_metadata(report))
         
-        if report.submitted_at:
-            metadata.append(('تاريخ الإرسال', report.submitted_at.strftime('%Y-%m-%d %H:%M')))
-        
-        if report.reviewer:
-            metadata.append(('المراجع', report.reviewer.username))
-            if report.reviewed_at:
-                metadata.append(('تاريخ المراجعة', report.reviewed_at.strftime('%Y-%m-%d %H:%M')))
-        
-        if report.review_notes:
-            metadata.append(('ملاحظات المراجعة', report.review_notes))
-        
-        for label, value in metadata:
-            ws[f'A{row}'] = label
-            ws[f'B{row}'] = value
-            ws[f'A{row}'].font = Font(bold=True)
-            ws[f'A{row}'].fill = PatternFill(start_color='e8eaf6', end_color='e8eaf6', fill_type='solid')
-            ws[f'A{row}'].border = border
-            ws[f'B{row}'].border = border
-            row += 1
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 40
+        wb = Workbook(write_only=True)
+        ReportExportService._excel_metadata_sheet(wb, 'تقرير الوردية', metadata)
         
-        # Health sheet
         if report.health:
-            ws_health = wb.create_sheet('الفحص الصحي')
-            ws_health.right_to_left = True
-            
-            ws_health['A1'] = 'الجزء'
-            ws_health['B1'] = 'الحالة'
-            ws_health['C1'] = 'الملاحظات'
-            
-            for cell in ['A1', 'B1', 'C1']:
-                ws_health[cell].font = header_font
-                ws_health[cell].fill = header_fill
-                ws_health[cell].border = border
-            
-            health_fields = [
-                ('eyes', 'العيون'),
-                ('nose', 'الأنف'),
-                ('ears', 'الأذنين'),
-                ('mouth', 'الفم'),
-                ('teeth', 'الأسنان'),
-                ('gums', 'اللثة'),
-                ('front_limbs', 'الأطراف الأمامية'),
-                ('back_limbs', 'الأطراف الخلفية'),
-                ('hair', 'الشعر'),
-                ('tail', 'الذيل'),
-                ('rear', 'الخلفية'),
-            ]
-            
-            row = 2
-            for field, label in health_fields:
-                status = getattr(report.health, f'{field}_status', None)
-                notes = getattr(report.health, f'{field}_notes', None)
-                if status:
-                    ws_health[f'A{row}'] = label
-                    ws_health[f'B{row}'] = ReportExportService._get_health_status_arabic(status.value)
-                    ws_health[f'C{row}'] = notes or ''
-                    for cell in [f'A{row}', f'B{row}', f'C{row}']:
-                        ws_health[cell].border = border
-                    row += 1
-            
-            ws_health.column_dimensions['A'].width = 20
-            ws_health.column_dimensions['B'].width = 15
-            ws_health.column_dimensions['C'].width = 50
-        
-        # Behavior sheet
+            ReportExportService._excel_health_sheet(wb, report.health)
         if report.behavior:
-            ws_behavior = wb.create_sheet('السلوك')
-            ws_behavior.right_to_left = True
-            
-            ws_behavior['A1'] = 'النوع'
-            ws_behavior['B1'] = 'الملاحظات'
-            
-            for cell in ['A1', 'B1']:
-                ws_behavior[cell].font = header_font
-                ws_behavior[cell].fill = header_fill
-                ws_behavior[cell].border = border
-            
-            row = 2
-            if report.behavior.good_behavior_notes:
-                ws_behavior[f'A{row}'] = 'السلوك الجيد'
-                ws_behavior[f'B{row}'] = report.behavior.good_behavior_notes
-                ws_behavior[f'A{row}'].font = Font(bold=True)
-                ws_behavior[f'A{row}'].fill = PatternFill(start_color='c8e6c9', end_color='c8e6c9', fill_type='solid')
-                for cell in [f'A{row}', f'B{row}']:
-                    ws_behavior[cell].border = border
-                row += 1
-            
-            if report.behavior.bad_behavior_notes:
-                ws_behavior[f'A{row}'] = 'السلوك السيئ'
-                ws_behavior[f'B{row}'] = report.behavior.bad_behavior_notes
-                ws_behavior[f'A{row}'].font = Font(bold=True)
-                ws_behavior[f'A{row}'].fill = PatternFill(start_color='ffcdd2', end_color='ffcdd2', fill_type='solid')
-                for cell in [f'A{row}', f'B{row}']:
-                    ws_behavior[cell].border = border
-                row += 1
-            
-            ws_behavior.column_dimensions['A'].width = 20
-            ws_behavior.column_dimensions['B'].width = 60
-        
-        # Incidents sheet
+            ReportExportService._excel_behavior_sheet(wb, report.behavior)
         if report.incidents:
-            ws_incidents = wb.create_sheet('الحوادث')
-            ws_incidents.right_to_left = True
-            
-            ws_incidents['A1'] = 'النوع'
-            ws_incidents['B1'] = 'الوصف'
-            ws_incidents['C1'] = 'التاريخ والوقت'
-            ws_incidents['D1'] = 'الموقع'
-            
-            for cell in ['A1', 'B1', 'C1', 'D1']:
-                ws_incidents[cell].font = header_font
-                ws_incidents[cell].fill = PatternFill(start_color='d32f2f', end_color='d32f2f', fill_type='solid')
-                ws_incidents[cell].border = border
-            
-            row = 2
-            for incident in report.incidents:
-                ws_incidents[f'A{row}'] = incident.incident_type.value if incident.incident_type else ''
-                ws_incidents[f'B{row}'] = incident.description or ''
-                ws_incidents[f'C{row}'] = incident.incident_datetime.strftime('%Y-%m-%d %H:%M') if incident.incident_datetime else ''
-                ws_incidents[f'D{row}'] = incident.location or ''
-                for cell in [f'A{row}', f'B{row}', f'C{row}', f'D{row}']:
-                    ws_incidents[cell].border = border
-                row += 1
-            
-            ws_incidents.column_dimensions['A'].width = 20
-            ws_incidents.column_dimensions['B'].width = 40
-            ws_incidents.column_dimensions['C'].width = 20
-            ws_incidents.column_dimensions['D'].width = 20
+            ReportExportService._excel_incidents_sheet(wb, report.incidents)
         
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer
+        return ReportExportService._save_workbook(wb)
@@ -0,0 +1,172 @@
+"""
+Report Filter Compiler
+Turns ReportRegistry filter definitions plus request values into SQLAlchemy
+WHERE clauses, so every registry report filters, sorts and limits inside
+PostgreSQL instead of in Python.
+
+Each FilterDefinition names the model fields it applies to:
+- SELECT / MULTI_SELECT  -> column IN (...) (enum names are validated)
+- TEXT_SEARCH            -> ILIKE '%value%' OR-ed across all fields
+- DATE_RANGE             -> column >= start AND column <= end
+- NUMBER_RANGE           -> column >= min AND column <= max
+
+Scope keys (e.g. project_id, dog_ids) declared on the ReportDefinition
+restrict the query to a project or a set of records.
+"""
+
+import logging
+from typing import Any, List, Optional
+
+from sqlalchemy import Enum as SAEnum, and_, or_
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from k9.services.report_registry import FilterDefinition, FilterType, ReportDefinition
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORT_LIMIT = 10000
+
+
+def _as_list(value) -> List[Any]:
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [v for v in value if v is not None and v != '']
+    return [value]
+
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _range_bounds(value):
+    """(low, high) from a dict with start/end or min/max keys, or a 2-tuple"""
+    if isinstance(value, dict):
+        low = value.get('start', value.get('min'))
+        high = value.get('end', value.get('max'))
+        return low, high
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return value[0], value[1]
+    return None, None
+
+
+class ReportFilterCompiler:
+    """Compile registry filter definitions to SQLAlchemy clauses"""
+
+    @staticmethod
+    def resolve_model(report_def: ReportDefinition):
+        """Model class backing a report definition"""
+        from k9.models import models
+        if not report_def.model:
+            raise ValueError(f"Report {report_def.report_type} has no model")
+        return getattr(models, report_def.model)
+
+    @staticmethod
+    def column(model, name: str) -> Optional[InstrumentedAttribute]:
+        """Mapped column attribute on the model, or None for unknown names"""
+        attr = getattr(model, name, None)
+        if isinstance(attr, InstrumentedAttribute) and hasattr(attr.property, 'columns'):
+            return attr
+        return None
+
+    @staticmethod
+    def _select_values(column, filter_def: FilterDefinition, values: List[Any]) -> List[Any]:
+        if filter_def.value_map:
+            return [filter_def.value_map[v] for v in values if v in filter_def.value_map]
+        column_type = column.property.columns[0].type
+        enum_class = getattr(column_type, 'enum_class', None) if isinstance(column_type, SAEnum) else None
+        if enum_class is not None:
+            # Unknown names would fail at bind time; drop them like the hand-written filters did
+            return [enum_class[v] for v in values if isinstance(v, str) and v in enum_class.__members__]
+        return values
+
+    @staticmethod
+    def compile_filter(model, filter_def: FilterDefinition, value) -> Optional[Any]:
+        """Clause for one filter, or None when the value does not restrict the query"""
+        columns = [ReportFilterCompiler.column(model, name) for name in filter_def.fields]
+        columns = [col for col in columns if col is not None]
+        if not columns:
+            return None
+        filter_type = filter_def.filter_type
+
+        if filter_type in (FilterType.SELECT, FilterType.MULTI_SELECT):
+            values = _as_list(value)
+            if not values:
+                return None
+            if filter_def.value_map and set(filter_def.value_map) <= set(values):
+                # Every option selected: no restriction
+                return None
+            column = columns[0]
+            return column.in_(ReportFilterCompiler._select_values(column, filter_def, values))
+
+        if filter_type == FilterType.TEXT_SEARCH:
+            text = str(value).strip() if value is not None else ''
+            if not text:
+                return None
+            pattern = f'%{_escape_like(text)}%'
+            return or_(*[col.ilike(pattern, escape='\\') for col in columns])
+
+        if filter_type in (FilterType.DATE_RANGE, FilterType.NUMBER_RANGE):
+            low, high = _range_bounds(value)
+            clauses = []
+            if low not in (None, ''):
+                clauses.append(columns[0] >= low)
+            if high not in (None, ''):
+                clauses.append(columns[0] <= high)
+            return and_(*clauses) if clauses else None
+
+        return None
+
+    @staticmethod
+    def compile(report_def: ReportDefinition, filters: dict = None, start_date=None, end_date=None) -> List[Any]:
+        """
+        WHERE clauses for a report
+
+        The request-level start_date/end_date feed every DATE_RANGE filter
+        that has no explicit value in filters.
+        """
+        filters = filters or {}
+        model = ReportFilterCompiler.resolve_model(report_def)
+        clauses = []
+
+        for filter_def in report_def.filters:
+            value = filters.get(filter_def.key)
+            if filter_def.filter_type == FilterType.DATE_RANGE and value is None:
+                value = {'start': start_date, 'end': end_date}
+            clause = ReportFilterCompiler.compile_filter(model, filter_def, value)
+            if clause is not None:
+                clauses.append(clause)
+
+        for key, field_name in report_def.scope_fields.items():
+            values = _as_list(filters.get(key))
+            column = ReportFilterCompiler.column(model, field_name)
+            if values and column is not None:
+                clauses.append(column.in_(values) if len(values) > 1 else column == values[0])
+
+        return clauses
+
+    @staticmethod
+    def order_by(report_def: ReportDefinition, sort: Optional[str] = None) -> List[Any]:
+        """ORDER BY for a sort key such as 'visit_date' or '-visit_date'; unknown keys fall back to the default"""
+        model = ReportFilterCompiler.resolve_model(report_def)
+        for key in (sort, report_def.default_sort):
+            if not key:
+                continue
+            column = ReportFilterCompiler.column(model, key.lstrip('-'))
+            if column is not None:
+                return [column.desc() if key.startswith('-') else column.asc()]
+        return []
+
+    @staticmethod
+    def apply(query, report_def: ReportDefinition, filters: dict = None, start_date=None, end_date=None,
+              sort: Optional[str] = None, limit: Optional[int] = None):
+        """Apply filters, scope, sort and limit to a query on the report's model"""
+        clauses = ReportFilterCompiler.compile(report_def, filters, start_date, end_date)
+        if clauses:
+            query = query.filter(*clauses)
+        ordering = ReportFilterCompiler.order_by(report_def, sort)
+        if ordering:
+            query = query.order_by(*ordering)
+        if limit:
+            query = query.limit(min(max(int(limit), 1), MAX_REPORT_LIMIT))
+        return query
@@ -53,6 +53,10 @@ class FilterDefinition:
     filter_type: FilterType
     options: List[Dict[str, str]] = field(default_factory=list)
     default_value: Any = None
+    # Model fields the filter applies to (text search ORs across all of them)
+    fields: List[str] = field(default_factory=list)
+    # Option value -> column value, for options that are not enum names
+    value_map: Dict[str, Any] = field(default_factory=dict)
     
 
 @dataclass
@@ -67,6 +71,12 @@ class ReportDefinition:
     filters: List[FilterDefinition] = field(default_factory=list)
     description_ar: str = ''
     description_en: str = ''
+    # Model in k9.models.models the report reads (used by the filter compiler)
+    model: Optional[str] = None
+    # Default sort key; a leading '-' sorts descending
+    default_sort: Optional[str] = None
+    # Scope filter key -> model field (e.g. project_id, dog_ids)
+    scope_fields: Dict[str, str] = field(default_factory=dict)
     
 
 class ReportRegistry:
@@ -91,6 +101,7 @@ class ReportRegistry:
         # Dogs Report
         self._reports['dogs'] = ReportDefinition(
             report_type='dogs',
+            model='Dog',
             title_ar='تقرير الكلاب',
             title_en='Dogs Report',
             icon='fa-dog',
@@ -112,6 +123,7 @@ class ReportRegistry:
                     key='gender',
                     label='الجنس',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['gender'],
                     options=[
                         {'value': 'MALE', 'label': 'ذكر'},
                         {'value': 'FEMALE', 'label': 'أنثى'}
@@ -121,6 +133,7 @@ class ReportRegistry:
                     key='status',
                     label='الحالة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['current_status'],
                     options=[
                         {'value': 'ACTIVE', 'label': 'نشط'},
                         {'value': 'RETIRED', 'label': 'متقاعد'},
@@ -131,12 +144,14 @@ class ReportRegistry:
                 FilterDefinition(
                     key='breed',
                     label='السلالة',
-                    filter_type=FilterType.TEXT_SEARCH
+                    filter_type=FilterType.TEXT_SEARCH,
+                    fields=['breed']
                 ),
                 FilterDefinition(
                     key='keyword',
                     label='بحث',
-                    filter_type=FilterType.TEXT_SEARCH
+                    filter_type=FilterType.TEXT_SEARCH,
+                    fields=['name', 'code', 'breed', 'location', 'microchip_id']
                 )
             ]
         )
@@ -144,6 +159,7 @@ class ReportRegistry:
         # Employees Report
         self._reports['employees'] = ReportDefinition(
             report_type='employees',
+            model='Employee',
             title_ar='تقرير الموظفين',
             title_en='Employees Report',
             icon='fa-users',
@@ -164,6 +180,7 @@ class ReportRegistry:
                     key='role',
                     label='الوظيفة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['role'],
                     options=[
                         {'value': 'HANDLER', 'label': 'مدرب'},
                         {'value': 'TRAINER', 'label': 'معالج'},
@@ -176,6 +193,8 @@ class ReportRegistry:
                     key='status',
                     label='الحالة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['is_active'],
+                    value_map={'ACTIVE': True, 'INACTIVE': False},
                     options=[
                         {'value': 'ACTIVE', 'label': 'نشط'},
                         {'value': 'INACTIVE', 'label': 'غير نشط'}
@@ -184,7 +203,8 @@ class ReportRegistry:
                 FilterDefinition(
                     key='hire_date',
                     label='تاريخ التعيين',
-                    filter_type=FilterType.DATE_RANGE
+                    filter_type=FilterType.DATE_RANGE,
+                    fields=['hire_date']
                 )
             ]
         )
@@ -192,6 +212,9 @@ class ReportRegistry:
         # Training Report
         self._reports['training'] = ReportDefinition(
             report_type='training',
+            model='TrainingSession',
+            default_sort='-session_date',
+            scope_fields={'project_id': 'project_id', 'dog_ids': 'dog_id'},
             title_ar='تقرير التدريب',
             title_en='Training Report',
             icon='fa-dumbbell',
@@ -213,6 +236,7 @@ class ReportRegistry:
                     key='category',
                     label='فئة التدريب',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['category'],
                     options=[
                         {'value': 'OBEDIENCE', 'label': 'الطاعة'},
                         {'value': 'DETECTION', 'label': 'الكشف'},
@@ -224,7 +248,8 @@ class ReportRegistry:
                 FilterDefinition(
                     key='date_range',
                     label='الفترة',
-                    filter_type=FilterType.DATE_RANGE
+                    filter_type=FilterType.DATE_RANGE,
+                    fields=['session_date']
                 )
             ]
         )
@@ -232,6 +257,9 @@ class ReportRegistry:
         # Veterinary Report
         self._reports['veterinary'] = ReportDefinition(
             report_type='veterinary',
+            model='VeterinaryVisit',
+            default_sort='-visit_date',
+            scope_fields={'project_id': 'project_id', 'dog_ids': 'dog_id'},
             title_ar='تقرير الطبابة',
             title_en='Veterinary Report',
             icon='fa-stethoscope',
@@ -252,6 +280,7 @@ class ReportRegistry:
                     key='visit_type',
                     label='نوع الزيارة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['visit_type'],
                     options=[
                         {'value': 'ROUTINE', 'label': 'روتينية'},
                         {'value': 'EMERGENCY', 'label': 'طارئة'},
@@ -263,7 +292,8 @@ class ReportRegistry:
                 FilterDefinition(
                     key='date_range',
                     label='الفترة',
-                    filter_type=FilterType.DATE_RANGE
+                    filter_type=FilterType.DATE_RANGE,
+                    fields=['visit_date']
                 )
             ]
         )
@@ -271,6 +301,9 @@ class ReportRegistry:
         # Breeding Report
         self._reports['breeding'] = ReportDefinition(
             report_type='breeding',
+            model='ProductionCycle',
+            default_sort='-mating_date',
+            scope_fields={'dog_ids': 'female_id'},
             title_ar='تقرير التكاثر',
             title_en='Breeding Report',
             icon='fa-paw',
@@ -292,6 +325,7 @@ class ReportRegistry:
                     key='cycle_type',
                     label='نوع الدورة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['cycle_type'],
                     options=[
                         {'value': 'MATING', 'label': 'تزاوج'},
                         {'value': 'PREGNANCY', 'label': 'حمل'},
@@ -302,7 +336,8 @@ class ReportRegistry:
                 FilterDefinition(
                     key='date_range',
                     label='الفترة',
-                    filter_type=FilterType.DATE_RANGE
+                    filter_type=FilterType.DATE_RANGE,
+                    fields=['mating_date']
                 )
             ]
         )
@@ -310,6 +345,9 @@ class ReportRegistry:
         # Projects Report
         self._reports['projects'] = ReportDefinition(
             report_type='projects',
+            model='Project',
+            default_sort='-start_date',
+            scope_fields={'project_id': 'id'},
             title_ar='تقرير المشاريع',
             title_en='Projects Report',
             icon='fa-project-diagram',
@@ -331,6 +369,7 @@ class ReportRegistry:
                     key='status',
                     label='الحالة',
                     filter_type=FilterType.MULTI_SELECT,
+                    fields=['status'],
                     options=[
                         {'value': 'ACTIVE', 'label': 'نشط'},
                         {'value': 'COMPLETED', 'label': 'مكتمل'},
@@ -341,7 +380,8 @@ class ReportRegistry:
                 FilterDefinition(
                     key='date_range',
                     label='الفترة',
-                    filter_type=FilterType.DATE_RANGE
+                    filter_type=FilterType.DATE_RANGE,
+                    fields=['start_date']
                 )
             ]
         )
@@ -0,0 +1,367 @@
+"""
+Trainer Analytics
+Training progress analytics over TrainingSession in columnar, vectorized form.
+
+Sessions in scope are streamed with a server-side cursor as a narrow
+projection (date, dog, trainer, category, duration, rating) into NumPy
+arrays; dogs and trainers become integer codes. Every aggregate is then a
+bincount over an (entity, period) or (entity, category) key:
+
+- progress curves: sessions, minutes and average rating per period
+- moving average of the curve over MOVING_AVERAGE_WINDOW periods
+- category mix per entity
+- trend: least-squares slope of the last PLATEAU_WINDOW rated periods;
+  a flat slope below PLATEAU_MAX_RATING is reported as a plateau
+
+So a multi-month dashboard costs one streamed query and a few array
+passes, not Python work per session. Results are cached per
+(scope, period) for ANALYTICS_CACHE_TTL seconds and dropped whenever a
+transaction that wrote training sessions commits.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import db
+from k9.models.models import Dog, Employee, TrainingCategory, TrainingSession
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_CACHE_TTL = 300
+STREAM_BATCH_SIZE = 5000
+
+PERIODS = ('day', 'week', 'month')
+GROUPINGS = ('dog', 'trainer')
+
+MOVING_AVERAGE_WINDOW = 3
+PLATEAU_WINDOW = 4          # rated periods examined for the trend
+PLATEAU_MIN_SLOPE = 0.1     # rating points per period that still counts as progress
+PLATEAU_MAX_RATING = 9.0    # ratings (0-10) at or above this are mastery, not a plateau
+
+CATEGORIES = list(TrainingCategory)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+_ANALYTICS_DIRTY_KEY = 'trainer_analytics_dirty'
+
+
+@dataclass
+class SessionArrays:
+    """Training sessions as parallel columns; dog/trainer are codes into dog_ids/trainer_ids"""
+    day: np.ndarray          # datetime64[D]
+    dog: np.ndarray          # int64 codes
+    trainer: np.ndarray      # int64 codes
+    category: np.ndarray     # int64 codes into CATEGORIES
+    duration: np.ndarray     # int64 minutes
+    rating: np.ndarray       # float64, 0-10
+    dog_ids: List[str]
+    trainer_ids: List[str]
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> 'SessionArrays':
+        """Build from (session_date, dog_id, trainer_id, category, duration, success_rating) rows"""
+        columns = [[], [], [], [], [], []]
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+        return cls.from_columns(*columns)
+
+    @classmethod
+    def from_columns(cls, session_dates, dog_ids, trainer_ids, categories, durations, ratings) -> 'SessionArrays':
+        dog_ids_out, dog_codes = np.unique(np.array([str(v) for v in dog_ids], dtype=object), return_inverse=True)
+        trainer_ids_out, trainer_codes = np.unique(
+            np.array([str(v) for v in trainer_ids], dtype=object), return_inverse=True
+        )
+        return cls(
+            day=np.array(session_dates, dtype='datetime64[D]'),
+            dog=dog_codes.astype(np.int64),
+            trainer=trainer_codes.astype(np.int64),
+            category=np.fromiter((CATEGORY_CODES[c] for c in categories), dtype=np.int64, count=len(categories)),
+            duration=np.asarray(durations, dtype=np.int64),
+            rating=np.asarray(ratings, dtype=np.float64),
+            dog_ids=list(dog_ids_out),
+            trainer_ids=list(trainer_ids_out),
+        )
+
+    def entity(self, group_by: str):
+        """(codes, ids) for 'dog' or 'trainer'"""
+        if group_by == 'dog':
+            return self.dog, self.dog_ids
+        return self.trainer, self.trainer_ids
+
+
+def load_sessions(
+    project_ids: Optional[Iterable[str]],
+    date_from: date,
+    date_to: date,
+    trainer_id: Optional[str] = None,
+    dog_id: Optional[str] = None
+) -> SessionArrays:
+    """Stream the sessions in [date_from, date_to] into columns (server-side cursor, no ORM objects)"""
+    stmt = select(
+        TrainingSession.session_date, TrainingSession.dog_id, TrainingSession.trainer_id,
+        TrainingSession.category, TrainingSession.duration, TrainingSession.success_rating
+    ).where(
+        TrainingSession.session_date >= datetime.combine(date_from, datetime.min.time()),
+        TrainingSession.session_date < datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+    )
+    if project_ids is not None:
+        stmt = stmt.where(TrainingSession.project_id.in_(list(project_ids)))
+    if trainer_id:
+        stmt = stmt.where(TrainingSession.trainer_id == trainer_id)
+    if dog_id:
+        stmt = stmt.where(TrainingSession.dog_id == dog_id)
+
+    result = db.session.execute(
+        stmt.order_by(TrainingSession.session_date),
+        execution_options={'stream_results': True, 'yield_per': STREAM_BATCH_SIZE}
+    )
+    columns = [[], [], [], [], [], []]
+    for partition in result.partitions():
+        for column, values in zip(columns, zip(*partition)):
+            column.extend(values)
+    return SessionArrays.from_columns(*columns)
+
+
+def period_starts(date_from: date, date_to: date, period: str) -> np.ndarray:
+    """Calendar of period start days covering the range (weeks start on Monday)"""
+    start, end = np.datetime64(date_from, 'D'), np.datetime64(date_to, 'D')
+    if period == 'day':
+        return np.arange(start, end + 1)
+    if period == 'week':
+        return np.arange(_week_start(start), _week_start(end) + 1, 7)
+    months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1)
+    return months.astype('datetime64[D]')
+
+
+def _week_start(days):
+    # 1970-01-01 was a Thursday: (days since epoch + 3) % 7 is the weekday with Monday = 0
+    return days - (days.astype(np.int64) + 3) % 7
+
+
+def period_index(days: np.ndarray, date_from: date, period: str) -> np.ndarray:
+    """Position of each day in period_starts(date_from, ..., period)"""
+    start = np.datetime64(date_from, 'D')
+    if period == 'day':
+        return (days - start).astype(np.int64)
+    if period == 'week':
+        return ((_week_start(days) - _week_start(start)).astype(np.int64)) // 7
+    return (days.astype('datetime64[M]') - start.astype('datetime64[M]')).astype(np.int64)
+
+
+def grid_totals(codes: np.ndarray, columns: np.ndarray, shape, weights=None) -> np.ndarray:
+    """Sum of weights (or counts) per (code, column) cell as a dense 2-D array"""
+    rows, width = shape
+    totals = np.bincount(codes * width + columns, weights=weights, minlength=rows * width)
+    return totals.reshape(rows, width)
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` columns, ignoring NaN cells (NaN where the window has no values)"""
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    zeros = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(filled, axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+    upper = np.arange(values.shape[1]) + 1
+    lower = np.maximum(upper - window, 0)
+    window_counts = counts[:, upper] - counts[:, lower]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, (sums[:, upper] - sums[:, lower]) / window_counts, np.nan)
+
+
+def trend_slopes(values: np.ndarray, window: int):
+    """
+    Least-squares slope of each row over its last `window` non-NaN cells
+
+    Returns:
+        tuple: (slopes, number of cells used) per row; slope is NaN below two cells
+    """
+    valid = ~np.isnan(values)
+    from_end = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1]
+    used = valid & (from_end <= window)
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    y = np.where(used, values, 0.0)
+    n = used.sum(axis=1).astype(np.float64)
+    sx = np.where(used, x, 0.0).sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = np.where(used, x * x, 0.0).sum(axis=1)
+    sxy = np.where(used, x * y, 0.0).sum(axis=1)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = np.where((n >= 2) & (denominator != 0), (n * sxy - sx * sy) / denominator, np.nan)
+    return slopes, n.astype(np.int64)
+
+
+def classify_trends(slopes: np.ndarray, used: np.ndarray, latest: np.ndarray) -> np.ndarray:
+    """'improving' / 'declining' / 'plateau' / 'stable' (flat at a high rating) / 'insufficient_data'"""
+    flat_status = np.where(latest >= PLATEAU_MAX_RATING, 'stable', 'plateau')
+    status = np.where(slopes >= PLATEAU_MIN_SLOPE, 'improving',
+                      np.where(slopes <= -PLATEAU_MIN_SLOPE, 'declining', flat_status))
+    return np.where(used >= PLATEAU_WINDOW, status, 'insufficient_data')
+
+
+def _optional(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+class TrainerAnalyticsService:
+    """Per-dog and per-trainer training progress"""
+
+    _cache = TTLCache(maxsize=256, ttl=ANALYTICS_CACHE_TTL)
+    _lock = threading.Lock()
+
+    @classmethod
+    def invalidate(cls):
+        """Drop every cached analytics result"""
+        with cls._lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def summarize(arrays: SessionArrays) -> Dict[str, Any]:
+        """Headline KPIs of a set of sessions"""
+        total = len(arrays)
+        return {
+            'total_sessions': total,
+            'unique_dogs': len(arrays.dog_ids),
+            'unique_trainers': len(arrays.trainer_ids),
+            'total_duration_min': int(arrays.duration.sum()),
+            'avg_success_rating': round(float(arrays.rating.mean()), 1) if total else 0
+        }
+
+    @staticmethod
+    def category_mix(arrays: SessionArrays, group_by: str = 'dog') -> np.ndarray:
+        """Session counts per (entity, category code)"""
+        codes, ids = arrays.entity(group_by)
+        return grid_totals(codes, arrays.category, (len(ids), len(CATEGORIES))).astype(np.int64)
+
+    @staticmethod
+    def compute(arrays: SessionArrays, date_from: date, date_to: date, group_by: str = 'dog',
+                period: str = 'week') -> Dict[str, Any]:
+        """Progress curves, moving averages, category mix and trend per dog or trainer"""
+        if group_by not in GROUPINGS:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        if period not in PERIODS:
+            raise ValueError(f"Unsupported period: {period}")
+
+        starts = period_starts(date_from, date_to, period)
+        codes, ids = arrays.entity(group_by)
+        shape = (len(ids), len(starts))
+        columns = period_index(arrays.day, date_from, period)
+
+        sessions = grid_totals(codes, columns, shape).astype(np.int64)
+        minutes = grid_totals(codes, columns, shape, weights=arrays.duration).astype(np.int64)
+        rating_sums = grid_totals(codes, columns, shape, weights=arrays.rating)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            curves = np.where(sessions > 0, rating_sums / np.maximum(sessions, 1), np.nan)
+        smoothed = moving_average(curves, MOVING_AVERAGE_WINDOW)
+        slopes, used = trend_slopes(curves, PLATEAU_WINDOW)
+
+        # Latest smoothed rating per entity (last non-NaN cell)
+        has_value = ~np.isnan(smoothed)
+        last_column = np.where(has_value.any(axis=1), shape[1] - 1 - np.argmax(has_value[:, ::-1], axis=1), 0)
+        latest = smoothed[np.arange(shape[0]), last_column] if shape[0] else np.zeros(0)
+        trends = classify_trends(slopes, used, np.nan_to_num(latest, nan=0.0))
+
+        mix = TrainerAnalyticsService.category_mix(arrays, group_by)
+        total_sessions = sessions.sum(axis=1)
+        average = np.where(total_sessions > 0, rating_sums.sum(axis=1) / np.maximum(total_sessions, 1), 0.0)
+
+        series = []
+        for position, entity_id in enumerate(ids):
+            series.append({
+                'id': entity_id,
+                'sessions': int(total_sessions[position]),
+                'total_duration_min': int(minutes[position].sum()),
+                'avg_success_rating': round(float(average[position]), 1),
+                'sessions_per_period': sessions[position].tolist(),
+                'minutes_per_period': minutes[position].tolist(),
+                'curve': [_optional(v) for v in curves[position]],
+                'moving_average': [_optional(v) for v in smoothed[position]],
+                'category_mix': {
+                    CATEGORIES[code].value: int(count) for code, count in enumerate(mix[position]) if count
+                },
+                'trend': str(trends[position]),
+                'slope': _optional(slopes[position], 3),
+            })
+
+        return {
+            'group_by': group_by,
+            'period': period,
+            'periods': [str(day) for day in starts],
+            'kpis': TrainerAnalyticsService.summarize(arrays),
+            'series': series,
+        }
+
+    @staticmethod
+    def progress(
+        project_ids: Optional[Iterable[str]],
+        date_from: date,
+        date_to: date,
+        group_by: str = 'dog',
+        period: str = 'week',
+        trainer_id: Optional[str] = None,
+        dog_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Cached training progress for a scope and period
+
+        Args:
+            project_ids: None for every project, otherwise the projects to include
+            group_by: 'dog' or 'trainer'
+            period: 'day', 'week' or 'month'
+        """
+        if group_by not in GROUPINGS:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        if period not in PERIODS:
+            raise ValueError(f"Unsupported period: {period}")
+
+        scope = None if project_ids is None else tuple(sorted(str(pid) for pid in project_ids))
+        key = (scope, date_from, date_to, group_by, period, str(trainer_id or ''), str(dog_id or ''))
+        with TrainerAnalyticsService._lock:
+            if key in TrainerAnalyticsService._cache:
+                return TrainerAnalyticsService._cache[key]
+
+        arrays = load_sessions(project_ids, date_from, date_to, trainer_id=trainer_id, dog_id=dog_id)
+        result = TrainerAnalyticsService.compute(arrays, date_from, date_to, group_by=group_by, period=period)
+
+        model = Dog if group_by == 'dog' else Employee
+        names = dict(db.session.query(model.id, model.name).filter(
+            model.id.in_([row['id'] for row in result['series']])
+        ).all()) if result['series'] else {}
+        names = {str(k): v for k, v in names.items()}
+        for row in result['series']:
+            row['name'] = names.get(row['id'], '')
+        result['series'].sort(key=lambda row: (row['name'], row['id']))
+
+        with TrainerAnalyticsService._lock:
+            TrainerAnalyticsService._cache[key] = result
+        return result
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_training_changes(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, TrainingSession) for obj in changed):
+        session.info[_ANALYTICS_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop(_ANALYTICS_DIRTY_KEY, None):
+        TrainerAnalyticsService.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_training_changes(session):
+    session.info.pop(_ANALYTICS_DIRTY_KEY, None)
@@ -5,6 +5,7 @@ Trainer daily report data provider services
 from datetime import date, datetime, time
 from typing import Dict, List, Optional, Any
 from uuid import UUID
+import numpy as np
 from sqlalchemy.orm import joinedload
 from sqlalchemy import func, and_
 from k9.models.models import TrainingSession, Employee, Dog, Project, TrainingCategory
@@ -12,6 +13,7 @@ from app import db
 
 from k9.utils.dates_ar import get_arabic_day_name
 from k9.utils.trainer_daily_constants import CATEGORY_LABELS_AR
+from k9.services.trainer_analytics import CATEGORY_CODES, SessionArrays, TrainerAnalyticsService
 
 
 def get_trainer_daily(
@@ -92,48 +94,35 @@ def get_trainer_daily(
             "notes": session.notes or ""
         })
     
-    # Build summary by dog
-    dog_summary = {}
-    for session in sessions:
-        dog_name = session.dog.name if session.dog else "Unknown"
-        if dog_name not in dog_summary:
-            dog_summary[dog_name] = {
-                "sessions_count": 0,
-                "total_duration_min": 0,
-                "ratings": [],
-                "categories": {}
-            }
-        
-        dog_summary[dog_name]["sessions_count"] += 1
-        dog_summary[dog_name]["total_duration_min"] += session.duration
-        dog_summary[dog_name]["ratings"].append(session.success_rating)
-        
-        category_ar = CATEGORY_LABELS_AR.get(session.category.value, session.category.value)
-        dog_summary[dog_name]["categories"][category_ar] = dog_summary[dog_name]["categories"].get(category_ar, 0) + 1
+    # Summary by dog and KPIs, vectorized over the sessions' columns
+    arrays = SessionArrays.from_rows(
+        (session.session_date, session.dog_id, session.trainer_id, session.category, session.duration,
+         session.success_rating)
+        for session in sessions
+    )
+    category_mix = TrainerAnalyticsService.category_mix(arrays, 'dog')
+    sessions_per_dog = np.bincount(arrays.dog, minlength=len(arrays.dog_ids))
+    minutes_per_dog = np.bincount(arrays.dog, weights=arrays.duration, minlength=len(arrays.dog_ids))
+    ratings_per_dog = np.bincount(arrays.dog, weights=arrays.rating, minlength=len(arrays.dog_ids))
+    dog_names = {str(session.dog_id): session.dog.name if session.dog else "Unknown" for session in sessions}
     
-    # Convert to final format
+    # Dogs in order of their first session of the day
+    _, first_seen = np.unique(arrays.dog, return_index=True)
     summary_by_dog = []
-    for dog_name, data in dog_summary.items():
-        avg_rating = sum(data["ratings"]) / len(data["ratings"]) if data["ratings"] else 0
-        
-        # Ensure all categories are represented
-        categories_breakdown = {}
-        for category_en, category_ar in CATEGORY_LABELS_AR.items():
-            categories_breakdown[category_ar] = data["categories"].get(category_ar, 0)
-        
+    for code in np.argsort(first_seen, kind='stable'):
         summary_by_dog.append({
-            "dog_name": dog_name,
-            "sessions_count": data["sessions_count"],
-            "total_duration_min": data["total_duration_min"],
-            "avg_success_rating": round(avg_rating, 1),
-            "categories_breakdown": categories_breakdown
+            "dog_name": dog_names[arrays.dog_ids[code]],
+            "sessions_count": int(sessions_per_dog[code]),
+            "total_duration_min": int(minutes_per_dog[code]),
+            "avg_success_rating": round(float(ratings_per_dog[code] / sessions_per_dog[code]), 1),
+            # Ensure all categories are represented
+            "categories_breakdown": {
+                category_ar: int(category_mix[code, CATEGORY_CODES[TrainingCategory[category_en]]])
+                for category_en, category_ar in CATEGORY_LABELS_AR.items()
+            }
         })
     
-    # Calculate KPIs
-    unique_dogs = len(set(session.dog_id for session in sessions))
-    unique_trainers = len(set(session.trainer_id for session in sessions))
-    total_duration = sum(session.duration for session in sessions)
-    avg_rating = sum(session.success_rating for session in sessions) / len(sessions) if sessions else 0
+    kpis = TrainerAnalyticsService.summarize(arrays)
     
     # Get project info for display
     project_name = ""
@@ -155,11 +144,49 @@ def get_trainer_daily(
         },
         "sessions": sessions_data,
         "summary_by_dog": summary_by_dog,
-        "kpis": {
-            "total_sessions": len(sessions),
-            "unique_dogs": unique_dogs,
-            "unique_trainers": unique_trainers,
-            "total_duration_min": total_duration,
-            "avg_success_rating": round(avg_rating, 1)
-        }
-    }
\ No newline at end of file
+        "kpis": kpis
+    }
+
+def get_trainer_progress(
+    project_id: Optional[str],
+    date_from: date,
+    date_to: date,
+    group_by: str,
+    period: str,
+    trainer_id: Optional[str],
+    dog_id: Optional[str],
+    user
+) -> Dict[str, Any]:
+    """
+    Training progress per dog or trainer over a date range
+    
+    Args:
+        project_id: Project UUID (required for PROJECT_MANAGER), None for every project
+        group_by: 'dog' or 'trainer'
+        period: 'day', 'week' or 'month'
+        
+    Returns:
+        Dictionary with periods, KPIs and one progress series per dog/trainer
+    """
+    if user.role.value == "PROJECT_MANAGER":
+        if not project_id:
+            raise ValueError("Project ID is required for PROJECT_MANAGER")
+        managed = {str(p.id) for p in (user.managed_projects or [])}
+        if str(project_id) not in managed:
+            raise ValueError("Access denied to this project")
+    
+    result = TrainerAnalyticsService.progress(
+        [project_id] if project_id else None,
+        date_from,
+        date_to,
+        group_by=group_by,
+        period=period,
+        trainer_id=trainer_id,
+        dog_id=dog_id
+    )
+    return {
+        **result,
+        "project_id": project_id,
+        "date_from": date_from.strftime("%Y-%m-%d"),
+        "date_to": date_to.strftime("%Y-%m-%d")
+    }
@@ -12,8 +12,12 @@ Key Concepts:
 - Uses effective_permissions (role baseline + grants - revokes)
 """
 
+import time
+import threading
 from dataclasses import dataclass, field
 from typing import List, Optional, Callable
+
+from cachetools import LRUCache
 from flask import url_for, request
 from flask_login import current_user
 
@@ -800,3 +804,91 @@ class NavigationFilter:
             if filtered_item:
                 filtered.append(filtered_item)
         return filtered
+
+
+class NavigationCache:
+    """
+    Compiled navigation trees shared between users with the same permission set.
+
+    The filtered tree depends only on the user's permission fingerprint
+    (PermissionService.permission_fingerprint), so it is built once per
+    fingerprint and held in a bounded LRU. The user -> fingerprint mapping is
+    cached per permissions_version and re-checked after FINGERPRINT_TTL seconds
+    so that expiring roles and overrides are picked up. Trees are read-only:
+    badges and active states are still evaluated at render time.
+    """
+    
+    MAX_TREES = 256
+    MAX_USERS = 4096
+    FINGERPRINT_TTL = 60
+    
+    _trees = LRUCache(maxsize=MAX_TREES)
+    _fingerprints = LRUCache(maxsize=MAX_USERS)
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def empty_navigation():
+        return {
+            'main_nav': [],
+            'handler_nav': None,
+            'pm_nav': None,
+            'pm_quick_nav': [],
+            'admin_nav': None
+        }
+    
+    @staticmethod
+    def build(nav_filter: NavigationFilter) -> dict:
+        """Filter every navigation section with the given filter"""
+        return {
+            'main_nav': nav_filter.filter_navigation(UINavigationRegistry.get_main_navigation()),
+            'handler_nav': nav_filter.filter_nav_item(UINavigationRegistry.get_handler_navigation()),
+            'pm_nav': nav_filter.filter_nav_item(UINavigationRegistry.get_pm_navigation()),
+            'pm_quick_nav': nav_filter.filter_navigation(UINavigationRegistry.get_pm_quick_nav()),
+            'admin_nav': nav_filter.filter_nav_item(UINavigationRegistry.get_admin_navigation())
+        }
+    
+    @classmethod
+    def fingerprint_for(cls, user_id, permissions_version=0) -> str:
+        from k9.services.permission_service import PermissionService
+        
+        key = str(user_id)
+        now = time.monotonic()
+        with cls._lock:
+            cached = cls._fingerprints.get(key)
+        if cached and cached[0] == permissions_version and now - cached[2] < cls.FINGERPRINT_TTL:
+            return cached[1]
+        
+        fingerprint = PermissionService.permission_fingerprint(user_id)
+        with cls._lock:
+            cls._fingerprints[key] = (permissions_version, fingerprint, now)
+        return fingerprint
+    
+    @classmethod
+    def get_navigation(cls, user_id, permissions_version=0) -> dict:
+        """Filtered navigation for a user, compiled once per permission fingerprint"""
+        from k9.services.permission_service import PermissionService
+        
+        fingerprint = cls.fingerprint_for(user_id, permissions_version)
+        with cls._lock:
+            tree = cls._trees.get(fingerprint)
+        if tree is not None:
+            return tree
+        
+        nav_filter = NavigationFilter(
+            lambda permission_key: PermissionService.has_permission(user_id, permission_key),
+            lambda: PermissionService.is_admin(user_id)
+        )
+        tree = cls.build(nav_filter)
+        with cls._lock:
+            cls._trees[fingerprint] = tree
+        return tree
+    
+    @classmethod
+    def invalidate(cls, user_id=None):
+        """Forget a user's fingerprint, or everything when no user is given"""
+        with cls._lock:
+            if user_id is None:
+                cls._fingerprints.clear()
+                cls._trees.clear()
+            else:
+                cls._fingerprints.pop(str(user_id), None)
@@ -23,13 +23,13 @@ from k9.models.report_models import (
 )
 from k9.services.permission_service import PermissionService
 from k9.services.report_export_service import ReportExportService
+from k9.utils.db_routing import read_replica
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Spacer
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
 
 from k9.utils.pdf_minimal_elegant import (
     create_minimal_header,
@@ -42,6 +42,7 @@ from k9.utils.pdf_minimal_elegant import (
     create_spacer
 )
 from k9.utils.utils_pdf_rtl import rtl, register_arabic_fonts, get_arabic_font_name, format_pdf_text
+from k9.utils.excel_exporter import create_write_only_sheet, styled_cell
 
 logger = logging.getLogger(__name__)
 
@@ -676,6 +677,7 @@ class UnifiedReportService:
         return count
     
     @classmethod
+    @read_replica
     def _fetch_report_data(
         cls,
         report_type: UnifiedReportType,
@@ -1360,9 +1362,6 @@ class UnifiedReportService:
                     return result
         
         try:
-            buffer = BytesIO()
-            wb = Workbook()
-            
             header_font = Font(bold=True, size=12, color='FFFFFF')
             header_fill = PatternFill(start_color='3A6EA5', end_color='3A6EA5', fill_type='solid')
             title_font = Font(bold=True, size=14, color='333333')
@@ -1373,20 +1372,19 @@ class UnifiedReportService:
                 top=Side(style='thin', color='DDDDDD'),
                 bottom=Side(style='thin', color='DDDDDD')
             )
+            right = Alignment(horizontal='right')
             
             report_type_name = REPORT_TYPE_NAMES_AR.get(context.report_type, 'تقرير')
-            sheet_name = report_type_name[:31]
             
-            ws = wb.active
-            ws.title = sheet_name
-            ws.right_to_left = True
+            # Write-only workbook: rows are serialised as they are appended,
+            # so sheet settings go first and rows are written top to bottom
+            wb = Workbook(write_only=True)
+            ws = create_write_only_sheet(wb, report_type_name, [25, 35, 25, 25, 30])
             
-            row = 1
-            ws.merge_cells(f'A{row}:D{row}')
-            ws[f'A{row}'] = context.title_ar or report_type_name
-            ws[f'A{row}'].font = title_font
-            ws[f'A{row}'].alignment = Alignment(horizontal='center', vertical='center')
-            row += 2
+            ws.append([styled_cell(ws, context.title_ar or report_type_name, font=title_font,
+                                   alignment=Alignment(horizontal='center', vertical='center'))])
+            ws.merged_cells.add('A1:D1')
+            ws.append([])
             
             meta_data = []
             
@@ -1413,30 +1411,20 @@ class UnifiedReportService:
                     meta_data.append(('تاريخ المراجعة', context.pm_reviewed_at.strftime('%Y-%m-%d %H:%M')))
             
             for label, value in meta_data:
-                ws[f'A{row}'] = label
-                ws[f'B{row}'] = value
-                ws[f'A{row}'].font = Font(bold=True)
-                ws[f'A{row}'].fill = meta_fill
-                ws[f'A{row}'].border = border
-                ws[f'B{row}'].border = border
-                ws[f'A{row}'].alignment = Alignment(horizontal='right')
-                ws[f'B{row}'].alignment = Alignment(horizontal='right')
-                row += 1
+                ws.append([
+                    styled_cell(ws, label, font=Font(bold=True), fill=meta_fill, border=border, alignment=right),
+                    styled_cell(ws, value, border=border, alignment=right),
+                ])
             
-            row += 1
+            ws.append([])
             
             cached_data = context.cached_data or {}
-            row = cls._add_report_data_to_excel(ws, row, context.report_type, cached_data, header_font, header_fill, border)
-            
-            ws.column_dimensions['A'].width = 25
-            ws.column_dimensions['B'].width = 35
-            ws.column_dimensions['C'].width = 25
-            ws.column_dimensions['D'].width = 25
-            ws.column_dimensions['E'].width = 30
+            cls._add_report_data_to_excel(ws, 4 + len(meta_data), context.report_type, cached_data, header_font, header_fill, border)
             
             if cached_data and not cached_data.get('error'):
                 cls._add_data_worksheet(wb, context.report_type, cached_data, header_font, header_fill, border)
             
+            buffer = BytesIO()
             wb.save(buffer)
             buffer.seek(0)
             return buffer
@@ -1447,114 +1435,75 @@ class UnifiedReportService:
     
     @classmethod
     def _add_report_data_to_excel(cls, ws, row: int, report_type: UnifiedReportType, data: Dict, header_font, header_fill, border) -> int:
-        """Add report-type specific data to main Excel sheet"""
+        """Append report-type specific data to the main (write-only) sheet; row is the next row number"""
         if not data or data.get('error'):
             return row
         
         dog_info = data.get('dog', {})
         if dog_info:
-            ws[f'A{row}'] = 'معلومات الكلب'
-            ws[f'A{row}'].font = Font(bold=True, size=11, color='3A6EA5')
+            ws.append([styled_cell(ws, 'معلومات الكلب', font=Font(bold=True, size=11, color='3A6EA5'))])
             row += 1
             
-            if dog_info.get('name'):
-                ws[f'A{row}'] = 'اسم الكلب'
-                ws[f'B{row}'] = dog_info.get('name')
-                ws[f'A{row}'].border = border
-                ws[f'B{row}'].border = border
-                row += 1
-            if dog_info.get('code'):
-                ws[f'A{row}'] = 'رمز الكلب'
-                ws[f'B{row}'] = dog_info.get('code')
-                ws[f'A{row}'].border = border
-                ws[f'B{row}'].border = border
-                row += 1
+            for key, label in (('name', 'اسم الكلب'), ('code', 'رمز الكلب')):
+                if dog_info.get(key):
+                    ws.append([styled_cell(ws, label, border=border), styled_cell(ws, dog_info.get(key), border=border)])
+                    row += 1
+            ws.append([])
             row += 1
         
         if data.get('notes'):
-            ws[f'A{row}'] = 'ملاحظات'
-            ws[f'A{row}'].font = Font(bold=True)
-            row += 1
-            ws[f'A{row}'] = data.get('notes')
-            ws.merge_cells(f'A{row}:D{row}')
-            row += 1
+            ws.append([styled_cell(ws, 'ملاحظات', font=Font(bold=True))])
+            ws.append([data.get('notes')])
+            ws.merged_cells.add(f'A{row + 1}:D{row + 1}')
+            row += 2
         
         return row
     
     @classmethod
     def _add_data_worksheet(cls, wb: Workbook, report_type: UnifiedReportType, data: Dict, header_font, header_fill, border):
-        """Add a data worksheet with tables for list data"""
+        """Add write-only data worksheets with tables for list data"""
+        right = Alignment(horizontal='right')
+        
+        def header_row(ws, headers):
+            return [styled_cell(ws, header, font=header_font, fill=header_fill, border=border, alignment=right)
+                    for header in headers]
+        
+        def data_row(ws, values):
+            return [styled_cell(ws, value, border=border, alignment=right) for value in values]
+        
         training = data.get('training_sessions', [])
         if training:
-            ws = wb.create_sheet('جلسات التدريب')
-            ws.right_to_left = True
+            ws = create_write_only_sheet(wb, 'جلسات التدريب', [20] * 5)
+            ws.auto_filter.ref = f"A1:E{len(training)+1}"
+            ws.append(header_row(ws, ['نوع التدريب', 'الوصف', 'من', 'إلى', 'ملاحظات']))
             
-            headers = ['نوع التدريب', 'الوصف', 'من', 'إلى', 'ملاحظات']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = Alignment(horizontal='right')
-            
-            for row_idx, session in enumerate(training, 2):
-                values = [
+            for session in training:
+                ws.append(data_row(ws, [
                     session.get('training_type', ''),
                     session.get('description', ''),
                     session.get('time_from', '') or '',
                     session.get('time_to', '') or '',
                     session.get('notes', '') or ''
-                ]
-                for col, val in enumerate(values, 1):
-                    cell = ws.cell(row=row_idx, column=col, value=val)
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='right')
-            
-            ws.auto_filter.ref = f"A1:E{len(training)+1}"
-            for col_idx in range(1, 6):
-                ws.column_dimensions[get_column_letter(col_idx)].width = 20
+                ]))
         
         incidents = data.get('incidents', [])
         if incidents:
-            ws = wb.create_sheet('الحوادث')
-            ws.right_to_left = True
+            ws = create_write_only_sheet(wb, 'الحوادث', [22] * 4)
+            ws.auto_filter.ref = f"A1:D{len(incidents)+1}"
+            ws.append(header_row(ws, ['النوع', 'الوصف', 'التاريخ/الوقت', 'الموقع']))
             
-            headers = ['النوع', 'الوصف', 'التاريخ/الوقت', 'الموقع']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = Alignment(horizontal='right')
-            
-            for row_idx, incident in enumerate(incidents, 2):
-                values = [
+            for incident in incidents:
+                ws.append(data_row(ws, [
                     incident.get('incident_type', ''),
                     incident.get('description', ''),
                     incident.get('incident_datetime', '') or '',
                     incident.get('location', '') or ''
-                ]
-                for col, val in enumerate(values, 1):
-                    cell = ws.cell(row=row_idx, column=col, value=val)
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='right')
-            
-            ws.auto_filter.ref = f"A1:D{len(incidents)+1}"
-            for col_idx in range(1, 5):
-                ws.column_dimensions[get_column_letter(col_idx)].width = 22
+                ]))
         
         health = data.get('health')
         if health:
-            ws = wb.create_sheet('الفحص الصحي')
-            ws.right_to_left = True
-            
-            headers = ['الجزء', 'الحالة', 'الملاحظات']
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = Alignment(horizontal='right')
+            ws = create_write_only_sheet(wb, 'الفحص الصحي', [25] * 3)
+            ws.append(header_row(ws, ['الجزء', 'الحالة', 'الملاحظات']))
             
             health_fields = [
                 ('eyes_status', 'eyes_notes', 'العيون'),
@@ -1563,19 +1512,10 @@ class UnifiedReportService:
                 ('mouth_status', 'mouth_notes', 'الفم'),
             ]
             
-            row_idx = 2
             for status_field, notes_field, label in health_fields:
                 status = health.get(status_field)
                 if status:
-                    ws.cell(row=row_idx, column=1, value=label).border = border
-                    ws.cell(row=row_idx, column=2, value=cls._get_health_status_ar(status)).border = border
-                    ws.cell(row=row_idx, column=3, value=health.get(notes_field, '')).border = border
-                    for col in range(1, 4):
-                        ws.cell(row=row_idx, column=col).alignment = Alignment(horizontal='right')
-                    row_idx += 1
-            
-            for col_idx in range(1, 4):
-                ws.column_dimensions[get_column_letter(col_idx)].width = 25
+                    ws.append(data_row(ws, [label, cls._get_health_status_ar(status), health.get(notes_field, '')]))
     
     @classmethod
     def _log_export(
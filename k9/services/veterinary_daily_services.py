@@ -1,10 +1,15 @@
 """
 Veterinary daily report services
+
+Reports read a projection of veterinary_visit: the medication and
+vital-sign display strings are stored on each visit when it is saved
+(VeterinaryVisit.refresh_summary), and KPIs are SQL aggregates, so a daily
+report is one row query plus one aggregate query and a multi-project,
+multi-week summary is a single grouped query.
 """
-from datetime import datetime, date
-from typing import Dict, List, Optional, Any
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import joinedload
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Any, Iterable
+from sqlalchemy import func
 
 from k9.models.models import VeterinaryVisit, Dog, Employee, Project, EmployeeRole, VisitType
 from app import db
@@ -12,6 +17,88 @@ from k9.utils.dates_ar import get_arabic_day_name
 from k9.utils.utils_pdf_rtl import format_arabic_date
 from k9.utils.veterinary_daily_constants import VISIT_TYPE_LABELS
 
+# Period summary groupings: key -> date_trunc unit (None groups the whole range)
+PERIOD_GROUPINGS = {
+    'project': None,
+    'day': 'day',
+    'week': 'week',
+    'month': 'month',
+}
+
+
+def _check_project_access(user, project_ids: Iterable[str]):
+    """PROJECT_MANAGER users may only report on the projects they manage"""
+    if user and user.role.value == "PROJECT_MANAGER":
+        managed = {str(p.id) for p in (user.managed_projects or [])}
+        if not managed or any(str(pid) not in managed for pid in project_ids):
+            raise ValueError("Access denied to this project")
+
+
+def visit_filters(
+    project_ids: Iterable[str],
+    date_from: date,
+    date_to: date,
+    vet_id: Optional[str] = None,
+    dog_id: Optional[str] = None,
+    visit_type: Optional[str] = None
+) -> List[Any]:
+    """WHERE clauses for visits in [date_from, date_to]; a half-open datetime range keeps the date indexes usable"""
+    clauses = [
+        VeterinaryVisit.project_id.in_(list(project_ids)),
+        VeterinaryVisit.visit_date >= datetime.combine(date_from, datetime.min.time()),
+        VeterinaryVisit.visit_date < datetime.combine(date_to + timedelta(days=1), datetime.min.time()),
+    ]
+    if vet_id:
+        clauses.append(VeterinaryVisit.vet_id == vet_id)
+    if dog_id:
+        clauses.append(VeterinaryVisit.dog_id == dog_id)
+    if visit_type:
+        clauses.append(VeterinaryVisit.visit_type == VisitType(visit_type))
+    return clauses
+
+
+def _kpi_columns() -> List[Any]:
+    columns = [
+        func.count(VeterinaryVisit.id).label('total_visits'),
+        func.count(func.distinct(VeterinaryVisit.dog_id)).label('unique_dogs'),
+        func.count(func.distinct(VeterinaryVisit.vet_id)).label('unique_vets'),
+        func.coalesce(func.sum(VeterinaryVisit.cost), 0).label('total_cost'),
+        func.coalesce(func.sum(VeterinaryVisit.medication_count), 0).label('total_medications'),
+    ]
+    for visit_type in VisitType:
+        columns.append(func.count(VeterinaryVisit.id).filter(
+            VeterinaryVisit.visit_type == visit_type
+        ).label(f'type_{visit_type.value}'))
+    return columns
+
+
+def _kpi_row_to_dict(row) -> Dict[str, Any]:
+    return {
+        "total_visits": row.total_visits,
+        "unique_dogs": row.unique_dogs,
+        "unique_vets": row.unique_vets,
+        "total_cost": round(float(row.total_cost or 0), 2),
+        "total_medications": int(row.total_medications or 0),
+        "by_visit_type": {vt.value: getattr(row, f'type_{vt.value}') for vt in VisitType},
+    }
+
+
+def visit_kpis(clauses: List[Any]) -> Dict[str, Any]:
+    """Visit KPIs for the filtered visits in one aggregate query"""
+    row = db.session.query(*_kpi_columns()).filter(*clauses).one()
+    return _kpi_row_to_dict(row)
+
+
+def visit_kpis_by_dog(clauses: List[Any]) -> List[Dict[str, Any]]:
+    """Per-dog KPIs for the filtered visits in one grouped query"""
+    rows = db.session.query(
+        Dog.id.label('dog_id'), Dog.code.label('dog_code'), Dog.name.label('dog_name'), *_kpi_columns()
+    ).join(Dog, Dog.id == VeterinaryVisit.dog_id).filter(
+        *clauses
+    ).group_by(Dog.id, Dog.code, Dog.name).order_by(Dog.name).all()
+    return [dict(_kpi_row_to_dict(row), dog_id=str(row.dog_id), dog_code=row.dog_code or '',
+                 dog_name=row.dog_name or '') for row in rows]
+
 
 def get_vet_daily(
     project_id: str,
@@ -36,116 +123,54 @@ def get_vet_daily(
         Dictionary containing report data
     """
     # Validate project access for PROJECT_MANAGER
-    if user and user.role.value == "PROJECT_MANAGER":
-        # Check if user has access to this project
-        if not user.managed_projects or project_id not in [p.id for p in user.managed_projects]:
-            raise ValueError("Access denied to this project")
+    _check_project_access(user, [project_id])
     
     # Get project info
-    project = Project.query.get(project_id)
+    project = db.session.get(Project, project_id)
     if not project:
         raise ValueError("Project not found")
     
-    # Build query with joins for better performance
-    query = VeterinaryVisit.query.join(
-        VeterinaryVisit.dog
+    clauses = visit_filters([project_id], target_date, target_date, vet_id, dog_id, visit_type)
+    
+    # One projection query: stored summaries instead of per-row JSON formatting and lazy loads
+    rows = db.session.query(
+        VeterinaryVisit.visit_date,
+        VeterinaryVisit.visit_type,
+        VeterinaryVisit.diagnosis,
+        VeterinaryVisit.treatment,
+        VeterinaryVisit.medications_summary,
+        VeterinaryVisit.vital_signs_summary,
+        VeterinaryVisit.cost,
+        VeterinaryVisit.location,
+        VeterinaryVisit.weather,
+        VeterinaryVisit.notes,
+        Dog.name.label('dog_name'),
+        Dog.breed.label('breed'),
+        Employee.name.label('vet_name')
     ).join(
-        VeterinaryVisit.vet
+        Dog, Dog.id == VeterinaryVisit.dog_id
     ).join(
-        VeterinaryVisit.project
-    ).filter(
-        and_(
-            VeterinaryVisit.project_id == project_id,
-            db.func.date(VeterinaryVisit.visit_date) == target_date
-        )
-    )
-    
-    # Apply filters
-    if vet_id:
-        query = query.filter(VeterinaryVisit.vet_id == vet_id)
+        Employee, Employee.id == VeterinaryVisit.vet_id
+    ).filter(*clauses).order_by(VeterinaryVisit.visit_date.asc()).all()
     
-    if dog_id:
-        query = query.filter(VeterinaryVisit.dog_id == dog_id)
+    visits_data = [{
+        "time": row.visit_date.strftime("%H:%M"),
+        "dog_name": row.dog_name,
+        "breed": row.breed or "",
+        "vet_name": row.vet_name,
+        "visit_type_ar": VISIT_TYPE_LABELS.get(row.visit_type.value, row.visit_type.value),
+        "diagnosis": row.diagnosis or "",
+        "treatment": row.treatment or "",
+        "medications": row.medications_summary or "",
+        "cost": row.cost or 0.0,
+        "location": row.location or "",
+        "weather": row.weather or "",
+        "vital_signs": row.vital_signs_summary or "",
+        "notes": row.notes or ""
+    } for row in rows]
     
-    if visit_type:
-        query = query.filter(VeterinaryVisit.visit_type == VisitType(visit_type))
-    
-    # Execute query
-    visits = query.order_by(VeterinaryVisit.visit_date.asc()).all()
-    
-    # Process visits data
-    visits_data = []
-    for visit in visits:
-        # Format medications
-        medications_str = ""
-        if visit.medications:
-            meds = []
-            for med in visit.medications:
-                name = med.get('name', '')
-                dose = med.get('dose', '')
-                frequency = med.get('frequency', '')
-                if name:
-                    med_str = f"{name}"
-                    if dose:
-                        med_str += f" ({dose}"
-                        if frequency:
-                            med_str += f"×{frequency}"
-                        med_str += ")"
-                    meds.append(med_str)
-            medications_str = "؛ ".join(meds)
-        
-        # Format vital signs
-        vital_signs_str = ""
-        if visit.vital_signs:
-            vs_parts = []
-            temp = visit.vital_signs.get('temp') or visit.temperature
-            hr = visit.vital_signs.get('hr') or visit.heart_rate
-            resp = visit.vital_signs.get('resp')
-            bp = visit.vital_signs.get('bp') or visit.blood_pressure
-            
-            if temp:
-                vs_parts.append(f"الحرارة: {temp}°")
-            if hr:
-                vs_parts.append(f"النبض: {hr}")
-            if resp:
-                vs_parts.append(f"التنفس: {resp}")
-            if bp:
-                vs_parts.append(f"الضغط: {bp}")
-                
-            vital_signs_str = "، ".join(vs_parts)
-        elif visit.temperature or visit.heart_rate or visit.blood_pressure:
-            # Fallback to individual fields
-            vs_parts = []
-            if visit.temperature:
-                vs_parts.append(f"الحرارة: {visit.temperature}°")
-            if visit.heart_rate:
-                vs_parts.append(f"النبض: {visit.heart_rate}")
-            if visit.blood_pressure:
-                vs_parts.append(f"الضغط: {visit.blood_pressure}")
-            vital_signs_str = "، ".join(vs_parts)
-        
-        visits_data.append({
-            "time": visit.visit_date.strftime("%H:%M"),
-            "dog_name": visit.dog.name,
-            "breed": visit.dog.breed or "",
-            "vet_name": visit.vet.name,
-            "visit_type_ar": VISIT_TYPE_LABELS.get(visit.visit_type.value, visit.visit_type.value),
-            "diagnosis": visit.diagnosis or "",
-            "treatment": visit.treatment or "",
-            "medications": medications_str,
-            "cost": visit.cost or 0.0,
-            "location": visit.location or "",
-            "weather": visit.weather or "",
-            "vital_signs": vital_signs_str,
-            "notes": visit.notes or ""
-        })
-    
-    # Calculate KPIs
-    total_visits = len(visits)
-    unique_dogs = len(set(visit.dog_id for visit in visits))
-    total_cost = sum(visit.cost or 0 for visit in visits)
-    emergencies = len([v for v in visits if v.visit_type == VisitType.EMERGENCY])
-    vaccinations = len([v for v in visits if v.visit_type == VisitType.VACCINATION])
+    # KPIs as SQL aggregates
+    kpis = visit_kpis(clauses)
     
     return {
         "project_id": project_id,
@@ -162,15 +187,84 @@ def get_vet_daily(
         },
         "visits": visits_data,
         "kpis": {
-            "total_visits": total_visits,
-            "unique_dogs": unique_dogs,
-            "total_cost": round(total_cost, 2),
-            "emergencies": emergencies,
-            "vaccinations": vaccinations
+            "total_visits": kpis["total_visits"],
+            "unique_dogs": kpis["unique_dogs"],
+            "total_cost": kpis["total_cost"],
+            "emergencies": kpis["by_visit_type"][VisitType.EMERGENCY.value],
+            "vaccinations": kpis["by_visit_type"][VisitType.VACCINATION.value]
         }
     }
 
 
+def get_vet_period(
+    project_ids: List[str],
+    date_from: date,
+    date_to: date,
+    group_by: str = 'project',
+    vet_id: Optional[str] = None,
+    dog_id: Optional[str] = None,
+    visit_type: Optional[str] = None,
+    user=None
+) -> Dict[str, Any]:
+    """
+    Veterinary summary over several projects and days in a single grouped query
+    
+    Args:
+        project_ids: Projects to include
+        date_from: First day (inclusive)
+        date_to: Last day (inclusive)
+        group_by: 'project', or 'day' / 'week' / 'month' per project
+        vet_id: Optional veterinarian ID filter
+        dog_id: Optional dog ID filter
+        visit_type: Optional visit type filter
+        user: Current user for RBAC
+        
+    Returns:
+        Dictionary with one row per group plus totals
+    """
+    if group_by not in PERIOD_GROUPINGS:
+        raise ValueError(f"Unsupported grouping: {group_by}")
+    if not project_ids:
+        raise ValueError("At least one project is required")
+    if date_to < date_from:
+        raise ValueError("date_to must not be before date_from")
+    _check_project_access(user, project_ids)
+    
+    clauses = visit_filters(project_ids, date_from, date_to, vet_id, dog_id, visit_type)
+    
+    unit = PERIOD_GROUPINGS[group_by]
+    group_columns = [Project.id, Project.name]
+    if unit:
+        period = func.date_trunc(unit, VeterinaryVisit.visit_date).label('period')
+        group_columns.append(period)
+    
+    query = db.session.query(*group_columns, *_kpi_columns()).join(
+        Project, Project.id == VeterinaryVisit.project_id
+    ).filter(*clauses).group_by(*group_columns)
+    query = query.order_by(Project.name, group_columns[-1]) if unit else query.order_by(Project.name)
+    
+    groups = []
+    for row in query.all():
+        group = dict(_kpi_row_to_dict(row), project_id=str(row.id), project_name=row.name)
+        if unit:
+            group["period"] = row.period.strftime("%Y-%m-%d")
+        groups.append(group)
+    
+    return {
+        "filters_applied": {
+            "project_ids": [str(pid) for pid in project_ids],
+            "date_from": date_from.strftime("%Y-%m-%d"),
+            "date_to": date_to.strftime("%Y-%m-%d"),
+            "group_by": group_by,
+            "vet_id": vet_id,
+            "dog_id": dog_id,
+            "visit_type": visit_type
+        },
+        "groups": groups,
+        "kpis": visit_kpis(clauses)
+    }
+
+
 def get_available_vets(project_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get list of available veterinarians"""
     query = Employee.query.filter(Employee.role == EmployeeRole.VET)
@@ -0,0 +1,62 @@
+"""
+Daily checkup findings encoding
+Body-part findings of a DailyCheckupLog as an integer bitmask.
+
+Each body part has a fixed bit; a checkup's abnormal_mask has the bit set
+when that part's finding is abnormal (anything other than a normal value).
+The mask and a numeric severity rank are computed when the checkup is
+saved, so reports count abnormal findings with bitwise SQL aggregates
+(abnormal_mask & bit) instead of reading and comparing every row.
+
+Bits are stored data: append new body parts at the end, never reorder.
+"""
+
+# Body part column -> Arabic display name, in bit order (eyes = bit 0)
+CHECKUP_BODY_PARTS = {
+    'eyes': 'العين',
+    'ears': 'الأذن',
+    'nose': 'الأنف',
+    'front_legs': 'الأطراف الأمامية',
+    'hind_legs': 'الأطراف الخلفية',
+    'coat': 'الشعر',
+    'tail': 'الذيل',
+}
+
+BODY_PART_BITS = {part: 1 << position for position, part in enumerate(CHECKUP_BODY_PARTS)}
+
+# Findings that count as normal ("سليم" is what the checkup form stores)
+NORMAL_FINDINGS = ('طبيعي', 'سليم', 'Normal', 'normal')
+
+# Severity levels in order; the rank is the 1-based position
+SEVERITY_LEVELS = ('خفيف', 'متوسط', 'شديد')
+
+
+def is_abnormal_finding(value) -> bool:
+    """Whether a body part finding is abnormal (set and not a normal value)"""
+    if not value:
+        return False
+    return value.strip() not in NORMAL_FINDINGS
+
+
+def abnormal_mask(findings) -> int:
+    """Bitmask of abnormal parts from a {part: finding} mapping"""
+    mask = 0
+    for part, bit in BODY_PART_BITS.items():
+        if is_abnormal_finding(findings.get(part)):
+            mask |= bit
+    return mask
+
+
+def mask_parts(mask) -> list:
+    """Body part columns whose bit is set, in bit order"""
+    return [part for part, bit in BODY_PART_BITS.items() if (mask or 0) & bit]
+
+
+def severity_rank(severity):
+    """1-based rank of a severity level, None when empty or unknown"""
+    if not severity:
+        return None
+    try:
+        return SEVERITY_LEVELS.index(severity.strip()) + 1
+    except ValueError:
+        return None
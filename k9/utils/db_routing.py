@@ -0,0 +1,168 @@
+"""
+Read-replica routing for report and dashboard reads
+
+Report generation, exports and dashboards run long read-only queries that
+otherwise compete with form submissions for the primary's connections and
+locks. When REPLICA_DATABASE_URL is set, app.py registers it as the
+'replica' Flask-SQLAlchemy bind, and code marked with @read_replica (or run
+inside `with replica_reads():`) sends its SELECTs there through
+RoutingSession.get_bind(). Everything else, and any statement that may
+write, stays on the primary:
+
+- only SELECT statements without FOR UPDATE are routed
+- once a session has flushed, or executed anything else (DML, text(),
+  SELECT ... FOR UPDATE), it reads from the primary for the rest of its
+  life, so a request always sees its own writes
+- the replica is used only while its replay lag is within
+  REPLICA_MAX_LAG_SECONDS (checked at most every REPLICA_LAG_CHECK_INTERVAL
+  seconds per process); a lagging or unreachable replica, or a standby
+  that has lost its upstream, falls back to the primary
+
+Without a 'replica' bind the decorator is a no-op.
+
+Configuration:
+    REPLICA_DATABASE_URL         PostgreSQL hot standby (or, locally, a second database)
+    REPLICA_MAX_LAG_SECONDS      replay lag above which reads fall back (default 30)
+    REPLICA_LAG_CHECK_INTERVAL   seconds a lag measurement is reused (default 5)
+"""
+
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 30))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+# session.info key set once the session has written to the primary
+WROTE_KEY = 'k9_wrote_primary'
+
+# Zero when the server is not a standby (a plain second database); NULL
+# (unhealthy) for a standby whose WAL receiver is not streaming, since a
+# standby cut off from its upstream has replayed everything it received and
+# would otherwise look current; else the age of the last replayed commit
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL
+        ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_use_replica: ContextVar[bool] = ContextVar('k9_use_replica', default=False)
+
+# engine URL -> (monotonic time of the check, lag in seconds or None when unreachable)
+_lag_cache: Dict[str, Tuple[float, Optional[float]]] = {}
+_lag_lock = threading.Lock()
+
+
+def replica_database_url() -> Optional[str]:
+    """REPLICA_DATABASE_URL normalized like DATABASE_URL, or None"""
+    url = os.environ.get('REPLICA_DATABASE_URL')
+    if url and url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url or None
+
+
+@contextmanager
+def replica_reads():
+    """Route the SELECTs of the enclosed block to the replica when it is healthy"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(func):
+    """
+    Mark a read-only function (service method or view) for replica reads
+
+    Generator functions (streaming exports) are routed while each row is
+    produced, since their queries run as the caller iterates.
+    """
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            try:
+                while True:
+                    with replica_reads():
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                    yield item
+            finally:
+                generator.close()
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def replica_lag(engine) -> Optional[float]:
+    """Replay lag of the replica in seconds, or None when it cannot be queried or is not streaming"""
+    try:
+        with engine.connect() as conn:
+            lag = conn.execute(REPLICA_LAG_SQL).scalar()
+    except Exception as e:
+        logger.warning(f"Replica lag check failed: {e}")
+        return None
+    if lag is None:
+        logger.warning("Replica is not streaming from its upstream")
+        return None
+    return float(lag)
+
+
+def replica_is_healthy(engine) -> bool:
+    """Whether the replica is reachable and within REPLICA_MAX_LAG_SECONDS (cached)"""
+    key = str(engine.url)
+    now = time.monotonic()
+    with _lag_lock:
+        checked_at, lag = _lag_cache.get(key, (None, None))
+        if checked_at is None or now - checked_at >= REPLICA_LAG_CHECK_INTERVAL:
+            lag = replica_lag(engine)
+            _lag_cache[key] = (now, lag)
+            if lag is not None and lag > REPLICA_MAX_LAG_SECONDS:
+                logger.warning(f"Replica lag {lag:.1f}s exceeds {REPLICA_MAX_LAG_SECONDS}s, reading from primary")
+    return lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+
+
+def _is_plain_select(clause) -> bool:
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session sending marked read-only SELECTs to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        engines = self._db.engines
+        if bind is not None or engine is not engines.get(None):
+            return engine
+
+        # Flushes, DML, text() and locking SELECTs may write: pin the session to the primary
+        if self._flushing or (clause is not None and not _is_plain_select(clause)):
+            self.info[WROTE_KEY] = True
+            return engine
+
+        replica = engines.get(REPLICA_BIND)
+        if (replica is None or clause is None or not _use_replica.get() or self.info.get(WROTE_KEY)
+                or not replica_is_healthy(replica)):
+            return engine
+        return replica
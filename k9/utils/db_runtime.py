@@ -0,0 +1,296 @@
+"""
+Database runtime: pool sizing, per-route timeouts and pool telemetry
+
+Pool sizing
+    Every gunicorn worker process (and the scheduler threads inside it)
+    has its own pool, so SQLAlchemy's default of 5 + 10 connections per
+    process multiplies past PostgreSQL's max_connections with cpu*2+1
+    workers. pool_options() splits DB_MAX_CONNECTIONS, less
+    DB_RESERVED_CONNECTIONS kept for migrations, backups and psql, between
+    the workers: each process keeps one connection per request thread plus
+    DB_SCHEDULER_CONNECTIONS, and may overflow up to its share.
+
+Timeouts per route class
+    On checkout a connection gets the statement_timeout and
+    idle_in_transaction_session_timeout of the code that borrows it: short
+    for pages, longer for exports (PDF/Excel/ZIP downloads), none for
+    statements outside a request (scheduler jobs, CLI). Views marked with
+    @export_route are exports whatever their URL; other requests are
+    classified by EXPORT_PATH_PATTERN. The export default
+    is GUNICORN_TIMEOUT less EXPORT_TIMEOUT_MARGIN, so the database cancels
+    a slow export before gunicorn kills its worker. The settings are only
+    sent when they differ from what the connection already has.
+
+Telemetry
+    TimedQueuePool records checkout wait time, peak saturation and pool
+    timeouts; engine events record statements slower than
+    DB_SLOW_STATEMENT_MS and statements cancelled by statement_timeout.
+    pool_status() returns the counters (GET /api/health/db) and every slow
+    or cancelled statement is logged with its route class and endpoint.
+
+Configuration:
+    GUNICORN_WORKERS / GUNICORN_THREADS   worker processes / threads per worker
+    GUNICORN_TIMEOUT                      worker timeout in seconds (default 120)
+    DB_MAX_CONNECTIONS                    server max_connections (default 100)
+    DB_RESERVED_CONNECTIONS               connections left free (default 10)
+    DB_SCHEDULER_CONNECTIONS              per process, for scheduler jobs (default 1)
+    DB_POOL_SIZE / DB_MAX_OVERFLOW        explicit overrides of the computed sizes
+    DB_POOL_TIMEOUT                       seconds to wait for a connection (default 10)
+    DB_{PAGE,EXPORT,BACKGROUND}_STATEMENT_TIMEOUT
+    DB_{PAGE,EXPORT,BACKGROUND}_IDLE_TIMEOUT
+    DB_SLOW_STATEMENT_MS                  slow statement threshold (default 1000)
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+DB_RESERVED_CONNECTIONS = int(os.environ.get('DB_RESERVED_CONNECTIONS', 10))
+DB_SCHEDULER_CONNECTIONS = int(os.environ.get('DB_SCHEDULER_CONNECTIONS', 1))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_SLOW_STATEMENT_MS = float(os.environ.get('DB_SLOW_STATEMENT_MS', 1000))
+# Slow/cancelled statements kept per pool for pool_status()
+SLOW_STATEMENT_HISTORY = 50
+
+# Request paths served by the export route class
+EXPORT_PATH_PATTERN = re.compile(r'/export|/download|/batch/|[-.](pdf|excel|xlsx|csv|zip)\b', re.IGNORECASE)
+
+QUERY_CANCELED = '57014'
+
+# Default of docker-entrypoint.sh and deploy/gunicorn.conf.py
+DEFAULT_GUNICORN_TIMEOUT = 120
+# Seconds an export keeps after its statement is cancelled to fail cleanly
+EXPORT_TIMEOUT_MARGIN = 10
+
+
+@dataclass(frozen=True)
+class SessionTimeouts:
+    """PostgreSQL timeouts of one route class (values as accepted by SET, '0' disables)"""
+    statement_timeout: str
+    idle_in_transaction_timeout: str
+
+
+def worker_timeout() -> int:
+    """GUNICORN_TIMEOUT, or the default of docker-entrypoint.sh"""
+    timeout = os.environ.get('GUNICORN_TIMEOUT')
+    return int(timeout) if timeout else DEFAULT_GUNICORN_TIMEOUT
+
+
+def export_statement_timeout() -> str:
+    """DB_EXPORT_STATEMENT_TIMEOUT, or the gunicorn worker timeout less EXPORT_TIMEOUT_MARGIN"""
+    timeout = os.environ.get('DB_EXPORT_STATEMENT_TIMEOUT')
+    if timeout:
+        return timeout
+    return f"{max(worker_timeout() - EXPORT_TIMEOUT_MARGIN, 1)}s"
+
+
+ROUTE_TIMEOUTS: Dict[str, SessionTimeouts] = {
+    'page': SessionTimeouts(
+        os.environ.get('DB_PAGE_STATEMENT_TIMEOUT', '15s'),
+        os.environ.get('DB_PAGE_IDLE_TIMEOUT', '30s'),
+    ),
+    'export': SessionTimeouts(
+        export_statement_timeout(),
+        os.environ.get('DB_EXPORT_IDLE_TIMEOUT', '60s'),
+    ),
+    'background': SessionTimeouts(
+        os.environ.get('DB_BACKGROUND_STATEMENT_TIMEOUT', '0'),
+        os.environ.get('DB_BACKGROUND_IDLE_TIMEOUT', '10min'),
+    ),
+}
+
+
+def web_workers() -> int:
+    """GUNICORN_WORKERS, or the cpu*2+1 default of docker-entrypoint.sh"""
+    workers = os.environ.get('GUNICORN_WORKERS')
+    return int(workers) if workers else (os.cpu_count() or 1) * 2 + 1
+
+
+def pool_options(workers: Optional[int] = None, threads: Optional[int] = None,
+                 max_connections: Optional[int] = None) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS entries sizing each process's pool to its share of the server
+
+    Returns:
+        dict: poolclass, pool_size, max_overflow and pool_timeout
+    """
+    workers = workers or web_workers()
+    threads = threads or int(os.environ.get('GUNICORN_THREADS', 1))
+    budget = (max_connections or DB_MAX_CONNECTIONS) - DB_RESERVED_CONNECTIONS
+
+    per_process = max(2, budget // workers)
+    pool_size = min(threads + DB_SCHEDULER_CONNECTIONS, per_process)
+    max_overflow = per_process - pool_size
+
+    if os.environ.get('DB_POOL_SIZE'):
+        pool_size = int(os.environ['DB_POOL_SIZE'])
+    if os.environ.get('DB_MAX_OVERFLOW'):
+        max_overflow = int(os.environ['DB_MAX_OVERFLOW'])
+
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': DB_POOL_TIMEOUT,
+    }
+
+
+def export_route(view):
+    """Mark a view as an export (long queries, slow streaming clients) regardless of its URL"""
+    view.db_route_class = 'export'
+    return view
+
+
+def current_route_class() -> str:
+    """'export' or 'page' inside a request (by view mark, then path), 'background' outside one"""
+    if not has_request_context():
+        return 'background'
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    if getattr(view, 'db_route_class', None):
+        return view.db_route_class
+    return 'export' if EXPORT_PATH_PATTERN.search(request.path) else 'page'
+
+
+def _endpoint() -> Optional[str]:
+    return request.endpoint if has_request_context() else None
+
+
+@dataclass
+class PoolStats:
+    """Counters of one pool since the process started (or the pool was recreated)"""
+    capacity: int
+    checkouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    peak_checked_out: int = 0
+    pool_timeouts: int = 0
+    slow_statements: int = 0
+    statement_timeouts: int = 0
+    recent: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=SLOW_STATEMENT_HISTORY))
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_statement(self, kind: str, statement: str, seconds: Optional[float]):
+        route_class, endpoint = current_route_class(), _endpoint()
+        with self.lock:
+            if kind == 'slow':
+                self.slow_statements += 1
+            else:
+                self.statement_timeouts += 1
+            self.recent.append({
+                'kind': kind,
+                'at': datetime.utcnow().isoformat(timespec='seconds'),
+                'ms': round(seconds * 1000, 1) if seconds is not None else None,
+                'route_class': route_class,
+                'endpoint': endpoint,
+                'statement': ' '.join(statement.split())[:500],
+            })
+        duration = f"{seconds * 1000:.0f} ms" if seconds is not None else 'statement_timeout'
+        logger.warning(f"{kind.capitalize()} statement ({duration}, {route_class}, {endpoint}): "
+                       f"{' '.join(statement.split())[:200]}")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording checkout wait time, saturation and checkout timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats(capacity=self.size() + max(self._max_overflow, 0))
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self.stats.lock:
+                self.stats.pool_timeouts += 1
+            logger.warning(f"Connection pool exhausted after {self._timeout}s "
+                           f"({self.checkedout()}/{self.stats.capacity} checked out)")
+            raise
+        waited = time.perf_counter() - started
+        checked_out = self.checkedout()
+        with self.stats.lock:
+            self.stats.checkouts += 1
+            self.stats.wait_total += waited
+            self.stats.wait_max = max(self.stats.wait_max, waited)
+            self.stats.peak_checked_out = max(self.stats.peak_checked_out, checked_out)
+        return connection
+
+
+def install_engine_events(engine):
+    """Apply route-class timeouts on checkout and record slow and cancelled statements"""
+
+    @event.listens_for(engine, 'checkout')
+    def apply_timeouts(dbapi_connection, connection_record, connection_proxy):
+        timeouts = ROUTE_TIMEOUTS[current_route_class()]
+        if connection_record.info.get('session_timeouts') == timeouts:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, false), "
+                "set_config('idle_in_transaction_session_timeout', %s, false)",
+                (timeouts.statement_timeout, timeouts.idle_in_transaction_timeout),
+            )
+        finally:
+            cursor.close()
+        dbapi_connection.commit()
+        connection_record.info['session_timeouts'] = timeouts
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_slow(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['statement_started'].pop()
+        seconds = time.perf_counter() - started
+        stats = getattr(engine.pool, 'stats', None)
+        if stats is not None and seconds * 1000 >= DB_SLOW_STATEMENT_MS:
+            stats.record_statement('slow', statement, seconds)
+
+    @event.listens_for(engine, 'handle_error')
+    def record_cancelled(context):
+        if context.connection is not None and context.connection.info.get('statement_started'):
+            context.connection.info['statement_started'].pop()
+        stats = getattr(engine.pool, 'stats', None)
+        if stats is not None and getattr(context.original_exception, 'pgcode', None) == QUERY_CANCELED:
+            stats.record_statement('cancelled', context.statement or '', None)
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Current occupancy and accumulated telemetry of an engine's pool"""
+    pool = engine.pool
+    status = {'pool': pool.status()}
+    stats = getattr(pool, 'stats', None)
+    if stats is None:
+        return status
+
+    with stats.lock:
+        status.update({
+            'capacity': stats.capacity,
+            'checked_out': pool.checkedout(),
+            'saturation': round(pool.checkedout() / stats.capacity, 3) if stats.capacity else None,
+            'peak_saturation': round(stats.peak_checked_out / stats.capacity, 3) if stats.capacity else None,
+            'checkouts': stats.checkouts,
+            'checkout_wait_avg_ms': round(stats.wait_total / stats.checkouts * 1000, 2) if stats.checkouts else 0,
+            'checkout_wait_max_ms': round(stats.wait_max * 1000, 2),
+            'pool_timeouts': stats.pool_timeouts,
+            'slow_statements': stats.slow_statements,
+            'statement_timeouts': stats.statement_timeouts,
+            'recent': list(stats.recent),
+        })
+    return status
@@ -3,14 +3,173 @@ Excel Export Utilities for K9 Operations Management System
 
 This module provides reusable functions for exporting data to Excel format (XLSX)
 using the openpyxl library. It replaces CSV exports with properly formatted Excel files.
+
+Large exports should use StreamingExcelWriter: it writes through openpyxl's
+write-only mode, so rows go straight to a temporary sheet file instead of
+being held as cell objects, and the finished file is streamed in chunks.
 """
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+from tempfile import SpooledTemporaryFile
 import os
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Iterable, Iterator
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Finished workbooks stay in memory up to this size, then spill to disk
+SPOOL_MAX_SIZE = 1024 * 1024
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _named_styles() -> List[NamedStyle]:
+    border_side = Side(style='thin', color='000000')
+    border = Border(left=border_side, right=border_side, top=border_side, bottom=border_side)
+    
+    header = NamedStyle(name='k9_header')
+    header.font = Font(bold=True, color="FFFFFF", size=12)
+    header.fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
+    header.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    header.border = border
+    
+    title = NamedStyle(name='k9_title')
+    title.font = Font(bold=True, size=14, color="1F4788")
+    title.alignment = Alignment(horizontal="center", vertical="center")
+    
+    cell = NamedStyle(name='k9_cell')
+    cell.alignment = Alignment(horizontal="right", vertical="center", wrap_text=True)
+    cell.border = border
+    
+    return [header, title, cell]
+
+
+class StreamingExcelWriter:
+    """
+    Write-only workbook with one right-to-left sheet
+    
+    Styles are registered once per workbook as named styles and applied by
+    name, and column widths are fixed up front (write-only sheets cannot be
+    auto-fitted after the fact). Rows can come from any iterable, e.g. a
+    query using yield_per so they are read through a server-side cursor.
+    
+    Usage:
+        writer = StreamingExcelWriter(headers, sheet_name="تقرير", title="...")
+        writer.write_rows(row_iterable)
+        return excel_stream_response(writer, "report.xlsx")
+    """
+    
+    def __init__(
+        self,
+        headers: List[str],
+        sheet_name: str = "Sheet1",
+        title: Optional[str] = None,
+        column_widths: Optional[List[int]] = None,
+        rtl: bool = True,
+        freeze_header: bool = True
+    ):
+        self.headers = headers
+        self.workbook = Workbook(write_only=True)
+        for style in _named_styles():
+            self.workbook.add_named_style(style)
+        
+        self.sheet = self.workbook.create_sheet(title=sheet_name[:31])
+        self.sheet.sheet_view.rightToLeft = rtl
+        
+        widths = column_widths or [min(max(len(str(h)) + 4, 12), 50) for h in headers]
+        for col_num, width in enumerate(widths, 1):
+            self.sheet.column_dimensions[get_column_letter(col_num)].width = width
+        
+        # Sheet settings are serialised with the first row, so set them before appending
+        header_row = 3 if title else 1
+        if freeze_header:
+            self.sheet.freeze_panes = f"A{header_row + 1}"
+        if title:
+            self.sheet.append([self._cell(title, 'k9_title')])
+            self.sheet.append([])
+        
+        self.sheet.append([self._cell(h, 'k9_header') for h in headers])
+        self.row_count = 0
+    
+    def _cell(self, value: Any, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.sheet, value=value)
+        cell.style = style
+        return cell
+    
+    def append(self, row: Iterable[Any]):
+        self.sheet.append([self._cell('' if value is None else value, 'k9_cell') for value in row])
+        self.row_count += 1
+    
+    def write_rows(self, rows: Iterable[Iterable[Any]]) -> int:
+        for row in rows:
+            self.append(row)
+        return self.row_count
+    
+    def save(self, fileobj) -> None:
+        """Save to a path or file object; a write-only workbook can only be saved once"""
+        self.workbook.save(fileobj)
+    
+    def iter_bytes(self, rows: Optional[Iterable[Iterable[Any]]] = None,
+                   chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Write any remaining rows, finish the workbook and yield the file in chunks"""
+        if rows is not None:
+            self.write_rows(rows)
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+            self.save(spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def create_write_only_sheet(workbook: Workbook, title: str, column_widths: List[int], rtl: bool = True):
+    """
+    Add a sheet to a write-only workbook with its view and column widths set
+    
+    Both are serialised with the first row, so they must be set before the
+    first append; rows are then added with sheet.append().
+    """
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.sheet_view.rightToLeft = rtl
+    for col_num, width in enumerate(column_widths, 1):
+        sheet.column_dimensions[get_column_letter(col_num)].width = width
+    return sheet
+
+
+def styled_cell(sheet, value: Any, font: Optional[Font] = None, fill: Optional[PatternFill] = None,
+                border: Optional[Border] = None, alignment: Optional[Alignment] = None) -> WriteOnlyCell:
+    """Write-only cell with inline styles, for layouts beyond StreamingExcelWriter's table"""
+    cell = WriteOnlyCell(sheet, value='' if value is None else value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if border is not None:
+        cell.border = border
+    if alignment is not None:
+        cell.alignment = alignment
+    return cell
+
+
+def excel_stream_response(writer: StreamingExcelWriter, download_name: str,
+                          rows: Optional[Iterable[Iterable[Any]]] = None):
+    """
+    Flask response streaming a StreamingExcelWriter as an attachment
+    
+    Rows passed here are consumed inside the response generator, so the
+    query behind them runs while the response is being sent.
+    """
+    from flask import Response, stream_with_context
+    from urllib.parse import quote
+    
+    return Response(
+        stream_with_context(writer.iter_bytes(rows)),
+        mimetype=XLSX_MIMETYPE,
+        headers={'Content-Disposition': f"attachment; filename*=UTF-8''{quote(download_name)}"}
+    )
 
 
 def create_excel_file(
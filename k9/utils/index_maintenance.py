@@ -0,0 +1,180 @@
+"""
+BRIN indexes and physical ordering for append-mostly tables (PostgreSQL)
+
+Log, audit, notification, training and visit rows are inserted in near
+date order, so a BRIN index (min/max per block range, migration
+20261019160000) answers date range scans at a tiny fraction of a B-tree's
+size. BRIN is only as selective as the physical order is close to the
+column order: rows entered late, and holes left by retention deletes that
+are refilled with new rows, spread each range's min/max apart.
+
+reorder_tables() restores that order with CLUSTER, but only where the
+block-range spread (the share of the column's span one block range covers,
+i.e. roughly the share of the table a narrow BRIN scan reads) exceeds
+CLUSTER_MAX_SPREAD. pg_stats correlation is not used: a fraction of a
+percent of late rows ruins BRIN while correlation stays above 0.99
+(see scripts/benchmark_brin_indexes.py). CLUSTER rewrites under an
+ACCESS EXCLUSIVE lock, so for partitioned tables only closed (past month)
+partitions are reordered, and every target is attempted with a short
+lock_timeout and skipped if it is busy.
+All functions take an SQLAlchemy Connection; reorder_tables() commits
+after each CLUSTER so every lock is released before the next one.
+"""
+
+import logging
+import os
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from k9.models.model_utils import BRIN_PAGES_PER_RANGE
+from k9.utils.partitioning import is_partitioned, list_partitions, month_start
+
+logger = logging.getLogger(__name__)
+
+# BRIN index name -> (table, column)
+BRIN_INDEXES: Dict[str, Tuple[str, str]] = {
+    'ix_feeding_log_date_brin': ('feeding_log', 'date'),
+    'ix_daily_checkup_date_brin': ('daily_checkup_log', 'date'),
+    'ix_excretion_date_brin': ('excretion_log', 'date'),
+    'ix_grooming_date_brin': ('grooming_log', 'date'),
+    'ix_cleaning_date_brin': ('cleaning_log', 'date'),
+    'ix_caretaker_daily_date_brin': ('caretaker_daily_log', 'date'),
+    'ix_audit_log_created_at_brin': ('audit_log', 'created_at'),
+    'ix_access_audit_created_at_brin': ('access_audit_logs', 'created_at'),
+    'ix_notification_created_at_brin': ('notification', 'created_at'),
+    'ix_training_session_date_brin': ('training_session', 'session_date'),
+    'ix_veterinary_visit_date_brin': ('veterinary_visit', 'visit_date'),
+}
+
+# Tables reordered by reorder_tables(): table -> (column, B-tree index CLUSTER uses)
+CLUSTER_TABLES: Dict[str, Tuple[str, str]] = {
+    'veterinary_visit': ('visit_date', 'idx_veterinary_visit_date'),
+    'caretaker_daily_log': ('date', 'ix_caretaker_daily_date'),
+    'notification': ('created_at', 'idx_notification_created'),
+    'access_audit_logs': ('created_at', 'ix_access_audit_logs_created_at'),
+}
+
+CLUSTER_MAX_SPREAD = float(os.environ.get('CLUSTER_MAX_SPREAD', 0.15))
+# Relations with fewer block ranges are too small for BRIN order to matter
+CLUSTER_MIN_RANGES = 16
+CLUSTER_LOCK_TIMEOUT = os.environ.get('CLUSTER_LOCK_TIMEOUT', '5s')
+
+
+def block_range_spread(conn, relation: str, column: str,
+                       pages_per_range: Optional[int] = None) -> Tuple[Optional[float], int]:
+    """
+    Mean share (0..1) of the column's full span covered by one BRIN block range
+
+    Perfectly ordered rows give about 1 / ranges; every late row stretches
+    its range towards 1. Reads the whole relation (a closed partition or a
+    moderately sized table).
+
+    Returns:
+        tuple: (spread or None when the column has a single value, number of block ranges)
+    """
+    preparer = conn.dialect.identifier_preparer
+    row = conn.execute(text(f"""
+        SELECT avg(hi - lo) / NULLIF(max(hi) - min(lo), 0) AS spread, count(*) AS ranges
+        FROM (
+            SELECT (ctid::text::point)[0]::bigint / :pages_per_range AS block_range,
+                   min(extract(epoch FROM {preparer.quote(column)})) AS lo,
+                   max(extract(epoch FROM {preparer.quote(column)})) AS hi
+            FROM {preparer.quote(relation)}
+            WHERE {preparer.quote(column)} IS NOT NULL
+            GROUP BY 1
+        ) AS block_ranges
+    """), {'pages_per_range': pages_per_range or BRIN_PAGES_PER_RANGE}).one()
+    return (float(row.spread) if row.spread is not None else None), row.ranges
+
+
+def partition_indexes(conn, index: str) -> Dict[str, str]:
+    """Partition name -> name of its index attached to the partitioned index"""
+    rows = conn.execute(text("""
+        SELECT part.relname AS partition, idx.relname AS index
+        FROM pg_inherits i
+        JOIN pg_class idx ON idx.oid = i.inhrelid
+        JOIN pg_index x ON x.indexrelid = idx.oid
+        JOIN pg_class part ON part.oid = x.indrelid
+        WHERE i.inhparent = to_regclass(:index)
+    """), {'index': index})
+    return {row.partition: row.index for row in rows}
+
+
+def cluster_targets(conn, table: str, today: Optional[date] = None) -> List[Tuple[str, str]]:
+    """
+    (relation, index) pairs of a CLUSTER_TABLES table whose order has drifted
+
+    A plain table is its own target; a partitioned table contributes its
+    closed monthly partitions (the current and future months still take writes).
+    """
+    column, index = CLUSTER_TABLES[table]
+    if conn.execute(text("SELECT to_regclass(:index)"), {'index': index}).scalar() is None:
+        return []
+
+    if is_partitioned(conn, table):
+        current = month_start(today or date.today())
+        indexes = partition_indexes(conn, index)
+        candidates = [(name, indexes[name]) for name, month in list_partitions(conn, table)
+                      if month < current and name in indexes]
+    else:
+        candidates = [(table, index)]
+
+    targets = []
+    for relation, relation_index in candidates:
+        spread, ranges = block_range_spread(conn, relation, column)
+        if ranges >= CLUSTER_MIN_RANGES and spread is not None and spread > CLUSTER_MAX_SPREAD:
+            targets.append((relation, relation_index))
+    return targets
+
+
+def cluster_relation(conn, relation: str, index: str) -> bool:
+    """
+    CLUSTER one table or partition on a B-tree index and refresh its statistics
+
+    Returns:
+        False when the lock could not be taken within CLUSTER_LOCK_TIMEOUT
+    """
+    preparer = conn.dialect.identifier_preparer
+    previous_timeout = conn.execute(text("SELECT current_setting('lock_timeout')")).scalar()
+    try:
+        # A failed statement rolls the savepoint back, which also reverts the
+        # local lock_timeout; after success it is restored before release
+        with conn.begin_nested():
+            conn.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': CLUSTER_LOCK_TIMEOUT})
+            conn.execute(text(f"CLUSTER {preparer.quote(relation)} USING {preparer.quote(index)}"))
+            conn.execute(text(f"ANALYZE {preparer.quote(relation)}"))
+            conn.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': previous_timeout})
+    except OperationalError as e:
+        logger.warning(f"Skipped CLUSTER of {relation}: {e.orig}")
+        return False
+    return True
+
+
+def reorder_tables(conn, today: Optional[date] = None) -> Dict[str, List[str]]:
+    """CLUSTER every drifted target of CLUSTER_TABLES; returns table -> relations reordered"""
+    report = {}
+    for table in CLUSTER_TABLES:
+        if conn.execute(text("SELECT to_regclass(:table)"), {'table': table}).scalar() is None:
+            continue
+        report[table] = []
+        for relation, index in cluster_targets(conn, table, today=today):
+            if cluster_relation(conn, relation, index):
+                report[table].append(relation)
+            conn.commit()
+    return report
+
+
+def index_sizes(conn, table: str) -> Dict[str, int]:
+    """Index name -> size in bytes (partitioned indexes include every partition)"""
+    rows = conn.execute(text("""
+        SELECT idx.relname AS index,
+               COALESCE((SELECT sum(pg_relation_size(p.relid)) FROM pg_partition_tree(idx.oid) AS p),
+                        pg_relation_size(idx.oid)) AS size
+        FROM pg_index x
+        JOIN pg_class idx ON idx.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(:table)
+    """), {'table': table})
+    return {row.index: int(row.size) for row in rows}
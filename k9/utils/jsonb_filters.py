@@ -0,0 +1,70 @@
+"""
+Containment filters for the JSONB log fields
+
+Supplements, cleaning materials, visit medications and vital signs, and
+audit old/new values are JSONB columns with GIN (jsonb_path_ops) indexes
+(migrations 20261019140000 and 20261019150000). jsonb_path_ops indexes
+serve only the containment operator @>, so every helper here builds a
+`column @> document` condition: report filters such as "feeding logs
+using supplement X" become index lookups instead of loading the rows and
+inspecting the JSON in Python.
+
+Matching is exact on the stored values (after trimming the search term).
+"""
+
+from typing import Any
+
+from sqlalchemy import or_
+
+from k9.models.models import AuditLog, CleaningLog, FeedingLog, VeterinaryVisit
+
+
+def contains_item(column, **fields):
+    """Array column holding at least one object with these key/values"""
+    return column.contains([fields])
+
+
+def contains_values(column, **fields):
+    """Object column holding these key/values"""
+    return column.contains(fields)
+
+
+def _term(value) -> str:
+    return str(value or '').strip()
+
+
+def uses_supplement(name):
+    """Feeding logs listing the supplement (entries are {"name", "qty"})"""
+    return contains_item(FeedingLog.supplements, name=_term(name))
+
+
+def uses_material(name):
+    """Cleaning logs listing the material (entries are {"name", "qty"})"""
+    return contains_item(CleaningLog.materials_used, name=_term(name))
+
+
+def prescribes_medication(name):
+    """Veterinary visits whose medications JSON lists the medication as entered"""
+    return contains_item(VeterinaryVisit.medications, name=_term(name))
+
+
+def vital_signs_match(**fields):
+    """Veterinary visits whose vital signs hold these values (e.g. temp='39.5')"""
+    return contains_values(VeterinaryVisit.vital_signs, **fields)
+
+
+def audit_value_changed(key: str, value: Any, side: str = 'any'):
+    """
+    Audit rows whose old and/or new values record key = value
+
+    Args:
+        side: 'old', 'new' or 'any'
+    """
+    if side == 'old':
+        return contains_values(AuditLog.old_values, **{key: value})
+    if side == 'new':
+        return contains_values(AuditLog.new_values, **{key: value})
+    if side != 'any':
+        raise ValueError(f"side must be 'old', 'new' or 'any', not {side!r}")
+    return or_(contains_values(AuditLog.old_values, **{key: value}),
+               contains_values(AuditLog.new_values, **{key: value}))
@@ -0,0 +1,228 @@
+"""
+Monthly range partitioning for append-mostly log tables (PostgreSQL)
+
+The tables listed in PARTITIONED_TABLES are converted to declarative
+partitioned tables by migration 20261019090000. This module keeps them
+healthy at runtime: it pre-creates partitions for the coming months and
+drops (optionally archiving first) partitions past their retention, so
+retention is a metadata operation instead of row-by-row deletes.
+All functions take an SQLAlchemy Connection and are no-ops for tables
+that are not partitioned (e.g. databases built with db.create_all()).
+"""
+
+import logging
+import os
+import re
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Table name -> partition key column
+PARTITIONED_TABLES: Dict[str, str] = {
+    'feeding_log': 'date',
+    'daily_checkup_log': 'date',
+    'excretion_log': 'date',
+    'grooming_log': 'date',
+    'cleaning_log': 'date',
+    'caretaker_daily_log': 'date',
+    'access_audit_logs': 'created_at',
+    'audit_log': 'created_at',
+    'notification': 'created_at',
+}
+
+# Months of partitions kept ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', 3))
+
+
+def _retention_from_env(var: str) -> Optional[int]:
+    value = os.environ.get(var)
+    return int(value) if value else None
+
+
+# Table name -> months to keep (None keeps everything). Care logs are
+# operational records and are kept unless configured otherwise; dropping a
+# notification partition also drops its unread notifications, which
+# cleanup_old_notifications keeps, so notifications are kept by default too.
+RETENTION_MONTHS: Dict[str, Optional[int]] = {
+    'notification': _retention_from_env('NOTIFICATION_RETENTION_MONTHS'),
+    'audit_log': _retention_from_env('AUDIT_LOG_RETENTION_MONTHS'),
+    'access_audit_logs': _retention_from_env('ACCESS_AUDIT_RETENTION_MONTHS'),
+}
+
+_PARTITION_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """First day of the month that is `months` away from value's month"""
+    years, month_index = divmod(value.month - 1 + months, 12)
+    return date(value.year + years, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the partition holding `month`, e.g. feeding_log_p202511"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    """Check whether a table is a declarative partitioned table"""
+    if conn.dialect.name != 'postgresql':
+        return False
+    return conn.execute(text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+    """), {'table': table}).first() is not None
+
+
+def list_partitions(conn, table: str) -> List[Tuple[str, date]]:
+    """Monthly partitions of a table as (name, month) sorted by month; the default partition is skipped"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)
+    """), {'table': table}).scalars()
+
+    partitions = []
+    for name in rows:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def default_partition(conn, table: str) -> Optional[str]:
+    """Name of a partitioned table's DEFAULT partition, or None"""
+    return conn.execute(text("""
+        SELECT c.relname FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partdefid
+        WHERE pt.partrelid = to_regclass(:table)
+    """), {'table': table}).scalar()
+
+
+def _partition_key(conn, table: str) -> str:
+    return conn.execute(text("""
+        SELECT a.attname FROM pg_partitioned_table pt
+        JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+        WHERE pt.partrelid = to_regclass(:table)
+    """), {'table': table}).scalar()
+
+
+def _columns(conn, table: str) -> List[str]:
+    return list(conn.execute(text("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(:table) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {'table': table}).scalars())
+
+
+def create_partition(conn, table: str, month: date) -> Optional[str]:
+    """
+    Create the partition for one month; returns its name, or None if it already existed
+
+    Rows of that month already stored in the DEFAULT partition (written
+    before the partition existed) would make CREATE TABLE ... PARTITION OF
+    fail; they are moved into the new partition, which is then attached.
+    """
+    month = month_start(month)
+    name = partition_name(table, month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar() is not None:
+        return None
+
+    preparer = conn.dialect.identifier_preparer
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    default = default_partition(conn, table)
+    in_month = None
+    if default is not None:
+        key = preparer.quote(_partition_key(conn, table))
+        in_month = f"{key} >= :start AND {key} < :end"
+        params = {'start': month, 'end': add_months(month, 1)}
+        if conn.execute(text(f"SELECT 1 FROM {preparer.quote(default)} WHERE {in_month} LIMIT 1"),
+                        params).first() is None:
+            in_month = None
+
+    if in_month is None:
+        conn.execute(text(f"CREATE TABLE {preparer.quote(name)} PARTITION OF {preparer.quote(table)} {bounds}"))
+        return name
+
+    columns = ', '.join(preparer.quote(column) for column in _columns(conn, table))
+    conn.execute(text(
+        f"CREATE TABLE {preparer.quote(name)} "
+        f"(LIKE {preparer.quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {preparer.quote(default)} WHERE {in_month} RETURNING {columns}) "
+        f"INSERT INTO {preparer.quote(name)} ({columns}) SELECT {columns} FROM moved"
+    ), params).rowcount
+    conn.execute(text(f"ALTER TABLE {preparer.quote(table)} ATTACH PARTITION {preparer.quote(name)} {bounds}"))
+    logger.warning(f"Moved {moved} rows of {table} from {default} into new partition {name}")
+    return name
+
+
+def ensure_partitions(conn, table: str, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                      today: Optional[date] = None) -> List[str]:
+    """Create any missing partitions from the current month through `months_ahead` months"""
+    if not is_partitioned(conn, table):
+        return []
+
+    current = month_start(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        name = create_partition(conn, table, add_months(current, offset))
+        if name:
+            created.append(name)
+    return created
+
+
+def drop_expired_partitions(conn, table: str, retention_months: Optional[int], today: Optional[date] = None,
+                            archive: Optional[Callable[..., None]] = None) -> List[str]:
+    """
+    Detach and drop partitions that lie entirely before the retention window
+
+    Args:
+        retention_months: Whole months to keep before the current month (None keeps everything)
+        archive: Optional callback archive(conn, table, partition_name) run after
+                 detaching and before dropping; raising aborts the whole run
+
+    Returns:
+        Names of the partitions dropped
+    """
+    if retention_months is None or not is_partitioned(conn, table):
+        return []
+
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    preparer = conn.dialect.identifier_preparer
+    dropped = []
+    for name, month in list_partitions(conn, table):
+        if add_months(month, 1) > cutoff:
+            break
+        conn.execute(text(f"ALTER TABLE {preparer.quote(table)} DETACH PARTITION {preparer.quote(name)}"))
+        if archive is not None:
+            archive(conn, table, name)
+        conn.execute(text(f"DROP TABLE {preparer.quote(name)}"))
+        dropped.append(name)
+    return dropped
+
+
+def maintain_partitions(conn, today: Optional[date] = None,
+                        archive: Optional[Callable[..., None]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """Pre-create upcoming partitions and apply retention for every partitioned log table"""
+    report = {}
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(conn, table):
+            continue
+        report[table] = {
+            'created': ensure_partitions(conn, table, today=today),
+            'dropped': drop_expired_partitions(conn, table, RETENTION_MONTHS.get(table),
+                                               today=today, archive=archive),
+        }
+    return report
@@ -17,6 +17,7 @@ from reportlab.platypus import (
 )
 from reportlab.pdfgen import canvas
 from k9.utils.utils_pdf_rtl import rtl, register_arabic_fonts, get_arabic_font_name
+from k9.utils.pdf_page_templates import StaticPageLayer
 
 logger = logging.getLogger(__name__)
 
@@ -428,39 +429,44 @@ def create_data_table(headers, rows, col_widths=None):
 
 
 # ==================== FOOTER ====================
+def _draw_footer_static(canvas_obj, doc):
+    """System name on the right; identical on every page"""
+    canvas_obj.setFont(get_arabic_font_name(), 9)
+    canvas_obj.setFillColor(MinimalColors.TEXT_LIGHT)
+    canvas_obj.drawRightString(
+        A4[0] - 2*cm,
+        1.5*cm,
+        rtl("نظام إدارة عمليات الكلاب البوليسية K9")
+    )
+
+
+def _draw_page_label(canvas_obj, doc):
+    """Centred page number"""
+    canvas_obj.setFont(get_arabic_font_name(), 9)
+    canvas_obj.setFillColor(MinimalColors.TEXT_LIGHT)
+    canvas_obj.drawCentredString(
+        A4[0] / 2,
+        1.5*cm,
+        rtl(f"صفحة {canvas_obj.getPageNumber()}")
+    )
+
+
+_FOOTER_TEMPLATE = StaticPageLayer('k9_minimal_footer', _draw_footer_static, _draw_page_label)
+
+
 def add_page_number(canvas_obj, doc):
     """
     Add minimal page footer with page number
     
+    The static part of the footer is drawn once per document as a Form
+    XObject; only the page number is drawn on each page.
+    
     Args:
         canvas_obj: ReportLab canvas object
         doc: Document object
     """
     register_arabic_fonts()
-    font_name = get_arabic_font_name()
-    
-    page_num = canvas_obj.getPageNumber()
-    text = rtl(f"صفحة {page_num}")
-    
-    canvas_obj.saveState()
-    canvas_obj.setFont(font_name, 9)
-    canvas_obj.setFillColor(MinimalColors.TEXT_LIGHT)
-    
-    # Center footer
-    canvas_obj.drawCentredString(
-        A4[0] / 2,
-        1.5*cm,
-        text
-    )
-    
-    # Optional: Add system name on the right
-    canvas_obj.drawRightString(
-        A4[0] - 2*cm,
-        1.5*cm,
-        rtl("نظام إدارة عمليات الكلاب البوليسية K9")
-    )
-    
-    canvas_obj.restoreState()
+    _FOOTER_TEMPLATE(canvas_obj, doc)
 
 
 # ==================== UTILITIES ====================
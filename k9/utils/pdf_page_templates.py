@@ -0,0 +1,71 @@
+"""
+PDF Page Templates
+Static page decorations recorded once per document as PDF Form XObjects
+
+Letterheads, logos, separators and fixed footer text are identical on every
+page of a report. A StaticPageLayer records them into a named Form XObject the
+first time a page is drawn and afterwards places that form with a single
+`Do` operator, so images and header text are embedded once per document and
+each page's content stream only carries the live parts (page number, date).
+
+Usage:
+    template = StaticPageLayer('k9_letterhead', draw_static, draw_live)
+    doc.build(story, onFirstPage=template, onLaterPages=template)
+"""
+
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StaticPageLayer:
+    """Page callback drawing a per-document Form XObject plus live content"""
+
+    def __init__(self, name: str, draw_static: Callable, draw_live: Optional[Callable] = None):
+        """
+        Args:
+            name: Form XObject name, unique within a document
+            draw_static: callable(canvas, doc) drawing content identical on every page
+            draw_live: optional callable(canvas, doc) drawing per-page content
+        """
+        self.name = name
+        self.draw_static = draw_static
+        self.draw_live = draw_live
+
+    def ensure_form(self, canvas_obj, doc):
+        """Record the static decorations into this canvas' document once"""
+        if canvas_obj.hasForm(self.name):
+            return
+        canvas_obj.beginForm(self.name)
+        try:
+            self.draw_static(canvas_obj, doc)
+        finally:
+            canvas_obj.endForm()
+
+    def __call__(self, canvas_obj, doc):
+        canvas_obj.saveState()
+        try:
+            self.ensure_form(canvas_obj, doc)
+            canvas_obj.doForm(self.name)
+            if self.draw_live:
+                self.draw_live(canvas_obj, doc)
+        finally:
+            canvas_obj.restoreState()
+
+
+def draw_watermark(canvas_obj, text, font_name, page_size, font_size=60, color=None, angle=45):
+    """
+    Draw a large diagonal watermark centred on the page.
+    Meant to be called from a StaticPageLayer's draw_static callable.
+    """
+    from reportlab.lib import colors
+
+    width, height = page_size
+    canvas_obj.saveState()
+    canvas_obj.setFont(font_name, font_size)
+    canvas_obj.setFillColor(color or colors.Color(0.6, 0.6, 0.6, alpha=0.15))
+    canvas_obj.translate(width / 2, height / 2)
+    canvas_obj.rotate(angle)
+    canvas_obj.drawCentredString(0, 0, text)
+    canvas_obj.restoreState()
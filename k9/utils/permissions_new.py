@@ -26,7 +26,8 @@ def _is_admin_mode(user):
 def load_user_permissions(user_id):
     """
     Load all permission keys for a user into the session using V2 PermissionService.
-    Called during login to cache permissions for fast checking.
+    Called during login to cache permissions for fast checking. The session is
+    stored server-side, so only the session ID travels in the cookie.
     
     Args:
         user_id: The user's ID
@@ -36,7 +37,6 @@ def load_user_permissions(user_id):
     """
     from k9.services.permission_service import PermissionService
     from k9.models.models import User
-    from datetime import datetime
     
     # Use V2 PermissionService to get all user permissions (resolves roles + wildcards)
     permission_keys = PermissionService.get_user_permissions(user_id)
@@ -44,12 +44,12 @@ def load_user_permissions(user_id):
     # Store in session for fast access
     session['user_permissions'] = list(permission_keys)
     
-    # Store the timestamp when permissions were loaded
-    user = User.query.get(user_id)
-    if user and user.permissions_updated_at:
-        session['permissions_loaded_at'] = user.permissions_updated_at.isoformat()
+    # Stamp the permission version the set was built from
+    if current_user.is_authenticated and str(current_user.id) == str(user_id):
+        user = current_user
     else:
-        session['permissions_loaded_at'] = datetime.utcnow().isoformat()
+        user = User.query.get(user_id)
+    session['permissions_version'] = (user.permissions_version or 0) if user else 0
     
     session.modified = True
     
@@ -59,39 +59,18 @@ def load_user_permissions(user_id):
 def _should_reload_permissions():
     """
     Check if permissions should be reloaded from database.
-    Returns True if the user's permissions have been updated since they were loaded.
-    Uses flask.g to cache the check per request to avoid multiple DB queries.
+    Returns True if the user's permission version has moved past the one the
+    cached set was built from. current_user is already loaded for the request,
+    so this is an integer comparison without an extra query.
     """
-    from flask import g
-    from k9.models.models import User
-    from datetime import datetime
-    
     if not current_user.is_authenticated:
         return False
     
-    # Cache the result in flask.g to avoid multiple DB queries per request
-    cache_key = '_permissions_reload_checked'
-    if hasattr(g, cache_key):
-        return getattr(g, cache_key)
-    
-    loaded_at_str = session.get('permissions_loaded_at')
-    if not loaded_at_str:
-        setattr(g, cache_key, True)
+    loaded_version = session.get('permissions_version')
+    if loaded_version is None or session.get('user_permissions') is None:
         return True  # Never loaded, should load
     
-    user = User.query.get(current_user.id)
-    if not user or not user.permissions_updated_at:
-        setattr(g, cache_key, False)
-        return False
-    
-    try:
-        loaded_at = datetime.fromisoformat(loaded_at_str)
-        result = user.permissions_updated_at > loaded_at
-        setattr(g, cache_key, result)
-        return result
-    except (ValueError, TypeError):
-        setattr(g, cache_key, True)
-        return True  # Invalid format, reload to be safe
+    return (current_user.permissions_version or 0) != loaded_version
 
 
 def get_user_permissions():
@@ -539,11 +518,11 @@ def grant_permission(user_id, permission_key, granted_by_user_id=None, _batch_se
         success = False
     
     if success:
-        # Update the user's permissions_updated_at timestamp to invalidate their session cache
+        # Bump the user's permission version to invalidate their session cache
         from app import db
         target_user = User.query.get(user_id)
         if target_user:
-            target_user.permissions_updated_at = datetime.utcnow()
+            target_user.touch_permissions()
             db.session.commit()
         
         # Reload permissions if this user is currently logged in
@@ -583,11 +562,11 @@ def revoke_permission(user_id, permission_key, revoked_by_user_id=None, _batch_s
         success = False
     
     if success:
-        # Update the user's permissions_updated_at timestamp to invalidate their session cache
+        # Bump the user's permission version to invalidate their session cache
         from app import db
         target_user = User.query.get(user_id)
         if target_user:
-            target_user.permissions_updated_at = datetime.utcnow()
+            target_user.touch_permissions()
             db.session.commit()
         
         # Reload permissions if this user is currently logged in
@@ -635,7 +614,7 @@ def batch_grant_permissions(user_id, permission_keys, granted_by_user_id=None):
         # Update timestamp for all changes at once
         target_user = User.query.get(user_id)
         if target_user:
-            target_user.permissions_updated_at = datetime.utcnow()
+            target_user.touch_permissions()
             db.session.commit()
         
         # Reload permissions if this user is currently logged in
@@ -683,7 +662,7 @@ def batch_revoke_permissions(user_id, permission_keys, revoked_by_user_id=None):
         # Update timestamp for all changes at once
         target_user = User.query.get(user_id)
         if target_user:
-            target_user.permissions_updated_at = datetime.utcnow()
+            target_user.touch_permissions()
             db.session.commit()
         
         # Reload permissions if this user is currently logged in
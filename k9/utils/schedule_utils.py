@@ -1,12 +1,44 @@
 """
 Utility functions for daily schedule management
 """
+import logging
+import zlib
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
+from sqlalchemy import delete, text
 from k9.models.models_handler_daily import DailySchedule, ScheduleStatus
 from k9.services.handler_service import NotificationService, DailyScheduleService
 from k9.models.models_handler_daily import NotificationType
 from app import db, app
 
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def job_lock(name):
+    """
+    Cluster-wide lock for a scheduled job (PostgreSQL session advisory lock)
+
+    Every gunicorn worker runs its own scheduler, so the same cron job fires
+    once per worker. Yields True in the one process that obtained the lock
+    and False in the others, which should skip the run. The lock is held on
+    a dedicated connection left outside any transaction, so long jobs are
+    not cut off by idle_in_transaction_session_timeout, and it is released
+    when the job ends or its connection drops.
+    """
+    key = zlib.crc32(f'k9-job:{name}'.encode())
+    with db.engine.connect() as conn:
+        acquired = conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {'key': key})
+        conn.commit()
+        if not acquired:
+            logger.info(f"Job {name} is already running in another process, skipping")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': key})
+                conn.commit()
+
 
 def auto_lock_yesterday_schedules():
     """
@@ -16,19 +48,8 @@ def auto_lock_yesterday_schedules():
     with app.app_context():
         yesterday = date.today() - timedelta(days=1)
         
-        schedules = DailySchedule.query.filter(
-            db.and_(
-                DailySchedule.date <= yesterday,
-                DailySchedule.status == ScheduleStatus.OPEN
-            )
-        ).all()
-        
-        locked_count = 0
-        for schedule in schedules:
-            if DailyScheduleService.lock_schedule(str(schedule.id)):
-                locked_count += 1
-        
-        return locked_count
+        # Set-based lock: one UPDATE for every open schedule up to yesterday
+        return DailyScheduleService.lock_schedules_until(yesterday)
 
 
 def cleanup_old_notifications(days=30):
@@ -40,16 +61,66 @@ def cleanup_old_notifications(days=30):
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        old_notifications = Notification.query.filter(
-            db.and_(
+        # One set-based DELETE; bulk retention is handled by dropping partitions
+        result = db.session.execute(
+            delete(Notification).where(
                 Notification.created_at < cutoff_date,
                 Notification.read == True
-            )
-        ).all()
-        
-        count = len(old_notifications)
-        for notif in old_notifications:
-            db.session.delete(notif)
+            ),
+            execution_options={'synchronize_session': False}
+        )
         
         db.session.commit()
-        return count
+        return result.rowcount
+
+
+def maintain_log_partitions():
+    """
+    Pre-create upcoming monthly partitions of the log tables and drop the
+    ones past their retention (no-op for tables that are not partitioned)
+    """
+    with app.app_context():
+        from k9.utils.partitioning import maintain_partitions
+        
+        with job_lock('maintain_log_partitions') as acquired:
+            if not acquired:
+                return None
+            with db.engine.begin() as conn:
+                return maintain_partitions(conn)
+
+
+def reorder_date_ordered_tables():
+    """
+    CLUSTER the tables (closed partitions) whose physical order has drifted
+    from their date column, keeping their BRIN indexes selective
+    """
+    with app.app_context():
+        from k9.utils.index_maintenance import reorder_tables
+        
+        with job_lock('reorder_date_ordered_tables') as acquired:
+            if not acquired:
+                return None
+            with db.engine.connect() as conn:
+                return reorder_tables(conn)
+
+
+def archive_old_audit_logs():
+    """
+    Move aged access and permission audit rows into cold archive segments
+    """
+    with app.app_context():
+        from k9.services.audit_archive_service import AuditArchiveService
+        
+        with job_lock('archive_old_audit_logs') as acquired:
+            if not acquired:
+                return None
+            return AuditArchiveService.archive_all()
+
+
+def cleanup_expired_sessions():
+    """
+    Delete expired server-side sessions in one statement
+    """
+    with app.app_context():
+        store = getattr(app.session_interface, 'store', None)
+        return store.delete_expired() if store is not None else 0
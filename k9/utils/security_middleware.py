@@ -365,14 +365,16 @@ class AuditLogger:
             **(details or {})
         }
         
-        # Log to audit system
-        log_audit(
-            user_id=user_id or 'system',
-            action='SECURITY_EVENT',
-            target_type='Security',
-            target_id=event_type,
-            details=enhanced_details
-        )
+        # Log to audit system (system events without a user only go to the app logger)
+        if user_id:
+            log_audit(
+                user_id=user_id,
+                action='SECURITY_EVENT',
+                target_type='Security',
+                target_id=None,
+                description=event_type,
+                extra_data=enhanced_details
+            )
         
         # Also log to application logger for immediate visibility
         log_level = current_app.logger.warning
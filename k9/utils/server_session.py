@@ -0,0 +1,244 @@
+"""
+Server-side session storage
+
+The session cookie only carries a signed opaque session ID; the session
+data lives in the server_session table (or, as a stand-in for local
+development, in one JSON file per session). Records are written only when
+the session changed or is past half its lifetime, so an unchanged session
+costs one primary-key read per request.
+
+Configuration:
+    SESSION_BACKEND   'sqlalchemy' (default), 'filesystem' or 'cookie'
+    SESSION_FILE_DIR  directory for the filesystem backend
+"""
+
+import os
+import json
+import secrets
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_BYTES = 32
+# Lifetime of non-permanent sessions in the store (the cookie itself expires with the browser)
+DEFAULT_SESSION_TTL = timedelta(days=1)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict tracking modifications, identified by an opaque ID"""
+
+    def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False,
+                 expires_at: Optional[datetime] = None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.previous_sid: Optional[str] = None
+
+    def regenerate(self):
+        """Move the data to a fresh ID (e.g. on login) so a fixed ID cannot be reused"""
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = _new_sid()
+        self.new = True
+        self.modified = True
+
+
+def _new_sid() -> str:
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+class SqlSessionStore:
+    """PostgreSQL-backed store using its own connection, independent of db.session"""
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def _table(self):
+        from k9.models.models import ServerSession
+        return ServerSession.__table__
+
+    def load(self, sid: str) -> Optional[Tuple[str, datetime]]:
+        table = self._table
+        with self.db.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.data, table.c.expires_at).where(table.c.id == sid)
+            ).first()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return row.data, row.expires_at
+
+    def save(self, sid: str, data: str, expires_at: datetime, user_id=None):
+        table = self._table
+        values = {'id': sid, 'data': data, 'expires_at': expires_at,
+                  'user_id': user_id, 'updated_at': datetime.utcnow()}
+        statement = pg_insert(table).values(**values).on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={k: v for k, v in values.items() if k != 'id'}
+        )
+        with self.db.engine.begin() as conn:
+            conn.execute(statement)
+
+    def delete(self, sid: str):
+        table = self._table
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.id == sid))
+
+    def delete_expired(self) -> int:
+        table = self._table
+        with self.db.engine.begin() as conn:
+            return conn.execute(delete(table).where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+
+class FileSessionStore:
+    """One JSON file per session; a stand-in for local development"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid: str) -> str:
+        return os.path.join(self.directory, f'{sid}.json')
+
+    def load(self, sid: str) -> Optional[Tuple[str, datetime]]:
+        try:
+            with open(self._path(sid), encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        expires_at = datetime.fromisoformat(record['expires_at'])
+        if expires_at <= datetime.utcnow():
+            return None
+        return record['data'], expires_at
+
+    def save(self, sid: str, data: str, expires_at: datetime, user_id=None):
+        path = self._path(sid)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'data': data, 'expires_at': expires_at.isoformat(), 'user_id': user_id}, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, sid: str):
+        try:
+            os.remove(self._path(sid))
+        except OSError:
+            pass
+
+    def delete_expired(self) -> int:
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.endswith('.json') and self.load(name[:-5]) is None:
+                self.delete(name[:-5])
+                removed += 1
+        return removed
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface storing session data server-side"""
+
+    serializer = TaggedJSONSerializer()
+    salt = 'k9-server-session'
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app) -> Optional[Signer]:
+        if not app.secret_key:
+            return None
+        return Signer(app.secret_key, salt=self.salt, key_derivation='hmac')
+
+    def _lifetime(self, app, session) -> timedelta:
+        return app.permanent_session_lifetime if session.permanent else DEFAULT_SESSION_TTL
+
+    def open_session(self, app, request):
+        signer = self._signer(app)
+        if signer is None:
+            return None
+
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = signer.unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                try:
+                    record = self.store.load(sid)
+                except Exception as e:
+                    logger.error(f"Error loading server session: {e}")
+                    record = None
+                if record is not None:
+                    data, expires_at = record
+                    try:
+                        return ServerSideSession(self.serializer.loads(data), sid=sid, expires_at=expires_at)
+                    except (ValueError, TypeError):
+                        pass
+
+        return ServerSideSession(sid=_new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        now = datetime.utcnow()
+        lifetime = self._lifetime(app, session)
+        # Unchanged sessions are only re-written once past half their lifetime
+        stale = session.expires_at is None or session.expires_at - now < lifetime / 2
+        written = False
+        if session.new or session.modified or stale:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)), now + lifetime,
+                            user_id=session.get('_user_id'))
+            written = True
+
+        if written or self.should_set_cookie(app, session):
+            cookie_value = self._signer(app).sign(session.sid).decode()
+            response.set_cookie(name, cookie_value, expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure,
+                                samesite=samesite)
+            response.vary.add('Cookie')
+
+
+def init_server_session(app, db):
+    """Install the configured session backend on the app"""
+    backend = app.config.get('SESSION_BACKEND', 'sqlalchemy')
+    if backend == 'cookie':
+        return None
+
+    if backend == 'filesystem':
+        store = FileSessionStore(app.config.get('SESSION_FILE_DIR') or os.path.join(app.instance_path, 'sessions'))
+    elif backend == 'sqlalchemy':
+        store = SqlSessionStore(db)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    app.session_interface = ServerSessionInterface(store)
+    return store
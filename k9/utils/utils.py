@@ -24,37 +24,27 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def log_audit(user_id, action, target_type, target_id, description=None, old_values=None, new_values=None):
-    """Log an audit trail entry"""
-    import json
+def log_audit(user_id, action, target_type, target_id, description=None, old_values=None, new_values=None,
+              extra_data=None):
+    """
+    Log an audit trail entry
+
+    The entry commits together with any uncommitted changes in the current
+    transaction; otherwise it is buffered and written in the background.
+    """
+    from k9.services.audit_sink import audit_sink
     try:
-        audit_log = AuditLog()
-        audit_log.user_id = user_id
-        audit_log.action = action
-        audit_log.target_type = target_type
-        # Handle target_id properly for UUID compatibility
-        # Don't convert User IDs (integers) to UUIDs, leave them as None for User targets
-        if target_type == 'User' and isinstance(target_id, (int, str)) and str(target_id).isdigit():
-            audit_log.target_id = None  # Don't try to store integer user IDs as UUIDs
-        else:
-            audit_log.target_id = str(target_id) if target_id is not None else None
-        
-        # Ensure description is a string, not dict (for SQLite compatibility)
-        if isinstance(description, dict):
-            audit_log.description = json.dumps(description, ensure_ascii=False)
-        else:
-            audit_log.description = description
-            
-        # Ensure old_values and new_values are properly handled for SQLite
-        audit_log.old_values = json.dumps(old_values, ensure_ascii=False) if old_values and isinstance(old_values, dict) else old_values
-        audit_log.new_values = json.dumps(new_values, ensure_ascii=False) if new_values and isinstance(new_values, dict) else new_values
-        
-        audit_log.ip_address = request.remote_addr if request else None
-        audit_log.user_agent = request.headers.get('User-Agent') if request else None
-        db.session.add(audit_log)
-        db.session.commit()
+        audit_sink.record(
+            user_id=user_id,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            description=description,
+            old_values=old_values,
+            new_values=new_values,
+            extra_data=extra_data
+        )
     except Exception as e:
-        db.session.rollback()
         current_app.logger.error(f"Error logging audit: {str(e)}")
 
 def generate_pdf_report(report_type, start_date, end_date, user, filters=None):
@@ -542,54 +532,28 @@ def generate_pdf_report(report_type, start_date, end_date, user, filters=None):
     
     return filename
 
-def generate_excel_report(report_type, start_date, end_date, user, filters=None):
+EXCEL_REPORT_TITLES = {
+    'dogs': "تقرير الكلاب",
+    'employees': "تقرير الموظفين",
+    'training': "تقرير التدريب",
+}
+
+
+def _excel_report_rows(report_type, start_date, end_date, user, filters):
     """
-    Generate an Excel report for the specified type and filters
-    :param report_type: one of 'dogs', 'employees', 'training', 'veterinary', 'breeding', 'projects'
-    :param start_date: optional start date (datetime.date)
-    :param end_date: optional end date (datetime.date)
-    :param user: current_user for permission filtering
-    :param filters: optional dict with keys appropriate to report_type
-    :return: filename of generated Excel file
+    Headers and a lazy row iterator for an Excel report.
+    Database-backed reports are read with yield_per so rows come from a
+    server-side cursor instead of being loaded all at once.
     """
-    from k9.models.models import Dog, Employee, TrainingSession, VeterinaryVisit, ProductionCycle, Project
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
-    from openpyxl.drawing.image import Image as XLImage
-    from k9.utils.report_header import create_excel_header_data
-    
-    filters = filters or {}
-    
-    # Create workbook and worksheet
-    wb = Workbook()
-    ws = wb.active
-    
-    # Get company header data
-    header_data = create_excel_header_data()
-    
-    # Arabic font and styling
-    arabic_font = Font(name='Calibri', size=11, bold=False)
-    header_font = Font(name='Calibri', size=12, bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-    border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                   top=Side(style='thin'), bottom=Side(style='thin'))
+    from k9.models.models import Employee, TrainingSession
+    from sqlalchemy.orm import joinedload
     
-    # Generate filename
-    filename = f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-    
-    # Collect data based on report_type
     if report_type == 'dogs':
-        ws.title = "تقرير الكلاب"
-        
-        # Headers
         headers = ['رقم', 'اسم الكلب', 'الكود', 'السلالة', 'الجنس', 'الحالة', 'الموقع', 'العمر']
         
         # Fetch dogs accessible by the current user using permission-aware helper
         dogs = get_user_accessible_dogs(user)
         
-        # Apply filters
         status_filter = filters.get('status')
         gender_filter = filters.get('gender')
         if status_filter:
@@ -597,182 +561,86 @@ def generate_excel_report(report_type, start_date, end_date, user, filters=None)
         if gender_filter:
             dogs = [d for d in dogs if d.gender.value == gender_filter]
         
-        # Write headers
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-            cell.border = border
-        
-        # Adjust data start row to account for header
-        data_start_row = current_row + 1
-        
-        # Write data
-        for row, dog in enumerate(dogs, data_start_row):
-            gender_ar = 'ذكر' if dog.gender.value == 'MALE' else 'أنثى'
-            status_ar = {
-                'ACTIVE': 'نشط', 'RETIRED': 'متقاعد', 
-                'DECEASED': 'متوفى', 'TRAINING': 'تدريب'
-            }.get(dog.current_status.value, dog.current_status.value)
-            
-            age = (datetime.now().date() - dog.date_of_birth).days // 365 if dog.date_of_birth else ''
-            
-            data = [row-1, dog.name or '', dog.code or '', dog.breed or '', 
-                   gender_ar, status_ar, dog.location or '', age]
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = value
-                cell.font = arabic_font
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-    
-    elif report_type == 'employees':
-        ws.title = "تقرير الموظفين"
+        status_map = {
+            'ACTIVE': 'نشط', 'RETIRED': 'متقاعد',
+            'DECEASED': 'متوفى', 'TRAINING': 'تدريب'
+        }
+        today = datetime.now().date()
         
-        # Headers
+        def rows():
+            for number, dog in enumerate(dogs, 1):
+                yield [number, dog.name or '', dog.code or '', dog.breed or '',
+                       'ذكر' if dog.gender.value == 'MALE' else 'أنثى',
+                       status_map.get(dog.current_status.value, dog.current_status.value),
+                       dog.location or '',
+                       (today - dog.date_of_birth).days // 365 if dog.date_of_birth else '']
+        return headers, rows()
+    
+    if report_type == 'employees':
         headers = ['رقم', 'الاسم', 'الرقم الوظيفي', 'الوظيفة', 'تاريخ التعيين', 'الحالة', 'الهاتف', 'البريد']
         
-        employees = Employee.query.all()
+        employees = Employee.query
         role_filter = filters.get('role')
         status_filter = filters.get('status')
         if role_filter:
-            employees = [e for e in employees if e.role.value == role_filter]
+            roles = role_filter if isinstance(role_filter, list) else [role_filter]
+            employees = employees.filter(Employee.role.in_(roles))
         if status_filter:
-            is_active = (status_filter == 'ACTIVE')
-            employees = [e for e in employees if e.is_active == is_active]
-        
-        # Add company header (same logic as dogs section)
-        current_row = 1
-        try:
-            if os.path.exists(header_data['company_logo_path']):
-                img = XLImage(header_data['company_logo_path'])
-                img.height = 60
-                img.width = 120
-                ws.add_image(img, f'D{current_row}')
-        except:
-            pass
-        
-        for i, info in enumerate(header_data['english_info']):
-            ws.cell(row=current_row + i, column=1).value = info
-            ws.cell(row=current_row + i, column=1).font = Font(name='Calibri', size=9)
-        
-        for i, info in enumerate(header_data['arabic_info']):
-            ws.cell(row=current_row + i, column=8).value = info
-            ws.cell(row=current_row + i, column=8).font = Font(name='Calibri', size=9)
-            ws.cell(row=current_row + i, column=8).alignment = Alignment(horizontal='right')
+            employees = employees.filter(Employee.is_active == (status_filter == 'ACTIVE'))
+        employees = employees.order_by(Employee.name)
         
-        current_row += 6
-        ws.cell(row=current_row, column=4).value = "تقرير الموظفين"
-        ws.cell(row=current_row, column=4).font = Font(name='Calibri', size=14, bold=True)
-        ws.cell(row=current_row, column=4).alignment = Alignment(horizontal='center')
-        current_row += 2
-        
-        # Write headers
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=current_row, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-            cell.border = border
-        
-        # Write data
         role_map = {
             'TRAINER': 'مدرب', 'HANDLER': 'معالج', 'VET': 'طبيب بيطري',
             'PROJECT_MANAGER': 'مدير مشروع', 'BREEDER': 'مربي'
         }
         
-        for row, emp in enumerate(employees, 2):
-            status_ar = 'نشط' if emp.is_active else 'غير نشط'
-            data = [row-1, emp.name, emp.employee_id or '', 
-                   role_map.get(emp.role.value, emp.role.value),
-                   emp.hire_date.strftime('%Y-%m-%d') if emp.hire_date else '',
-                   status_ar, emp.phone or '', emp.email or '']
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = value
-                cell.font = arabic_font
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-    
-    elif report_type == 'training':
-        ws.title = "تقرير التدريب"
-        
-        # Headers
+        def rows():
+            for number, emp in enumerate(employees.yield_per(1000), 1):
+                yield [number, emp.name, emp.employee_id or '',
+                       role_map.get(emp.role.value, emp.role.value),
+                       emp.hire_date.strftime('%Y-%m-%d') if emp.hire_date else '',
+                       'نشط' if emp.is_active else 'غير نشط', emp.phone or '', emp.email or '']
+        return headers, rows()
+    
+    if report_type == 'training':
         headers = ['رقم', 'اسم الكلب', 'المدرب', 'الفئة', 'الموضوع', 'التاريخ', 'المدة (دقيقة)', 'التقييم']
         
-        sessions = TrainingSession.query
-        # Apply date range
+        sessions = TrainingSession.query.options(
+            joinedload(TrainingSession.dog), joinedload(TrainingSession.trainer)
+        )
         if start_date and end_date:
             sessions = sessions.filter(TrainingSession.session_date >= start_date,
                                        TrainingSession.session_date <= end_date)
         # Restrict to accessible dogs using permission-aware helper
         if not _is_admin_mode(user):
-            accessible_dogs = get_user_accessible_dogs(user)
-            accessible_dog_ids = [d.id for d in accessible_dogs]
-            if accessible_dog_ids:
-                sessions = sessions.filter(TrainingSession.dog_id.in_(accessible_dog_ids))
-            else:
-                sessions = sessions.filter(TrainingSession.id.in_([]))  # No accessible dogs, return empty
-        # Filter by category
+            accessible_dog_ids = [d.id for d in get_user_accessible_dogs(user)]
+            sessions = sessions.filter(TrainingSession.dog_id.in_(accessible_dog_ids))
         category_filter = filters.get('category')
         if category_filter:
             sessions = sessions.filter(TrainingSession.category == category_filter)
-        sessions = sessions.all()
-        
-        # Write headers
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-            cell.border = border
+        sessions = sessions.order_by(TrainingSession.session_date)
         
-        # Write data
         category_map = {
             'OBEDIENCE': 'طاعة', 'DETECTION': 'كشف', 'AGILITY': 'رشاقة',
             'ATTACK': 'هجوم', 'FITNESS': 'لياقة'
         }
         
-        for row, session in enumerate(sessions, 2):
-            data = [row-1, 
-                   session.dog.name if session.dog else '',
-                   session.trainer.name if session.trainer else '',
-                   category_map.get(session.category.value, session.category.value),
-                   session.subject or '',
-                   session.session_date.strftime('%Y-%m-%d') if session.session_date else '',
-                   session.duration or '',
-                   f"{session.success_rating}/10" if session.success_rating else '']
-            
-            for col, value in enumerate(data, 1):
-                cell = ws.cell(row=row, column=col)
-                cell.value = value
-                cell.font = arabic_font
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save file
-    wb.save(filepath)
-    
-    # Log the report generation (with safe error handling)
+        def rows():
+            for number, session in enumerate(sessions.yield_per(1000), 1):
+                yield [number,
+                       session.dog.name if session.dog else '',
+                       session.trainer.name if session.trainer else '',
+                       category_map.get(session.category.value, session.category.value),
+                       session.subject or '',
+                       session.session_date.strftime('%Y-%m-%d') if session.session_date else '',
+                       session.duration or '',
+                       f"{session.success_rating}/10" if session.success_rating else '']
+        return headers, rows()
+    
+    raise ValueError(f"نوع التقرير غير مدعوم للتصدير إلى Excel: {report_type}")
+
+
+def _log_excel_export(report_type, filename, start_date, end_date, user, filters):
     try:
         import uuid
         log_audit(user.id, 'EXPORT', 'Report', str(uuid.uuid4()), {
@@ -786,9 +654,56 @@ def generate_excel_report(report_type, start_date, end_date, user, filters=None)
     except Exception as e:
         # Don't let audit logging errors break report generation
         current_app.logger.warning(f"Could not log export audit trail: {e}")
+
+
+def _build_excel_report(report_type, start_date, end_date, user, filters):
+    from k9.utils.excel_exporter import StreamingExcelWriter
+    
+    headers, rows = _excel_report_rows(report_type, start_date, end_date, user, filters)
+    title = EXCEL_REPORT_TITLES[report_type]
+    if start_date and end_date:
+        title = f"{title} - من {start_date.strftime('%Y-%m-%d')} إلى {end_date.strftime('%Y-%m-%d')}"
+    writer = StreamingExcelWriter(headers, sheet_name=EXCEL_REPORT_TITLES[report_type], title=title,
+                                  column_widths=[8] + [22] * (len(headers) - 1))
+    return writer, rows
+
+
+def generate_excel_report(report_type, start_date, end_date, user, filters=None):
+    """
+    Generate an Excel report for the specified type and filters
+    :param report_type: one of 'dogs', 'employees', 'training'
+    :param start_date: optional start date (datetime.date)
+    :param end_date: optional end date (datetime.date)
+    :param user: current_user for permission filtering
+    :param filters: optional dict with keys appropriate to report_type
+    :return: filename of generated Excel file
+    """
+    filters = filters or {}
+    writer, rows = _build_excel_report(report_type, start_date, end_date, user, filters)
     
+    filename = f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    writer.write_rows(rows)
+    writer.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+    
+    _log_excel_export(report_type, filename, start_date, end_date, user, filters)
     return filename
 
+
+def stream_excel_report(report_type, start_date, end_date, user, filters=None):
+    """
+    Same report as generate_excel_report, streamed to the client instead of
+    being saved under UPLOAD_FOLDER. Memory use does not grow with row count.
+    :return: Flask streaming response
+    """
+    from k9.utils.excel_exporter import excel_stream_response
+    
+    filters = filters or {}
+    writer, rows = _build_excel_report(report_type, start_date, end_date, user, filters)
+    
+    filename = f"report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    _log_excel_export(report_type, filename, start_date, end_date, user, filters)
+    return excel_stream_response(writer, filename, rows=rows)
+
 def get_user_permissions(user):
     """
     Get user permissions based on the new Permission/UserPermission system.
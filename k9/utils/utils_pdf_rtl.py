@@ -5,6 +5,8 @@ Provides helper functions for generating RTL Arabic text in PDFs using ReportLab
 
 import os
 import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List
 from reportlab.lib.fonts import addMapping
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -92,6 +94,35 @@ def contains_arabic(text: str) -> bool:
     return False
 
 
+# Shaped strings are memoised: report tables repeat the same names, statuses
+# and headers thousands of times. Long free text (notes) is shaped uncached.
+RTL_CACHE_SIZE = 8192
+RTL_CACHE_MAX_LENGTH = 256
+
+# Pinned shapes for fixed labels (headers, enum labels); never evicted
+_PRESHAPED: Dict[str, str] = {}
+
+
+def _shape(text_str: str) -> str:
+    """Reshape and reorder a string that contains Arabic"""
+    try:
+        # Reshape Arabic text (connect letters properly)
+        reshaped_text = arabic_reshaper.reshape(text_str)
+        
+        # Apply bidirectional algorithm for proper RTL ordering
+        return get_display(reshaped_text)
+    except Exception as e:
+        logger.error(f"Error processing Arabic text: {e}")
+        return text_str
+
+
+@lru_cache(maxsize=RTL_CACHE_SIZE)
+def _shape_cached(text_str: str) -> str:
+    if not ARABIC_SUPPORT or not contains_arabic(text_str):
+        return text_str
+    return _shape(text_str)
+
+
 def rtl(text: str) -> str:
     """
     Process text for RTL display in PDFs.
@@ -109,21 +140,49 @@ def rtl(text: str) -> str:
     
     text_str = str(text)
     
+    shaped = _PRESHAPED.get(text_str)
+    if shaped is not None:
+        return shaped
+    
+    if len(text_str) <= RTL_CACHE_MAX_LENGTH:
+        return _shape_cached(text_str)
+    
     # If no Arabic support or text is purely Latin, return as-is
     if not ARABIC_SUPPORT or not contains_arabic(text_str):
         return text_str
-    
-    try:
-        # Reshape Arabic text (connect letters properly)
-        reshaped_text = arabic_reshaper.reshape(text_str)
-        
-        # Apply bidirectional algorithm for proper RTL ordering
-        display_text = get_display(reshaped_text)
-        
-        return display_text
-    except Exception as e:
-        logger.error(f"Error processing Arabic text: {e}")
-        return text_str
+    return _shape(text_str)
+
+
+def rtl_column(values: Iterable) -> List[str]:
+    """
+    Shape a whole column at once: each distinct value is shaped a single time.
+    None becomes an empty string, matching format_pdf_text.
+    """
+    values = ['' if value is None else str(value) for value in values]
+    shaped = {value: rtl(value) for value in set(values)}
+    return [shaped[value] for value in values]
+
+
+def preshape(texts: Iterable[str]) -> int:
+    """Pin the shapes of fixed labels (column headers, enum labels, titles)"""
+    added = 0
+    for text in texts:
+        if text and text not in _PRESHAPED:
+            text_str = str(text)
+            _PRESHAPED[text_str] = _shape(text_str) if ARABIC_SUPPORT and contains_arabic(text_str) else text_str
+            added += 1
+    return added
+
+
+def clear_rtl_cache():
+    """Drop memoised shapes (pinned labels included)"""
+    _shape_cached.cache_clear()
+    _PRESHAPED.clear()
+
+
+def rtl_cache_info():
+    """Hit/miss statistics of the shaping cache"""
+    return _shape_cached.cache_info()
 
 def get_arabic_font_name() -> str:
     """
@@ -0,0 +1,91 @@
+"""
+Veterinary visit summary formatting
+Arabic display strings for a visit's medications and vital signs.
+
+They are computed once when a visit is saved and stored on the row
+(VeterinaryVisit.medications_summary / vital_signs_summary), so reports
+read plain columns instead of walking the JSON of every visit. The same
+entries, normalized, feed the visit_medication ledger.
+"""
+
+
+def format_medications_summary(medications) -> str:
+    """'name (dose×frequency)' entries joined with '؛ '"""
+    if not isinstance(medications, list):
+        return ""
+    meds = []
+    for med in medications:
+        if not isinstance(med, dict):
+            continue
+        name = med.get('name', '')
+        dose = med.get('dose', '')
+        frequency = med.get('frequency', '')
+        if name:
+            med_str = f"{name}"
+            if dose:
+                med_str += f" ({dose}"
+                if frequency:
+                    med_str += f"×{frequency}"
+                med_str += ")"
+            meds.append(med_str)
+    return "؛ ".join(meds)
+
+
+def count_medications(medications) -> int:
+    """Number of medication entries in a visit's medications JSON"""
+    return len(medications) if isinstance(medications, list) else 0
+
+
+def format_vital_signs_summary(vital_signs, temperature=None, heart_rate=None, blood_pressure=None) -> str:
+    """Vital signs from the consolidated JSON, falling back to the examination columns"""
+    vital_signs = vital_signs if isinstance(vital_signs, dict) else {}
+    temp = vital_signs.get('temp') or temperature
+    hr = vital_signs.get('hr') or heart_rate
+    resp = vital_signs.get('resp')
+    bp = vital_signs.get('bp') or blood_pressure
+
+    vs_parts = []
+    if temp:
+        vs_parts.append(f"الحرارة: {temp}°")
+    if hr:
+        vs_parts.append(f"النبض: {hr}")
+    if resp:
+        vs_parts.append(f"التنفس: {resp}")
+    if bp:
+        vs_parts.append(f"الضغط: {bp}")
+    return "، ".join(vs_parts)
+
+
+def normalize_medication_name(name) -> str:
+    """Catalogue key for a medication name: trimmed, single-spaced, lower-case"""
+    return " ".join(str(name or "").split()).lower()
+
+
+def _optional_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def medication_ledger_entries(medications) -> list:
+    """Named entries of a visit's medications JSON, shaped for the visit_medication ledger"""
+    if not isinstance(medications, list):
+        return []
+    entries = []
+    for position, med in enumerate(medications):
+        if not isinstance(med, dict):
+            continue
+        name = " ".join(str(med.get('name') or "").split())
+        if not name:
+            continue
+        entries.append({
+            'position': position,
+            'name_as_entered': name[:200],
+            'normalized_name': normalize_medication_name(name)[:200],
+            'dose': str(med.get('dose') or "")[:100] or None,
+            'frequency': str(med.get('frequency') or "")[:100] or None,
+            'duration': str(med.get('duration') or "")[:100] or None,
+            'quantity': _optional_float(med.get('quantity')),
+        })
+    return entries
@@ -0,0 +1,177 @@
+"""partition high-volume log tables by month
+
+Converts the append-mostly log tables into declarative RANGE-partitioned
+tables with one partition per month plus a DEFAULT partition. The primary
+key becomes (id, partition key) because PostgreSQL requires the partition
+key in every unique constraint; all existing unique constraints on these
+tables already include it. Runtime maintenance (future partitions,
+retention) lives in k9/utils/partitioning.py.
+
+Revision ID: 20261019090000
+Revises: 7e8f529ec334
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019090000'
+down_revision = '7e8f529ec334'
+branch_labels = None
+depends_on = None
+
+
+# Table name -> partition key column
+TABLES = {
+    'feeding_log': 'date',
+    'daily_checkup_log': 'date',
+    'excretion_log': 'date',
+    'grooming_log': 'date',
+    'cleaning_log': 'date',
+    'caretaker_daily_log': 'date',
+    'access_audit_logs': 'created_at',
+    'audit_log': 'created_at',
+    'notification': 'created_at',
+}
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    years, month_index = divmod(value.month - 1 + months, 12)
+    return date(value.year + years, month_index + 1, 1)
+
+
+def _is_partitioned(conn, table):
+    return conn.execute(sa.text("""
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+    """), {'table': table}).first() is not None
+
+
+def _table_exists(conn, table):
+    return conn.execute(sa.text("SELECT to_regclass(:table)"), {'table': table}).scalar() is not None
+
+
+def _detach_definitions(conn, table):
+    """
+    Capture non-PK constraint and index definitions of a table, then drop them
+    so the names can be reused on the replacement table. Returns
+    (primary key name, constraint DDL list, index DDL list).
+    """
+    pk_name = conn.execute(sa.text("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'
+    """), {'table': table}).scalar()
+
+    constraints = conn.execute(sa.text("""
+        SELECT conname, pg_get_constraintdef(oid), conindid
+        FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype IN ('u', 'f')
+        ORDER BY contype DESC, conname
+    """), {'table': table}).fetchall()
+
+    indexes = conn.execute(sa.text("""
+        SELECT i.relname, pg_get_indexdef(i.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = CAST(:table AS regclass)
+          AND NOT x.indisprimary
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+        ORDER BY i.relname
+    """), {'table': table}).fetchall()
+
+    constraint_ddl = [f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}'
+                      for name, definition, _ in constraints]
+    index_ddl = [definition.replace(' ON ONLY ', ' ON ') for _, definition in indexes]
+
+    for name, _, _ in constraints:
+        conn.execute(sa.text(f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"'))
+    for name, _ in indexes:
+        conn.execute(sa.text(f'DROP INDEX "{name}"'))
+
+    return pk_name, constraint_ddl, index_ddl
+
+
+def _partition_table(conn, table, column):
+    legacy = f'{table}_unpartitioned'
+    pk_name, constraint_ddl, index_ddl = _detach_definitions(conn, table)
+
+    # The partition key becomes part of the primary key, so it cannot be NULL
+    conn.execute(sa.text(f'UPDATE "{table}" SET "{column}" = CURRENT_TIMESTAMP WHERE "{column}" IS NULL'))
+
+    conn.execute(sa.text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+    conn.execute(sa.text(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{pk_name}" TO "{legacy}_pkey"'))
+
+    conn.execute(sa.text(f"""
+        CREATE TABLE "{table}" (
+            LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS
+        ) PARTITION BY RANGE ("{column}")
+    """))
+    conn.execute(sa.text(f'ALTER TABLE "{table}" ALTER COLUMN "{column}" SET NOT NULL'))
+    conn.execute(sa.text(f'ALTER TABLE "{table}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, "{column}")'))
+    conn.execute(sa.text(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT'))
+
+    # One partition per month from the oldest row through MONTHS_AHEAD months from now
+    oldest = conn.execute(sa.text(f'SELECT MIN("{column}") FROM "{legacy}"')).scalar()
+    current = date.today().replace(day=1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        conn.execute(sa.text(
+            f'CREATE TABLE "{table}_p{month:%Y%m}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        ))
+        month = _add_months(month, 1)
+
+    for ddl in constraint_ddl + index_ddl:
+        conn.execute(sa.text(ddl))
+
+    conn.execute(sa.text(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"'))
+    conn.execute(sa.text(f'DROP TABLE "{legacy}"'))
+    conn.execute(sa.text(f'ANALYZE "{table}"'))
+
+
+def _unpartition_table(conn, table, column):
+    legacy = f'{table}_partitioned'
+    pk_name, constraint_ddl, index_ddl = _detach_definitions(conn, table)
+
+    conn.execute(sa.text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+    conn.execute(sa.text(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{pk_name}" TO "{legacy}_pkey"'))
+
+    conn.execute(sa.text(f"""
+        CREATE TABLE "{table}" (
+            LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS
+        )
+    """))
+    conn.execute(sa.text(f'ALTER TABLE "{table}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id)'))
+
+    for ddl in constraint_ddl + index_ddl:
+        conn.execute(sa.text(ddl))
+
+    conn.execute(sa.text(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"'))
+    conn.execute(sa.text(f'DROP TABLE "{legacy}" CASCADE'))
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    for table, column in TABLES.items():
+        if _table_exists(conn, table) and not _is_partitioned(conn, table):
+            _partition_table(conn, table, column)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    for table, column in TABLES.items():
+        if _table_exists(conn, table) and _is_partitioned(conn, table):
+            _unpartition_table(conn, table, column)
@@ -0,0 +1,44 @@
+"""add server_session table and user.permissions_version
+
+Revision ID: 20261019100000
+Revises: 20261019090000
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261019100000'
+down_revision = '20261019090000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('server_session',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('server_session', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_server_session_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_server_session_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('permissions_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('permissions_version')
+
+    with op.batch_alter_table('server_session', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_server_session_user_id'))
+        batch_op.drop_index(batch_op.f('ix_server_session_expires_at'))
+
+    op.drop_table('server_session')
@@ -0,0 +1,69 @@
+"""add stored medication and vital-sign summaries to veterinary_visit
+
+Revision ID: 20261019110000
+Revises: 20261019100000
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019110000'
+down_revision = '20261019100000'
+branch_labels = None
+depends_on = None
+
+
+# Same formatting as k9.utils.veterinary_summary, done set-based for existing rows
+BACKFILL_SQL = """
+UPDATE veterinary_visit AS v SET
+    medication_count = CASE WHEN json_typeof(v.medications) = 'array'
+                            THEN json_array_length(v.medications) ELSE 0 END,
+    medications_summary = COALESCE((
+        SELECT string_agg(
+            (m.value->>'name')
+            || CASE WHEN COALESCE(m.value->>'dose', '') <> ''
+                    THEN ' (' || (m.value->>'dose')
+                         || CASE WHEN COALESCE(m.value->>'frequency', '') <> ''
+                                 THEN '×' || (m.value->>'frequency') ELSE '' END
+                         || ')'
+                    ELSE '' END,
+            '؛ ' ORDER BY m.ordinality)
+        FROM json_array_elements(CASE WHEN json_typeof(v.medications) = 'array'
+                                      THEN v.medications ELSE '[]'::json END)
+             WITH ORDINALITY AS m(value, ordinality)
+        WHERE json_typeof(m.value) = 'object' AND COALESCE(m.value->>'name', '') <> ''
+    ), ''),
+    vital_signs_summary = concat_ws('، ',
+        'الحرارة: ' || COALESCE(NULLIF(vs.temp, ''), v.temperature::text) || '°',
+        'النبض: ' || COALESCE(NULLIF(vs.hr, ''), v.heart_rate::text),
+        'التنفس: ' || NULLIF(vs.resp, ''),
+        'الضغط: ' || COALESCE(NULLIF(vs.bp, ''), NULLIF(v.blood_pressure, ''))
+    )
+FROM (
+    SELECT id,
+           CASE WHEN json_typeof(vital_signs) = 'object' THEN vital_signs->>'temp' END AS temp,
+           CASE WHEN json_typeof(vital_signs) = 'object' THEN vital_signs->>'hr' END AS hr,
+           CASE WHEN json_typeof(vital_signs) = 'object' THEN vital_signs->>'resp' END AS resp,
+           CASE WHEN json_typeof(vital_signs) = 'object' THEN vital_signs->>'bp' END AS bp
+    FROM veterinary_visit
+) AS vs
+WHERE vs.id = v.id
+"""
+
+
+def upgrade():
+    with op.batch_alter_table('veterinary_visit', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('medications_summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('vital_signs_summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('medication_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade():
+    with op.batch_alter_table('veterinary_visit', schema=None) as batch_op:
+        batch_op.drop_column('medication_count')
+        batch_op.drop_column('vital_signs_summary')
+        batch_op.drop_column('medications_summary')
@@ -0,0 +1,110 @@
+"""add medication catalogue and visit_medication ledger
+
+Revision ID: 20261019120000
+Revises: 20261019110000
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261019120000'
+down_revision = '20261019110000'
+branch_labels = None
+depends_on = None
+
+
+# Named medication entries of every visit (same rules as medication_ledger_entries)
+ENTRIES_SQL = """
+SELECT v.id AS visit_id, v.dog_id, v.project_id, v.visit_date,
+       (m.ordinality - 1)::int AS position,
+       left(regexp_replace(btrim(m.value->>'name'), '\\s+', ' ', 'g'), 200) AS name,
+       left(lower(regexp_replace(btrim(m.value->>'name'), '\\s+', ' ', 'g')), 200) AS normalized_name,
+       NULLIF(left(COALESCE(m.value->>'dose', ''), 100), '') AS dose,
+       NULLIF(left(COALESCE(m.value->>'frequency', ''), 100), '') AS frequency,
+       NULLIF(left(COALESCE(m.value->>'duration', ''), 100), '') AS duration,
+       CASE WHEN btrim(m.value->>'quantity') ~ '^-?[0-9]+(\\.[0-9]+)?$'
+            THEN btrim(m.value->>'quantity')::double precision END AS quantity
+FROM veterinary_visit AS v
+CROSS JOIN LATERAL json_array_elements(
+    CASE WHEN json_typeof(v.medications) = 'array' THEN v.medications ELSE '[]'::json END
+) WITH ORDINALITY AS m(value, ordinality)
+WHERE json_typeof(m.value) = 'object'
+  AND btrim(COALESCE(m.value->>'name', '')) <> ''
+"""
+
+
+def upgrade():
+    op.create_table('medication',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('normalized_name', sa.String(length=200), nullable=False),
+    sa.Column('unit', sa.String(length=30), nullable=True),
+    sa.Column('unit_cost', sa.Float(), nullable=True),
+    sa.Column('canonical_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.text('true')),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['canonical_id'], ['medication.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('medication', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_medication_normalized_name'), ['normalized_name'], unique=True)
+
+    op.create_table('visit_medication',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('visit_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('medication_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('dog_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('project_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('visit_date', sa.DateTime(), nullable=False),
+    sa.Column('name_as_entered', sa.String(length=200), nullable=False),
+    sa.Column('dose', sa.String(length=100), nullable=True),
+    sa.Column('frequency', sa.String(length=100), nullable=True),
+    sa.Column('duration', sa.String(length=100), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=True),
+    sa.Column('unit_cost', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['visit_id'], ['veterinary_visit.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['medication_id'], ['medication.id'], ),
+    sa.ForeignKeyConstraint(['dog_id'], ['dog.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('visit_medication', schema=None) as batch_op:
+        batch_op.create_index('idx_visit_medication_med_date', ['medication_id', 'visit_date'], unique=False)
+        batch_op.create_index('idx_visit_medication_project_date', ['project_id', 'visit_date'], unique=False)
+        batch_op.create_index('idx_visit_medication_dog_date', ['dog_id', 'visit_date'], unique=False)
+        batch_op.create_index('idx_visit_medication_visit', ['visit_id'], unique=False)
+
+    # Backfill: one catalogue entry per normalized name, then one ledger row per entry
+    op.execute(f"""
+        INSERT INTO medication (id, name, normalized_name, is_active, created_at)
+        SELECT gen_random_uuid(), min(e.name), e.normalized_name, true, now()
+        FROM ({ENTRIES_SQL}) AS e
+        GROUP BY e.normalized_name
+    """)
+    op.execute(f"""
+        INSERT INTO visit_medication (id, visit_id, position, medication_id, dog_id, project_id, visit_date,
+                                      name_as_entered, dose, frequency, duration, quantity, unit_cost)
+        SELECT gen_random_uuid(), e.visit_id, e.position, med.id, e.dog_id, e.project_id, e.visit_date,
+               e.name, e.dose, e.frequency, e.duration, e.quantity, NULL
+        FROM ({ENTRIES_SQL}) AS e
+        JOIN medication AS med ON med.normalized_name = e.normalized_name
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('visit_medication', schema=None) as batch_op:
+        batch_op.drop_index('idx_visit_medication_visit')
+        batch_op.drop_index('idx_visit_medication_dog_date')
+        batch_op.drop_index('idx_visit_medication_project_date')
+        batch_op.drop_index('idx_visit_medication_med_date')
+
+    op.drop_table('visit_medication')
+
+    with op.batch_alter_table('medication', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_medication_normalized_name'))
+
+    op.drop_table('medication')
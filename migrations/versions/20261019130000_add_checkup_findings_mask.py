@@ -0,0 +1,60 @@
+"""add abnormal findings bitmask and severity rank to daily_checkup_log
+
+Revision ID: 20261019130000
+Revises: 20261019120000
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261019130000'
+down_revision = '20261019120000'
+branch_labels = None
+depends_on = None
+
+
+# Bit order of k9.utils.checkup_findings.CHECKUP_BODY_PARTS
+BODY_PARTS = ('eyes', 'ears', 'nose', 'front_legs', 'hind_legs', 'coat', 'tail')
+NORMAL_FINDINGS = ('طبيعي', 'سليم', 'Normal', 'normal')
+SEVERITY_LEVELS = ('خفيف', 'متوسط', 'شديد')
+
+
+def _abnormal(column):
+    normal = ", ".join(f"'{value}'" for value in NORMAL_FINDINGS)
+    return f"(COALESCE({column}, '') <> '' AND btrim({column}, E' \\t\\r\\n') NOT IN ({normal}))"
+
+
+BACKFILL_SQL = "UPDATE daily_checkup_log SET abnormal_mask = {mask}, severity_rank = {rank}".format(
+    mask=" | ".join(
+        f"(CASE WHEN {_abnormal(part)} THEN {1 << position} ELSE 0 END)"
+        for position, part in enumerate(BODY_PARTS)
+    ),
+    rank="CASE btrim(severity, E' \\t\\r\\n') {} END".format(
+        " ".join(f"WHEN '{level}' THEN {position + 1}" for position, level in enumerate(SEVERITY_LEVELS))
+    ),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('daily_checkup_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('abnormal_mask', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('severity_rank', sa.SmallInteger(), nullable=True))
+
+    op.execute(BACKFILL_SQL)
+
+    # Partial indexes on the partitioned parent cascade to every partition
+    op.create_index('ix_daily_checkup_abnormal_project_date', 'daily_checkup_log', ['project_id', 'date'],
+                    unique=False, postgresql_where=sa.text('abnormal_mask <> 0'))
+    op.create_index('ix_daily_checkup_abnormal_dog_date', 'daily_checkup_log', ['dog_id', 'date'],
+                    unique=False, postgresql_where=sa.text('abnormal_mask <> 0'))
+
+
+def downgrade():
+    op.drop_index('ix_daily_checkup_abnormal_dog_date', table_name='daily_checkup_log')
+    op.drop_index('ix_daily_checkup_abnormal_project_date', table_name='daily_checkup_log')
+
+    with op.batch_alter_table('daily_checkup_log', schema=None) as batch_op:
+        batch_op.drop_column('severity_rank')
+        batch_op.drop_column('abnormal_mask')
@@ -0,0 +1,49 @@
+"""convert semi-structured log fields from json to jsonb
+
+JSONB can be indexed (GIN) and queried with the containment operator,
+which the report filters in k9/utils/jsonb_filters.py rely on. ALTER on a
+partitioned parent (feeding_log, cleaning_log, audit_log) converts every
+partition. JSONB does not keep key order or duplicate keys; no reader of
+these columns depends on either.
+
+Revision ID: 20261019140000
+Revises: 20261019130000
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261019140000'
+down_revision = '20261019130000'
+branch_labels = None
+depends_on = None
+
+
+# Table name -> converted columns
+COLUMNS = {
+    'feeding_log': ('supplements',),
+    'cleaning_log': ('materials_used',),
+    'veterinary_visit': ('medications', 'vital_signs'),
+    'pregnancy_record': tuple(f'week_{week}_checkup' for week in range(1, 9)),
+    'audit_log': ('old_values', 'new_values'),
+}
+
+
+def upgrade():
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=postgresql.JSON(),
+                                      type_=postgresql.JSONB(),
+                                      postgresql_using=f'{column}::jsonb')
+
+
+def downgrade():
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=postgresql.JSONB(),
+                                      type_=postgresql.JSON(),
+                                      postgresql_using=f'{column}::json')
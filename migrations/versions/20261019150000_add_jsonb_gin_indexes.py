@@ -0,0 +1,42 @@
+"""add GIN jsonb_path_ops indexes on filtered jsonb log fields
+
+jsonb_path_ops indexes are smaller and faster than the default jsonb_ops
+but serve only containment (@>), which is the only operator the report
+filters use. The pregnancy weekly checkups are converted to jsonb but not
+indexed: the table is small. Indexes on partitioned parents cascade to
+every partition.
+
+Revision ID: 20261019150000
+Revises: 20261019140000
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261019150000'
+down_revision = '20261019140000'
+branch_labels = None
+depends_on = None
+
+
+# Index name -> (table, column)
+INDEXES = {
+    'ix_feeding_log_supplements_gin': ('feeding_log', 'supplements'),
+    'ix_cleaning_materials_gin': ('cleaning_log', 'materials_used'),
+    'idx_veterinary_medications_gin': ('veterinary_visit', 'medications'),
+    'idx_veterinary_vital_signs_gin': ('veterinary_visit', 'vital_signs'),
+    'ix_audit_log_old_values_gin': ('audit_log', 'old_values'),
+    'ix_audit_log_new_values_gin': ('audit_log', 'new_values'),
+}
+
+
+def upgrade():
+    for name, (table, column) in INDEXES.items():
+        op.create_index(name, table, [column], unique=False, postgresql_using='gin',
+                        postgresql_ops={column: 'jsonb_path_ops'})
+
+
+def downgrade():
+    for name, (table, column) in INDEXES.items():
+        op.drop_index(name, table_name=table)
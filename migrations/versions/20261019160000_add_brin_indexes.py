@@ -0,0 +1,56 @@
+"""add BRIN indexes on naturally ordered date columns
+
+Log, audit, notification, training and visit rows arrive in near date
+order, so a BRIN index serves their date range scans at a fraction of a
+B-tree's size and write cost. autosummarize keeps new block ranges
+summarized without waiting for VACUUM. Indexes on partitioned parents
+cascade to every partition. The second, identical B-tree on
+notification.created_at (ix_notification_created_at, from index=True) is
+dropped; idx_notification_created stays as the CLUSTER key used by
+k9/utils/index_maintenance.py.
+
+Revision ID: 20261019160000
+Revises: 20261019150000
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261019160000'
+down_revision = '20261019150000'
+branch_labels = None
+depends_on = None
+
+
+PAGES_PER_RANGE = 32
+
+# Index name -> (table, column)
+INDEXES = {
+    'ix_feeding_log_date_brin': ('feeding_log', 'date'),
+    'ix_daily_checkup_date_brin': ('daily_checkup_log', 'date'),
+    'ix_excretion_date_brin': ('excretion_log', 'date'),
+    'ix_grooming_date_brin': ('grooming_log', 'date'),
+    'ix_cleaning_date_brin': ('cleaning_log', 'date'),
+    'ix_caretaker_daily_date_brin': ('caretaker_daily_log', 'date'),
+    'ix_audit_log_created_at_brin': ('audit_log', 'created_at'),
+    'ix_access_audit_created_at_brin': ('access_audit_logs', 'created_at'),
+    'ix_notification_created_at_brin': ('notification', 'created_at'),
+    'ix_training_session_date_brin': ('training_session', 'session_date'),
+    'ix_veterinary_visit_date_brin': ('veterinary_visit', 'visit_date'),
+}
+
+
+def upgrade():
+    for name, (table, column) in INDEXES.items():
+        op.create_index(name, table, [column], unique=False, postgresql_using='brin',
+                        postgresql_with={'pages_per_range': PAGES_PER_RANGE, 'autosummarize': 'on'})
+
+    op.execute('DROP INDEX IF EXISTS ix_notification_created_at')
+
+
+def downgrade():
+    op.execute('CREATE INDEX IF NOT EXISTS ix_notification_created_at ON notification (created_at)')
+
+    for name, (table, column) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+BRIN vs B-tree benchmark for date range scans
+
+Builds a temporary log table filled in near time order (optionally with a
+fraction of late-entered rows), then for each index type measures build
+time, index size and the median time and buffers of a report-style range
+scan, next to the table's pg_stats correlation and block-range spread
+(the metric the reorder job uses). With --cluster the drifted table is
+reordered with CLUSTER and the BRIN index measured again, which is what
+the weekly reorder job does (k9/utils/index_maintenance.py).
+
+Everything runs in one transaction on a TEMP table that is rolled back,
+so it is safe to point at any database:
+
+    DATABASE_URL=postgresql://... python3 scripts/benchmark_brin_indexes.py --rows 5000000
+    python3 scripts/benchmark_brin_indexes.py --late-fraction 0.01 --cluster
+    python3 scripts/benchmark_brin_indexes.py --late-fraction 0.2 --late-days 2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+RANGE_SQL = """
+    SELECT count(*), count(DISTINCT project_id), sum(length(payload))
+    FROM bench_log
+    WHERE created_at >= :start AND created_at < :start + make_interval(days => :days)
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2_000_000, help='rows in the table (default 2,000,000)')
+    parser.add_argument('--days', type=int, default=7, help='width of the scanned range in days (default 7)')
+    parser.add_argument('--span-days', type=int, default=730, help='days covered by the table (default 730)')
+    parser.add_argument('--late-fraction', type=float, default=0.0,
+                        help='fraction of rows entered out of order (default 0)')
+    parser.add_argument('--late-days', type=float, default=0,
+                        help='how far back late rows are dated, in days (default 0: any earlier time)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per scan (default 5)')
+    parser.add_argument('--pages-per-range', type=int, default=32,
+                        help='BRIN pages_per_range (default 32, as k9.models.model_utils.BRIN_PAGES_PER_RANGE)')
+    parser.add_argument('--cluster', action='store_true', help='also measure BRIN after CLUSTER')
+    return parser.parse_args()
+
+
+def populate(conn, args):
+    conn.execute(text("""
+        CREATE TEMP TABLE bench_log (
+            id bigserial PRIMARY KEY,
+            project_id int NOT NULL,
+            created_at timestamp NOT NULL,
+            payload text
+        ) ON COMMIT DROP
+    """))
+    # Row g is written at its position in time; late rows carry a random earlier
+    # time, at most late_window seconds back (the whole history when 0)
+    conn.execute(text("""
+        INSERT INTO bench_log (project_id, created_at, payload)
+        SELECT g % 50,
+               timestamp '2024-01-01' + make_interval(secs => g * :step - CASE
+                   WHEN random() < :late THEN random() * LEAST(g * :step, COALESCE(NULLIF(:window, 0), g * :step))
+                   ELSE 0 END),
+               repeat('x', 80)
+        FROM generate_series(1, :rows) AS g
+    """), {'rows': args.rows, 'late': args.late_fraction, 'window': args.late_days * 86400.0,
+          'step': args.span_days * 86400.0 / args.rows})
+    conn.execute(text("ANALYZE bench_log"))
+
+
+def order_stats(conn, args):
+    """pg_stats correlation and block-range spread of created_at"""
+    correlation = conn.execute(text(
+        "SELECT correlation FROM pg_stats WHERE tablename = 'bench_log' AND attname = 'created_at'"
+    )).scalar()
+    # Same measure as k9.utils.index_maintenance.block_range_spread
+    spread = conn.execute(text("""
+        SELECT avg(hi - lo) / NULLIF(max(hi) - min(lo), 0)
+        FROM (
+            SELECT (ctid::text::point)[0]::bigint / :pages_per_range AS block_range,
+                   min(extract(epoch FROM created_at)) AS lo, max(extract(epoch FROM created_at)) AS hi
+            FROM bench_log GROUP BY 1
+        ) AS block_ranges
+    """), {'pages_per_range': args.pages_per_range}).scalar()
+    return correlation, float(spread)
+
+
+def build(conn, args, using):
+    options = f" WITH (pages_per_range = {args.pages_per_range})" if using == 'brin' else ''
+    started = time.perf_counter()
+    conn.execute(text(f"CREATE INDEX bench_log_created_at ON bench_log USING {using} (created_at){options}"))
+    elapsed = time.perf_counter() - started
+    conn.execute(text("ANALYZE bench_log"))
+    return elapsed, conn.execute(text("SELECT pg_relation_size('bench_log_created_at')")).scalar()
+
+
+def scan(conn, args, start):
+    """Median execution time (ms) and buffers touched of the range scan"""
+    timings, buffers, node = [], 0, None
+    params = {'start': start, 'days': args.days}
+    conn.execute(text(RANGE_SQL), params)  # warm up
+    for _ in range(args.repeat):
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {RANGE_SQL}"), params).scalar()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        timings.append(plan['Execution Time'])
+        buffers = sum(plan['Plan'].get(f'{kind} {access} Blocks', 0)
+                      for kind in ('Shared', 'Local') for access in ('Hit', 'Read'))
+        node = _scan_node(plan['Plan'])
+    return statistics.median(timings), buffers, node
+
+
+def _scan_node(plan):
+    if 'Scan' in plan['Node Type']:
+        return plan['Node Type']
+    for child in plan.get('Plans', []):
+        found = _scan_node(child)
+        if found:
+            return found
+    return plan['Node Type']
+
+
+def main():
+    args = parse_args()
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        sys.exit('DATABASE_URL is not set')
+
+    engine = create_engine(database_url, connect_args={'client_encoding': 'utf8'})
+    results = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            print(f"Populating {args.rows:,} rows (late fraction {args.late_fraction}) ...")
+            populate(conn, args)
+            table_size = conn.execute(text("SELECT pg_relation_size('bench_log')")).scalar()
+            start = conn.execute(text(
+                "SELECT min(created_at) + (max(created_at) - min(created_at)) / 2 FROM bench_log"
+            )).scalar()
+
+            conn.execute(text("SET LOCAL max_parallel_workers_per_gather = 0"))
+            results.append(('no index', 0.0, 0, *scan(conn, args, start), *order_stats(conn, args)))
+
+            for using in ('btree', 'brin'):
+                build_seconds, size = build(conn, args, using)
+                conn.execute(text("SET LOCAL enable_seqscan = off"))
+                results.append((using, build_seconds, size, *scan(conn, args, start), *order_stats(conn, args)))
+                conn.execute(text("SET LOCAL enable_seqscan = on"))
+                if using == 'brin' and args.cluster:
+                    conn.execute(text("DROP INDEX bench_log_created_at"))
+                    conn.execute(text("CREATE INDEX bench_log_order ON bench_log (created_at)"))
+                    conn.execute(text("CLUSTER bench_log USING bench_log_order"))
+                    conn.execute(text("DROP INDEX bench_log_order"))
+                    build_seconds, size = build(conn, args, using)
+                    conn.execute(text("SET LOCAL enable_seqscan = off"))
+                    results.append(('brin (clustered)', build_seconds, size, *scan(conn, args, start),
+                                    *order_stats(conn, args)))
+                    conn.execute(text("SET LOCAL enable_seqscan = on"))
+                conn.execute(text("DROP INDEX bench_log_created_at"))
+        finally:
+            transaction.rollback()
+
+    print(f"\nTable: {table_size / 1024 ** 2:,.1f} MB, range scanned: {args.days} days of {args.span_days}\n")
+    header = (f"{'index':<18}{'build s':>9}{'size':>12}{'scan ms':>10}{'buffers':>10}"
+              f"{'correlation':>13}{'spread':>9}  plan")
+    print(header)
+    print('-' * len(header))
+    for name, build_seconds, size, milliseconds, buffers, node, corr, spread in results:
+        size_text = f"{size / 1024:,.0f} kB" if size else '-'
+        print(f"{name:<18}{build_seconds:>9.2f}{size_text:>12}{milliseconds:>10.1f}{buffers:>10,}"
+              f"{corr if corr is not None else 0:>13.3f}{spread:>9.3f}  {node}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import event
+
+from k9.models.models import User
+from k9.models.permissions_v2 import PermissionOverride, RoleType
+from k9.services.access_matrix_service import AccessMatrixService, all_permission_keys, expand_role
+
+
+@pytest.fixture
+def count_queries(db):
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+@pytest.mark.unit
+def test_expand_role_resolves_wildcards():
+    assert expand_role(RoleType.SUPER_ADMIN) == all_permission_keys()
+    admin_keys = expand_role(RoleType.GENERAL_ADMIN)
+    assert 'dogs.view' in admin_keys
+    assert all('*' not in key for key in admin_keys)
+    assert expand_role('no_such_role') == frozenset()
+
+
+@pytest.mark.database
+class TestAccessMatrix:
+    """Users, roles and overrides loaded in set-based queries"""
+
+    def test_rows_apply_overrides(self, db_session, admin_user, pm_user):
+        db_session.add(PermissionOverride(user_id=admin_user.id, permission_key='dogs.view', is_granted=False))
+        db_session.add(PermissionOverride(user_id=pm_user.id, permission_key='custom.extra', is_granted=True))
+        db_session.commit()
+
+        rows = {row['username']: row for row in AccessMatrixService.build_rows([admin_user, pm_user])}
+
+        admin_row = rows[admin_user.username]
+        assert admin_row['v2_role'] == RoleType.GENERAL_ADMIN
+        assert 'dogs.view' not in admin_row['permissions']
+        assert 'dogs.edit' in admin_row['permissions']
+        assert admin_row['overrides'] == {'dogs.view': False}
+        # The PM fixture's role is project-scoped, so only the global grant applies
+        assert rows[pm_user.username]['v2_role'] is None
+        assert rows[pm_user.username]['permissions'] == ['custom.extra']
+
+    def test_permissions_merge_all_global_roles(self, db_session, handler_user):
+        from k9.models.permissions_v2 import Role, UserRoleAssignment
+
+        role_names = (RoleType.HANDLER, RoleType.VETERINARIAN)
+        for role_name in role_names:
+            role = Role.query.filter_by(name=role_name).first()
+            if role is None:
+                role = Role(name=role_name, name_ar=role_name, is_system=True, is_active=True)
+                db_session.add(role)
+                db_session.flush()
+            db_session.add(UserRoleAssignment(user_id=handler_user.id, role_id=role.id, is_active=True))
+        db_session.commit()
+
+        row = AccessMatrixService.build_rows([handler_user])[0]
+
+        assert sorted(row['v2_roles']) == sorted(role_names)
+        assert row['permissions'] == sorted(expand_role(RoleType.HANDLER) | expand_role(RoleType.VETERINARIAN))
+        assert set(expand_role(RoleType.VETERINARIAN)) - set(expand_role(RoleType.HANDLER))
+
+    def test_query_count_independent_of_users(self, db_session, admin_user, pm_user, handler_user, count_queries):
+        users = User.query.all()
+        count_queries.clear()
+
+        AccessMatrixService.build_rows(users)
+
+        assert len(count_queries) == 2
+
+    def test_get_page_paginates(self, db_session, admin_user, pm_user, handler_user):
+        result, error = AccessMatrixService.get_page(page=2, per_page=2)
+
+        assert error is None
+        assert result['total'] == 3 and result['pages'] == 2
+        assert len(result['users']) == 1
+
+        _, error = AccessMatrixService.get_page(page='x')
+        assert error is not None
+
+    def test_xlsx_export(self, db_session, admin_user, pm_user):
+        output = AccessMatrixService.write_xlsx(io.BytesIO(), AccessMatrixService.iter_rows(chunk_size=1))
+
+        output.seek(0)
+        rows = list(load_workbook(output).active.values)
+        assert rows[0] == ('User', 'Username', 'Role', 'Access Role', 'Permissions')
+        assert sorted(r[1] for r in rows[1:]) == sorted([admin_user.username, pm_user.username])
@@ -0,0 +1,105 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import Config
+from k9.models.models import AccessAuditLog, AccessActionType
+from k9.models.permissions_v2 import PermissionAuditLog
+from k9.services.access_audit_service import get_audit_logs
+from k9.services.audit_archive_service import AuditArchiveService
+
+
+@pytest.fixture
+def archive_dir(app, tmp_path):
+    previous = app.config.get('AUDIT_ARCHIVE_DIR')
+    app.config['AUDIT_ARCHIVE_DIR'] = str(tmp_path)
+    yield tmp_path
+    app.config['AUDIT_ARCHIVE_DIR'] = previous
+
+
+def _permission_log(user, changed_by, days_ago, action='granted'):
+    return PermissionAuditLog(
+        target_user_id=user.id,
+        changed_by_id=changed_by.id,
+        action=action,
+        entity_type='permission',
+        details=f'log {days_ago}',
+        created_at=datetime.utcnow() - timedelta(days=days_ago)
+    )
+
+
+@pytest.mark.database
+class TestAuditArchive:
+    """Cold archive of aged audit rows"""
+
+    def test_archive_moves_old_rows_to_segments(self, db_session, archive_dir, admin_user, pm_user):
+        for days_ago in (400, 400, 401, 5, 1):
+            db_session.add(_permission_log(pm_user, admin_user, days_ago))
+        db_session.commit()
+
+        archived, error = AuditArchiveService.archive_source('permission', older_than_days=180)
+
+        assert error is None
+        assert archived == 3
+        assert PermissionAuditLog.query.count() == 2
+        segments = [f for _, _, files in os.walk(archive_dir) for f in files if f.endswith('.jsonl.gz')]
+        assert len(segments) == 2
+        assert AuditArchiveService.count('permission', user_id=pm_user.id) == 3
+        assert AuditArchiveService.count('permission', user_id=admin_user.id) == 0
+
+    def test_configured_zero_days_is_respected(self, app, monkeypatch):
+        monkeypatch.setitem(app.config, 'AUDIT_ARCHIVE_AFTER_DAYS', 0)
+        assert AuditArchiveService.archive_after_days() == 0
+
+        monkeypatch.delitem(app.config, 'AUDIT_ARCHIVE_AFTER_DAYS')
+        assert AuditArchiveService.archive_after_days() == Config.AUDIT_ARCHIVE_AFTER_DAYS
+
+    def test_paginate_continues_into_archive(self, db_session, archive_dir, admin_user, pm_user):
+        for days_ago in (400, 401, 402, 5, 1):
+            db_session.add(_permission_log(pm_user, admin_user, days_ago))
+        db_session.commit()
+        AuditArchiveService.archive_source('permission', older_than_days=180)
+
+        query = PermissionAuditLog.query.order_by(PermissionAuditLog.created_at.desc())
+        pages = [AuditArchiveService.paginate('permission', query, page, 2, user_id=pm_user.id)
+                 for page in (1, 2, 3)]
+
+        assert pages[0].total == 5 and pages[0].pages == 3
+        assert [log.details for page in pages for log in page.items] == \
+            ['log 1', 'log 5', 'log 400', 'log 401', 'log 402']
+        assert pages[1].items[0].is_archived
+        assert pages[1].items[0].changed_by.id == admin_user.id
+        assert not pages[2].has_next
+
+    def test_get_audit_logs_includes_archived_entries(self, db_session, archive_dir, admin_user):
+        db_session.add(AccessAuditLog(
+            user_id=admin_user.id, action_type=AccessActionType.DATA_EXPORT,
+            created_at=datetime.utcnow() - timedelta(days=300)
+        ))
+        db_session.add(AccessAuditLog(
+            user_id=admin_user.id, action_type=AccessActionType.PAGE_ACCESS,
+            created_at=datetime.utcnow()
+        ))
+        db_session.commit()
+        AuditArchiveService.archive_source('access', older_than_days=180)
+
+        logs = get_audit_logs(user_id=admin_user.id)
+
+        assert [log.action_type for log in logs] == [AccessActionType.PAGE_ACCESS, AccessActionType.DATA_EXPORT]
+        assert get_audit_logs(user_id=admin_user.id, action_type=AccessActionType.DATA_EXPORT)[0].is_archived
+
+    def test_archive_job_runs_in_one_process_at_a_time(self, db, db_session, archive_dir, admin_user, pm_user):
+        from k9.utils.schedule_utils import archive_old_audit_logs, job_lock
+
+        db_session.add(_permission_log(pm_user, admin_user, 400))
+        db_session.commit()
+
+        # Another worker's scheduler holds the lock: this run is skipped
+        with job_lock('archive_old_audit_logs') as acquired:
+            assert acquired
+            assert archive_old_audit_logs() is None
+        assert PermissionAuditLog.query.count() == 1
+
+        assert archive_old_audit_logs()['permission'] == 1
+        assert PermissionAuditLog.query.count() == 0
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from k9.models.models import AuditLog, AuditAction
+from k9.services.audit_sink import AuditSink, build_audit_row
+from k9.utils.utils import log_audit
+
+
+@pytest.mark.database
+class TestAuditSink:
+    """Outbox and buffered audit writes"""
+
+    def test_outbox_row_rolls_back_with_business_change(self, db_session, admin_user):
+        admin_user.full_name = 'Changed Name'
+        log_audit(admin_user.id, 'EDIT', 'User', None, new_values={'full_name': 'Changed Name'})
+        db_session.rollback()
+
+        assert AuditLog.query.count() == 0
+
+    def test_outbox_row_commits_with_business_change(self, db_session, admin_user):
+        admin_user.full_name = 'Changed Name'
+        log_audit(admin_user.id, 'EDIT', 'User', None, old_values={'full_name': 'Admin'},
+                  new_values={'full_name': 'Changed Name'})
+        db_session.commit()
+
+        entry = AuditLog.query.one()
+        assert entry.action == AuditAction.EDIT
+        assert entry.new_values == {'full_name': 'Changed Name'}
+
+    def test_standalone_row_written_without_touching_session(self, db_session, admin_user):
+        log_audit(admin_user.id, 'EXPORT', 'Permission', None, new_values={'rows': 3})
+
+        entry = AuditLog.query.one()
+        assert entry.new_values == {'rows': 3}
+        assert not db_session.new
+
+    def test_background_writer_flushes_batches(self, app, db_session, admin_user, monkeypatch):
+        monkeypatch.setattr(app, 'testing', False)
+        sink = AuditSink(batch_size=2, flush_interval=0.05)
+
+        for i in range(5):
+            assert sink.record(user_id=admin_user.id, action=AuditAction.EXPORT,
+                               target_type='Report', new_values={'n': i})
+        sink.flush()
+
+        deadline = time.monotonic() + 5
+        while AuditLog.query.count() < 5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert AuditLog.query.count() == 5
+
+    def test_invalid_user_id_rejected(self, app):
+        assert build_audit_row(user_id='system', action='SECURITY_EVENT') is None
+        assert AuditSink().record(user_id=None, action='SECURITY_EVENT') is False
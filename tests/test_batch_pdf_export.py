@@ -0,0 +1,130 @@
+import io
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from k9.models.models import ProjectAssignment, VeterinaryVisit, VisitType
+from k9.services import batch_pdf_export
+from k9.services.batch_pdf_export import BatchPDFExportService
+
+
+@pytest.fixture
+def project_visits(db_session, test_project, test_dog, test_dog_female, pm_employee):
+    for dog in (test_dog, test_dog_female):
+        db_session.add(ProjectAssignment(project_id=test_project.id, dog_id=dog.id, is_active=True))
+    for days, dog in ((1, test_dog), (2, test_dog), (3, test_dog_female)):
+        db_session.add(VeterinaryVisit(
+            dog_id=dog.id, vet_id=pm_employee.id, project_id=test_project.id,
+            visit_type=VisitType.ROUTINE, visit_date=datetime.utcnow() - timedelta(days=days),
+            diagnosis='سليم'
+        ))
+    db_session.commit()
+    return test_project
+
+
+@pytest.fixture
+def bundle_dir(app, tmp_path):
+    previous = app.config.get('BATCH_EXPORT_DIR')
+    app.config['BATCH_EXPORT_DIR'] = str(tmp_path)
+    yield tmp_path
+    app.config['BATCH_EXPORT_DIR'] = previous
+
+
+@pytest.mark.database
+class TestBatchPdfExport:
+    """Per-dog PDF bundles rendered in a process pool"""
+
+    def test_jobs_grouped_per_dog(self, app, db_session, project_visits, test_dog, admin_user):
+        jobs, error = BatchPDFExportService.build_jobs('veterinary', project_visits.id, user=admin_user)
+
+        assert error is None
+        by_name = {job['filename']: job for job in jobs}
+        assert len(by_name) == 2
+        rex = by_name[f"{test_dog.code}_veterinary.pdf"]
+        assert [r['م'] for r in rex['records']] == ['1', '2']
+        assert rex['username'] == admin_user.username
+
+    def test_unsupported_report_type(self, app, db_session, test_project):
+        jobs, error = BatchPDFExportService.build_jobs('employees', test_project.id)
+
+        assert jobs is None
+        assert error
+
+    def test_bundle_written_with_progress(self, app, db_session, project_visits, admin_user):
+        output = io.BytesIO()
+        progress = []
+
+        count, error = BatchPDFExportService.export_project_bundle(
+            'veterinary', project_visits.id, output, user=admin_user,
+            max_workers=2, progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert error is None
+        assert count == 2
+        assert progress[-1] == (2, 2)
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as archive:
+            names = archive.namelist()
+            assert len(names) == 2
+            assert all(archive.read(name).startswith(b'%PDF') for name in names)
+
+    def test_bundle_built_in_background(self, app, db_session, auth_client, project_visits, bundle_dir):
+        response = auth_client.post('/reports/batch/veterinary', data={'project_id': str(project_visits.id)})
+        assert response.status_code == 202
+        urls = response.get_json()
+
+        deadline = time.monotonic() + 120
+        while True:
+            status = auth_client.get(urls['status_url']).get_json()
+            if status['state'] != 'running' or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+        assert status == {'state': 'done', 'done': 2, 'total': 2, 'error': None}
+
+        download = auth_client.get(urls['download_url'])
+        assert download.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(download.data)) as archive:
+            assert len(archive.namelist()) == 2
+        download.close()
+
+        assert auth_client.get('/reports/batch/bundles/not-a-bundle-id-0000').status_code == 404
+
+    def test_bundle_size_and_concurrency_capped(self, app, db_session, auth_client, project_visits,
+                                                bundle_dir, monkeypatch):
+        data = {'project_id': str(project_visits.id)}
+
+        monkeypatch.setattr(batch_pdf_export, 'MAX_BATCH_RECORDS', 2)
+        assert auth_client.post('/reports/batch/veterinary', data=data).status_code == 400
+
+        monkeypatch.setattr(batch_pdf_export, 'MAX_BATCH_RECORDS', 100)
+        monkeypatch.setattr(batch_pdf_export, 'MAX_CONCURRENT_BUNDLES', 1)
+        held = batch_pdf_export._acquire_slot(str(bundle_dir))
+        try:
+            response = auth_client.post('/reports/batch/veterinary', data=data)
+            assert response.status_code == 429
+        finally:
+            held.close()
+        assert not [name for name in os.listdir(bundle_dir) if not name.startswith('.')]
+
+
+@pytest.mark.unit
+def test_worker_module_imports_neither_flask_nor_app():
+    """Spawned workers unpickle the job functions by module; that import must stay light"""
+    probe = (
+        "import sys, datetime\n"
+        "from k9.services.batch_pdf_worker import init_worker, render_job\n"
+        "init_worker()\n"
+        "name, pdf = render_job({'filename': 'x.pdf', 'report_type': 'veterinary', 'records': [],"
+        " 'start_date': datetime.date(2026, 1, 1), 'end_date': None, 'username': 'u', 'subtitle': 's'})\n"
+        "assert pdf.startswith(b'%PDF')\n"
+        "print(sorted(m for m in ('app', 'flask', 'flask_sqlalchemy', 'sqlalchemy') if m in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', probe], cwd=root, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
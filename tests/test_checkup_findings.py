@@ -0,0 +1,61 @@
+from datetime import date, time
+
+import pytest
+
+from k9.models.models import DailyCheckupLog
+from k9.utils.checkup_findings import BODY_PART_BITS, abnormal_mask, mask_parts, severity_rank
+
+DAY = date(2026, 6, 3)
+
+
+def _checkup(db_session, project, dog, hour, **findings):
+    checkup = DailyCheckupLog(project_id=project.id, dog_id=dog.id, date=DAY, time=time(hour), **findings)
+    db_session.add(checkup)
+    db_session.commit()
+    return checkup
+
+
+def test_mask_encoding():
+    mask = abnormal_mask({'eyes': 'احمرار', 'ears': 'سليم', 'tail': ' طبيعي ', 'coat': 'جرح', 'nose': ''})
+    assert mask == BODY_PART_BITS['eyes'] | BODY_PART_BITS['coat']
+    assert mask_parts(mask) == ['eyes', 'coat']
+    assert (severity_rank('شديد'), severity_rank(' خفيف'), severity_rank(None), severity_rank('x')) == (3, 1, None, None)
+
+
+@pytest.mark.database
+class TestCheckupFindings:
+    """Stored findings bitmask and the SQL-backed checkup KPIs"""
+
+    def test_mask_maintained_on_write(self, app, db_session, test_project, test_dog):
+        checkup = _checkup(db_session, test_project, test_dog, 8, eyes='التهاب', ears='سليم', severity='متوسط')
+        assert (checkup.abnormal_mask, checkup.severity_rank) == (BODY_PART_BITS['eyes'], 2)
+
+        checkup.eyes = 'سليم'
+        checkup.tail = 'جرح'
+        checkup.severity = None
+        db_session.commit()
+        db_session.refresh(checkup)
+        assert (checkup.abnormal_mask, checkup.severity_rank) == (BODY_PART_BITS['tail'], None)
+
+    def test_daily_report_kpis(self, app, db_session, auth_client, test_project, test_dog, test_dog_female):
+        _checkup(db_session, test_project, test_dog, 8, eyes='التهاب', coat='جرح', severity='شديد')
+        _checkup(db_session, test_project, test_dog, 12, eyes='إفرازات', severity='خفيف')
+        _checkup(db_session, test_project, test_dog_female, 9, eyes='سليم', ears='سليم', severity='خفيف')
+
+        response = auth_client.get('/api/reports/breeding/checkup/daily',
+                                   query_string={'project_id': str(test_project.id), 'date': DAY.isoformat()})
+
+        assert response.status_code == 200
+        kpis = response.get_json()['kpis']
+        assert kpis['total_checks'] == 3
+        assert kpis['unique_dogs'] == 2
+        assert kpis['by_severity'] == {'شديد': 1, 'خفيف': 2}
+        assert kpis['flags'] == {'العين': 2, 'الشعر': 1}
+
+        response = auth_client.get('/api/reports/breeding/checkup/unified', query_string={
+            'project_id': str(test_project.id), 'range_type': 'daily', 'date': DAY.isoformat()})
+        assert response.status_code == 200
+        kpis = response.get_json()['kpis']
+        assert (kpis['abnormal_checks'], kpis['flagged_dogs']) == (2, 1)
+        row = next(r for r in response.get_json()['rows'] if r['time'] == '08:00')
+        assert row['abnormal_findings'] == ['العين', 'الشعر']
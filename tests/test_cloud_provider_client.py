@@ -0,0 +1,252 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from k9.models.models import UserCloudIntegration, CloudProvider
+from k9.services import cloud_provider_client
+from k9.services.cloud_provider_client import (
+    token_is_fresh, expiry_from_seconds, get_session,
+    get_cached_folder_id, set_cached_folder_id
+)
+
+
+class _StubDropbox(BaseHTTPRequestHandler):
+    """Minimal Dropbox API stub recording every request path"""
+    calls = []
+    # path -> [(status, headers), ...] answered before the normal response
+    failures = {}
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        self.calls.append(self.path)
+
+        if self.failures.get(self.path):
+            status, headers = self.failures[self.path].pop(0)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.path == '/oauth2/token':
+            body = {'access_token': 'fresh-token', 'expires_in': 14400}
+        elif self.path == '/2/users/get_space_usage':
+            body = {'used': 10, 'allocation': {'allocated': 100}}
+        elif self.path == '/2/files/list_folder':
+            body = {'entries': []}
+        else:
+            body = {}
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_PUT = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_dropbox(monkeypatch):
+    server = HTTPServer(('127.0.0.1', 0), _StubDropbox)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _StubDropbox.calls = []
+    _StubDropbox.failures = {}
+
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    monkeypatch.setenv('DROPBOX_API_URL', base_url)
+    monkeypatch.setenv('DROPBOX_CONTENT_URL', base_url)
+    monkeypatch.setenv('DROPBOX_APP_KEY', 'key')
+    monkeypatch.setenv('DROPBOX_APP_SECRET', 'secret')
+    cloud_provider_client.reset_sessions()
+
+    yield _StubDropbox.calls
+
+    server.shutdown()
+    server.server_close()
+    cloud_provider_client.reset_sessions()
+
+
+@pytest.mark.unit
+class TestCloudProviderClient:
+    """Token expiry checks, shared sessions and folder ID caching"""
+
+    def test_token_is_fresh_respects_skew(self):
+        integration = UserCloudIntegration(access_token='t')
+        assert not token_is_fresh(integration)
+
+        integration.expires_at = datetime.utcnow() + timedelta(seconds=30)
+        assert not token_is_fresh(integration)
+
+        integration.expires_at = expiry_from_seconds(3600)
+        assert token_is_fresh(integration)
+
+    def test_session_is_shared_per_provider(self):
+        cloud_provider_client.reset_sessions()
+        assert get_session(CloudProvider.DROPBOX) is get_session(CloudProvider.DROPBOX)
+        assert get_session(CloudProvider.DROPBOX) is not get_session(CloudProvider.GOOGLE_DRIVE)
+
+    def test_uploads_not_resent_after_server_error(self, stub_dropbox):
+        session = get_session(CloudProvider.DROPBOX)
+        upload_url = f"{cloud_provider_client.provider_url(CloudProvider.DROPBOX, 'content')}/2/files/upload"
+        _StubDropbox.failures['/2/files/upload'] = [(500, {})]
+
+        assert session.post(upload_url, data=b'backup').status_code == 500
+        assert stub_dropbox.count('/2/files/upload') == 1
+
+        _StubDropbox.failures['/2/files/upload'] = [(429, {'Retry-After': '0'})]
+        assert session.post(upload_url, data=b'backup').status_code == 200
+        assert stub_dropbox.count('/2/files/upload') == 3
+
+        _StubDropbox.failures['/2/files/upload'] = [(429, {})]
+        assert session.post(upload_url, data=b'backup').status_code == 429
+        assert stub_dropbox.count('/2/files/upload') == 4
+
+    def test_idempotent_requests_retry_server_errors(self, stub_dropbox):
+        session = get_session(CloudProvider.DROPBOX)
+        url = f"{cloud_provider_client.provider_url(CloudProvider.DROPBOX, 'api')}/2/files/list_folder"
+        _StubDropbox.failures['/2/files/list_folder'] = [(503, {})]
+
+        assert session.put(url, data=b'{}').status_code == 200
+        assert stub_dropbox.count('/2/files/list_folder') == 2
+
+    def test_folder_id_cache_round_trip(self):
+        integration = UserCloudIntegration(provider_metadata={'other': 1})
+        set_cached_folder_id(integration, 'K9_Backups', 'folder-1')
+        assert get_cached_folder_id(integration, 'K9_Backups') == 'folder-1'
+        assert integration.provider_metadata['other'] == 1
+
+        set_cached_folder_id(integration, 'K9_Backups', None)
+        assert get_cached_folder_id(integration, 'K9_Backups') is None
+
+
+@pytest.mark.database
+class TestDropboxTokenCache:
+    """Dropbox refreshes the access token only when it is about to expire"""
+
+    def _integration(self, db_session, user, expires_at):
+        integration = UserCloudIntegration(
+            user_id=user.id,
+            provider=CloudProvider.DROPBOX,
+            access_token='old-token',
+            refresh_token='refresh',
+            expires_at=expires_at
+        )
+        db_session.add(integration)
+        db_session.commit()
+        return integration
+
+    def test_expired_token_refreshed_once(self, app, db_session, admin_user, stub_dropbox):
+        from k9.services.dropbox_service import DropboxService
+
+        self._integration(db_session, admin_user, datetime.utcnow() - timedelta(minutes=5))
+        service = DropboxService(admin_user.id)
+
+        assert service.get_storage_quota() is not None
+        assert service.list_backups() == []
+        assert service.get_storage_quota() is not None
+
+        assert stub_dropbox.count('/oauth2/token') == 1
+        assert service.integration.access_token == 'fresh-token'
+        assert token_is_fresh(service.integration)
+
+    def test_fresh_token_not_refreshed(self, app, db_session, admin_user, stub_dropbox):
+        from k9.services.dropbox_service import DropboxService
+
+        self._integration(db_session, admin_user, datetime.utcnow() + timedelta(hours=2))
+        service = DropboxService(admin_user.id)
+
+        assert service.get_storage_quota() is not None
+        assert '/oauth2/token' not in stub_dropbox
+
+
+class _FakeRequest:
+    def __init__(self, result):
+        self.result = result
+        self.num_retries = None
+
+    def execute(self, num_retries=0):
+        self.num_retries = num_retries
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class _FakeDrive:
+    """Drive files() resource answering from queued list/create results"""
+
+    def __init__(self, listings, creates):
+        self.listings, self.creates, self.requests = listings, creates, []
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        return self._request('list', self.listings.pop(0))
+
+    def create(self, **kwargs):
+        return self._request('create', self.creates.pop(0))
+
+    def _request(self, kind, result):
+        request = _FakeRequest(result)
+        self.requests.append((kind, request))
+        return request
+
+
+def _http_error(status):
+    from googleapiclient.errors import HttpError
+    from httplib2 import Response
+    return HttpError(Response({'status': status}), b'')
+
+
+@pytest.mark.database
+class TestDriveFolderCreation:
+    """Folder creation is never blindly re-sent"""
+
+    def test_lost_create_response_does_not_duplicate_folder(self, app, db_session, admin_user, monkeypatch):
+        from k9.services import google_drive_service
+        from k9.services.google_drive_service import GoogleDriveService
+
+        monkeypatch.setattr(google_drive_service, 'DRIVE_RETRY_BACKOFF', 0)
+        db_session.add(UserCloudIntegration(user_id=admin_user.id, provider=CloudProvider.GOOGLE_DRIVE,
+                                            access_token='t'))
+        db_session.commit()
+        service = GoogleDriveService(admin_user.id)
+
+        # The first create succeeded on Drive but its response was a 503
+        drive = _FakeDrive(listings=[{'files': []}, {'files': [{'id': 'created'}]}],
+                           creates=[_http_error(503)])
+        assert service._find_or_create_folder(drive, 'K9_Backups') == 'created'
+        assert [kind for kind, _ in drive.requests] == ['list', 'create', 'list']
+        assert all(request.num_retries == 0 for kind, request in drive.requests if kind == 'create')
+        assert get_cached_folder_id(service.integration, 'K9_Backups') == 'created'
+
+    def test_create_retried_when_folder_still_missing(self, app, db_session, admin_user, monkeypatch):
+        from k9.services import google_drive_service
+        from k9.services.google_drive_service import GoogleDriveService
+
+        monkeypatch.setattr(google_drive_service, 'DRIVE_RETRY_BACKOFF', 0)
+        db_session.add(UserCloudIntegration(user_id=admin_user.id, provider=CloudProvider.GOOGLE_DRIVE,
+                                            access_token='t'))
+        db_session.commit()
+        service = GoogleDriveService(admin_user.id)
+
+        drive = _FakeDrive(listings=[{'files': []}, {'files': []}], creates=[_http_error(429), {'id': 'new'}])
+        assert service._find_or_create_folder(drive, 'K9_Backups') == 'new'
+        assert [kind for kind, _ in drive.requests] == ['list', 'create', 'list', 'create']
+
+        # Permanent errors are not retried
+        set_cached_folder_id(service.integration, 'K9_Backups', None)
+        drive = _FakeDrive(listings=[{'files': []}], creates=[_http_error(403)])
+        assert service._find_or_create_folder(drive, 'K9_Backups') is None
+        assert [kind for kind, _ in drive.requests] == ['list', 'create']
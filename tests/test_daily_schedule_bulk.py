@@ -0,0 +1,119 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from k9.models.models_handler_daily import DailySchedule, DailyScheduleItem, ScheduleItemStatus, ScheduleStatus
+from k9.services.handler_service import DailyScheduleService
+
+
+@pytest.mark.database
+class TestDailyScheduleBulk:
+    """Bulk schedule builder, copy-forward and set-based locking"""
+
+    def _items(self, handler_user, test_dog, test_shift, count=3):
+        return [{
+            'handler_user_id': handler_user.id,
+            'dog_id': test_dog.id,
+            'shift_id': test_shift.id,
+        } for _ in range(count)]
+
+    def test_save_schedules_bulk_creates_week(self, db_session, test_project, admin_user,
+                                              handler_user, test_dog, test_shift):
+        start = date.today() + timedelta(days=10)
+        days = {start + timedelta(days=i): self._items(handler_user, test_dog, test_shift) for i in range(7)}
+
+        schedules, error = DailyScheduleService.save_schedules_bulk(
+            str(test_project.id), admin_user.id, days
+        )
+
+        assert error is None
+        assert [s.date for s in schedules] == sorted(days)
+        assert DailyScheduleItem.query.count() == 21
+
+    def test_save_schedule_rejects_existing_unless_replace(self, db_session, test_project, admin_user,
+                                                          handler_user, test_dog, test_shift):
+        target = date.today() + timedelta(days=3)
+        items = self._items(handler_user, test_dog, test_shift)
+        schedule, error = DailyScheduleService.save_schedule(target, str(test_project.id), admin_user.id, items)
+        assert error is None
+
+        _, error = DailyScheduleService.save_schedule(target, str(test_project.id), admin_user.id, items[:1])
+        assert error is not None
+
+        replaced, error = DailyScheduleService.save_schedule(
+            target, str(test_project.id), admin_user.id, items[:1], replace=True
+        )
+        assert error is None
+        assert replaced.id == schedule.id
+        assert DailyScheduleItem.query.filter_by(daily_schedule_id=schedule.id).count() == 1
+
+    def test_copy_forward_last_week(self, db_session, test_project, admin_user,
+                                    handler_user, test_dog, test_shift):
+        source_start = date.today() + timedelta(days=20)
+        days = {source_start + timedelta(days=i): self._items(handler_user, test_dog, test_shift, count=i + 1)
+                for i in range(7)}
+        DailyScheduleService.save_schedules_bulk(str(test_project.id), admin_user.id, days)
+
+        target_start = source_start + timedelta(days=7)
+        schedules, error = DailyScheduleService.copy_forward(
+            str(test_project.id), target_start, admin_user.id, source='last_week', days=7
+        )
+
+        assert error is None
+        assert len(schedules) == 7
+        for offset, schedule in enumerate(schedules):
+            assert schedule.items.count() == offset + 1
+
+    def test_lock_schedules_until_and_unlock(self, db_session, test_project, admin_user,
+                                             handler_user, test_dog, test_shift):
+        today = date.today()
+        days = {today - timedelta(days=i): [] for i in range(1, 4)}
+        days[today] = []
+        schedules, _ = DailyScheduleService.save_schedules_bulk(str(test_project.id), admin_user.id, days)
+
+        assert DailyScheduleService.lock_schedules_until(today - timedelta(days=1)) == 3
+        db_session.expire_all()
+        assert DailySchedule.query.filter_by(status=ScheduleStatus.LOCKED).count() == 3
+
+        locked_ids = [str(s.id) for s in schedules if s.date < today]
+        assert DailyScheduleService.set_schedules_locked(locked_ids, False) == 3
+        db_session.expire_all()
+        assert DailySchedule.query.filter_by(status=ScheduleStatus.OPEN).count() == 4
+
+    def test_replace_keeps_reported_items_and_status(self, db_session, test_project, admin_user, handler_user,
+                                                     test_dog, test_dog_female, test_shift,
+                                                     test_daily_schedule, test_schedule_item, test_handler_report):
+        reported_id = test_schedule_item.id
+        extra, _ = DailyScheduleService.save_schedule(
+            date.today(), str(test_project.id), admin_user.id,
+            self._items(handler_user, test_dog, test_shift, count=2), replace=True
+        )
+        assert extra.id == test_daily_schedule.id
+        assert DailyScheduleItem.query.filter_by(daily_schedule_id=extra.id).count() == 2
+
+        # Same handler and shift with another dog: the reported item is updated in place
+        _, error = DailyScheduleService.save_schedule(
+            date.today(), str(test_project.id), admin_user.id,
+            [{'handler_user_id': handler_user.id, 'dog_id': test_dog_female.id, 'shift_id': test_shift.id}],
+            replace=True
+        )
+        assert error is None
+        db_session.expire_all()
+        items = DailyScheduleItem.query.filter_by(daily_schedule_id=extra.id).all()
+        assert [item.id for item in items] == [reported_id]
+        assert items[0].dog_id == test_dog_female.id
+        assert items[0].status == ScheduleItemStatus.PRESENT
+
+        # An item a report references is kept even when it is no longer submitted
+        _, error = DailyScheduleService.save_schedule(
+            date.today(), str(test_project.id), admin_user.id, [], replace=True
+        )
+        assert error is None
+        assert DailyScheduleItem.query.get(reported_id) is not None
+
+    def test_bulk_lock_validates_ids(self, auth_client, test_project, admin_user):
+        url = '/supervisor/schedules/bulk-lock'
+        assert auth_client.post(url, json={'schedule_ids': ['not-a-uuid']}).status_code == 400
+        assert auth_client.post(url, json={'schedule_ids': [str(uuid.uuid4())]}).status_code == 400
+        assert auth_client.post(url, json={'schedule_ids': 'x'}).status_code == 400
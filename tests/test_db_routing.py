@@ -0,0 +1,108 @@
+import pytest
+from sqlalchemy import create_engine, event, select, text
+
+from k9.models.models import Dog
+from k9.services.dashboard_service import DashboardService
+from k9.utils import db_routing
+from k9.utils.db_routing import REPLICA_BIND, read_replica, replica_reads
+
+
+@pytest.fixture
+def replica(app, db, monkeypatch):
+    """Second engine on the test database registered as the replica bind; collects its statements"""
+    engine = create_engine(db.engine.url, connect_args={'client_encoding': 'utf8'})
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'pg_is_in_recovery' not in statement:
+            statements.append(statement)
+
+    monkeypatch.setitem(db.engines, REPLICA_BIND, engine)
+    monkeypatch.setattr(db_routing, '_lag_cache', {})
+    # Fixtures wrote through the shared session; read on as if in a new request
+    db.session.info.pop(db_routing.WROTE_KEY, None)
+    yield statements
+    db.session.remove()
+    engine.dispose()
+
+
+@pytest.mark.database
+class TestReplicaRouting:
+    """Marked report reads go to the replica bind, everything else to the primary"""
+
+    def test_marked_selects_use_replica(self, app, db, test_dog, replica):
+        assert db.session.get_bind(clause=select(Dog)) is db.engine
+
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog)) is db.engines[REPLICA_BIND]
+
+        stats = DashboardService.get_dogs_by_status()
+        assert stats['total'] == 1
+        assert replica
+
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog).with_for_update()) is db.engine
+            assert db.session.get_bind(clause=select(Dog)) is db.engine
+
+    def test_session_pinned_to_primary_after_write(self, app, db, test_dog, replica):
+        dog = db.session.get(Dog, test_dog.id)
+        dog.name = 'renamed'
+        db.session.flush()
+
+        with replica_reads():
+            assert db.session.scalar(select(Dog.name).where(Dog.id == test_dog.id)) == 'renamed'
+        assert replica == []
+
+        db.session.info.pop(db_routing.WROTE_KEY)
+        db.session.execute(text("SELECT 1"))
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog)) is db.engine
+
+    def test_lagging_or_unreachable_replica_falls_back(self, app, db, test_dog, replica, monkeypatch):
+        name = test_dog.name
+        replica.clear()
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog)) is db.engines[REPLICA_BIND]
+
+        monkeypatch.setattr(db_routing, 'REPLICA_LAG_CHECK_INTERVAL', 0)
+        monkeypatch.setattr(db_routing, 'REPLICA_MAX_LAG_SECONDS', -1)
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog)) is db.engine
+
+        monkeypatch.setattr(db_routing, 'REPLICA_MAX_LAG_SECONDS', 30)
+        monkeypatch.setattr(db_routing, 'replica_lag', lambda engine: None)
+        with replica_reads():
+            assert db.session.scalar(select(Dog.name)) == name
+        assert replica == []
+
+    def test_generator_rows_read_from_replica(self, app, db, test_dog, replica):
+        dog_id, name = test_dog.id, test_dog.name
+        replica.clear()
+
+        @read_replica
+        def dog_names():
+            yield db.session.scalar(select(Dog.name).where(Dog.id == dog_id))
+
+        rows = dog_names()
+        assert replica == []
+        assert list(rows) == [name]
+        assert len(replica) == 1
+
+    def test_report_endpoint_reads_from_replica(self, app, db, auth_client, test_dog, replica):
+        db.session.info.pop(db_routing.WROTE_KEY, None)
+        response = auth_client.get('/api/reports/breeding/veterinary/?range_type=daily&date=2026-10-19')
+
+        assert response.status_code == 200
+        assert any('veterinary_visit' in statement for statement in replica)
+
+    def test_disconnected_standby_is_unhealthy(self, app, db, test_dog, replica, monkeypatch):
+        # The test database is not in recovery: no lag
+        assert db_routing.replica_lag(db.engines[REPLICA_BIND]) == 0
+
+        # A standby whose WAL receiver stopped streaming reports NULL
+        monkeypatch.setattr(db_routing, 'REPLICA_LAG_SQL', text("SELECT NULL::float"))
+        assert db_routing.replica_lag(db.engines[REPLICA_BIND]) is None
+        assert not db_routing.replica_is_healthy(db.engines[REPLICA_BIND])
+        with replica_reads():
+            assert db.session.get_bind(clause=select(Dog)) is db.engine
@@ -0,0 +1,136 @@
+import re
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from k9.utils import db_runtime
+from k9.utils.db_runtime import (
+    ROUTE_TIMEOUTS, SessionTimeouts, TimedQueuePool, current_route_class, export_statement_timeout,
+    pool_options, pool_status
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestPoolSizing:
+    """Pools split the server's connections between worker processes"""
+
+    def test_pool_fits_worker_share(self, monkeypatch):
+        monkeypatch.delenv('DB_POOL_SIZE', raising=False)
+        monkeypatch.delenv('DB_MAX_OVERFLOW', raising=False)
+
+        options = pool_options(workers=9, threads=1, max_connections=100)
+        assert options['poolclass'] is TimedQueuePool
+        assert options['pool_size'] == 1 + db_runtime.DB_SCHEDULER_CONNECTIONS
+        assert options['pool_size'] + options['max_overflow'] == (100 - db_runtime.DB_RESERVED_CONNECTIONS) // 9
+
+        crowded = pool_options(workers=200, threads=4, max_connections=100)
+        assert crowded['pool_size'] + crowded['max_overflow'] == 2
+
+    def test_explicit_sizes_win(self, monkeypatch):
+        monkeypatch.setenv('DB_POOL_SIZE', '3')
+        monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+
+        options = pool_options(workers=2)
+        assert (options['pool_size'], options['max_overflow']) == (3, 0)
+
+
+class TestExportTimeout:
+    """The export statement timeout stays below the gunicorn worker timeout"""
+
+    def test_derived_from_worker_timeout(self, monkeypatch):
+        monkeypatch.delenv('DB_EXPORT_STATEMENT_TIMEOUT', raising=False)
+        monkeypatch.setenv('GUNICORN_TIMEOUT', '30')
+        assert export_statement_timeout() == '20s'
+
+        monkeypatch.delenv('GUNICORN_TIMEOUT')
+        assert export_statement_timeout() == f"{db_runtime.DEFAULT_GUNICORN_TIMEOUT - db_runtime.EXPORT_TIMEOUT_MARGIN}s"
+
+        monkeypatch.setenv('DB_EXPORT_STATEMENT_TIMEOUT', '45s')
+        assert export_statement_timeout() == '45s'
+
+    def test_deploy_defaults_match(self):
+        entrypoint = (ROOT / 'docker-entrypoint.sh').read_text()
+        gunicorn_conf = (ROOT / 'deploy' / 'gunicorn.conf.py').read_text()
+
+        assert re.search(r'GUNICORN_TIMEOUT:-(\d+)', entrypoint).group(1) == str(db_runtime.DEFAULT_GUNICORN_TIMEOUT)
+        assert '--timeout $TIMEOUT' in entrypoint
+        assert re.search(r'"GUNICORN_TIMEOUT", (\d+)', gunicorn_conf).group(1) == str(db_runtime.DEFAULT_GUNICORN_TIMEOUT)
+
+
+@pytest.mark.database
+class TestRouteTimeouts:
+    """Checked-out connections carry the timeouts of their route class"""
+
+    def _timeouts(self, engine):
+        with engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT current_setting('statement_timeout'), current_setting('idle_in_transaction_session_timeout')"
+            )).one()
+
+    def test_timeouts_follow_route_class(self, app, db, monkeypatch):
+        monkeypatch.setitem(ROUTE_TIMEOUTS, 'page', SessionTimeouts('7s', '20s'))
+        monkeypatch.setitem(ROUTE_TIMEOUTS, 'export', SessionTimeouts('90s', '45s'))
+        monkeypatch.setitem(ROUTE_TIMEOUTS, 'background', SessionTimeouts('0', '10min'))
+
+        with app.test_request_context('/dashboard'):
+            assert tuple(self._timeouts(db.engine)) == ('7s', '20s')
+        with app.test_request_context('/api/reports/breeding/feeding/unified/export.pdf'):
+            assert tuple(self._timeouts(db.engine)) == ('90s', '45s')
+        with app.test_request_context('/reports/batch/dogs.zip'):
+            assert tuple(self._timeouts(db.engine)) == ('90s', '45s')
+        # The report hub's export endpoint is marked with @export_route
+        with app.test_request_context('/reports/generate', method='POST'):
+            assert current_route_class() == 'export'
+            assert tuple(self._timeouts(db.engine)) == ('90s', '45s')
+        with app.test_request_context('/reports/preview', method='POST'):
+            assert current_route_class() == 'page'
+
+        # Scheduler jobs run in their own threads, outside any request
+        background, engine = [], db.engine
+        worker = threading.Thread(target=lambda: background.append(tuple(self._timeouts(engine))))
+        worker.start()
+        worker.join()
+        assert background == [('0', '10min')]
+
+    def test_statement_timeout_and_slow_statements_recorded(self, app, db, monkeypatch):
+        monkeypatch.setitem(ROUTE_TIMEOUTS, 'page', SessionTimeouts('100ms', '30s'))
+        monkeypatch.setattr(db_runtime, 'DB_SLOW_STATEMENT_MS', 20)
+        before = pool_status(db.engine)
+
+        with app.test_request_context('/dashboard'):
+            with db.engine.connect() as conn:
+                conn.execute(text("SELECT pg_sleep(0.05)"))
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT pg_sleep(1)"))
+
+        status = pool_status(db.engine)
+        assert status['slow_statements'] == before['slow_statements'] + 1
+        assert status['statement_timeouts'] == before['statement_timeouts'] + 1
+        assert [event['kind'] for event in status['recent'][-2:]] == ['slow', 'cancelled']
+        assert status['recent'][-1]['route_class'] == 'page'
+
+
+@pytest.mark.database
+class TestPoolTelemetry:
+    """Checkout waits and saturation are exposed per bind"""
+
+    def test_checkout_telemetry(self, app, db):
+        before = pool_status(db.engine)
+        with db.engine.connect() as first, db.engine.connect() as second:
+            first.execute(text("SELECT 1"))
+            second.execute(text("SELECT 1"))
+            assert pool_status(db.engine)['checked_out'] >= 2
+
+        status = pool_status(db.engine)
+        assert status['checkouts'] >= before['checkouts'] + 2
+        assert status['peak_saturation'] >= 2 / status['capacity']
+        assert status['checkout_wait_max_ms'] > 0
+
+    def test_health_endpoint(self, app, auth_client):
+        response = auth_client.get('/api/health/db')
+        assert response.status_code == 200
+        assert 'checkout_wait_avg_ms' in response.get_json()['primary']
@@ -0,0 +1,117 @@
+import io
+import tracemalloc
+
+import pytest
+from openpyxl import load_workbook
+
+from k9.utils.excel_exporter import StreamingExcelWriter, excel_stream_response
+
+
+def _load(chunks):
+    return load_workbook(io.BytesIO(b''.join(chunks))).active
+
+
+@pytest.mark.unit
+class TestStreamingExcelWriter:
+    """Write-only Excel export engine"""
+
+    def test_layout_and_styles(self):
+        writer = StreamingExcelWriter(['الاسم', 'القيمة'], sheet_name='تقرير', title='عنوان التقرير')
+
+        ws = _load(writer.iter_bytes([['أ', 1], ['ب', None]]))
+
+        assert ws.title == 'تقرير'
+        assert ws.sheet_view.rightToLeft
+        assert ws.freeze_panes == 'A4'
+        assert ws['A1'].value == 'عنوان التقرير'
+        assert ws['A3'].value == 'الاسم' and ws['A3'].font.b
+        assert [c.value for c in ws[5]] == ['ب', None]
+        assert ws['A4'].style == 'k9_cell'
+
+    def test_memory_flat_for_large_exports(self):
+        def rows(count):
+            for i in range(count):
+                yield [i, f'كلب رقم {i}', 'نشط', i * 1.5]
+
+        def peak(count):
+            writer = StreamingExcelWriter(['رقم', 'الاسم', 'الحالة', 'القيمة'])
+            tracemalloc.start()
+            for _ in writer.iter_bytes(rows(count)):
+                pass
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        assert peak(20000) < peak(2000) * 3
+
+    def test_stream_response(self, app):
+        writer = StreamingExcelWriter(['a'])
+        with app.test_request_context():
+            response = excel_stream_response(writer, 'تقرير.xlsx', rows=([i] for i in range(10)))
+            body = b''.join(response.response)
+
+        assert response.is_streamed
+        assert "filename*=UTF-8''" in response.headers['Content-Disposition']
+        assert _load([body]).max_row == 11
+
+
+@pytest.mark.database
+def test_employee_report_streams_from_query(app, db_session, admin_user, handler_user):
+    from k9.utils.utils import stream_excel_report
+
+    with app.test_request_context():
+        response = stream_excel_report('employees', None, None, admin_user, {'role': ['HANDLER']})
+        ws = _load(response.response)
+
+    assert ws['A1'].value == 'تقرير الموظفين'
+    assert [row[1] for row in ws.iter_rows(min_row=4, values_only=True)] == [handler_user.employee.name]
+
+
+@pytest.mark.database
+class TestReportWorkbooks:
+    """Per-report Excel exports are written through write-only workbooks"""
+
+    def test_handler_report_export(self, app, db_session, test_handler_report):
+        from k9.models.models_handler_daily import HandlerReportIncident, IncidentType
+        from k9.services.report_export_service import ReportExportService
+
+        db_session.add(HandlerReportIncident(report_id=test_handler_report.id, incident_type=IncidentType.SUSPICION,
+                                             description='تعثر أثناء الدورية'))
+        db_session.commit()
+
+        workbook = load_workbook(ReportExportService.export_handler_report_to_excel(str(test_handler_report.id)))
+
+        info = workbook['معلومات التقرير']
+        assert info.sheet_view.rightToLeft
+        assert info['A1'].value == 'تقرير السائس اليومي'
+        assert 'A1:B1' in info.merged_cells
+        assert info['A3'].value == 'التاريخ' and info['A3'].font.b
+        assert ('الموقع', 'موقع الاختبار') in info.iter_rows(min_row=3, values_only=True)
+        assert [row[1] for row in workbook['الحوادث'].iter_rows(min_row=2, values_only=True)] == ['تعثر أثناء الدورية']
+        assert workbook['العناية']['A1'].font.color.rgb.endswith('FFFFFF')
+
+    def test_unified_vet_report_export(self, app, db_session):
+        from k9.models.report_models import ReportContext, UnifiedReportType
+        from k9.services.unified_report_service import UnifiedReportService
+
+        context = ReportContext(
+            report_type=UnifiedReportType.VET,
+            title_ar='تقرير بيطري',
+            cached_data={
+                'dog': {'name': 'ريكس', 'code': 'K9-1'},
+                'notes': 'متابعة بعد أسبوع',
+                'incidents': [{'incident_type': 'إصابة', 'description': 'جرح بسيط'}],
+            },
+        )
+
+        workbook = load_workbook(UnifiedReportService._generate_excel(context))
+
+        main = workbook.worksheets[0]
+        assert main['A1'].value == 'تقرير بيطري' and main.sheet_view.rightToLeft
+        values = [row[:2] for row in main.iter_rows(values_only=True)]
+        assert ('اسم الكلب', 'ريكس') in values
+        notes_row = values.index(('متابعة بعد أسبوع', None)) + 1
+        assert f'A{notes_row}:D{notes_row}' in main.merged_cells
+        incidents = workbook['الحوادث']
+        assert incidents.auto_filter.ref == 'A1:D2'
+        assert incidents['B2'].value == 'جرح بسيط'
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from k9.models.models import VeterinaryVisit, VisitType
+from k9.utils import index_maintenance
+from k9.utils.index_maintenance import (
+    BRIN_INDEXES, block_range_spread, cluster_relation, cluster_targets, index_sizes, reorder_tables
+)
+
+
+@pytest.mark.database
+class TestIndexMaintenance:
+    """BRIN indexes and drift-triggered CLUSTER"""
+
+    def test_brin_indexes_exist(self, app, db_session):
+        rows = db_session.execute(text(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE indexname = ANY(:names)"
+        ), {'names': list(BRIN_INDEXES)}).all()
+
+        assert {row.indexname for row in rows} == set(BRIN_INDEXES)
+        assert all('USING brin' in row.indexdef and 'autosummarize' in row.indexdef for row in rows)
+        sizes = index_sizes(db_session.connection(), 'veterinary_visit')
+        assert sizes['ix_veterinary_visit_date_brin'] > 0
+
+    def test_reorder_clusters_drifted_table_once(self, app, db, db_session, monkeypatch,
+                                                 test_project, test_dog, pm_employee):
+        # One-page block ranges so a few hundred rows make a measurable table
+        monkeypatch.setattr(index_maintenance, 'BRIN_PAGES_PER_RANGE', 1)
+        monkeypatch.setattr(index_maintenance, 'CLUSTER_MIN_RANGES', 2)
+
+        start = datetime(2026, 1, 1, 9)
+        # Visit dates interleaved from both ends: physical order far from date order
+        days = [day for pair in zip(range(0, 150), range(299, 149, -1)) for day in pair]
+        db_session.add_all([
+            VeterinaryVisit(dog_id=test_dog.id, vet_id=pm_employee.id, project_id=test_project.id,
+                            visit_type=VisitType.ROUTINE, visit_date=start + timedelta(days=day),
+                            notes='x' * 200)
+            for day in days
+        ])
+        db_session.commit()
+
+        with db.engine.connect() as conn:
+            spread, ranges = block_range_spread(conn, 'veterinary_visit', 'visit_date')
+            assert ranges >= 2 and spread > 0.5
+
+            report = reorder_tables(conn)
+            assert report['veterinary_visit'] == ['veterinary_visit']
+
+            spread, _ = block_range_spread(conn, 'veterinary_visit', 'visit_date')
+            assert spread < index_maintenance.CLUSTER_MAX_SPREAD
+            assert reorder_tables(conn)['veterinary_visit'] == []
+
+    def test_partitioned_table_targets_closed_partitions(self, app, db, monkeypatch):
+        monkeypatch.setattr(index_maintenance, 'BRIN_PAGES_PER_RANGE', 1)
+        monkeypatch.setattr(index_maintenance, 'CLUSTER_MIN_RANGES', 2)
+        monkeypatch.setattr(index_maintenance, 'CLUSTER_TABLES', {'zz_reorder_log': ('date', 'zz_reorder_log_date')})
+
+        with db.engine.connect() as conn:
+            with conn.begin() as transaction:
+                conn.execute(text("""
+                    CREATE TABLE zz_reorder_log (id int, date date, payload text, PRIMARY KEY (id, date))
+                    PARTITION BY RANGE (date);
+                    CREATE TABLE zz_reorder_log_p202601 PARTITION OF zz_reorder_log
+                        FOR VALUES FROM ('2026-01-01') TO ('2026-02-01');
+                    CREATE TABLE zz_reorder_log_p202602 PARTITION OF zz_reorder_log
+                        FOR VALUES FROM ('2026-02-01') TO ('2026-03-01');
+                    CREATE INDEX zz_reorder_log_date ON zz_reorder_log (date);
+                    INSERT INTO zz_reorder_log
+                    SELECT g, month + ((g * 7919) % 28), repeat('x', 200)
+                    FROM generate_series(1, 2000) AS g,
+                         (VALUES (date '2026-01-01'), (date '2026-02-01')) AS months(month);
+                """))
+
+                targets = cluster_targets(conn, 'zz_reorder_log', today=date(2026, 2, 15))
+                assert [relation for relation, _ in targets] == ['zz_reorder_log_p202601']
+                transaction.rollback()
+
+    def test_cluster_error_propagates_and_restores_lock_timeout(self, app, db):
+        with db.engine.connect() as conn:
+            before = conn.execute(text("SELECT current_setting('lock_timeout')")).scalar()
+
+            with pytest.raises(ProgrammingError) as error:
+                cluster_relation(conn, 'veterinary_visit', 'no_such_index')
+            assert 'no_such_index' in str(error.value.orig)
+
+            # The savepoint was rolled back: the transaction is usable and the timeout unchanged
+            assert conn.execute(text("SELECT current_setting('lock_timeout')")).scalar() == before
+            conn.rollback()
+
+    def test_reorder_job_runs_in_one_process_at_a_time(self, app, db):
+        from k9.utils.schedule_utils import job_lock, reorder_date_ordered_tables
+
+        with job_lock('reorder_date_ordered_tables') as acquired:
+            assert acquired
+            assert reorder_date_ordered_tables() is None
@@ -0,0 +1,82 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import text
+
+from k9.models.models import AuditAction, AuditLog, CleaningLog, FeedingLog
+from k9.utils.jsonb_filters import audit_value_changed, uses_material, uses_supplement
+
+DAY = date(2026, 5, 20)
+
+
+def _feeding(db_session, project, dog, hour, supplements):
+    log = FeedingLog(project_id=project.id, dog_id=dog.id, date=DAY, time=time(hour), supplements=supplements)
+    db_session.add(log)
+    return log
+
+
+@pytest.mark.database
+class TestJSONBFilters:
+    """Containment filters on the JSONB log fields"""
+
+    def test_supplement_and_material_containment(self, app, db_session, test_project, test_dog):
+        _feeding(db_session, test_project, test_dog, 8, [{'name': 'أوميغا 3', 'qty': '5 مل'},
+                                                         {'name': 'كالسيوم', 'qty': '1 قرص'}])
+        _feeding(db_session, test_project, test_dog, 12, [{'name': 'كالسيوم', 'qty': '2 قرص'}])
+        _feeding(db_session, test_project, test_dog, 18, None)
+        db_session.add(CleaningLog(project_id=test_project.id, dog_id=test_dog.id, date=DAY, time=time(9),
+                                   materials_used=[{'name': 'هيبوكلوريت', 'qty': '100 مل'}]))
+        db_session.commit()
+
+        feeding = FeedingLog.query.filter(FeedingLog.project_id == test_project.id)
+        assert feeding.filter(uses_supplement(' كالسيوم ')).count() == 2
+        assert [log.time.hour for log in feeding.filter(uses_supplement('أوميغا 3'))] == [8]
+        assert feeding.filter(uses_supplement('فيتامين')).count() == 0
+
+        cleaning = CleaningLog.query.filter(CleaningLog.project_id == test_project.id)
+        assert cleaning.filter(uses_material('هيبوكلوريت')).count() == 1
+        assert cleaning.filter(uses_material('كلور')).count() == 0
+
+    def test_audit_value_changed(self, app, db_session, admin_user):
+        db_session.add_all([
+            AuditLog(user_id=admin_user.id, action=AuditAction.EDIT, target_type='Dog',
+                     old_values={'status': 'ACTIVE'}, new_values={'status': 'RETIRED', 'notes': 'x'}),
+            AuditLog(user_id=admin_user.id, action=AuditAction.EDIT, target_type='Dog',
+                     old_values={'status': 'TRAINING'}, new_values={'status': 'ACTIVE'}),
+        ])
+        db_session.commit()
+
+        audits = AuditLog.query.filter(AuditLog.user_id == admin_user.id)
+        assert audits.filter(audit_value_changed('status', 'RETIRED', side='new')).count() == 1
+        assert audits.filter(audit_value_changed('status', 'ACTIVE', side='old')).count() == 1
+        assert audits.filter(audit_value_changed('status', 'ACTIVE')).count() == 2
+        with pytest.raises(ValueError):
+            audit_value_changed('status', 'ACTIVE', side='both')
+
+    def test_supplement_filter_uses_gin_index(self, app, db_session):
+        assert '@>' in str(uses_supplement('كالسيوم'))
+
+        db_session.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = '\n'.join(row[0] for row in db_session.execute(text(
+            "EXPLAIN SELECT id FROM feeding_log WHERE supplements @> CAST(:doc AS jsonb)"
+        ), {'doc': '[{"name": "zinc"}]'}))
+        db_session.rollback()
+
+        assert 'ix_feeding_log_supplements_gin' in plan
+
+    def test_feeding_list_filter_and_supplement_count(self, app, db_session, auth_client, test_project, test_dog):
+        _feeding(db_session, test_project, test_dog, 8, [{'name': 'كالسيوم', 'qty': '1 قرص'},
+                                                         {'name': 'زنك', 'qty': '1 قرص'}])
+        _feeding(db_session, test_project, test_dog, 12, [{'name': 'زنك', 'qty': '1 قرص'}])
+        db_session.commit()
+
+        response = auth_client.get('/api/breeding/feeding/log/list',
+                                   query_string={'project_id': str(test_project.id)})
+        assert response.status_code == 200
+        assert response.get_json()['kpis']['supplements_count'] == 3
+
+        response = auth_client.get('/api/breeding/feeding/log/list',
+                                   query_string={'project_id': str(test_project.id), 'supplement': 'كالسيوم'})
+        data = response.get_json()
+        assert data['pagination']['total'] == 1
+        assert data['kpis']['supplements_count'] == 2
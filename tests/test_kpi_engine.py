@@ -0,0 +1,87 @@
+from datetime import date, time
+
+import pytest
+
+from k9.api.api_cleaning import calculate_cleaning_kpis
+from k9.api.api_deworming import DEWORMING_KPIS
+from k9.api.caretaker_daily_report_api import CARETAKER_KPIS
+from k9.models.models import CaretakerDailyLog, CleaningLog, DewormingLog
+from k9.services.kpi_engine import KPIDefinition, KPIEngine, KPIMetric
+
+DAY = date(2026, 5, 20)
+
+
+@pytest.mark.database
+class TestKPIEngine:
+    """Declarative KPI definitions evaluated in one SQL statement"""
+
+    def test_caretaker_counts_and_ratios(self, app, db_session, test_project, test_dog, test_dog_female):
+        db_session.add_all([
+            CaretakerDailyLog(date=DAY, project_id=test_project.id, dog_id=test_dog.id, house_clean=True,
+                              house_vacuum=True, house_tap_clean=True, house_drain_clean=True, dog_clean=True),
+            CaretakerDailyLog(date=DAY, project_id=test_project.id, dog_id=test_dog_female.id, house_clean=True,
+                              dog_clean=True, dog_washed=True, dog_brushed=True),
+            CaretakerDailyLog(date=date(2026, 5, 21), project_id=test_project.id, dog_id=test_dog.id),
+        ])
+        db_session.commit()
+
+        query = CaretakerDailyLog.query.filter(CaretakerDailyLog.project_id == test_project.id)
+        kpis = KPIEngine.evaluate(CARETAKER_KPIS, query)
+
+        assert kpis['total_entries'] == 3
+        assert kpis['unique_dogs'] == 2
+        assert kpis['unique_dates'] == 2
+        assert kpis['house_tasks']['house_clean'] == 2
+        assert kpis['house_tasks']['full_house_clean'] == 1
+        assert kpis['house_tasks']['house_clean_pct'] == 66.7
+        assert kpis['dog_tasks']['full_dog_grooming'] == 1
+        assert kpis['dog_tasks']['full_dog_grooming_pct'] == 33.3
+
+        empty = KPIEngine.evaluate(CARETAKER_KPIS, query.filter(CaretakerDailyLog.date > DAY.replace(month=6)))
+        assert empty == CARETAKER_KPIS.empty()
+
+    def test_deworming_average_and_open_breakdown(self, app, db_session, test_project, test_dog):
+        db_session.add_all([
+            DewormingLog(project_id=test_project.id, dog_id=test_dog.id, date=DAY, time=time(8),
+                         standard_dose_mg_per_kg=5.0, administration_route='فموي', next_due_date=date(2026, 8, 20)),
+            DewormingLog(project_id=test_project.id, dog_id=test_dog.id, date=DAY, time=time(9),
+                         standard_dose_mg_per_kg=6.5, administration_route='فموي'),
+            DewormingLog(project_id=test_project.id, dog_id=test_dog.id, date=DAY, time=time(10),
+                         administration_route='حقن'),
+        ])
+        db_session.commit()
+
+        query = DewormingLog.query.filter(DewormingLog.project_id == test_project.id).order_by(DewormingLog.date)
+        kpis = KPIEngine.evaluate(DEWORMING_KPIS, query)
+
+        assert kpis == {'total': 3, 'avg_mg_per_kg': 5.75, 'with_next_due': 1, 'by_route': {'فموي': 2, 'حقن': 1}}
+
+    def test_cleaning_cadence_uses_last_wash_per_dog(self, app, db_session, test_project, test_dog,
+                                                     test_dog_female):
+        db_session.add_all([
+            CleaningLog(project_id=test_project.id, dog_id=test_dog.id, date=date(2026, 5, 1), time=time(8),
+                        washed_house='نعم', disinfected_house='نعم'),
+            CleaningLog(project_id=test_project.id, dog_id=test_dog.id, date=date(2026, 5, 18), time=time(8),
+                        washed_house='نعم', cleaned_house='نعم'),
+            CleaningLog(project_id=test_project.id, dog_id=test_dog_female.id, date=DAY, time=time(8),
+                        cleaned_house='نعم'),
+        ])
+        db_session.commit()
+
+        query = CleaningLog.query.filter(CleaningLog.project_id == test_project.id, CleaningLog.date >= date(2026, 5, 10))
+        kpis = calculate_cleaning_kpis(query, DAY.isoformat())
+
+        assert kpis['total'] == 2
+        assert kpis['cleaned_yes'] == 2
+        assert kpis['washed_yes'] == 1
+        # test_dog: washed 2 days ago, disinfected 19 days ago (outside the range); test_dog_female: never
+        assert kpis['due_wash_count'] == 0
+        assert kpis['overdue_wash_count'] == 1
+        assert kpis['due_disinfect_count'] == 1
+        assert kpis['overdue_disinfect_count'] == 2
+
+    def test_definition_validation(self):
+        with pytest.raises(ValueError):
+            KPIDefinition('broken', CleaningLog, [KPIMetric.count('total'), KPIMetric.count('total')])
+        with pytest.raises(ValueError):
+            KPIDefinition('broken', CleaningLog, [KPIMetric.ratio('pct', 'missing', 'total')])
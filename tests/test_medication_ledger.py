@@ -0,0 +1,98 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+
+from k9.models.models import Medication, VeterinaryVisit, VisitMedication, VisitType
+from k9.services.medication_ledger_service import MedicationLedgerService
+
+DAY = date(2026, 4, 14)
+
+
+def _drug():
+    return f"Drug{uuid.uuid4().hex[:6]}"
+
+
+def _visit(db_session, dog, vet, project, medications, hour=9):
+    visit = VeterinaryVisit(dog_id=dog.id, vet_id=vet.id, project_id=project.id, visit_type=VisitType.ROUTINE,
+                            visit_date=datetime(DAY.year, DAY.month, DAY.day, hour), medications=medications)
+    db_session.add(visit)
+    db_session.commit()
+    return visit
+
+
+def _ledger(db_session, visit):
+    return VisitMedication.query.filter_by(visit_id=visit.id).order_by(VisitMedication.position).all()
+
+
+@pytest.mark.database
+class TestMedicationLedger:
+    """visit_medication rows written on save and usage aggregates"""
+
+    def test_ledger_written_and_rewritten_on_save(self, app, db_session, test_project, test_dog, pm_employee):
+        drug = _drug()
+        visit = _visit(db_session, test_dog, pm_employee, test_project, [
+            {'name': f"  {drug} ", 'dose': '5ml', 'quantity': '2'},
+            {'name': ''},
+            {'name': drug.upper(), 'frequency': 'daily'},
+        ])
+
+        rows = _ledger(db_session, visit)
+        assert [(r.position, r.name_as_entered, r.quantity) for r in rows] == [(0, drug, 2.0), (2, drug.upper(), None)]
+        assert rows[0].medication_id == rows[1].medication_id
+        assert rows[0].project_id == test_project.id and rows[0].dog_id == test_dog.id
+
+        visit.medications = [{'name': 'Other ' + drug}]
+        db_session.commit()
+        rows = _ledger(db_session, visit)
+        assert [r.name_as_entered for r in rows] == ['Other ' + drug]
+
+        db_session.delete(visit)
+        db_session.commit()
+        assert _ledger(db_session, visit) == []
+
+    def test_usage_by_medication_and_project(self, app, db_session, test_project, test_dog, test_dog_female,
+                                             pm_employee):
+        drug = _drug()
+        _visit(db_session, test_dog, pm_employee, test_project, [{'name': drug}])
+        medication = MedicationLedgerService.find(drug)
+        MedicationLedgerService.update_medication(medication.id, unit='ml', unit_cost=4.0)
+        _visit(db_session, test_dog_female, pm_employee, test_project, [{'name': drug, 'quantity': 3}], hour=11)
+
+        rows = MedicationLedgerService.usage(DAY, DAY, medication_id=medication.id)
+        assert len(rows) == 1
+        assert rows[0]['administrations'] == 2
+        assert rows[0]['dogs'] == 2
+        assert rows[0]['quantity'] == 3.0
+        # The first visit was saved before the price was set
+        assert rows[0]['cost'] == 12.0
+
+        by_project = MedicationLedgerService.usage(DAY, DAY, group_by='project', medication_id=medication.id)
+        assert [(r['id'], r['administrations']) for r in by_project] == [(str(test_project.id), 2)]
+        assert MedicationLedgerService.usage(date(2026, 4, 15), date(2026, 4, 30), medication_id=medication.id) == []
+
+    def test_merge_moves_variant_rows(self, app, db_session, test_project, test_dog, pm_employee):
+        drug, typo = _drug(), _drug()
+        _visit(db_session, test_dog, pm_employee, test_project, [{'name': drug}, {'name': typo}])
+        target, source = MedicationLedgerService.find(drug), MedicationLedgerService.find(typo)
+
+        moved, error = MedicationLedgerService.merge(source.id, target.id)
+
+        assert error is None
+        assert moved == 1
+        assert MedicationLedgerService.find(typo).id == target.id
+        _visit(db_session, test_dog, pm_employee, test_project, [{'name': typo}], hour=12)
+        rows = MedicationLedgerService.usage(DAY, DAY, medication_id=target.id)
+        assert rows[0]['administrations'] == 3
+        assert db_session.get(Medication, source.id).canonical_id == target.id
+
+    def test_merge_into_own_variant_rejected(self, app, db_session, test_project, test_dog, pm_employee):
+        drug, typo = _drug(), _drug()
+        _visit(db_session, test_dog, pm_employee, test_project, [{'name': drug}, {'name': typo}])
+        target, source = MedicationLedgerService.find(drug), MedicationLedgerService.find(typo)
+        MedicationLedgerService.merge(source.id, target.id)
+
+        assert MedicationLedgerService.merge(target.id, source.id) == (0, "لا يمكن دمج الدواء مع نفسه")
+        assert MedicationLedgerService.merge(target.id, str(target.id))[1] is not None
+        assert db_session.get(Medication, target.id).canonical_id is None
+        assert MedicationLedgerService.find(drug).id == target.id
@@ -0,0 +1,103 @@
+import uuid
+from datetime import date
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from k9.models.models import Employee, EmployeeRole, User, UserRole
+from k9.models.permissions_v2 import Role, UserRoleAssignment, RoleType, PermissionOverride
+from k9.services.permission_service import PermissionService
+from k9.services.ui_navigation import NavigationCache, NavigationFilter
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    NavigationCache.invalidate()
+    PermissionService.clear_cache()
+    yield
+    NavigationCache.invalidate()
+
+
+@pytest.fixture
+def second_pm(db_session, pm_user, test_project):
+    uid = uuid.uuid4().hex[:8]
+    employee = Employee(name="مدير مشروع ثان", employee_id=f"EMP-PM2-{uid}", role=EmployeeRole.PROJECT_MANAGER,
+                        phone=f"714{uid}", hire_date=date(2021, 1, 1), is_active=True)
+    db_session.add(employee)
+    db_session.commit()
+    user = User(
+        username=f"pm2_{uid}",
+        email=f"pm2_{uid}@k9test.com",
+        password_hash=generate_password_hash("Test1234!"),
+        role=UserRole.PROJECT_MANAGER,
+        full_name="مدير مشروع ثان",
+        active=True,
+        employee_id=employee.id,
+        project_id=test_project.id,
+    )
+    db_session.add(user)
+    db_session.commit()
+    role = Role.query.filter_by(name=RoleType.PROJECT_MANAGER).first()
+    db_session.add(UserRoleAssignment(user_id=user.id, role_id=role.id,
+                                      project_id=test_project.id, is_active=True))
+    db_session.commit()
+    return user
+
+
+def _ids(items):
+    return [(item.id, _ids(item.children)) for item in items if item]
+
+
+@pytest.mark.database
+class TestNavigationCache:
+    """Navigation compiled once per permission fingerprint"""
+
+    def test_same_permissions_share_one_tree(self, app, db_session, pm_user, second_pm):
+        with app.test_request_context():
+            first = NavigationCache.get_navigation(pm_user.id)
+            second = NavigationCache.get_navigation(second_pm.id)
+
+        assert PermissionService.permission_fingerprint(pm_user.id) == \
+            PermissionService.permission_fingerprint(second_pm.id)
+        assert first is second
+
+    def test_cached_tree_matches_direct_filtering(self, app, db_session, admin_user, pm_user):
+        with app.test_request_context():
+            for user in (admin_user, pm_user):
+                nav_filter = NavigationFilter(
+                    lambda key: PermissionService.has_permission(user.id, key),
+                    lambda: PermissionService.is_admin(user.id)
+                )
+                expected = NavigationCache.build(nav_filter)
+                cached = NavigationCache.get_navigation(user.id)
+
+                assert _ids(cached['main_nav']) == _ids(expected['main_nav'])
+                assert _ids([cached['admin_nav']]) == _ids([expected['admin_nav']])
+
+        assert NavigationCache.get_navigation(admin_user.id) is not NavigationCache.get_navigation(pm_user.id)
+
+    def test_override_change_invalidates_user(self, app, db_session, pm_user, second_pm):
+        with app.test_request_context():
+            before = NavigationCache.get_navigation(pm_user.id)
+
+            PermissionService.revoke_permission(pm_user.id, 'pm.team.view')
+            after = NavigationCache.get_navigation(pm_user.id)
+            untouched = NavigationCache.get_navigation(second_pm.id)
+
+        assert after is not before
+        assert untouched is before
+        quick_ids = [item.id for item in after['pm_quick_nav']]
+        assert 'pm_quick_team' not in quick_ids
+        assert 'pm_quick_team' in [item.id for item in before['pm_quick_nav']]
+
+    def test_version_bump_recomputes_fingerprint(self, app, db_session, pm_user):
+        with app.test_request_context():
+            NavigationCache.get_navigation(pm_user.id, permissions_version=0)
+            db_session.add(PermissionOverride(user_id=pm_user.id, permission_key='reports.view', is_granted=True))
+            db_session.commit()
+
+            stale = NavigationCache.fingerprint_for(pm_user.id, permissions_version=0)
+            fresh = NavigationCache.fingerprint_for(pm_user.id, permissions_version=1)
+
+        assert stale != fresh
+
@@ -0,0 +1,97 @@
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from k9.utils import partitioning
+from k9.utils.partitioning import (
+    add_months, partition_name, is_partitioned, list_partitions,
+    ensure_partitions, drop_expired_partitions
+)
+
+SCRATCH_TABLE = 'partition_test_log'
+
+
+@pytest.fixture
+def scratch_table(db):
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE} CASCADE"))
+        conn.execute(text(f"""
+            CREATE TABLE {SCRATCH_TABLE} (
+                id uuid NOT NULL,
+                created_at timestamp NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """))
+    yield SCRATCH_TABLE
+    with db.engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE} CASCADE"))
+
+
+@pytest.mark.unit
+def test_month_arithmetic():
+    assert add_months(date(2026, 11, 15), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert partition_name('audit_log', date(2026, 3, 1)) == 'audit_log_p202603'
+
+
+@pytest.mark.unit
+def test_retention_defaults(monkeypatch):
+    # Notification partitions hold unread notifications too: kept unless configured
+    assert partitioning.RETENTION_MONTHS['notification'] is None
+
+    monkeypatch.setenv('NOTIFICATION_RETENTION_MONTHS', '0')
+    assert partitioning._retention_from_env('NOTIFICATION_RETENTION_MONTHS') == 0
+
+
+@pytest.mark.database
+class TestPartitionMaintenance:
+    """Monthly partition pre-creation and retention drops"""
+
+    def test_plain_tables_are_left_alone(self, db):
+        with db.engine.begin() as conn:
+            assert not is_partitioned(conn, 'notification')
+            assert ensure_partitions(conn, 'notification') == []
+            assert drop_expired_partitions(conn, 'notification', 1) == []
+
+    def test_ensure_partitions_is_idempotent(self, db, scratch_table):
+        today = date(2026, 11, 20)
+        with db.engine.begin() as conn:
+            created = ensure_partitions(conn, scratch_table, months_ahead=2, today=today)
+            assert created == [f'{scratch_table}_p202611', f'{scratch_table}_p202612', f'{scratch_table}_p202701']
+            assert ensure_partitions(conn, scratch_table, months_ahead=2, today=today) == []
+
+    def test_drop_expired_partitions_archives_then_drops(self, db, scratch_table):
+        archived = []
+        with db.engine.begin() as conn:
+            ensure_partitions(conn, scratch_table, months_ahead=5, today=date(2026, 1, 1))
+            conn.execute(text(f"INSERT INTO {scratch_table} VALUES (:id, :at)"),
+                         [{'id': str(uuid.uuid4()), 'at': datetime(2026, m, 10)} for m in range(1, 7)])
+
+            dropped = drop_expired_partitions(
+                conn, scratch_table, retention_months=2, today=date(2026, 6, 15),
+                archive=lambda c, table, name: archived.append(
+                    c.execute(text(f"SELECT count(*) FROM {name}")).scalar())
+            )
+
+            assert dropped == [f'{scratch_table}_p{m:%Y%m}' for m in
+                               (date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1))]
+            assert archived == [1, 1, 1]
+            assert [month for _, month in list_partitions(conn, scratch_table)] == \
+                [date(2026, 4, 1), date(2026, 5, 1), date(2026, 6, 1)]
+            assert conn.execute(text(f"SELECT count(*) FROM {scratch_table}")).scalar() == 3
+
+    def test_rows_in_default_partition_moved_to_new_partition(self, db, scratch_table):
+        with db.engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE {scratch_table}_default PARTITION OF {scratch_table} DEFAULT"))
+            conn.execute(text(f"INSERT INTO {scratch_table} VALUES (:id, :at)"),
+                         [{'id': str(uuid.uuid4()), 'at': at} for at in
+                          (datetime(2026, 11, 2), datetime(2026, 11, 30, 23), datetime(2027, 3, 1))])
+
+            created = ensure_partitions(conn, scratch_table, months_ahead=1, today=date(2026, 11, 20))
+
+            assert created == [f'{scratch_table}_p202611', f'{scratch_table}_p202612']
+            assert conn.execute(text(f"SELECT count(*) FROM {scratch_table}_p202611")).scalar() == 2
+            assert conn.execute(text(f"SELECT count(*) FROM {scratch_table}_default")).scalar() == 1
+            assert conn.execute(text(f"SELECT count(*) FROM {scratch_table}")).scalar() == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from k9.services.pdf_report_generator import CHUNK_ROWS, LARGE_REPORT_ROWS, get_pdf_generator
+
+
+COLUMNS = [
+    ('code', 'الرمز', 30, False),
+    ('name', 'الاسم', 60, True),
+    ('status', 'الحالة', 40, True),
+]
+
+
+def _records(count):
+    return [{'code': f'K9-{i:05d}', 'name': f'كلب {i}', 'status': 'نشط'} for i in range(count)]
+
+
+@pytest.mark.unit
+class TestChunkedPdfTables:
+    """Large reports rendered as page-sized tables that repeat the header"""
+
+    def test_small_report_is_one_table(self):
+        generator = get_pdf_generator()
+        flowables = generator._build_data_table(_records(10), COLUMNS)
+
+        assert len(flowables) == 1
+        assert len(flowables[0]._cellvalues) == 11
+
+    def test_large_report_chunks_repeat_header(self):
+        generator = get_pdf_generator()
+        flowables = generator._build_data_table(_records(95), COLUMNS, chunk_rows=CHUNK_ROWS)
+
+        assert len(flowables) == -(-95 // CHUNK_ROWS)
+        assert sum(len(t._cellvalues) - 1 for t in flowables) == 95
+        assert all(t.repeatRows == 1 for t in flowables)
+        assert len({id(t._cellvalues[0][0]) for t in flowables}) == 1
+
+    def test_odd_chunk_size_rounded_up_for_striping(self):
+        generator = get_pdf_generator()
+        rows = [['الرمز', 'الاسم']] + [[str(i), 'نشط'] for i in range(20)]
+        flowables = generator._build_simple_table(rows, chunk_rows=5)
+
+        assert [len(t._cellvalues) - 1 for t in flowables] == [6, 6, 6, 2]
+
+    def test_large_report_builds_pdf(self):
+        buffer = get_pdf_generator().generate_pdf_report(
+            report_type='dogs',
+            data=_records(LARGE_REPORT_ROWS + 200),
+            columns=COLUMNS,
+            title='تقرير الكلاب',
+            include_signatures=False
+        )
+
+        assert buffer.getvalue().startswith(b'%PDF')
@@ -0,0 +1,50 @@
+from io import BytesIO
+
+import pytest
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from k9.services.pdf_report_generator import get_pdf_generator
+from k9.utils.pdf_page_templates import StaticPageLayer
+
+
+@pytest.mark.unit
+class TestPdfPageTemplates:
+    """Static page decorations recorded once as a Form XObject"""
+
+    def test_static_part_drawn_once_live_part_every_page(self):
+        calls = {'static': 0, 'live': 0}
+
+        def draw_static(canvas_obj, doc):
+            calls['static'] += 1
+            canvas_obj.drawString(40, 800, 'K9 letterhead')
+
+        def draw_live(canvas_obj, doc):
+            calls['live'] += 1
+            canvas_obj.drawString(40, 40, str(canvas_obj.getPageNumber()))
+
+        template = StaticPageLayer('test_page', draw_static, draw_live)
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        for _ in range(5):
+            template(pdf, None)
+            pdf.showPage()
+        pdf.save()
+
+        assert calls == {'static': 1, 'live': 5}
+        assert buffer.getvalue().count(b'/Subtype /Form') == 1
+
+    def test_report_references_template_on_every_page(self):
+        data = [{'code': f'K9-{i:04d}', 'name': f'كلب {i}'} for i in range(200)]
+        buffer = get_pdf_generator().generate_pdf_report(
+            report_type='dogs',
+            data=data,
+            columns=[('code', 'الرمز', 40, False), ('name', 'الاسم', 80, True)],
+            title='تقرير الكلاب',
+            watermark='سري'
+        )
+        content = buffer.getvalue()
+
+        assert content.count(b'/Subtype /Form') == 1
+        assert content.count(b'/Subtype /Image') <= 2  # logo and its alpha mask
+        assert content.count(b'/Type /Page\n') > 1
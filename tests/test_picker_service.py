@@ -0,0 +1,64 @@
+import uuid
+from datetime import date
+
+import pytest
+
+from k9.models.models import Dog, DogGender, DogStatus, ProjectAssignment, project_dog_assignment
+from k9.services.picker_service import PickerService
+
+
+def _dog(db_session, name, status=DogStatus.ACTIVE, **kwargs):
+    dog = Dog(name=name, code=f"PK-{uuid.uuid4().hex[:8]}", breed="مالينوا", gender=DogGender.MALE,
+              birth_date=date(2022, 1, 1), current_status=status, **kwargs)
+    db_session.add(dog)
+    db_session.commit()
+    return dog
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    PickerService.invalidate()
+    yield
+    PickerService.invalidate()
+
+
+@pytest.mark.database
+class TestPickerService:
+    """Scoped dog/employee option lists"""
+
+    def test_dog_scope_unions_every_source(self, app, db_session, test_project, handler_user):
+        assigned = _dog(db_session, "أسد")
+        legacy = _dog(db_session, "برق")
+        handled = _dog(db_session, "تاج", assigned_to_user_id=handler_user.id)
+        retired = _dog(db_session, "ثلج", status=DogStatus.RETIRED)
+        outsider = _dog(db_session, "جبل")
+        db_session.add(ProjectAssignment(project_id=test_project.id, dog_id=assigned.id, is_active=True))
+        db_session.add(ProjectAssignment(project_id=test_project.id, dog_id=retired.id, is_active=True))
+        db_session.execute(project_dog_assignment.insert().values(project_id=test_project.id, dog_id=legacy.id))
+        db_session.commit()
+
+        ids = {d['id'] for d in PickerService.dog_options([test_project.id])}
+        assert {str(assigned.id), str(legacy.id), str(handled.id)} <= ids
+        assert str(retired.id) not in ids
+        assert str(outsider.id) not in ids
+
+        handler_only = {d['id'] for d in PickerService.dog_options([test_project.id], sources=('handler',))}
+        assert str(handled.id) in handler_only
+        assert str(assigned.id) not in handler_only
+
+    def test_prefix_search_with_limit(self, app, db_session, test_project):
+        prefix = f"زمرد{uuid.uuid4().hex[:4]}"
+        for i in range(5):
+            _dog(db_session, f"{prefix}-{i}")
+
+        results = PickerService.dog_options(search=prefix, limit=3)
+        assert [d['name'] for d in results] == [f"{prefix}-{i}" for i in range(3)]
+        assert PickerService.dog_options(search=f"x{prefix}") == []
+
+    def test_cache_dropped_on_commit(self, app, db_session, test_project):
+        prefix = f"سهم{uuid.uuid4().hex[:4]}"
+        _dog(db_session, f"{prefix}-1")
+        assert len(PickerService.dog_options(search=prefix)) == 1
+
+        _dog(db_session, f"{prefix}-2")
+        assert len(PickerService.dog_options(search=prefix)) == 2
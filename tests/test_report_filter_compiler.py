@@ -0,0 +1,72 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from k9.models.models import Dog, DogGender, DogStatus
+from k9.services.report_data_service import get_report_data_service
+from k9.services.report_filter_compiler import ReportFilterCompiler
+from k9.services.report_registry import get_report_registry
+
+
+def _sql(clauses):
+    return [str(c.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})) for c in clauses]
+
+
+@pytest.mark.unit
+class TestReportFilterCompiler:
+    """Registry filter definitions compiled to WHERE clauses"""
+
+    def test_keyword_is_ilike_across_fields(self):
+        report_def = get_report_registry().get_report('dogs')
+
+        clauses = ReportFilterCompiler.compile(report_def, {'keyword': '50%_off'})
+        compiled = clauses[0].compile(dialect=postgresql.dialect())
+
+        assert len(clauses) == 1
+        assert str(compiled).count('ILIKE') == 5
+        assert '%50\\%\\_off%' in compiled.params.values()
+
+    def test_unknown_enum_names_dropped(self):
+        report_def = get_report_registry().get_report('employees')
+
+        sql = _sql(ReportFilterCompiler.compile(report_def, {'role': ['VET', 'MANAGER']}))
+
+        assert sql == ["employee.role IN ('VET')"]
+
+    def test_value_map_and_all_options_selected(self):
+        report_def = get_report_registry().get_report('employees')
+
+        assert _sql(ReportFilterCompiler.compile(report_def, {'status': ['INACTIVE']})) == ['employee.is_active IN (false)']
+        assert ReportFilterCompiler.compile(report_def, {'status': ['ACTIVE', 'INACTIVE']}) == []
+
+    def test_date_range_scope_and_sort(self):
+        report_def = get_report_registry().get_report('veterinary')
+
+        sql = _sql(ReportFilterCompiler.compile(
+            report_def, {'project_id': 'p1'}, start_date=date(2026, 1, 1), end_date=date(2026, 1, 31)
+        ))
+
+        assert any('visit_date >=' in clause and 'visit_date <=' in clause for clause in sql)
+        assert "veterinary_visit.project_id = 'p1'" in sql
+        assert _sql(ReportFilterCompiler.order_by(report_def, 'dog_id')) == ['veterinary_visit.dog_id ASC']
+        assert _sql(ReportFilterCompiler.order_by(report_def, 'no_such_field')) == ['veterinary_visit.visit_date DESC']
+
+
+@pytest.mark.database
+class TestFiltersPushedDown:
+    """Registry reports filter, sort and limit inside PostgreSQL"""
+
+    def test_dogs_breed_keyword_sort_and_limit(self, app, db_session, admin_user):
+        for i, breed in enumerate(['مالينوا', 'جيرمن شيبرد', 'مالينوا بلجيكي']):
+            db_session.add(Dog(name=f'كلب {i}', code=f'FC-{i}', breed=breed, gender=DogGender.MALE,
+                               birth_date=date(2022, 1, 1), current_status=DogStatus.ACTIVE))
+        db_session.commit()
+        service = get_report_data_service()
+
+        with app.test_request_context():
+            rows = list(service.iter_report_rows('dogs', {'breed': 'مالينوا'}, user=admin_user, sort='-code'))
+            limited = list(service.iter_report_rows('dogs', {'keyword': 'FC-'}, user=admin_user, sort='code', limit=2))
+
+        assert [row[2] for row in rows] == ['FC-2', 'FC-0']
+        assert [row[2] for row in limited] == ['FC-0', 'FC-1']
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import pytest
+
+from k9.services.report_data_service import ReportDataService, get_report_data_service
+from k9.services.report_registry import get_report_registry
+from k9.services import report_stream_export
+from k9.services.report_stream_export import iter_csv, iter_ndjson, stream_report_export
+
+
+@pytest.mark.unit
+class TestSerialisers:
+    """CSV and NDJSON chunks built from ColumnDefinitions"""
+
+    def test_csv_has_bom_and_chunks(self, monkeypatch):
+        monkeypatch.setattr(report_stream_export, 'ROWS_PER_CHUNK', 2)
+        columns = get_report_registry().get_columns('employees')
+        rows = [[str(i), f'موظف {i}', '', '', '', '', ''] for i in range(1, 6)]
+
+        chunks = list(iter_csv(columns, iter(rows)))
+
+        assert chunks[0].startswith('﻿'.encode('utf-8'))
+        assert len(chunks) == 4
+        parsed = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))
+        assert parsed[0] == [col.header for col in columns]
+        assert parsed[5][1] == 'موظف 5'
+
+    def test_ndjson_uses_column_keys(self):
+        columns = get_report_registry().get_columns('employees')
+
+        lines = b''.join(iter_ndjson(columns, [['1', 'أحمد', 'E1', 'مدرب', '', 'نشط', '']])).decode().splitlines()
+
+        assert json.loads(lines[0])['name'] == 'أحمد'
+        assert list(json.loads(lines[0])) == [col.key for col in columns]
+
+
+@pytest.mark.database
+class TestStreamReportExport:
+    """Streaming registry exports fed by yield_per fetchers"""
+
+    def test_rows_match_preview_data(self, app, db_session, admin_user, pm_user, handler_user):
+        service = get_report_data_service()
+        with app.test_request_context():
+            preview = service.fetch_report_data('employees', user=admin_user)
+            rows = list(service.iter_report_rows('employees', user=admin_user))
+
+        assert [list(record.values()) for record in preview] == rows
+        assert len(rows) == 3
+
+    def test_csv_response_streams(self, app, db_session, admin_user, handler_user):
+        with app.test_request_context():
+            response, error = stream_report_export('employees', 'csv', {'role': ['HANDLER']}, user=admin_user)
+            body = b''.join(response.response).decode('utf-8-sig')
+
+        assert error is None
+        assert response.is_streamed
+        assert response.content_type.startswith('text/csv')
+        parsed = list(csv.reader(io.StringIO(body)))
+        assert len(parsed) == 2 and parsed[1][1] == handler_user.employee.name
+
+    def test_failure_mid_stream_aborts_the_body(self, app, db_session, admin_user, monkeypatch, caplog):
+        monkeypatch.setattr(report_stream_export, 'ROWS_PER_CHUNK', 2)
+
+        def failing_rows(*args, **kwargs):
+            for i in range(3):
+                yield [str(i), f'موظف {i}', '', '', '', '', '']
+            raise RuntimeError('statement timeout')
+
+        monkeypatch.setattr(ReportDataService, 'iter_report_rows', failing_rows)
+        with app.test_request_context():
+            response, error = stream_report_export('employees', 'csv', user=admin_user)
+            chunks = iter(response.response)
+            received = [next(chunks), next(chunks)]
+            with pytest.raises(RuntimeError):
+                list(chunks)
+
+        assert error is None
+        assert len(list(csv.reader(io.StringIO(b''.join(received).decode('utf-8-sig'))))) == 3
+        failure = [record for record in caplog.records if 'Streaming export of employees failed' in record.message]
+        assert failure and failure[0].exc_info is not None
+
+    def test_rejects_unknown_format_and_report(self, app):
+        assert stream_report_export('employees', 'xml')[1] is not None
+        assert stream_report_export('nope', 'csv')[1] is not None
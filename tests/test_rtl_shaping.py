@@ -0,0 +1,66 @@
+import pytest
+
+from k9.utils import utils_pdf_rtl
+from k9.utils.utils_pdf_rtl import (
+    rtl, rtl_column, preshape, clear_rtl_cache, rtl_cache_info, RTL_CACHE_MAX_LENGTH
+)
+
+
+@pytest.fixture
+def shape_calls(monkeypatch):
+    clear_rtl_cache()
+    calls = []
+    original = utils_pdf_rtl._shape
+
+    def counting_shape(text):
+        calls.append(text)
+        return original(text)
+
+    monkeypatch.setattr(utils_pdf_rtl, '_shape', counting_shape)
+    yield calls
+    clear_rtl_cache()
+
+
+@pytest.mark.unit
+class TestRtlShapingCache:
+    """Memoised Arabic shaping for PDF text"""
+
+    def test_cached_result_matches_direct_shaping(self, shape_calls):
+        text = 'كلب الحراسة نشط'
+        expected = utils_pdf_rtl.get_display(utils_pdf_rtl.arabic_reshaper.reshape(text))
+
+        assert rtl(text) == expected
+        assert rtl(text) == expected
+        assert shape_calls == [text]
+        assert rtl_cache_info().hits >= 1
+
+    def test_latin_and_empty_pass_through(self, shape_calls):
+        assert rtl('K9-001') == 'K9-001'
+        assert rtl('') == ''
+        assert rtl(None) is None
+        assert shape_calls == []
+
+    def test_column_shapes_each_distinct_value_once(self, shape_calls):
+        column = ['نشط', 'متقاعد', 'نشط', None, 'نشط', 'متقاعد']
+
+        shaped = rtl_column(column)
+
+        assert sorted(shape_calls) == sorted(['نشط', 'متقاعد'])
+        assert shaped[0] == shaped[2] == rtl('نشط')
+        assert shaped[3] == ''
+
+    def test_preshaped_labels_skip_the_lru(self, shape_calls):
+        preshape(['اسم الكلب', 'Code'])
+        shape_calls.clear()
+
+        assert rtl('اسم الكلب') == utils_pdf_rtl._PRESHAPED['اسم الكلب']
+        assert rtl('Code') == 'Code'
+        assert shape_calls == []
+
+    def test_long_text_not_memoised(self, shape_calls):
+        note = 'ملاحظة ' * (RTL_CACHE_MAX_LENGTH // 4)
+
+        rtl(note)
+        rtl(note)
+
+        assert len(shape_calls) == 2
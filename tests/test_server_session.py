@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import session
+
+from k9.models.models import ServerSession
+from k9.utils.server_session import FileSessionStore, ServerSessionInterface, SqlSessionStore
+
+
+@pytest.mark.database
+class TestServerSession:
+    """Session data stored server-side behind an opaque cookie"""
+
+    def test_cookie_carries_only_session_id(self, app, db_session, auth_client):
+        with auth_client.session_transaction() as sess:
+            sess['user_permissions'] = ['perm.%d' % i for i in range(500)]
+
+        cookie = auth_client.get_cookie(app.config.get('SESSION_COOKIE_NAME', 'session'))
+        assert cookie is not None
+        assert len(cookie.value) < 100
+
+        record = ServerSession.query.one()
+        assert 'perm.499' in record.data
+        assert record.expires_at > datetime.utcnow()
+
+        with auth_client.session_transaction() as sess:
+            assert len(sess['user_permissions']) == 500
+
+    def test_tampered_cookie_starts_new_session(self, app, db_session, auth_client):
+        name = app.config.get('SESSION_COOKIE_NAME', 'session')
+        sid = auth_client.get_cookie(name).value.split('.')[0]
+        auth_client.set_cookie(name, f'{sid}.forged')
+
+        with auth_client.session_transaction() as sess:
+            assert '_user_id' not in sess
+
+    def test_file_store_round_trip(self, app, tmp_path):
+        store = FileSessionStore(str(tmp_path))
+        store.save('abc', '{"x": 1}', datetime.utcnow() + timedelta(hours=1))
+        store.save('old', '{}', datetime.utcnow() - timedelta(seconds=1))
+
+        assert store.load('abc')[0] == '{"x": 1}'
+        assert store.load('old') is None
+        assert store.delete_expired() == 1
+
+    def test_expired_sql_sessions_purged(self, app, db_session, db):
+        store = SqlSessionStore(db)
+        store.save('live', '{}', datetime.utcnow() + timedelta(hours=1))
+        store.save('dead', '{}', datetime.utcnow() - timedelta(hours=1))
+
+        assert store.load('dead') is None
+        assert store.delete_expired() == 1
+        assert [s.id for s in ServerSession.query.all()] == ['live']
+
+
+@pytest.mark.database
+class TestPermissionVersion:
+    """Stale permission sets detected by comparing permissions_version"""
+
+    def test_touch_permissions_bumps_version(self, db_session, pm_user):
+        assert pm_user.permissions_version == 0
+        pm_user.touch_permissions()
+        db_session.commit()
+        pm_user.touch_permissions()
+        db_session.commit()
+
+        assert pm_user.permissions_version == 2
+
+    def test_reload_only_when_version_moves(self, app, db_session, pm_user):
+        from flask_login import login_user
+        from k9.utils.permissions_new import _should_reload_permissions, load_user_permissions
+
+        with app.test_request_context():
+            login_user(pm_user)
+            assert _should_reload_permissions()
+
+            load_user_permissions(pm_user.id)
+            assert session['permissions_version'] == 0
+            assert not _should_reload_permissions()
+
+            pm_user.touch_permissions()
+            db_session.commit()
+            assert _should_reload_permissions()
+
+
+@pytest.mark.database
+class TestSessionFixation:
+    """Login and logout move the session to a new ID"""
+
+    def _sid(self, app, client):
+        cookie = client.get_cookie(app.config.get('SESSION_COOKIE_NAME', 'session'))
+        return cookie.value.rsplit('.', 1)[0] if cookie else None
+
+    def test_session_id_changes_on_login_and_logout(self, app, db_session, client, admin_user):
+        # Session ID planted before login (e.g. by an attacker)
+        with client.session_transaction() as sess:
+            sess['lang'] = 'ar'
+        fixed_sid = self._sid(app, client)
+        assert fixed_sid
+
+        response = client.post('/auth/login', data={'username': admin_user.username, 'password': 'Test1234!'})
+        assert response.status_code == 302
+        login_sid = self._sid(app, client)
+        assert login_sid and login_sid != fixed_sid
+        assert db_session.get(ServerSession, fixed_sid) is None
+        with client.session_transaction() as sess:
+            assert sess['_user_id'] == str(admin_user.id)
+            assert sess['lang'] == 'ar'
+
+        client.get('/auth/logout')
+        assert self._sid(app, client) != login_sid
+        assert db_session.get(ServerSession, login_sid) is None
@@ -0,0 +1,78 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from k9.models.models import TrainingCategory, TrainingSession
+from k9.services.trainer_analytics import (
+    SessionArrays, TrainerAnalyticsService, moving_average, period_index, period_starts
+)
+
+MONDAY = datetime(2026, 1, 5, 9)
+
+
+def _rows(dog, trainer, ratings, category=TrainingCategory.OBEDIENCE, offset=0):
+    return [(MONDAY + timedelta(days=7 * week + offset), dog, trainer, category, 30, rating)
+            for week, rating in enumerate(ratings)]
+
+
+def test_periods_and_moving_average():
+    assert [str(d) for d in period_starts(date(2026, 1, 7), date(2026, 1, 20), 'week')] == \
+        ['2026-01-05', '2026-01-12', '2026-01-19']
+    days = np.array(['2026-01-11', '2026-01-12', '2026-03-01'], dtype='datetime64[D]')
+    assert period_index(days, date(2026, 1, 7), 'week').tolist() == [0, 1, 7]
+    assert period_index(days, date(2026, 1, 7), 'month').tolist() == [0, 0, 2]
+
+    smoothed = moving_average(np.array([[np.nan, 4.0, 6.0, np.nan, 8.0]]), 2)
+    assert np.isnan(smoothed[0, 0])
+    assert smoothed[0, 1:].tolist() == [4.0, 5.0, 6.0, 8.0]
+
+
+def test_curves_trends_and_category_mix():
+    rows = (_rows('dog-a', 'trainer-1', [4, 5, 6, 7, 8])
+            + _rows('dog-b', 'trainer-1', [6, 6, 6, 6, 6], TrainingCategory.DETECTION, offset=1)
+            + _rows('dog-c', 'trainer-2', [9, 10, 10, 10, 10], offset=2)
+            + _rows('dog-d', 'trainer-2', [5, 5]))
+    arrays = SessionArrays.from_rows(rows)
+
+    result = TrainerAnalyticsService.compute(arrays, date(2026, 1, 5), date(2026, 2, 8), 'dog', 'week')
+
+    assert result['periods'] == ['2026-01-05', '2026-01-12', '2026-01-19', '2026-01-26', '2026-02-02']
+    series = {row['id']: row for row in result['series']}
+    assert series['dog-a']['curve'] == [4.0, 5.0, 6.0, 7.0, 8.0]
+    assert series['dog-a']['moving_average'] == [4.0, 4.5, 5.0, 6.0, 7.0]
+    assert series['dog-a']['trend'] == 'improving'
+    assert series['dog-b']['trend'] == 'plateau'
+    assert series['dog-b']['category_mix'] == {TrainingCategory.DETECTION.value: 5}
+    assert series['dog-c']['trend'] == 'stable'
+    assert series['dog-d']['trend'] == 'insufficient_data'
+    assert series['dog-d']['curve'] == [5.0, 5.0, None, None, None]
+    assert result['kpis'] == {'total_sessions': 17, 'unique_dogs': 4, 'unique_trainers': 2,
+                              'total_duration_min': 510, 'avg_success_rating': 7.0}
+
+    by_trainer = TrainerAnalyticsService.compute(arrays, date(2026, 1, 5), date(2026, 2, 8), 'trainer', 'month')
+    assert [row['sessions_per_period'] for row in by_trainer['series']] == [[8, 2], [6, 1]]
+
+
+@pytest.mark.database
+def test_progress_streams_caches_and_invalidates(app, db_session, test_project, test_dog, pm_employee):
+    for week, rating in enumerate([5, 6, 7, 8]):
+        db_session.add(TrainingSession(dog_id=test_dog.id, trainer_id=pm_employee.id, project_id=test_project.id,
+                                       category=TrainingCategory.OBEDIENCE, subject='طاعة',
+                                       session_date=MONDAY + timedelta(days=7 * week), duration=40,
+                                       success_rating=rating))
+    db_session.commit()
+
+    result = TrainerAnalyticsService.progress([str(test_project.id)], date(2026, 1, 1), date(2026, 1, 31))
+    assert [row['name'] for row in result['series']] == [test_dog.name]
+    assert result['series'][0]['trend'] == 'improving'
+    assert TrainerAnalyticsService.progress([str(test_project.id)], date(2026, 1, 1), date(2026, 1, 31)) is result
+
+    db_session.add(TrainingSession(dog_id=test_dog.id, trainer_id=pm_employee.id, project_id=test_project.id,
+                                   category=TrainingCategory.FITNESS, subject='لياقة',
+                                   session_date=MONDAY + timedelta(days=1), duration=20, success_rating=6))
+    db_session.commit()
+    refreshed = TrainerAnalyticsService.progress([str(test_project.id)], date(2026, 1, 1), date(2026, 1, 31))
+    assert refreshed['kpis']['total_sessions'] == 5
+    assert refreshed['series'][0]['category_mix'] == {TrainingCategory.OBEDIENCE.value: 4,
+                                                      TrainingCategory.FITNESS.value: 1}
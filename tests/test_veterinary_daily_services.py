@@ -0,0 +1,86 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from k9.models.models import Project, ProjectStatus, VeterinaryVisit, VisitType
+from k9.services.veterinary_daily_services import get_vet_daily, get_vet_period
+
+DAY = date(2026, 3, 10)
+
+
+def _visit(db_session, dog, vet, project, when, visit_type=VisitType.ROUTINE, **kwargs):
+    visit = VeterinaryVisit(dog_id=dog.id, vet_id=vet.id, project_id=project.id,
+                            visit_type=visit_type, visit_date=when, **kwargs)
+    db_session.add(visit)
+    db_session.commit()
+    return visit
+
+
+@pytest.fixture
+def second_project(db_session, pm_employee):
+    project = Project(name="مشروع ثان", code=f"TS2-{uuid.uuid4().hex[:6]}", status=ProjectStatus.ACTIVE,
+                      start_date=DAY - timedelta(days=90), project_manager_id=pm_employee.id)
+    db_session.add(project)
+    db_session.commit()
+    return project
+
+
+@pytest.mark.database
+class TestVeterinaryDailyServices:
+    """Stored visit summaries and SQL-aggregated vet reports"""
+
+    def test_summaries_written_on_save(self, app, db_session, test_project, test_dog, pm_employee):
+        visit = _visit(db_session, test_dog, pm_employee, test_project, datetime.combine(DAY, datetime.min.time()),
+                       medications=[{'name': 'أموكسيسيلين', 'dose': '250mg', 'frequency': 2}, {'name': 'فيتامين'}],
+                       vital_signs={'resp': 22}, temperature=38.6)
+
+        assert visit.medications_summary == 'أموكسيسيلين (250mg×2)؛ فيتامين'
+        assert visit.medication_count == 2
+        assert visit.vital_signs_summary == 'الحرارة: 38.6°، التنفس: 22'
+
+        visit.medications = []
+        visit.heart_rate = 90
+        db_session.commit()
+        assert visit.medications_summary == ''
+        assert visit.medication_count == 0
+        assert visit.vital_signs_summary == 'الحرارة: 38.6°، النبض: 90، التنفس: 22'
+
+    def test_daily_rows_and_kpis(self, app, db_session, test_project, test_dog, test_dog_female, pm_employee):
+        morning = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=8)
+        _visit(db_session, test_dog, pm_employee, test_project, morning, cost=100.0,
+               medications=[{'name': 'دواء', 'dose': '1'}])
+        _visit(db_session, test_dog, pm_employee, test_project, morning + timedelta(hours=2),
+               VisitType.EMERGENCY, cost=50.25)
+        _visit(db_session, test_dog_female, pm_employee, test_project, morning + timedelta(hours=4),
+               VisitType.VACCINATION)
+        _visit(db_session, test_dog, pm_employee, test_project, morning + timedelta(days=1), cost=999.0)
+
+        report = get_vet_daily(str(test_project.id), DAY)
+
+        assert [v['time'] for v in report['visits']] == ['08:00', '10:00', '12:00']
+        assert report['visits'][0]['medications'] == 'دواء (1)'
+        assert report['kpis'] == {'total_visits': 3, 'unique_dogs': 2, 'total_cost': 150.25,
+                                  'emergencies': 1, 'vaccinations': 1}
+
+    def test_period_grouped_by_project_and_week(self, app, db_session, test_project, second_project,
+                                                test_dog, pm_employee):
+        monday = datetime(2026, 3, 9, 9, 0)
+        _visit(db_session, test_dog, pm_employee, test_project, monday, cost=10.0)
+        _visit(db_session, test_dog, pm_employee, test_project, monday + timedelta(days=7), cost=20.0)
+        _visit(db_session, test_dog, pm_employee, second_project, monday + timedelta(days=1),
+               VisitType.EMERGENCY, cost=5.0)
+
+        report = get_vet_period([str(test_project.id), str(second_project.id)],
+                                date(2026, 3, 9), date(2026, 3, 22), group_by='week')
+
+        groups = {(g['project_id'], g['period']): g for g in report['groups']}
+        assert set(groups) == {(str(test_project.id), '2026-03-09'), (str(test_project.id), '2026-03-16'),
+                               (str(second_project.id), '2026-03-09')}
+        assert groups[(str(second_project.id), '2026-03-09')]['by_visit_type']['EMERGENCY'] == 1
+        assert report['kpis']['total_visits'] == 3
+        assert report['kpis']['total_cost'] == 35.0
+
+    def test_period_rejects_unknown_grouping(self, app, db_session, test_project):
+        with pytest.raises(ValueError):
+            get_vet_period([str(test_project.id)], DAY, DAY, group_by='hour')